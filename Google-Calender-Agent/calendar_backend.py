@@ -0,0 +1,231 @@
+# calendar_backend.py - Non-blocking calendar access with a free/busy cache
+#
+# googleapiclient calls block (httplib2). CalendarBackend runs them on a small
+# thread pool so the uvicorn event loop keeps serving other chats while one
+# waits on Google. Service objects are not thread-safe, so every pool thread
+# gets its own from the factory.
+#
+# Events of a day are cached per (calendar, day) for TAILORTALK_FREEBUSY_TTL
+# seconds (0 disables the cache). Concurrent misses for the same day share one fetch, and our own
+# bookings invalidate the days they touch.
+#
+# FakeCalendarService mimics events().list/insert, freebusy().query and batch
+# HTTP requests with a configurable latency
+# for local runs (TAILORTALK_FAKE_CALENDAR=1) and load_test.py.
+import asyncio
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+# 0 runs calendar calls inline on the event loop (the old behaviour; for comparison only)
+CALENDAR_IO_WORKERS = int(os.environ.get('TAILORTALK_CALENDAR_WORKERS', 8))
+FREEBUSY_TTL_SECONDS = float(os.environ.get('TAILORTALK_FREEBUSY_TTL', 60))
+FREEBUSY_CACHE_SIZE = int(os.environ.get('TAILORTALK_FREEBUSY_CACHE', 1024))
+FAKE_CALENDAR = os.environ.get('TAILORTALK_FAKE_CALENDAR', '').lower() in ('1', 'true', 'yes')
+FAKE_LATENCY_MS = float(os.environ.get('TAILORTALK_FAKE_LATENCY_MS', 200))
+
+
+def _parse_time(value):
+    return datetime.fromisoformat(value.replace('Z', '+00:00')).replace(tzinfo=None)
+
+
+def free_slots(events, start_time, end_time, duration_minutes=60, step_minutes=30, limit=5):
+    """Free slots of duration_minutes between start_time and end_time around sorted events"""
+    available_slots = []
+    current_time = start_time
+    duration = timedelta(minutes=duration_minutes)
+
+    for event in events:
+        event_start = _parse_time(event['start'].get('dateTime', event['start'].get('date')))
+        if current_time + duration <= event_start:
+            available_slots.append({
+                'start': current_time.strftime("%H:%M"),
+                'end': (current_time + duration).strftime("%H:%M")
+            })
+        event_end = _parse_time(event['end'].get('dateTime', event['end'].get('date')))
+        current_time = max(current_time, event_end)
+
+    while current_time + duration <= end_time:
+        available_slots.append({
+            'start': current_time.strftime("%H:%M"),
+            'end': (current_time + duration).strftime("%H:%M")
+        })
+        current_time += timedelta(minutes=step_minutes)
+
+    return available_slots[:limit]
+
+
+class CalendarBackend:
+    def __init__(self, service_factory, calendar_id='primary', workers=CALENDAR_IO_WORKERS,
+                 ttl=FREEBUSY_TTL_SECONDS, max_entries=FREEBUSY_CACHE_SIZE):
+        self.service_factory = service_factory
+        self.calendar_id = calendar_id
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='calendar-io') if workers > 0 else None
+        self._local = threading.local()
+        self._cache = OrderedDict()   # (calendar_id, day, key) -> (expires_at, value)
+        self._generation = {}         # day -> bumped on every invalidation
+        self._inflight = {}           # cache key -> asyncio future of the running fetch
+        self.stats_counters = {'calls': 0, 'hits': 0, 'misses': 0, 'shared_fetches': 0, 'invalidations': 0}
+
+    def service(self):
+        """Calendar service of the current thread"""
+        service = getattr(self._local, 'service', None)
+        if service is None:
+            service = self.service_factory()
+            self._local.service = service
+        return service
+
+    def _call_sync(self, fn, args):
+        return fn(self.service(), *args)
+
+    async def call(self, fn, *args):
+        """Run fn(service, *args) on the I/O pool"""
+        self.stats_counters['calls'] += 1
+        if self._executor is None:
+            return self._call_sync(fn, args)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, self._call_sync, fn, args)
+
+    async def day(self, day, fetch, *args, key=None):
+        """fetch(service, *args) for one day, cached until it expires or the day is invalidated"""
+        if self.ttl <= 0:
+            return await self.call(fetch, *args)
+        cache_key = (self.calendar_id, day, key)
+        hit = self._cache.get(cache_key)
+        if hit is not None and hit[0] > time.monotonic():
+            self._cache.move_to_end(cache_key)
+            self.stats_counters['hits'] += 1
+            return hit[1]
+
+        pending = self._inflight.get(cache_key)
+        if pending is not None:
+            self.stats_counters['shared_fetches'] += 1
+            return await asyncio.shield(pending)
+
+        self.stats_counters['misses'] += 1
+        generation = self._generation.get(day, 0)
+        pending = asyncio.ensure_future(self.call(fetch, *args))
+        self._inflight[cache_key] = pending
+        try:
+            value = await asyncio.shield(pending)
+        finally:
+            self._inflight.pop(cache_key, None)
+        # A booking made while we were fetching makes this result stale
+        if self._generation.get(day, 0) == generation:
+            self._cache[cache_key] = (time.monotonic() + self.ttl, value)
+            self._cache.move_to_end(cache_key)
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+        return value
+
+    def invalidate(self, *days):
+        for day in set(days):
+            self._generation[day] = self._generation.get(day, 0) + 1
+            for cache_key in [k for k in self._cache if k[1] == day]:
+                del self._cache[cache_key]
+            self.stats_counters['invalidations'] += 1
+
+    def stats(self):
+        return dict(self.stats_counters, cached_days=len(self._cache), inflight=len(self._inflight),
+                    workers=self._executor._max_workers if self._executor else 0, ttl_seconds=self.ttl)
+
+
+class _FakeRequest:
+    def __init__(self, run, calendar):
+        self._run = run
+        self._calendar = calendar
+
+    def execute(self):
+        # Blocks like httplib2 does
+        self._calendar.http_requests += 1
+        time.sleep(self._calendar.latency)
+        return self._run()
+
+
+class _FakeBatch:
+    def __init__(self, calendar, callback):
+        self._calendar = calendar
+        self._callback = callback
+        self._requests = []
+
+    def add(self, request, request_id=None, callback=None):
+        self._requests.append((request, request_id or str(len(self._requests)), callback or self._callback))
+
+    def execute(self):
+        # One HTTP round-trip for every request in the batch
+        self._calendar.http_requests += 1
+        time.sleep(self._calendar.latency)
+        for request, request_id, callback in self._requests:
+            try:
+                callback(request_id, request._run(), None)
+            except Exception as e:
+                callback(request_id, None, e)
+
+
+class _FakeFreebusy:
+    def __init__(self, calendar):
+        self.calendar = calendar
+
+    def query(self, body):
+        def run():
+            low, high = _parse_time(body['timeMin']), _parse_time(body['timeMax'])
+            calendars = {}
+            with self.calendar.lock:
+                for item in body.get('items', []):
+                    # Own events plus invitations, as on a real calendar
+                    busy = [
+                        {'start': event['start']['dateTime'], 'end': event['end']['dateTime']}
+                        for owner, events in self.calendar.stored.items() for event in events
+                        if (owner == item['id'] or any(a.get('email') == item['id'] for a in event.get('attendees', [])))
+                        and _parse_time(event['start']['dateTime']) < high and _parse_time(event['end']['dateTime']) > low
+                    ]
+                    calendars[item['id']] = {'busy': sorted(busy, key=lambda period: period['start'])}
+            return {'timeMin': body['timeMin'], 'timeMax': body['timeMax'], 'calendars': calendars}
+        return _FakeRequest(run, self.calendar)
+
+
+class _FakeEvents:
+    def __init__(self, calendar):
+        self.calendar = calendar
+
+    def list(self, calendarId, timeMin, timeMax, singleEvents=True, orderBy='startTime', **kwargs):
+        def run():
+            low, high = _parse_time(timeMin), _parse_time(timeMax)
+            with self.calendar.lock:
+                items = [event for event in self.calendar.stored.get(calendarId, [])
+                         if _parse_time(event['start']['dateTime']) < high and _parse_time(event['end']['dateTime']) > low]
+            return {'items': sorted(items, key=lambda event: event['start']['dateTime'])}
+        return _FakeRequest(run, self.calendar)
+
+    def insert(self, calendarId, body, **kwargs):
+        def run():
+            event = dict(body, id=uuid.uuid4().hex)
+            with self.calendar.lock:
+                self.calendar.stored.setdefault(calendarId, []).append(event)
+            return event
+        return _FakeRequest(run, self.calendar)
+
+
+class FakeCalendarService:
+    """In-memory stand-in for build('calendar', 'v3'); thread-safe, shared by all threads"""
+
+    def __init__(self, latency_ms=FAKE_LATENCY_MS):
+        self.latency = latency_ms / 1000.0
+        self.stored = {}  # calendar id -> events
+        self.lock = threading.Lock()
+        self.http_requests = 0
+
+    def events(self):
+        return _FakeEvents(self)
+
+    def freebusy(self):
+        return _FakeFreebusy(self)
+
+    def new_batch_http_request(self, callback=None):
+        return _FakeBatch(self, callback)
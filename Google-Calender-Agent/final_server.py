@@ -17,12 +17,25 @@ import pickle
 from googleapiclient.discovery import build
 import pytz
 
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from calendar_backend import CalendarBackend, FakeCalendarService, free_slots, FAKE_CALENDAR
+from interview_scheduler import ScheduleGrid, assign_interviews, query_busy, insert_batch, interview_event, parse_utc
+from typing import List, Optional
+
 SCOPES = ['https://www.googleapis.com/auth/calendar']
 
 class CalendarService:
     def __init__(self):
         self.calendar_id = 'primary'
-        self.service = self._authenticate()
+        if FAKE_CALENDAR:
+            fake = FakeCalendarService()
+            service_factory = lambda: fake
+        else:
+            creds = self._authenticate()
+            # One service per I/O thread: googleapiclient/httplib2 objects are not thread-safe
+            service_factory = lambda: build('calendar', 'v3', credentials=creds, cache_discovery=False)
+        self.backend = CalendarBackend(service_factory, self.calendar_id)
+        self.backend.service()  # fail at startup, not on the first chat
     
     def _authenticate(self):
         creds = None
@@ -44,9 +57,24 @@ class CalendarService:
             else:
                 raise ValueError("❌ No valid authentication token found.")
         
-        return build('calendar', 'v3', credentials=creds)
+        return creds
+    
+    def _insert_event(self, service, event):
+        return service.events().insert(
+            calendarId=self.calendar_id,
+            body=event
+        ).execute()
     
-    def create_event(self, title, start_time, end_time, description=""):
+    def _list_events(self, service, start_time, end_time):
+        return service.events().list(
+            calendarId=self.calendar_id,
+            timeMin=start_time.isoformat() + 'Z',
+            timeMax=end_time.isoformat() + 'Z',
+            singleEvents=True,
+            orderBy='startTime'
+        ).execute().get('items', [])
+    
+    async def create_event(self, title, start_time, end_time, description=""):
         try:
             # Convert to UTC for Google Calendar (IST is UTC+5:30)
             # Subtract 5 hours 30 minutes to get UTC time
@@ -66,10 +94,10 @@ class CalendarService:
             
             print("📅 Creating event:", event)
             
-            event_result = self.service.events().insert(
-                calendarId=self.calendar_id,
-                body=event
-            ).execute()
+            event_result = await self.backend.call(self._insert_event, event)
+            # Cached availability of the touched days is stale now
+            self.backend.invalidate(start_time.strftime('%Y-%m-%d'), utc_start.strftime('%Y-%m-%d'),
+                                    end_time.strftime('%Y-%m-%d'), utc_end.strftime('%Y-%m-%d'))
             
             print("✅ Event created successfully!")
             return event_result.get('id')
@@ -78,48 +106,14 @@ class CalendarService:
             print(f"❌ Error creating event: {e}")
             return None
     
-    def get_available_slots(self, date_str):
+    async def get_available_slots(self, date_str):
         try:
             target_date = datetime.strptime(date_str, "%Y-%m-%d")
             start_time = target_date.replace(hour=9, minute=0, second=0, microsecond=0)
             end_time = target_date.replace(hour=17, minute=0, second=0, microsecond=0)
             
-            events_result = self.service.events().list(
-                calendarId=self.calendar_id,
-                timeMin=start_time.isoformat() + 'Z',
-                timeMax=end_time.isoformat() + 'Z',
-                singleEvents=True,
-                orderBy='startTime'
-            ).execute()
-            
-            events = events_result.get('items', [])
-            available_slots = []
-            current_time = start_time
-            
-            for event in events:
-                event_start = datetime.fromisoformat(
-                    event['start'].get('dateTime', event['start'].get('date')).replace('Z', '+00:00')
-                ).replace(tzinfo=None)
-                
-                if current_time + timedelta(minutes=60) <= event_start:
-                    available_slots.append({
-                        'start': current_time.strftime("%H:%M"),
-                        'end': (current_time + timedelta(minutes=60)).strftime("%H:%M")
-                    })
-                
-                event_end = datetime.fromisoformat(
-                    event['end'].get('dateTime', event['end'].get('date')).replace('Z', '+00:00')
-                ).replace(tzinfo=None)
-                current_time = max(current_time, event_end)
-            
-            while current_time + timedelta(minutes=60) <= end_time:
-                available_slots.append({
-                    'start': current_time.strftime("%H:%M"),
-                    'end': (current_time + timedelta(minutes=60)).strftime("%H:%M")
-                })
-                current_time += timedelta(minutes=30)
-            
-            return available_slots[:5]
+            events = await self.backend.day(date_str, self._list_events, start_time, end_time)
+            return free_slots(events, start_time, end_time)
             
         except Exception as e:
             print(f"Error getting slots: {e}")
@@ -144,6 +138,30 @@ class ChatResponse(BaseModel):
     booking_status: str = None
     event_details: dict = None
 
+class InterviewCandidate(BaseModel):
+    id: str
+    name: Optional[str] = None
+    email: Optional[str] = None
+    # Optional windows the candidate can make: [{"start": ISO, "end": ISO}]
+    available: Optional[List[dict]] = None
+
+class ScheduleRequest(BaseModel):
+    candidates: List[InterviewCandidate]  # in priority order
+    interviewers: List[str]  # calendar ids (emails)
+    start_date: str  # YYYY-MM-DD, interviewers' local time
+    end_date: str
+    duration_minutes: int = 60
+    buffer_minutes: int = 0
+    step_minutes: int = 30
+    interviewers_per_interview: int = 1
+    max_per_day: Optional[int] = None
+    work_start: int = 9
+    work_end: int = 17
+    tz_offset_minutes: int = 330  # IST, as in create_event
+    skip_weekends: bool = True
+    title: str = "Interview: {name}"
+    dry_run: bool = False
+
 # Initialize calendar
 calendar_service = None
 try:
@@ -185,6 +203,7 @@ async def health():
         "status": "healthy",
         "service": "TailorTalk Final API",
         "calendar_ready": calendar_service is not None,
+        "calendar_io": calendar_service.backend.stats() if calendar_service else None,
         "timestamp": datetime.now().isoformat()
     }
 
@@ -219,7 +238,7 @@ async def chat(message: ChatMessage):
             end_time = start_time + timedelta(hours=1)
             
             # Book the meeting
-            event_id = calendar_service.create_event(
+            event_id = await calendar_service.create_event(
                 title="Meeting via TailorTalk",
                 start_time=start_time,
                 end_time=end_time,
@@ -255,7 +274,7 @@ async def chat(message: ChatMessage):
                 }
             
             tomorrow = (datetime.now() + timedelta(days=1)).strftime("%Y-%m-%d")
-            slots = calendar_service.get_available_slots(tomorrow)
+            slots = await calendar_service.get_available_slots(tomorrow)
             
             if slots:
                 slot_text = "\n".join([f"• {slot['start']}-{slot['end']}" for slot in slots])
@@ -285,6 +304,61 @@ async def chat(message: ChatMessage):
         print(f"❌ Error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/schedule-interviews")
+async def schedule_interviews(request: ScheduleRequest):
+    """
+    Schedule many candidates across several interviewer calendars at once:
+    one freebusy query for every calendar, a conflict-free assignment, then
+    the bookings as Calendar batch requests (skipped with dry_run)
+    """
+    if not calendar_service:
+        raise HTTPException(status_code=503, detail="Calendar service not available")
+    if not request.candidates or not request.interviewers:
+        raise HTTPException(status_code=400, detail="candidates and interviewers are required")
+    try:
+        grid = ScheduleGrid(request.start_date, request.end_date, request.tz_offset_minutes,
+                            request.work_start, request.work_end, request.skip_weekends)
+        candidates = [{
+            'id': c.id,
+            'available': [(parse_utc(w['start']), parse_utc(w['end'])) for w in c.available or []],
+        } for c in request.candidates]
+    except (ValueError, KeyError) as e:
+        raise HTTPException(status_code=400, detail=f"Invalid schedule request: {e}")
+
+    try:
+        busy = await calendar_service.backend.call(query_busy, grid, request.interviewers)
+        assignments, unscheduled = assign_interviews(
+            grid, candidates, busy, request.duration_minutes, request.buffer_minutes, request.step_minutes,
+            request.interviewers_per_interview, request.max_per_day,
+        )
+
+        by_id = {c.id: c.dict() for c in request.candidates}
+        results = [(None, None)] * len(assignments)
+        if assignments and not request.dry_run:
+            events = [interview_event(a, by_id[a['candidate_id']], request.title) for a in assignments]
+            results = await calendar_service.backend.call(insert_batch, calendar_service.calendar_id, events)
+            calendar_service.backend.invalidate(*{grid.day_of(grid.cell_of(a['start'])) for a in assignments})
+
+        local = timedelta(minutes=request.tz_offset_minutes)
+        scheduled = [{
+            "candidate_id": a['candidate_id'],
+            "start": a['start'].strftime('%Y-%m-%dT%H:%M:%SZ'),
+            "end": a['end'].strftime('%Y-%m-%dT%H:%M:%SZ'),
+            "local_start": (a['start'] + local).strftime('%Y-%m-%d %I:%M %p'),
+            "interviewers": a['interviewers'],
+            "event_id": (event or {}).get('id'),
+            "error": error,
+        } for a, (event, error) in zip(assignments, results)]
+        return {
+            "scheduled": scheduled,
+            "unscheduled": unscheduled,
+            "booked": sum(1 for item in scheduled if item['event_id']),
+            "dry_run": request.dry_run,
+        }
+    except Exception as e:
+        print(f"❌ Scheduling error: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 if __name__ == "__main__":
     print("🚀 Starting TailorTalk Final Server on http://localhost:8005")
     uvicorn.run(app, host="127.0.0.1", port=8005, reload=False)
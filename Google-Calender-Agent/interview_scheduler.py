@@ -0,0 +1,222 @@
+# interview_scheduler.py - Bulk interview scheduling over many calendars
+#
+# Time is a grid of SLOT_MINUTES cells from the first day to the last (UTC).
+# Every calendar becomes a Python int used as a bitset (bit i = cell i busy):
+# busy intervals from freebusy.query (up to FREEBUSY_LIMIT calendars each) are merged into it
+# with shifts and ORs, working hours are one more mask. "Free for the whole
+# interview" is an AND of shifted copies, so finding the earliest start that
+# suits a panel is a handful of big-int operations, not a walk over the day.
+#
+# Candidates are assigned in the order given (e.g. by rank): earliest start
+# where enough interviewers (and the candidate, if they sent availability) are
+# free, least-loaded interviewers first. Booked cells plus a buffer are marked
+# busy right away, so assignments never conflict with each other.
+#
+# Bookings go out as Calendar batch HTTP requests (up to BATCH_LIMIT inserts
+# each, Google's cap), not one request per interview.
+from datetime import datetime, timedelta
+
+SLOT_MINUTES = 15
+BATCH_LIMIT = 50
+FREEBUSY_LIMIT = 50  # calendars per freebusy.query, Google's cap
+
+
+def parse_utc(value):
+    parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    if parsed.tzinfo is not None:
+        parsed = (parsed - parsed.utcoffset()).replace(tzinfo=None)
+    return parsed
+
+
+def _utc_string(value):
+    return value.strftime('%Y-%m-%dT%H:%M:%S.000Z')
+
+
+def _run_mask(free, length):
+    """Bit s set iff cells s .. s+length-1 are all set in free (doubling: O(log length))"""
+    run, covered = free, 1
+    while covered < length:
+        step = min(covered, length - covered)
+        run &= run >> step
+        covered += step
+    return run
+
+
+class ScheduleGrid:
+    def __init__(self, start_date, end_date, tz_offset_minutes=330, work_start=9, work_end=17,
+                 skip_weekends=True, slot_minutes=SLOT_MINUTES):
+        """start_date/end_date: 'YYYY-MM-DD' in the interviewers' local time (UTC + tz_offset_minutes)"""
+        self.slot = timedelta(minutes=slot_minutes)
+        self.offset = timedelta(minutes=tz_offset_minutes)
+        first = datetime.strptime(start_date, '%Y-%m-%d')
+        last = datetime.strptime(end_date, '%Y-%m-%d')
+        if last < first:
+            raise ValueError("end_date is before start_date")
+        self.origin = first - self.offset  # local midnight of the first day, in UTC
+        self.cells = int((last + timedelta(days=1) - first) / self.slot)
+        self.end = self.origin + self.cells * self.slot
+
+        per_hour = int(timedelta(hours=1) / self.slot)
+        per_day = 24 * per_hour
+        self.work = 0
+        day = first
+        while day <= last:
+            if not (skip_weekends and day.weekday() >= 5):
+                base = int((day - first) / self.slot)
+                self.work |= self.span(base + work_start * per_hour, base + work_end * per_hour)
+            day += timedelta(days=1)
+        self.cells_per_day = per_day
+
+    @staticmethod
+    def span(start_cell, end_cell):
+        return ((1 << (end_cell - start_cell)) - 1) << start_cell if end_cell > start_cell else 0
+
+    def cell_of(self, moment, round_up=False):
+        cells = (moment - self.origin) / self.slot
+        cell = int(cells) + (1 if round_up and cells != int(cells) else 0)
+        return max(0, min(self.cells, cell))
+
+    def time_of(self, cell):
+        return self.origin + cell * self.slot
+
+    def mask(self, intervals):
+        """Merge (start, end) UTC intervals into one bitset; partially covered cells count as covered"""
+        bits = 0
+        for start, end in intervals:
+            if end <= self.origin or start >= self.end:
+                continue
+            bits |= self.span(self.cell_of(start), self.cell_of(end, round_up=True))
+        return bits
+
+    def day_of(self, cell):
+        return (self.time_of(cell) + self.offset).strftime('%Y-%m-%d')
+
+
+def assign_interviews(grid, candidates, busy, duration_minutes=60, buffer_minutes=0, step_minutes=30,
+                      interviewers_per_interview=1, max_per_day=None):
+    """
+    Greedy conflict-free assignment.
+
+    candidates: [{'id', 'available': [(start, end)] optional}] in priority order
+    busy: {calendar_id: bitset} for every interviewer
+    Returns (assignments, unscheduled) with assignments as
+    {'candidate_id', 'start', 'end', 'interviewers'} (UTC datetimes).
+    """
+    length = max(1, -(-duration_minutes // int(grid.slot.total_seconds() // 60)))
+    pad = -(-buffer_minutes // int(grid.slot.total_seconds() // 60)) if buffer_minutes else 0
+    step = max(1, step_minutes // int(grid.slot.total_seconds() // 60))
+    everything = (1 << grid.cells) - 1
+    starts = 0
+    for cell in range(0, grid.cells, step):
+        starts |= 1 << cell
+    starts &= _run_mask(grid.work, length)  # the whole interview inside working hours
+
+    busy = dict(busy)
+    load = {calendar_id: 0 for calendar_id in busy}
+    per_day = {}
+    need = min(interviewers_per_interview, len(busy)) if busy else 0
+    assignments, unscheduled = [], []
+
+    for candidate in candidates:
+        allowed = starts
+        if candidate.get('available'):
+            allowed &= _run_mask(grid.mask(candidate['available']), length)
+        runs = {calendar_id: _run_mask(~bits & everything, length) & allowed for calendar_id, bits in busy.items()}
+        if max_per_day is not None:
+            for calendar_id in runs:
+                for day, count in per_day.get(calendar_id, {}).items():
+                    if count >= max_per_day:
+                        runs[calendar_id] &= ~grid.span(*day)
+        if need == 0:
+            unscheduled.append({'candidate_id': candidate['id'], 'reason': 'no interviewers'})
+            continue
+
+        # Earliest cell where at least `need` interviewers can start
+        if need == len(runs):
+            possible = everything
+            for bits in runs.values():
+                possible &= bits
+        else:
+            possible = 0
+            for bits in runs.values():
+                possible |= bits
+        chosen_cell, chosen = None, None
+        while possible:
+            cell = (possible & -possible).bit_length() - 1
+            free_here = [calendar_id for calendar_id, bits in runs.items() if bits >> cell & 1]
+            if len(free_here) >= need:
+                chosen_cell = cell
+                chosen = sorted(free_here, key=lambda calendar_id: (load[calendar_id], calendar_id))[:need]
+                break
+            possible &= possible - 1
+        if chosen_cell is None:
+            unscheduled.append({'candidate_id': candidate['id'], 'reason': 'no common free slot'})
+            continue
+
+        blocked = grid.span(max(0, chosen_cell - pad), min(grid.cells, chosen_cell + length + pad))
+        # Cell 0 is local midnight, so local days are whole multiples of cells_per_day
+        day_start = chosen_cell - chosen_cell % grid.cells_per_day
+        day = (day_start, min(grid.cells, day_start + grid.cells_per_day))
+        for calendar_id in chosen:
+            busy[calendar_id] |= blocked
+            load[calendar_id] += 1
+            counts = per_day.setdefault(calendar_id, {})
+            counts[day] = counts.get(day, 0) + 1
+        assignments.append({
+            'candidate_id': candidate['id'],
+            'start': grid.time_of(chosen_cell),
+            'end': grid.time_of(chosen_cell + length),
+            'interviewers': chosen,
+        })
+    return assignments, unscheduled
+
+
+def query_busy(service, grid, calendar_ids):
+    """One freebusy.query per FREEBUSY_LIMIT calendars; returns {calendar_id: bitset}"""
+    calendars = {}
+    for offset in range(0, len(calendar_ids), FREEBUSY_LIMIT):
+        result = service.freebusy().query(body={
+            'timeMin': _utc_string(grid.origin),
+            'timeMax': _utc_string(grid.end),
+            'items': [{'id': calendar_id} for calendar_id in calendar_ids[offset:offset + FREEBUSY_LIMIT]],
+        }).execute()
+        calendars.update(result.get('calendars', {}))
+    busy = {}
+    for calendar_id in calendar_ids:
+        entry = calendars.get(calendar_id, {})
+        if entry.get('errors'):
+            raise ValueError(f"freebusy failed for {calendar_id}: {entry['errors']}")
+        busy[calendar_id] = grid.mask(
+            (parse_utc(period['start']), parse_utc(period['end'])) for period in entry.get('busy', [])
+        )
+    return busy
+
+
+def insert_batch(service, calendar_id, events):
+    """Insert events with Calendar batch HTTP requests; returns one (event or None, error) per event"""
+    results = [None] * len(events)
+
+    def callback(request_id, response, exception):
+        results[int(request_id)] = (response, str(exception) if exception else None)
+
+    for offset in range(0, len(events), BATCH_LIMIT):
+        batch = service.new_batch_http_request(callback=callback)
+        for index in range(offset, min(offset + BATCH_LIMIT, len(events))):
+            batch.add(service.events().insert(calendarId=calendar_id, body=events[index], sendUpdates='all'),
+                      request_id=str(index))
+        batch.execute()
+    return [result or (None, 'no response') for result in results]
+
+
+def interview_event(assignment, candidate, title_template):
+    attendees = [{'email': calendar_id} for calendar_id in assignment['interviewers'] if '@' in calendar_id]
+    if candidate.get('email'):
+        attendees.append({'email': candidate['email']})
+    name = candidate.get('name') or candidate['id']
+    return {
+        'summary': title_template.format(name=name, id=candidate['id']),
+        'description': f"Interview scheduled via TailorTalk\nCandidate: {name}",
+        'start': {'dateTime': _utc_string(assignment['start'])},
+        'end': {'dateTime': _utc_string(assignment['end'])},
+        'attendees': attendees,
+    }
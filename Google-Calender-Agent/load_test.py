@@ -0,0 +1,155 @@
+# load_test.py - Concurrent chat load against the calendar backend
+#
+# HTTP mode drives a running server (start it against the fake calendar):
+#   TAILORTALK_FAKE_CALENDAR=1 python Google-Calender-Agent/final_server.py
+#   python Google-Calender-Agent/load_test.py --url http://localhost:8005 --concurrency 50 --requests 1000
+# Run the server with TAILORTALK_CALENDAR_WORKERS=0 to compare with calls made
+# inline on the event loop.
+#
+# Without --url the chat handler's calendar path (availability, bookings and
+# plain greetings) runs in-process on one event loop against
+# FakeCalendarService, for inline calls vs the I/O pool, with and without the
+# free/busy cache. No web stack needed.
+import argparse
+import asyncio
+import json
+import random
+import sys
+import os
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from calendar_backend import CalendarBackend, FakeCalendarService, free_slots
+
+MESSAGES = {
+    'availability': "What slots are free tomorrow?",
+    'booking': "Book a meeting tomorrow at {hour} PM",
+    'greeting': "Hi there",
+}
+
+
+def pick_kind(rng, booking_share, greeting_share):
+    roll = rng.random()
+    if roll < booking_share:
+        return 'booking'
+    if roll < booking_share + greeting_share:
+        return 'greeting'
+    return 'availability'
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q / 100 * len(values)))] if values else 0.0
+
+
+def report(label, elapsed, latencies):
+    total = sum(len(v) for v in latencies.values())
+    print(f"{label:<32} {total / elapsed:8.1f} chats/s")
+    for kind, values in sorted(latencies.items()):
+        ms = [v * 1000 for v in values]
+        print(f"    {kind:<13} n={len(ms):5d}  p50 {percentile(ms, 50):8.1f} ms  "
+              f"p95 {percentile(ms, 95):8.1f} ms  p99 {percentile(ms, 99):8.1f} ms")
+
+
+def run_http(args):
+    rng = random.Random(0)
+    kinds = [pick_kind(rng, args.booking_share, args.greeting_share) for _ in range(args.requests)]
+
+    def send(kind):
+        body = json.dumps({'message': MESSAGES[kind].format(hour=rng.randint(1, 4))}).encode()
+        request = urllib.request.Request(args.url.rstrip('/') + '/chat', data=body,
+                                         headers={'Content-Type': 'application/json'})
+        start = time.perf_counter()
+        with urllib.request.urlopen(request, timeout=60) as response:
+            response.read()
+        return kind, time.perf_counter() - start
+
+    latencies = {}
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        for kind, latency in pool.map(send, kinds):
+            latencies.setdefault(kind, []).append(latency)
+    report(args.url, time.perf_counter() - start, latencies)
+    with urllib.request.urlopen(args.url.rstrip('/') + '/health', timeout=10) as response:
+        print(json.dumps(json.loads(response.read()).get('calendar_io'), indent=2))
+
+
+def _list_events(service, start_time, end_time):
+    return service.events().list(calendarId='primary', timeMin=start_time.isoformat() + 'Z',
+                                 timeMax=end_time.isoformat() + 'Z').execute().get('items', [])
+
+
+def _insert_event(service, event):
+    return service.events().insert(calendarId='primary', body=event).execute()
+
+
+async def simulated_chat(backend, kind, hour):
+    """The calendar work of final_server's /chat for one message"""
+    tomorrow = datetime.now() + timedelta(days=1)
+    date_str = tomorrow.strftime('%Y-%m-%d')
+    if kind == 'availability':
+        start_time = tomorrow.replace(hour=9, minute=0, second=0, microsecond=0)
+        end_time = tomorrow.replace(hour=17, minute=0, second=0, microsecond=0)
+        events = await backend.day(date_str, _list_events, start_time, end_time)
+        return free_slots(events, start_time, end_time)
+    if kind == 'booking':
+        start_time = tomorrow.replace(hour=hour + 12, minute=0, second=0, microsecond=0)
+        event = {'summary': 'Meeting via TailorTalk',
+                 'start': {'dateTime': start_time.strftime('%Y-%m-%dT%H:%M:%S.000Z')},
+                 'end': {'dateTime': (start_time + timedelta(hours=1)).strftime('%Y-%m-%dT%H:%M:%S.000Z')}}
+        result = await backend.call(_insert_event, event)
+        backend.invalidate(date_str)
+        return result
+    return None
+
+
+async def run_simulation(args, workers, ttl):
+    fake = FakeCalendarService(latency_ms=args.latency_ms)
+    backend = CalendarBackend(lambda: fake, workers=workers, ttl=ttl)
+    rng = random.Random(0)
+    kinds = [pick_kind(rng, args.booking_share, args.greeting_share) for _ in range(args.requests)]
+    queue = asyncio.Queue()
+    for kind in kinds:
+        queue.put_nowait(kind)
+    latencies = {}
+
+    async def client():
+        while not queue.empty():
+            kind = queue.get_nowait()
+            start = time.perf_counter()
+            await simulated_chat(backend, kind, rng.randint(1, 4))
+            await asyncio.sleep(0)  # the response is written back to the client
+            latencies.setdefault(kind, []).append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(args.concurrency)))
+    elapsed = time.perf_counter() - start
+    label = f"{'inline' if workers == 0 else f'pool x{workers}'}, {'no cache' if ttl <= 0 else f'ttl {ttl:g}s'}"
+    report(label, elapsed, latencies)
+    print(f"    calendar calls {backend.stats()['calls']}  cache hits {backend.stats()['hits']}  "
+          f"shared fetches {backend.stats()['shared_fetches']}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--url', default='', help='server to load (HTTP mode)')
+    parser.add_argument('--concurrency', type=int, default=50)
+    parser.add_argument('--requests', type=int, default=400)
+    parser.add_argument('--booking-share', type=float, default=0.1)
+    parser.add_argument('--greeting-share', type=float, default=0.3)
+    parser.add_argument('--latency-ms', type=float, default=100, help='fake Calendar API latency (in-process mode)')
+    parser.add_argument('--workers', type=int, default=8, help='I/O pool size (in-process mode)')
+    args = parser.parse_args()
+
+    if args.url:
+        run_http(args)
+        return
+    for workers, ttl in ((0, 0), (args.workers, 0), (args.workers, 60)):
+        asyncio.run(run_simulation(args, workers, ttl))
+
+
+if __name__ == "__main__":
+    main()
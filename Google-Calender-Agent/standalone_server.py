@@ -10,16 +10,22 @@ import re
 
 # Add path for imports
 sys.path.append(os.path.join(os.path.dirname(__file__), 'Google-Calender-Agent'))
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from calendar_backend import CalendarBackend
 
 # Try to import calendar service
 try:
     from app.calendar_service import GoogleCalendarService
     calendar_service = GoogleCalendarService()
+    # Calendar calls run off the event loop; each I/O thread builds its own
+    # GoogleCalendarService (the underlying googleapiclient client is not thread-safe)
+    calendar_backend = CalendarBackend(GoogleCalendarService)
     CALENDAR_AVAILABLE = True
     print("✅ Google Calendar service loaded successfully")
 except Exception as e:
     print(f"⚠️ Calendar service not available: {e}")
     calendar_service = None
+    calendar_backend = None
     CALENDAR_AVAILABLE = False
 
 app = FastAPI(title="TailorTalk Standalone API", version="1.0.0")
@@ -47,6 +53,7 @@ async def health_check():
         "status": "healthy", 
         "service": "TailorTalk Standalone",
         "timestamp": datetime.now().isoformat(),
+        "calendar_io": calendar_backend.stats() if calendar_backend else None,
         "port": 8002
     }
 
@@ -96,12 +103,13 @@ async def chat(message: ChatMessage):
                 start_datetime = event_date.replace(hour=hour, minute=0, second=0, microsecond=0)
                 end_datetime = start_datetime + timedelta(hours=1)  # 1 hour meeting
                 
-                result = calendar_service.create_event(
+                result = await calendar_backend.call(lambda service: service.create_event(
                     title='Meeting',
                     start_time=start_datetime,
                     end_time=end_datetime,
                     description=f'Meeting booked via TailorTalk: {message.message}'
-                )
+                ))
+                calendar_backend.invalidate(start_datetime.strftime('%Y-%m-%d'), end_datetime.strftime('%Y-%m-%d'))
                 
                 return {
                     "response": f"✅ Meeting successfully booked for {event_date.strftime('%Y-%m-%d')} at {display_time}!",
@@ -120,7 +128,9 @@ async def chat(message: ChatMessage):
                 tomorrow = datetime.now() + timedelta(days=1)
                 date_str = tomorrow.strftime('%Y-%m-%d')
                 
-                available_slots = calendar_service.get_available_slots(date_str, duration_minutes=60)
+                available_slots = await calendar_backend.day(
+                    date_str, lambda service: service.get_available_slots(date_str, duration_minutes=60), key=60
+                )
                 
                 # Format slots for display
                 slot_times = []
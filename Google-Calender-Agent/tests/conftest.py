@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Modules are imported by bare name, as the app and the benchmarks do
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,87 @@
+from datetime import datetime, timedelta
+
+from calendar_backend import FakeCalendarService
+from interview_scheduler import (BATCH_LIMIT, FREEBUSY_LIMIT, ScheduleGrid, _run_mask, assign_interviews,
+                                 insert_batch, interview_event, query_busy)
+
+MONDAY = datetime(2024, 1, 1)
+
+
+def at(day, hour, minute=0):
+    return MONDAY + timedelta(days=day, hours=hour, minutes=minute)
+
+
+def grid(end_date='2024-01-01', **kwargs):
+    return ScheduleGrid('2024-01-01', end_date, tz_offset_minutes=0, **kwargs)
+
+
+def slots(assignments):
+    return [(a['candidate_id'], a['start'], a['interviewers']) for a in assignments]
+
+
+def test_run_mask_marks_starts_of_long_enough_runs():
+    assert _run_mask(0b1111011, 3) == 0b11000
+    assert _run_mask(0b1111011, 1) == 0b1111011
+    assert _run_mask(0b1111011, 5) == 0
+
+
+def test_grid_cells_working_hours_and_local_days():
+    g = ScheduleGrid('2024-01-05', '2024-01-08', tz_offset_minutes=330)
+    assert g.cells == 4 * 96
+    # Friday and Monday only, 9:00-17:00 each
+    assert bin(g.work).count('1') == 2 * 32
+    nine_local = datetime(2024, 1, 5, 3, 30)
+    assert g.cell_of(nine_local) == 36 and g.work >> 36 & 1
+    assert g.day_of(36) == '2024-01-05'
+    # Partly covered cells count as busy
+    assert g.mask([(g.origin + timedelta(minutes=10), g.origin + timedelta(minutes=20))]) == 0b11
+    assert g.mask([(g.end, g.end + timedelta(hours=1))]) == 0
+
+
+def test_buffer_keeps_interviews_apart():
+    assignments, unscheduled = assign_interviews(grid(), [{'id': 'c1'}, {'id': 'c2'}], {'a': 0},
+                                                 duration_minutes=30, buffer_minutes=15, step_minutes=15)
+    assert slots(assignments) == [('c1', at(0, 9), ['a']), ('c2', at(0, 9, 45), ['a'])]
+    assert unscheduled == []
+
+
+def test_max_per_day_moves_interviews_to_the_next_day():
+    candidates = [{'id': f'c{i}'} for i in range(3)]
+    assignments, unscheduled = assign_interviews(grid('2024-01-02'), candidates, {'a': 0}, max_per_day=1)
+    assert slots(assignments) == [('c0', at(0, 9), ['a']), ('c1', at(1, 9), ['a'])]
+    assert unscheduled == [{'candidate_id': 'c2', 'reason': 'no common free slot'}]
+
+
+def test_panels_take_the_least_loaded_free_interviewers():
+    g = grid()
+    busy = {'a': g.mask([(at(0, 9), at(0, 10))]), 'b': 0, 'c': 0}
+    candidates = [{'id': 'c1'}, {'id': 'c2'}, {'id': 'c3', 'available': [(at(0, 13), at(0, 15))]}]
+    assignments, _ = assign_interviews(g, candidates, busy, duration_minutes=30, interviewers_per_interview=2)
+    assert slots(assignments) == [
+        ('c1', at(0, 9), ['b', 'c']),
+        ('c2', at(0, 9, 30), ['b', 'c']),
+        ('c3', at(0, 13), ['a', 'b']),
+    ]
+
+
+def test_freebusy_is_queried_in_chunks():
+    service = FakeCalendarService(latency_ms=0)
+    g = grid()
+    interviewers = [f'i{n}@example.com' for n in range(2 * FREEBUSY_LIMIT + 1)]
+    service.stored['i70@example.com'] = [{'start': {'dateTime': '2024-01-01T09:00:00.000Z'},
+                                          'end': {'dateTime': '2024-01-01T10:00:00.000Z'}}]
+    busy = query_busy(service, g, interviewers)
+    assert service.http_requests == 3
+    assert set(busy) == set(interviewers)
+    assert busy['i70@example.com'] == g.mask([(at(0, 9), at(0, 10))])
+    assert busy['i0@example.com'] == 0
+
+
+def test_insert_batch_sends_batch_limit_inserts_per_request():
+    service = FakeCalendarService(latency_ms=0)
+    assignment = {'candidate_id': 'c', 'start': at(0, 9), 'end': at(0, 10), 'interviewers': ['a@example.com']}
+    events = [interview_event(assignment, {'id': f'c{n}'}, 'Interview: {name}') for n in range(BATCH_LIMIT + 5)]
+    results = insert_batch(service, 'primary', events)
+    assert service.http_requests == 2
+    assert all(event and error is None for event, error in results)
+    assert [event['summary'] for event in service.stored['primary']] == [e['summary'] for e in events]
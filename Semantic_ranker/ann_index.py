@@ -0,0 +1,534 @@
+"""
+Candidate vector index (separate module)
+- VectorIndex: the interface /search talks to
+- IVFIndex: pure-NumPy inverted-file index (spherical k-means coarse quantiser)
+  with incremental inserts/deletes, persisted in SQLite + a memory-mapped matrix
+- ChromaIndex: the same interface backed by a Chroma collection
+- Metadata filters: minimum ATS score, required skills and workspace, applied
+  to the candidates before the top-k cut
+- An item belongs to every workspace it was indexed under: the same resume
+  uploaded to two workspaces is one vector found by either workspace filter
+- Several processes can share one IVF index: every write bumps a generation
+  counter that the others check before they search or write (and reload on
+  change), and retraining is serialised across processes by a lock file
+- Retraining runs in a background thread on a snapshot of the index; searches
+  and writes carry on and only the swap to the new quantiser takes the lock
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import math
+import os
+import sqlite3
+import threading
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+from embedding_store import STORAGE_DTYPES, EmbeddingStore, normalise_rows
+
+try:
+    import fcntl
+except ImportError:  # not POSIX: concurrent retrains are still serialised by the SQLite write lock
+    fcntl = None
+
+_ASSIGN_CHUNK = 8192
+
+
+def _skill_set(skills: Iterable[str]) -> frozenset:
+    return frozenset(s.strip().lower() for s in skills if s and s.strip())
+
+
+def _workspace_ids(meta: Dict[str, Any]) -> List[str]:
+    ids = list(meta.get('workspace_ids') or [])
+    if meta.get('workspace_id') and meta['workspace_id'] not in ids:
+        ids.append(meta['workspace_id'])
+    return ids
+
+
+def _with_workspaces(meta: Dict[str, Any], workspace_ids: Iterable[str]) -> Dict[str, Any]:
+    """``meta`` with ``workspace_ids`` added to its own (a copy; unchanged if there is nothing to add)"""
+    merged = sorted(set(_workspace_ids(meta)) | set(workspace_ids))
+    if not merged:
+        return meta
+    return dict(meta, workspace_ids=merged)
+
+
+class VectorIndex:
+    """Interface shared by the NumPy IVF index and the Chroma-backed index"""
+
+    def upsert(self, ids: Sequence[str], vectors: np.ndarray, metadatas: Sequence[Dict[str, Any]]):
+        raise NotImplementedError
+
+    def delete(self, ids: Sequence[str]):
+        raise NotImplementedError
+
+    def search(self, vector: np.ndarray, k: int = 10, min_ats_score: Optional[float] = None,
+               skills: Optional[Sequence[str]] = None, exact: bool = False,
+               workspace_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Top-k ``{'id', 'score', 'metadata'}`` by cosine similarity, best first"""
+        raise NotImplementedError
+
+    def __len__(self) -> int:
+        raise NotImplementedError
+
+    def stats(self) -> Dict[str, Any]:
+        return {'backend': type(self).__name__, 'size': len(self)}
+
+
+def spherical_kmeans(x: np.ndarray, k: int, iterations: int = 10, seed: int = 0) -> np.ndarray:
+    """Unit-norm centroids for unit-norm rows of ``x``"""
+    rng = np.random.default_rng(seed)
+    centroids = x[rng.choice(len(x), size=k, replace=False)].copy()
+    for _ in range(iterations):
+        assign = assign_to_centroids(x, centroids)
+        order = np.argsort(assign, kind='stable')
+        counts = np.bincount(assign, minlength=k)
+        nonempty = np.flatnonzero(counts)
+        starts = np.concatenate(([0], np.cumsum(counts[nonempty])[:-1]))
+        sums = np.add.reduceat(x[order], starts, axis=0)
+        centroids[nonempty] = normalise_rows(sums)
+        # Re-seed empty clusters from random points
+        empty = np.flatnonzero(counts == 0)
+        if len(empty):
+            centroids[empty] = x[rng.choice(len(x), size=len(empty), replace=False)]
+    return centroids
+
+
+def assign_to_centroids(x: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    out = np.empty(len(x), dtype=np.int64)
+    for i in range(0, len(x), _ASSIGN_CHUNK):
+        out[i:i + _ASSIGN_CHUNK] = np.argmax(x[i:i + _ASSIGN_CHUNK] @ centroids.T, axis=1)
+    return out
+
+
+class IVFIndex(VectorIndex):
+    """
+    Inverted-file index over unit-normalised vectors.
+
+    Until ``min_train`` vectors are present every search is exact. After
+    that, a spherical k-means quantiser with ~4*sqrt(n) lists is trained and a
+    search only scores the ``nprobe`` closest lists. The quantiser is retrained
+    (in a background thread started by ``upsert``) whenever the index has
+    grown 4x since the last training.
+
+    Other processes' writes are picked up through the generation counter in
+    the state table, the same way BM25Index does it.
+    """
+
+    def __init__(self, directory: str, dim: int, nprobe: int = 16, min_train: int = 4096,
+                 train_sample: int = 50000, seed: int = 0, dtype: str = 'float32'):
+        os.makedirs(directory, exist_ok=True)
+        self.dim = dim
+        self.nprobe = nprobe
+        self.min_train = min_train
+        self.train_sample = train_sample
+        self.seed = seed
+        self.store = EmbeddingStore(os.path.join(directory, 'vectors'), dim, dtype=dtype)
+        # Item rows point into the store's matrix, which is separate per dtype
+        suffix = STORAGE_DTYPES[dtype][0]
+        self.db_path = os.path.join(directory, 'index.sqlite3' if dtype == 'float32' else f'index.{suffix}.sqlite3')
+        self.lock_path = self.db_path + '.train.lock'
+        self._lock = threading.RLock()
+        self._trainer: Optional[threading.Thread] = None
+        self._db = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False)
+        with self._db:
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS items ("
+                " id TEXT PRIMARY KEY, row INTEGER NOT NULL, list INTEGER NOT NULL,"
+                " ats_score REAL, skills TEXT, meta TEXT)"
+            )
+            self._db.execute("CREATE TABLE IF NOT EXISTS state (key TEXT PRIMARY KEY, value BLOB)")
+        self._load()
+
+    # -- in-memory state -------------------------------------------------
+
+    def _reset(self, capacity: int = 1024):
+        self._ids: List[str] = []
+        self._skills: List[frozenset] = []
+        self._meta: List[Dict[str, Any]] = []
+        self._slot_of: Dict[str, int] = {}
+        # Workspace ids as small ints, so the filter is one comparison per slot: 0 = none,
+        # -1 = several (the codes are then in _multi_workspace)
+        self._workspace_codes: Dict[str, int] = {}
+        self._workspace = np.zeros(capacity, dtype=np.int32)
+        self._multi_workspace: Dict[int, frozenset] = {}
+        self._rows = np.empty(capacity, dtype=np.int64)
+        self._assign = np.full(capacity, -1, dtype=np.int64)
+        self._ats = np.zeros(capacity, dtype=np.float32)
+        self._alive = np.zeros(capacity, dtype=bool)
+        self._lists: Dict[int, List[int]] = {}
+        self._list_cache: Dict[int, np.ndarray] = {}
+        self._count = 0
+        self._dead = 0
+
+    def _grow(self, needed: int):
+        capacity = len(self._rows)
+        if needed <= capacity:
+            return
+        capacity = max(needed, capacity * 2)
+        for name, fill in (('_rows', 0), ('_assign', -1), ('_ats', 0), ('_alive', False), ('_workspace', 0)):
+            old = getattr(self, name)
+            new = np.full(capacity, fill, dtype=old.dtype)
+            new[:len(old)] = old
+            setattr(self, name, new)
+
+    def _stored_generation(self) -> int:
+        row = self._db.execute("SELECT value FROM state WHERE key = 'generation'").fetchone()
+        return int(row[0]) if row else 0
+
+    def _load(self):
+        with self._lock:
+            self._generation = self._stored_generation()
+            row = self._db.execute("SELECT value FROM state WHERE key = 'centroids'").fetchone()
+            self.centroids = np.frombuffer(row[0], dtype=np.float32).reshape(-1, self.dim).copy() if row else None
+            row = self._db.execute("SELECT value FROM state WHERE key = 'trained_on'").fetchone()
+            self.trained_on = int(row[0]) if row else 0
+            items = self._db.execute("SELECT id, row, list, ats_score, skills, meta FROM items").fetchall()
+            self._reset(max(1024, len(items)))
+            for item_id, store_row, list_id, ats, skills, meta in items:
+                self._append(item_id, store_row, list_id, ats, json.loads(skills or '[]'), json.loads(meta or '{}'))
+
+    def _refresh(self):
+        # Another process wrote since we loaded
+        if self._stored_generation() != self._generation:
+            self._load()
+
+    def _write(self, apply: Callable[[], Any]) -> Any:
+        """Run apply() in an immediate transaction (after catching up) and bump the generation"""
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                self._refresh()
+                result = apply()
+                self._db.execute("INSERT INTO state (key, value) VALUES ('generation', 1)"
+                                 " ON CONFLICT(key) DO UPDATE SET value = value + 1")
+                self._generation = self._stored_generation()
+                self._db.commit()
+            except BaseException:
+                self._db.rollback()
+                self._load()
+                raise
+            return result
+
+    def _append(self, item_id: str, store_row: int, list_id: int, ats: Optional[float],
+                skills: Sequence[str], meta: Dict[str, Any]):
+        slot = self._count
+        self._grow(slot + 1)
+        self._ids.append(item_id)
+        self._skills.append(_skill_set(skills))
+        self._meta.append(meta)
+        self._rows[slot] = store_row
+        self._assign[slot] = list_id
+        self._ats[slot] = float(ats) if ats is not None else 0.0
+        codes = frozenset(self._workspace_codes.setdefault(w, len(self._workspace_codes) + 1)
+                          for w in _workspace_ids(meta))
+        if len(codes) > 1:
+            self._workspace[slot] = -1
+            self._multi_workspace[slot] = codes
+        else:
+            self._workspace[slot] = next(iter(codes), 0)
+        self._alive[slot] = True
+        self._slot_of[item_id] = slot
+        self._lists.setdefault(list_id, []).append(slot)
+        self._list_cache.pop(list_id, None)
+        self._count += 1
+
+    def _kill(self, item_id: str) -> bool:
+        slot = self._slot_of.pop(item_id, None)
+        if slot is None:
+            return False
+        self._alive[slot] = False
+        self._multi_workspace.pop(slot, None)
+        self._dead += 1
+        return True
+
+    def _list_slots(self, list_id: int) -> np.ndarray:
+        cached = self._list_cache.get(list_id)
+        if cached is None:
+            cached = np.asarray(self._lists.get(list_id, []), dtype=np.int64)
+            self._list_cache[list_id] = cached
+        return cached
+
+    def __len__(self) -> int:
+        return self._count - self._dead
+
+    # -- mutations -------------------------------------------------------
+
+    def upsert(self, ids, vectors, metadatas):
+        if not len(ids):
+            return
+        vectors = normalise_rows(vectors)
+        keys = [hashlib.sha256(v.tobytes()).hexdigest() for v in vectors]
+        self.store.add(keys, vectors)
+        store_rows = self.store.lookup(keys)
+
+        def apply():
+            # Assigned inside the transaction: the centroids are current here
+            lists = assign_to_centroids(vectors, self.centroids) if self.centroids is not None \
+                else np.full(len(ids), -1, dtype=np.int64)
+            records = []
+            for item_id, store_row, list_id, meta in zip(ids, store_rows, lists, metadatas):
+                slot = self._slot_of.get(item_id)
+                if slot is not None:
+                    # Re-indexing under another workspace adds to the item's workspaces
+                    meta = _with_workspaces(meta, _workspace_ids(self._meta[slot]))
+                self._kill(item_id)
+                skills = list(meta.get('skills') or [])
+                ats = meta.get('ats_score')
+                self._append(item_id, store_row, int(list_id), ats, skills, meta)
+                records.append((item_id, store_row, int(list_id), ats, json.dumps(skills), json.dumps(meta)))
+            self._db.executemany(
+                "INSERT OR REPLACE INTO items (id, row, list, ats_score, skills, meta) VALUES (?, ?, ?, ?, ?, ?)",
+                records,
+            )
+
+        with self._lock:
+            self._write(apply)
+            if self._needs_training() and not (self._trainer and self._trainer.is_alive()):
+                self._trainer = threading.Thread(target=self._train_in_background, name='ivf-train', daemon=True)
+                self._trainer.start()
+
+    def delete(self, ids):
+        def apply():
+            removed = [item_id for item_id in ids if self._kill(item_id)]
+            self._db.executemany("DELETE FROM items WHERE id = ?", [(item_id,) for item_id in removed])
+            return removed
+
+        with self._lock:
+            removed = self._write(apply)
+            # Compact once tombstones dominate
+            if self._dead > max(1024, self._count // 2):
+                self._load()
+        return removed
+
+    def _needs_training(self) -> bool:
+        size = len(self)
+        if size < self.min_train:
+            return False
+        return self.centroids is None or size >= 4 * self.trained_on
+
+    def _train_lock(self):
+        """flock on <index>.train.lock, so one process at a time runs k-means"""
+        fh = open(self.lock_path, 'a')
+        if fcntl is not None:
+            fcntl.flock(fh, fcntl.LOCK_EX)
+        return fh
+
+    def _train_in_background(self):
+        try:
+            self.train(only_if_needed=True)
+        except Exception as e:
+            # The next upsert tries again; until then searches use the old quantiser
+            print(f"⚠️ IVF training failed: {e}")
+
+    def wait_for_training(self, timeout: Optional[float] = None):
+        """Block until a background retrain started by upsert has finished"""
+        trainer = self._trainer
+        if trainer is not None:
+            trainer.join(timeout)
+
+    def train(self, only_if_needed: bool = False):
+        """
+        (Re)train the coarse quantiser and reassign every live vector. With
+        only_if_needed, a retrain that another process finished while this one
+        waited for the lock is not repeated.
+
+        k-means and the assignment run on a snapshot of the live store rows
+        without holding this index's lock or the SQLite write lock: searches
+        and writes (here and in other processes) carry on meanwhile. The lock
+        is taken only to assign what was written since and swap the lists in.
+        """
+        with self._train_lock():
+            with self._lock:
+                self._refresh()
+                if only_if_needed and not self._needs_training():
+                    return
+                live = np.flatnonzero(self._alive[:self._count])
+                rows = np.unique(self._rows[live])
+            if len(rows) == 0:
+                return
+            rng = np.random.default_rng(self.seed)
+            sample = rows if len(rows) <= self.train_sample else rng.choice(rows, self.train_sample, replace=False)
+            nlist = int(min(len(sample), max(16, min(4096, 4 * math.sqrt(len(live))))))
+            centroids = spherical_kmeans(self.store.get_rows(sample), nlist, seed=self.seed)
+            # Store rows are content-addressed, so a row's list holds for every item pointing at it
+            row_lists = np.empty(len(rows), dtype=np.int64)
+            for i in range(0, len(rows), _ASSIGN_CHUNK):
+                row_lists[i:i + _ASSIGN_CHUNK] = assign_to_centroids(self.store.get_rows(rows[i:i + _ASSIGN_CHUNK]),
+                                                                     centroids)
+
+            def apply():
+                # Everything live now: only vectors written during k-means still need a list
+                live = np.flatnonzero(self._alive[:self._count])
+                live_rows = self._rows[live]
+                pos = np.minimum(np.searchsorted(rows, live_rows), len(rows) - 1)
+                assign = row_lists[pos]
+                new = np.flatnonzero(rows[pos] != live_rows)
+                if len(new):
+                    assign[new] = assign_to_centroids(self.store.get_rows(live_rows[new]), centroids)
+                self.centroids = centroids
+                self.trained_on = len(live)
+                self._assign[live] = assign
+                self._lists = {}
+                for slot, list_id in zip(live.tolist(), assign.tolist()):
+                    self._lists.setdefault(list_id, []).append(slot)
+                self._list_cache = {}
+
+                self._db.execute("INSERT OR REPLACE INTO state (key, value) VALUES ('centroids', ?)",
+                                 (centroids.astype(np.float32).tobytes(),))
+                self._db.execute("INSERT OR REPLACE INTO state (key, value) VALUES ('trained_on', ?)",
+                                 (self.trained_on,))
+                self._db.executemany("UPDATE items SET list = ? WHERE id = ?",
+                                     [(list_id, self._ids[slot]) for slot, list_id in zip(live.tolist(), assign.tolist())])
+
+            self._write(apply)
+
+    # -- search ----------------------------------------------------------
+
+    def _filter(self, candidates: np.ndarray, min_ats_score: Optional[float], required: frozenset,
+                workspace: Optional[int] = None) -> np.ndarray:
+        candidates = candidates[self._alive[candidates]]
+        if workspace is not None:
+            codes = self._workspace[candidates]
+            keep = codes == workspace
+            for i in np.flatnonzero(codes == -1).tolist():
+                keep[i] = workspace in self._multi_workspace[int(candidates[i])]
+            candidates = candidates[keep]
+        if min_ats_score is not None:
+            candidates = candidates[self._ats[candidates] >= float(min_ats_score)]
+        if required and len(candidates):
+            candidates = np.asarray([s for s in candidates.tolist() if required <= self._skills[s]], dtype=np.int64)
+        return candidates
+
+    def search(self, vector, k=10, min_ats_score=None, skills=None, exact=False, workspace_id=None):
+        query = normalise_rows(vector)[0]
+        required = _skill_set(skills or [])
+        with self._lock:
+            self._refresh()
+            workspace = None
+            if workspace_id:
+                # -1 matches nothing: a workspace this index has never seen
+                workspace = self._workspace_codes.get(workspace_id, -1)
+            if exact or self.centroids is None:
+                candidates = self._filter(np.arange(self._count), min_ats_score, required, workspace)
+            else:
+                order = np.argsort(-(self.centroids @ query))
+                nprobe = min(self.nprobe, len(order))
+                while True:
+                    # Vectors added before training sit in list -1 until the next retrain
+                    probe = order[:nprobe].tolist() + [-1]
+                    probed = np.concatenate([self._list_slots(list_id) for list_id in probe])
+                    candidates = self._filter(probed, min_ats_score, required, workspace)
+                    # Selective filters leave few survivors per list: widen the probe in
+                    # proportion so filtered recall matches unfiltered recall
+                    if nprobe >= len(order) or (min_ats_score is None and not required and workspace is None):
+                        break
+                    selectivity = len(candidates) / max(1, len(probed))
+                    wanted = int(math.ceil(self.nprobe / max(selectivity, 1e-3)))
+                    if wanted <= nprobe:
+                        break
+                    nprobe = min(wanted, len(order))
+
+            if len(candidates) == 0:
+                return []
+
+            scores = self.store.get_rows(self._rows[candidates]) @ query
+            top = min(k, len(candidates))
+            best = np.argpartition(-scores, top - 1)[:top]
+            best = best[np.argsort(-scores[best])]
+            return [
+                {'id': self._ids[candidates[i]], 'score': float(scores[i]), 'metadata': self._meta[candidates[i]]}
+                for i in best
+            ]
+
+    def stats(self):
+        return {
+            'backend': 'ivf',
+            'size': len(self),
+            'tombstones': self._dead,
+            'lists': 0 if self.centroids is None else len(self.centroids),
+            'nprobe': self.nprobe,
+            'trained_on': self.trained_on,
+            'dtype': self.store.dtype,
+        }
+
+
+class ChromaIndex(VectorIndex):
+    """The VectorIndex interface on top of a Chroma collection (cosine space)"""
+
+    def __init__(self, client, name: str = 'candidates'):
+        self.col = client.get_or_create_collection(name=name, metadata={'hnsw:space': 'cosine'})
+
+    @staticmethod
+    def _flatten(meta: Dict[str, Any]) -> Dict[str, Any]:
+        # Chroma metadata is scalar-only: skills become a joined string plus one flag per
+        # skill, and workspaces one flag per workspace
+        flat = {k: v for k, v in meta.items() if isinstance(v, (str, int, float, bool)) and v is not None}
+        skills = sorted(_skill_set(meta.get('skills') or []))
+        flat['skills'] = ', '.join(meta.get('skills') or [])
+        for skill in skills:
+            flat[f'skill:{skill}'] = True
+        for workspace_id in _workspace_ids(meta):
+            flat[f'workspace:{workspace_id}'] = True
+        return flat
+
+    @staticmethod
+    def _unflatten(meta: Dict[str, Any]) -> Dict[str, Any]:
+        meta = meta or {}
+        workspace_ids = sorted(k[len('workspace:'):] for k in meta if k.startswith('workspace:'))
+        meta = {k: v for k, v in meta.items() if not k.startswith(('skill:', 'workspace:'))}
+        meta['skills'] = [s.strip() for s in meta.get('skills', '').split(',') if s.strip()]
+        if workspace_ids:
+            meta['workspace_ids'] = workspace_ids
+        return meta
+
+    def upsert(self, ids, vectors, metadatas):
+        if not len(ids):
+            return
+        # Keep the workspaces the items are already in (the union is not atomic across writers)
+        existing = self.col.get(ids=list(ids), include=['metadatas'])
+        workspaces = {item_id: _workspace_ids(self._unflatten(meta))
+                      for item_id, meta in zip(existing.get('ids') or [], existing.get('metadatas') or [])}
+        self.col.upsert(
+            ids=list(ids),
+            embeddings=normalise_rows(vectors).tolist(),
+            metadatas=[self._flatten(_with_workspaces(m, workspaces.get(item_id, [])))
+                       for item_id, m in zip(ids, metadatas)],
+        )
+
+    def delete(self, ids):
+        self.col.delete(ids=list(ids))
+        return list(ids)
+
+    def search(self, vector, k=10, min_ats_score=None, skills=None, exact=False, workspace_id=None):
+        conditions = []
+        if workspace_id:
+            conditions.append({f'workspace:{workspace_id}': True})
+        if min_ats_score is not None:
+            conditions.append({'ats_score': {'$gte': float(min_ats_score)}})
+        for skill in sorted(_skill_set(skills or [])):
+            conditions.append({f'skill:{skill}': True})
+        where = None
+        if len(conditions) == 1:
+            where = conditions[0]
+        elif conditions:
+            where = {'$and': conditions}
+
+        qr = self.col.query(query_embeddings=normalise_rows(vector).tolist(), n_results=k, where=where)
+        ids = qr.get('ids', [[]])[0]
+        metas = qr.get('metadatas', [[]])[0]
+        dists = qr.get('distances', [[]])[0]
+        return [
+            {'id': ids[i], 'score': float(1.0 - dists[i]), 'metadata': self._unflatten(metas[i])}
+            for i in range(len(ids))
+        ]
+
+    def __len__(self):
+        return self.col.count()
+
+    def stats(self):
+        return {'backend': 'chroma', 'size': len(self)}
@@ -0,0 +1,2422 @@
+"""
+Enhanced ATS Flask API for Flutter Frontend
+Provides comprehensive resume processing with ML, LLaMA, and Chroma DB
+"""
+
+import time
+_IMPORT_START = time.perf_counter()
+
+from flask import Flask, request, jsonify, Response, stream_with_context, g
+from flask_cors import CORS
+from werkzeug.utils import secure_filename
+import numpy as np
+import base64
+import gzip
+import importlib.metadata
+import io
+import os
+import json
+import uuid
+import random
+import threading
+from datetime import datetime
+from typing import Iterator, List, Tuple, Dict, Optional
+import re
+import warnings
+from functools import lru_cache
+from collections import OrderedDict
+warnings.filterwarnings('ignore')
+
+# ML libraries (spaCy, sentence-transformers, joblib, openai, chromadb) are
+# imported by the model loaders on first use; see MODEL INITIALIZATION
+from resume_pipeline import ResumePipeline, PipelineStats
+from extraction_cache import ExtractionCache, file_digest
+from llm_extractor import LLMSkillExtractor, CircuitBreaker
+from skill_matcher import SkillMatcher
+from embedding_store import EmbeddingStore, normalise_rows, text_key
+from rag_api import _chunk_text, rag_stats
+from ann_index import VectorIndex, IVFIndex, ChromaIndex
+from job_queue import JobQueue, JobWorker
+from model_registry import ModelRegistry
+from text_stats import text_statistics
+from skill_index import SkillIndex
+from result_store import ResultStore
+from document_extractor import DocumentExtractor, resolve_backend
+from onnx_encoder import OnnxEncoder
+from metrics import metrics, timed, StackSampler
+
+# Initialize Flask app
+app = Flask(__name__)
+CORS(app)  # Enable CORS for Flutter frontend
+
+# Configuration
+app.config['MAX_CONTENT_LENGTH'] = 50 * 1024 * 1024  # 50MB max file size
+ALLOWED_EXTENSIONS = {'pdf', 'docx', 'doc'}
+
+# Resume pipeline: process pool for parsing/spaCy, thread pool for LLM calls
+# (gunicorn.conf.py divides the default parse pool between its workers)
+PIPELINE_PARSE_WORKERS = int(os.environ.get('ATS_PARSE_WORKERS', os.cpu_count() or 1))
+PIPELINE_LLM_WORKERS = int(os.environ.get('ATS_LLM_WORKERS', 4))
+PIPELINE_QUEUE_SIZE = int(os.environ.get('ATS_PIPELINE_QUEUE_SIZE', 32))
+# Resumes per parse task (one nlp.pipe / vectorised stats pass) and spaCy's pipe batch size
+PIPELINE_PARSE_BATCH_SIZE = int(os.environ.get('ATS_PARSE_BATCH_SIZE', 8))
+NLP_BATCH_SIZE = int(os.environ.get('ATS_NLP_BATCH_SIZE', 32))
+
+# Content-addressed extraction cache (set ATS_EXTRACTION_CACHE_MAX_MB=0 to disable)
+EXTRACTION_CACHE_PATH = os.environ.get('ATS_EXTRACTION_CACHE', 'extraction_cache.sqlite3')
+EXTRACTION_CACHE_MAX_MB = int(os.environ.get('ATS_EXTRACTION_CACHE_MAX_MB', 512))
+# Bump whenever text/skill/feature extraction changes what gets cached
+EXTRACTOR_VERSION = '3'
+
+# Text extraction from the upload bytes (document_extractor.py): PDF backend
+# (auto, pypdfium2, pypdf2, pdfminer), limits per document, and sandboxed
+# child processes per worker with a timeout and an address-space cap
+PDF_BACKEND = os.environ.get('ATS_PDF_BACKEND', 'auto')
+EXTRACT_MAX_MB = float(os.environ.get('ATS_EXTRACT_MAX_MB', 10))
+EXTRACT_MAX_PAGES = int(os.environ.get('ATS_EXTRACT_MAX_PAGES', 30))
+EXTRACT_TIMEOUT_SECONDS = float(os.environ.get('ATS_EXTRACT_TIMEOUT', 15))
+EXTRACT_MEMORY_MB = int(os.environ.get('ATS_EXTRACT_MEMORY_MB', 1024))
+EXTRACT_SANDBOX = os.environ.get('ATS_EXTRACT_SANDBOX', '1').lower() not in ('0', 'false', 'no')
+EXTRACT_SANDBOXES = int(os.environ.get('ATS_EXTRACT_SANDBOXES', 2))
+
+# Skill taxonomy (canonical names + aliases) compiled into one matcher at startup
+SKILL_TAXONOMY_PATH = os.environ.get(
+    'ATS_SKILL_TAXONOMY', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'skill_taxonomy.json')
+)
+skill_matcher = SkillMatcher.from_file(SKILL_TAXONOMY_PATH)
+
+LLAMA_MODEL = "meta/llama3-70b-instruct"
+SPACY_MODEL = 'en_core_web_sm'
+SENTENCE_MODEL_NAME = 'all-MiniLM-L6-v2'
+# Embedding engine: 'torch' (sentence-transformers) or 'onnx' (onnx_encoder.py,
+# built with `python onnx_encoder.py export`; variant 'int8' or 'fp32'), its
+# intra-op threads (0 = library default) and padded tokens per encode batch
+EMBED_ENGINE = os.environ.get('ATS_EMBED_ENGINE', 'torch')
+ONNX_MODEL_DIR = os.environ.get('ATS_ONNX_MODEL_DIR', os.path.join('onnx_models', SENTENCE_MODEL_NAME))
+ONNX_VARIANT = os.environ.get('ATS_ONNX_VARIANT', 'int8')
+EMBED_THREADS = int(os.environ.get('ATS_EMBED_THREADS', 0))
+EMBED_MAX_BATCH_TOKENS = int(os.environ.get('ATS_EMBED_MAX_BATCH_TOKENS', 8192))
+# Stored vectors are keyed by the model that made them. The fp32 export
+# reproduces the torch model to float rounding, so only int8 gets its own id.
+EMBEDDING_MODEL_ID = (f"{SENTENCE_MODEL_NAME}-onnx-int8" if EMBED_ENGINE == 'onnx' and ONNX_VARIANT == 'int8'
+                      else SENTENCE_MODEL_NAME)
+# Embedding store and candidate index storage: float32, float16 or int8
+EMBEDDING_DTYPE = os.environ.get('ATS_EMBEDDING_DTYPE', 'float32')
+# Resume/JD embeddings persisted per sentence model, keyed by text hash
+EMBEDDING_STORE_DIR = os.environ.get('ATS_EMBEDDING_STORE', 'embedding_store')
+# Encode batch size for chunked (long-document) semantic ranking
+CHUNK_ENCODE_BATCH_SIZE = int(os.environ.get('ATS_CHUNK_BATCH_SIZE', 64))
+# Cross-workspace candidate search: 'ivf' (NumPy inverted file index) or 'chroma'
+ANN_BACKEND = os.environ.get('ATS_ANN_BACKEND', 'ivf')
+ANN_INDEX_DIR = os.environ.get('ATS_ANN_INDEX', 'candidate_index')
+ANN_NPROBE = int(os.environ.get('ATS_ANN_NPROBE', 16))
+# Per-workspace skill indexes for /filter-resumes and /available-skills (in memory, LRU)
+SKILL_INDEX_WORKSPACES = int(os.environ.get('ATS_SKILL_INDEX_WORKSPACES', 64))
+# Processed resumes and result sets per workspace, so clients can send ids instead of bodies
+RESULT_STORE_PATH = os.environ.get('ATS_RESULT_STORE', 'results.sqlite3')
+RESULT_SET_MAX_AGE = float(os.environ.get('ATS_RESULT_SET_MAX_AGE', 7 * 24 * 3600))
+# Responses at least this large are gzipped for clients that accept it
+GZIP_MIN_BYTES = int(os.environ.get('ATS_GZIP_MIN_BYTES', 1024))
+# Batch screening jobs: queue database (local disk; job_worker.py processes on
+# this host share it and its job_spool/ directory) and in-process worker threads
+JOB_QUEUE_PATH = os.environ.get('ATS_JOB_DB', 'jobs.sqlite3')
+JOB_INLINE_WORKERS = int(os.environ.get('ATS_JOB_INLINE_WORKERS', 1))
+JOB_BATCH_SIZE = int(os.environ.get('ATS_JOB_BATCH_SIZE', 16))
+JOB_LEASE_SECONDS = float(os.environ.get('ATS_JOB_LEASE_SECONDS', 300))
+JOB_MAX_ATTEMPTS = int(os.environ.get('ATS_JOB_MAX_ATTEMPTS', 3))
+# Point LLAMA_BASE_URL at a local OpenAI-compatible server (see fake_openai_server.py) for testing
+LLAMA_BASE_URL = os.environ.get('LLAMA_BASE_URL', "https://integrate.api.nvidia.com/v1")
+LLAMA_API_KEY = os.environ.get('LLAMA_API_KEY') or os.environ.get('NVIDIA_API_KEY') or \
+    "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"
+
+# LLM skill extraction: resumes per prompt, concurrent prompts, per-call timeout
+LLM_BATCH_SIZE = int(os.environ.get('ATS_LLM_BATCH_SIZE', 4))
+LLM_MAX_CONCURRENCY = int(os.environ.get('ATS_LLM_MAX_CONCURRENCY', 4))
+LLM_TIMEOUT_SECONDS = float(os.environ.get('ATS_LLM_TIMEOUT', 20))
+LLM_BREAKER_FAILURES = int(os.environ.get('ATS_LLM_BREAKER_FAILURES', 5))
+LLM_BREAKER_RESET_SECONDS = float(os.environ.get('ATS_LLM_BREAKER_RESET', 30))
+LLM_CACHE_PATH = os.environ.get('ATS_LLM_CACHE', 'llm_cache.sqlite3')
+LLM_CACHE_MAX_MB = int(os.environ.get('ATS_LLM_CACHE_MAX_MB', 64))
+# Opt-in sampling profiler: share of requests to profile, and whether an
+# "X-ATS-Profile: 1" request header may ask for it; folded stacks go to ATS_PROFILE_DIR
+PROFILE_SAMPLE_RATE = float(os.environ.get('ATS_PROFILE_RATE', 0))
+PROFILE_ON_HEADER = os.environ.get('ATS_PROFILE_HEADER', '').lower() in ('1', 'true', 'yes')
+PROFILE_DIR = os.environ.get('ATS_PROFILE_DIR', 'profiles')
+PROFILE_INTERVAL_SECONDS = float(os.environ.get('ATS_PROFILE_INTERVAL_MS', 5)) / 1000.0
+ATS_MODEL_PATH = "ats_rf_model.joblib"
+ATS_FEATURE_NAMES_PATH = "ats_feature_names.joblib"
+
+# Models and clients load on first use (or in the background, see ATS_MODEL_LOADING)
+models = ModelRegistry()
+# 'lazy': load on first use; 'background': start loading all models in parallel
+# threads at startup while light endpoints already answer; 'eager': load before serving
+MODEL_LOADING = os.environ.get('ATS_MODEL_LOADING', 'background')
+resume_pipeline = None
+document_extractor = None
+extraction_cache = None
+llm_extractor = None
+embedding_store = None
+candidate_index = None
+job_queue = None
+result_store = None
+job_workers = []
+# key -> (index, result store generation it was built at; None for indexes not built from the store)
+skill_indexes: "OrderedDict[str, Tuple[SkillIndex, Optional[int]]]" = OrderedDict()
+skill_indexes_lock = threading.Lock()
+# Liveness is "the process answers"; readiness is "models loaded and warmed up"
+service_state = {'ready': False, 'started_at': datetime.now().isoformat(), 'pid': os.getpid()}
+
+# =============================================================================
+# MODEL INITIALIZATION
+# =============================================================================
+
+def _load_nlp_model(timings: Dict):
+    spacy = models.import_module('spacy', timings)
+    try:
+        model = spacy.load(SPACY_MODEL)
+    except OSError:
+        print(f"❌ spaCy model not found. Please install: python -m spacy download {SPACY_MODEL}")
+        return None
+    print("✅ spaCy model loaded")
+    return model
+
+def _load_sentence_model(timings: Dict):
+    if EMBED_ENGINE == 'onnx':
+        models.import_module('onnxruntime', timings)
+        model = OnnxEncoder(ONNX_MODEL_DIR, variant=ONNX_VARIANT, threads=EMBED_THREADS,
+                            max_batch_tokens=EMBED_MAX_BATCH_TOKENS)
+        print(f"✅ ONNX sentence encoder loaded ({ONNX_VARIANT})")
+        return model
+    if EMBED_ENGINE != 'torch':
+        raise ValueError(f"ATS_EMBED_ENGINE must be 'torch' or 'onnx', not {EMBED_ENGINE!r}")
+    sentence_transformers = models.import_module('sentence_transformers', timings)
+    if EMBED_THREADS:
+        import torch
+        torch.set_num_threads(EMBED_THREADS)
+    model = sentence_transformers.SentenceTransformer(SENTENCE_MODEL_NAME)
+    print("✅ Sentence Transformer loaded")
+    return model
+
+def _load_ats_model(timings: Dict):
+    """(model, feature_names), or None to use the fallback scorer"""
+    if not (os.path.exists(ATS_MODEL_PATH) and os.path.exists(ATS_FEATURE_NAMES_PATH)):
+        print("⚠️ ATS model files not found. Will train on first use.")
+        return None
+    joblib = models.import_module('joblib', timings)
+    model = joblib.load(ATS_MODEL_PATH)
+    names = joblib.load(ATS_FEATURE_NAMES_PATH)
+    print("✅ ATS ML model loaded")
+    return model, names
+
+def _load_llama_client(timings: Dict):
+    openai = models.import_module('openai', timings)
+    client = openai.OpenAI(base_url=LLAMA_BASE_URL, api_key=LLAMA_API_KEY)
+    print("✅ LLaMA client initialized")
+    return client
+
+def _load_chroma_client(timings: Dict):
+    chromadb = models.import_module('chromadb', timings)
+    client = chromadb.PersistentClient(path="./chroma_db")
+    print("✅ Chroma DB initialized")
+    return client
+
+models.register('nlp', _load_nlp_model)
+models.register('sentence_model', _load_sentence_model)
+models.register('ats_model', _load_ats_model)
+models.register('llama_client', _load_llama_client)
+models.register('chroma_client', _load_chroma_client)
+
+MODEL_NAMES = ('nlp', 'sentence_model', 'ats_model')
+CLIENT_NAMES = ('llama_client', 'chroma_client')
+
+def get_nlp_model():
+    return models.get('nlp')
+
+def get_sentence_model():
+    return models.get('sentence_model')
+
+def _embedding_engine_stats() -> Dict:
+    encoder = get_sentence_model() if models.is_loaded('sentence_model') else None
+    stats = {'engine': EMBED_ENGINE, 'model': EMBEDDING_MODEL_ID, 'storage_dtype': EMBEDDING_DTYPE}
+    if encoder is not None and hasattr(encoder, 'stats'):
+        stats.update(encoder.stats())
+    return stats
+
+def get_ats_model() -> Tuple:
+    """(model, feature_names); (None, None) when the fallback scorer is used"""
+    return models.get('ats_model') or (None, None)
+
+def get_llama_client():
+    return models.get('llama_client')
+
+def get_chroma_client():
+    return models.get('chroma_client')
+
+@metrics.collector
+def _collect_model_and_cache_metrics():
+    """Figures the registry, caches and LLM extractor already count, read at scrape time"""
+    for name, info in models.stats().items():
+        for step, seconds in (info.get('seconds') or {}).items():
+            yield 'ats_model_load_seconds', {'model': name, 'step': step}, seconds
+    caches = [('extraction', extraction_cache), ('llm', llm_extractor.cache if llm_extractor else None)]
+    for cache_name, cache in caches:
+        if cache is not None:
+            yield 'ats_cache_requests_total', {'cache': cache_name, 'result': 'hit'}, cache.hits
+            yield 'ats_cache_requests_total', {'cache': cache_name, 'result': 'miss'}, cache.misses
+    if llm_extractor is not None:
+        # Resumes that got regex skills because the call failed or the breaker was open
+        yield 'ats_llm_fallbacks_total', {'caller': 'skills', 'reason': 'unavailable'}, llm_extractor.fallbacks
+
+try:
+    # Register RAG blueprint (separate module); it resolves models/clients on use
+    from rag_api import init_rag_blueprint
+    init_rag_blueprint(app, get_llama_client, get_chroma_client, get_sentence_model)
+except Exception as e:
+    print(f"⚠️ RAG blueprint not registered: {e}")
+
+def initialize_models(connect: bool = True, parallel: bool = True) -> bool:
+    """
+    Load all models now (in parallel threads unless ``parallel`` is False). With
+    ``connect=False`` the LLaMA and Chroma clients are left to load on first
+    use, e.g. in each pre-forked worker.
+    """
+    print("🔄 Initializing models...")
+    models.load(MODEL_NAMES + (CLIENT_NAMES if connect else ()), parallel=parallel)
+    print("🎯 Model initialization complete!")
+    return models.is_loaded('nlp') and models.is_loaded('sentence_model')
+
+def reset_process_state():
+    """
+    Run in every forked worker before it serves requests. Model weights are
+    inherited copy-on-write; connections, SQLite handles, thread pools and
+    worker threads are not fork-safe, so they are dropped and reopened lazily.
+    """
+    global resume_pipeline, document_extractor, extraction_cache, llm_extractor, embedding_store, candidate_index
+    global job_queue, result_store
+    resume_pipeline = document_extractor = extraction_cache = llm_extractor = None
+    embedding_store = candidate_index = job_queue = result_store = None
+    job_workers.clear()
+    skill_indexes.clear()
+    for name in CLIENT_NAMES:
+        models.reset(name)
+    service_state.update({'ready': False, 'pid': os.getpid()})
+    # This worker reopens its own caches and stores: collectors report from here now
+    metrics.claim_collectors()
+
+WARMUP_TEXT = (
+    "Jane Doe\njane.doe@example.com | +1 555 010 0000\n\n"
+    "Experience\nSenior Software Engineer at Acme Corp (2019 - 2024). Built Python, Flask and "
+    "Docker services on AWS.\n\nEducation\nBSc Computer Science, State University\n\n"
+    "Skills\nPython, SQL, Kubernetes, React"
+)
+
+def warm_up() -> Dict:
+    """
+    Run one inference through every model so the first real request does not
+    pay for lazy initialisation, then mark this process ready
+    """
+    timings = {}
+    start = time.perf_counter()
+    features = extract_ml_features(WARMUP_TEXT)
+    timings['ml_features'] = time.perf_counter() - start
+    
+    start = time.perf_counter()
+    predict_ats_score(features)
+    timings['ats_model'] = time.perf_counter() - start
+    
+    sentence_model = get_sentence_model()
+    if sentence_model is not None:
+        # Straight to the model: the embedding store opens SQLite handles we must not fork
+        start = time.perf_counter()
+        sentence_model.encode([WARMUP_TEXT, 'Python developer'], batch_size=2)
+        timings['sentence_model'] = time.perf_counter() - start
+    
+    timings = {key: round(value, 4) for key, value in timings.items()}
+    service_state.update({
+        'ready': models.is_loaded('nlp') and models.is_loaded('sentence_model'),
+        'warmup_seconds': timings,
+        'ready_at': datetime.now().isoformat(),
+        'pid': os.getpid(),
+    })
+    return timings
+
+def load_in_background() -> threading.Thread:
+    """Load every model in parallel threads, then warm up; light endpoints answer meanwhile"""
+    def run():
+        initialize_models()
+        warm_up()
+    thread = threading.Thread(target=run, name='model-loader', daemon=True)
+    thread.start()
+    return thread
+
+# =============================================================================
+# UTILITY FUNCTIONS
+# =============================================================================
+
+def allowed_file(filename):
+    """Check if file extension is allowed"""
+    return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
+
+def _get_document_extractor() -> DocumentExtractor:
+    """Create the extractor on first use; it starts its sandbox processes lazily (again after fork)"""
+    global document_extractor
+    if document_extractor is None:
+        document_extractor = DocumentExtractor(
+            backend=PDF_BACKEND,
+            max_bytes=int(EXTRACT_MAX_MB * 1024 * 1024),
+            max_pages=EXTRACT_MAX_PAGES,
+            timeout=EXTRACT_TIMEOUT_SECONDS,
+            memory_mb=EXTRACT_MEMORY_MB,
+            sandbox=EXTRACT_SANDBOX,
+            sandboxes=EXTRACT_SANDBOXES,
+        )
+    return document_extractor
+
+def extract_text_from_bytes(data: bytes, filename: str) -> str:
+    """Text of an uploaded PDF/DOCX, parsed from memory; failures come back as an "Error extracting" string"""
+    fmt = 'pdf' if filename.lower().endswith('.pdf') else 'docx'
+    with metrics.timer('ats_stage_seconds', stage=f'extract_text_{fmt}'):
+        try:
+            return _get_document_extractor().extract(data, filename)
+        except Exception as e:
+            metrics.inc('ats_extraction_failures_total', format=fmt, reason=getattr(e, 'reason', 'error'))
+            return f"Error extracting {fmt.upper()}: {str(e)}"
+
+def _read_file(file_path: str) -> bytes:
+    with open(file_path, 'rb') as file:
+        return file.read()
+
+def extract_text_from_pdf(file_path: str) -> str:
+    """Extract text from a PDF file on disk"""
+    try:
+        data = _read_file(file_path)
+    except OSError as e:
+        metrics.inc('ats_extraction_failures_total', format='pdf', reason='unreadable')
+        return f"Error extracting PDF: {str(e)}"
+    return extract_text_from_bytes(data, file_path)
+
+def extract_text_from_docx(file_path: str) -> str:
+    """Extract text from a DOCX file on disk"""
+    try:
+        data = _read_file(file_path)
+    except OSError as e:
+        metrics.inc('ats_extraction_failures_total', format='docx', reason='unreadable')
+        return f"Error extracting DOCX: {str(e)}"
+    return extract_text_from_bytes(data, file_path)
+
+@lru_cache(maxsize=256)
+def _match_skills(text: str) -> Tuple[str, ...]:
+    """Run the taxonomy matcher once per distinct document"""
+    return tuple(skill_matcher.find(text))
+
+@timed('skills_regex')
+def extract_skills_with_regex(text: str) -> List[str]:
+    """Skill extraction with the compiled taxonomy matcher (word-boundary aware)"""
+    return list(_match_skills(text)[:20])  # Limit to 20 skills
+
+def extract_contact_info(text: str) -> Dict[str, List[str]]:
+    """Extract email and phone numbers"""
+    email_pattern = r'[a-zA-Z0-9_.+-]+@[a-zA-Z0-9-]+\.[a-zA-Z0-9-.]+'
+    emails = re.findall(email_pattern, text)
+    
+    phone_pattern = r'(\+?\d{1,3}[-.\s]?)?(\(?\d{3}\)?[-.\s]?)\d{3}[-.\s]?\d{4}'
+    phones = re.findall(phone_pattern, text)
+    phone_numbers = [''.join(phone) for phone in phones]
+    
+    return {'emails': emails, 'phones': phone_numbers}
+
+def _get_llm_extractor() -> Optional[LLMSkillExtractor]:
+    """Create the shared LLM skill extractor once the client exists"""
+    global llm_extractor
+    llama_client = get_llama_client() if llm_extractor is None else None
+    if llm_extractor is None and llama_client is not None:
+        cache = None
+        if LLM_CACHE_MAX_MB > 0:
+            try:
+                cache = ExtractionCache(LLM_CACHE_PATH, version=LLAMA_MODEL, max_bytes=LLM_CACHE_MAX_MB * 1024 * 1024)
+            except Exception as e:
+                metrics.inc('ats_errors_total', where='llm_cache')
+                print(f"⚠️ LLM response cache unavailable: {e}")
+        llm_extractor = LLMSkillExtractor(
+            llama_client,
+            LLAMA_MODEL,
+            max_concurrency=LLM_MAX_CONCURRENCY,
+            batch_size=LLM_BATCH_SIZE,
+            timeout=LLM_TIMEOUT_SECONDS,
+            cache=cache,
+            breaker=CircuitBreaker(LLM_BREAKER_FAILURES, LLM_BREAKER_RESET_SECONDS),
+        )
+    return llm_extractor
+
+def _extract_fields_with_regex(resume_text: str) -> Dict:
+    """Regex-only skills, experience section and primary email"""
+    
+    # Primary method: Use robust regex extraction
+    regex_skills = extract_skills_with_regex(resume_text)
+    
+    # Extract email with regex
+    contact_info = extract_contact_info(resume_text)
+    primary_email = contact_info['emails'][0] if contact_info['emails'] else 'No email found'
+    
+    # Extract experience section
+    experience_patterns = [
+        r'(?:professional\s+)?experience\s*:?\s*(.*?)(?=education|skills|projects|$)',
+        r'work\s+(?:history|experience)\s*:?\s*(.*?)(?=education|skills|projects|$)',
+        r'employment\s*:?\s*(.*?)(?=education|skills|projects|$)'
+    ]
+    
+    experience_text = 'Experience details not found'
+    for pattern in experience_patterns:
+        match = re.search(pattern, resume_text, re.IGNORECASE | re.DOTALL)
+        if match:
+            exp = match.group(1).strip()
+            if len(exp) > 50:
+                experience_text = exp[:400] + '...' if len(exp) > 400 else exp
+                break
+    
+    return {
+        'skills': regex_skills,
+        'experience': experience_text,
+        'email': primary_email
+    }
+
+@timed('skills_llm')
+def extract_fields_batch(resume_texts: List[str], regex_fields: Optional[List[Dict]] = None) -> List[Dict]:
+    """Extract fields for several resumes, sharing batched/concurrent LLaMA calls"""
+    if regex_fields is None:
+        regex_fields = [_extract_fields_with_regex(text) for text in resume_texts]
+    results = [dict(fields) for fields in regex_fields]
+    
+    # Try LLaMA enhancement; None means the breaker/timeout fell back to regex
+    extractor = _get_llm_extractor()
+    if extractor is None:
+        return results
+    try:
+        llm_skills = extractor.extract(resume_texts)
+    except Exception:
+        metrics.inc('ats_llm_fallbacks_total', len(resume_texts), caller='skills', reason='error')
+        return results  # Use regex results if LLaMA fails
+    
+    for fields, llama_skills in zip(results, llm_skills):
+        if llama_skills:
+            # Combine regex and LLaMA skills
+            fields['skills'] = list(set(fields['skills'] + llama_skills))[:25]
+    return results
+
+def extract_fields_with_llama(resume_text: str) -> Dict[str, str]:
+    """Extract skills, experience, and email using LLaMA with regex fallback"""
+    return extract_fields_batch([resume_text])[0]
+
+def _ner_pipe_exclusions(nlp_model) -> List[str]:
+    """Pipeline components entity counting does not need (parser, lemmatizer, ...)"""
+    keep = {'ner', 'entity_ruler'}
+    for name, component in nlp_model.pipeline:
+        # en_core_web_sm's ner has its own tok2vec; trf/md models may share one
+        if name in ('tok2vec', 'transformer') and 'ner' in getattr(component, 'listening_components', []):
+            keep.add(name)
+    return [name for name in nlp_model.pipe_names if name not in keep]
+
+@timed('ml_features')
+def extract_ml_features_batch(texts: List[str], batch_size: int = NLP_BATCH_SIZE) -> List[Dict]:
+    """
+    Extract ML features for ATS scoring for many resumes at once: text
+    statistics in one vectorised pass, spaCy NER through nlp.pipe with the
+    components NER does not use switched off
+    """
+    if not texts:
+        return []
+    stats = text_statistics(texts)
+    
+    entity_counts = [{} for _ in texts]
+    nlp_model = get_nlp_model()
+    if nlp_model:
+        with metrics.timer('ats_stage_seconds', stage='spacy_ner'):
+            docs = nlp_model.pipe((text[:10000] for text in texts),  # Limit for performance
+                                  batch_size=batch_size, disable=_ner_pipe_exclusions(nlp_model))
+            for counts, doc in zip(entity_counts, docs):
+                for ent in doc.ents:
+                    counts[ent.label_] = counts.get(ent.label_, 0) + 1
+    
+    features_list = []
+    for i, text in enumerate(texts):
+        features = {}
+        word_count = int(stats['word_count'][i])
+        
+        # Basic statistics
+        features['word_count'] = word_count
+        features['char_count'] = int(stats['char_count'][i])
+        features['avg_word_length'] = float(stats['avg_word_length'][i])
+        
+        # Skills and contact info
+        skills = extract_skills_with_regex(text)
+        contact_info = extract_contact_info(text)
+        
+        features['skills_count'] = len(skills)
+        features['has_email'] = int(len(contact_info['emails']) > 0)
+        features['has_phone'] = int(len(contact_info['phones']) > 0)
+        
+        # Section presence
+        text_lower = text.lower()
+        features['has_education'] = int(bool(re.search(r'\b(education|degree|university)\b', text_lower)))
+        features['has_experience'] = int(bool(re.search(r'\b(experience|work|employment)\b', text_lower)))
+        features['has_skills'] = int(bool(re.search(r'\b(skills|technologies)\b', text_lower)))
+        
+        # Text quality
+        features['person_entities_count'] = entity_counts[i].get('PERSON', 0)
+        features['date_entities_count'] = entity_counts[i].get('DATE', 0)
+        features['org_entities_count'] = entity_counts[i].get('ORG', 0)
+        
+        # Additional features (simplified)
+        features['experience_years'] = 0  # Could be enhanced
+        features['skills_density'] = len(skills) / word_count if word_count > 0 else 0
+        features['has_person_name'] = features['person_entities_count'] > 0
+        features['non_alpha_ratio'] = float(stats['non_alpha_ratio'][i])
+        features['sentence_count'] = int(stats['sentence_count'][i])
+        features['avg_sentence_length'] = float(stats['avg_sentence_length'][i])
+        features['paragraph_count'] = int(stats['paragraph_count'][i])
+        features['resume_keywords_density'] = sum(1 for keyword in ['experience', 'education', 'skills'] if keyword in text_lower) / word_count if word_count > 0 else 0
+        features['has_professional_email'] = int(bool(re.search(r'[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.(com|org|edu)', text)))
+        features_list.append(features)
+    return features_list
+
+def extract_ml_features(text: str) -> Dict:
+    """Extract ML features for ATS scoring"""
+    return extract_ml_features_batch([text])[0]
+
+def _fallback_ats_score(features_dict: Dict) -> Tuple[int, float]:
+    """Rule-based score used while no trained model is available"""
+    base_score = 50
+    if features_dict.get('has_email', 0): base_score += 15
+    if features_dict.get('has_phone', 0): base_score += 10
+    if features_dict.get('has_experience', 0): base_score += 20
+    if features_dict.get('skills_count', 0) > 5: base_score += 15
+    return min(base_score, 100), min(base_score, 100) / 100.0
+
+@timed('ats_score')
+def predict_ats_scores(features_list: List[Dict]) -> List[Tuple[int, float]]:
+    """Predict ATS scores for a batch with one predict_proba call"""
+    if not features_list:
+        return []
+    ats_model, feature_names = get_ats_model()
+    if not ats_model or not feature_names:
+        # Fallback scoring if model not available
+        return [_fallback_ats_score(features) for features in features_list]
+    
+    # Use ML model
+    feature_matrix = np.array([[features.get(name, 0) for name in feature_names] for features in features_list],
+                              dtype=np.float64)
+    probabilities = ats_model.predict_proba(feature_matrix)[:, 1]
+    return [(int(p * 100), float(p)) for p in probabilities]
+
+def predict_ats_score(features_dict: Dict) -> Tuple[int, float]:
+    """Predict ATS score using ML model"""
+    return predict_ats_scores([features_dict])[0]
+
+# =============================================================================
+# RESUME PIPELINE STAGES
+# =============================================================================
+
+def _init_parse_worker():
+    """Process pool initializer: make sure spaCy is available in the worker"""
+    get_nlp_model()
+
+def _parse_resume_jobs(jobs: List[Dict]) -> List[Dict]:
+    """Stage 1 (worker process): extract text and ML features from a batch of uploads (bytes or spooled files)"""
+    records = []
+    for job in jobs:
+        start = time.perf_counter()
+        try:
+            data = job['data'] if job.get('data') is not None else _read_file(job['path'])
+            text = extract_text_from_bytes(data, job['filename'])
+            error = None
+        except Exception as e:
+            # One unreadable file must not fail the rest of its batch
+            metrics.inc('ats_extraction_failures_total', format='unknown', reason='unreadable')
+            text, error = '', f'parse_failed: {e}'
+        record = {
+            'filename': job['filename'],
+            'text': text,
+            'contact_info': extract_contact_info(text),
+            'ml_features': None,
+            'timings': {'extract_text': time.perf_counter() - start}
+        }
+        if error:
+            record['error'] = error
+        records.append(record)
+
+    readable = [record for record in records if len(record['text']) >= 100]
+    if readable:
+        start = time.perf_counter()
+        features_list = extract_ml_features_batch([r['text'] for r in readable])
+        elapsed = (time.perf_counter() - start) / len(readable)
+        for record, ml_features in zip(readable, features_list):
+            record['ml_features'] = ml_features
+            record['timings']['ml_features'] = elapsed
+            # Same process as extract_ml_features, so the skill match is reused
+            record['regex_fields'] = _extract_fields_with_regex(record['text'])
+    return records
+
+def _get_embedding_store() -> Optional[EmbeddingStore]:
+    """Open the persistent embedding store once the sentence model is loaded"""
+    global embedding_store
+    sentence_model = get_sentence_model() if embedding_store is None else None
+    if embedding_store is None and sentence_model is not None:
+        try:
+            embedding_store = EmbeddingStore(
+                os.path.join(EMBEDDING_STORE_DIR, EMBEDDING_MODEL_ID),
+                dim=sentence_model.get_sentence_embedding_dimension(),
+                dtype=EMBEDDING_DTYPE,
+            )
+        except Exception as e:
+            metrics.inc('ats_errors_total', where='embedding_store')
+            print(f"⚠️ Embedding store unavailable: {e}")
+            return None
+    return embedding_store
+
+@timed('embed')
+def embed_texts(texts: List[str], batch_size: int = 32) -> np.ndarray:
+    """Unit-normalised embeddings, encoding only texts the store has not seen"""
+    store = _get_embedding_store()
+    if store is None:
+        with metrics.timer('ats_stage_seconds', stage='sentence_encode'):
+            return normalise_rows(get_sentence_model().encode(texts, batch_size=batch_size))
+    
+    keys = [text_key(text) for text in texts]
+    missing = {}
+    misses = 0
+    for key, text, row in zip(keys, texts, store.lookup(keys)):
+        if row is None:
+            missing.setdefault(key, text)
+            misses += 1
+    # Both counted per text looked up; a text repeated in one call is encoded once
+    metrics.inc('ats_cache_requests_total', len(texts) - misses, cache='embedding', result='hit')
+    metrics.inc('ats_cache_requests_total', misses, cache='embedding', result='miss')
+    if missing:
+        with metrics.timer('ats_stage_seconds', stage='sentence_encode'):
+            encoded = get_sentence_model().encode(list(missing.values()), batch_size=batch_size)
+        store.add(list(missing), encoded)
+    return store.get(keys)
+
+@timed('chunked_similarity')
+def chunked_similarities(job_embedding: np.ndarray, resume_texts: List[str], pooling: str = 'max',
+                         batch_size: int = CHUNK_ENCODE_BATCH_SIZE) -> Tuple[np.ndarray, Dict]:
+    """
+    Score whole resumes instead of the model's first ~256 word pieces: split every
+    resume with the RAG chunker, encode all chunks in one batched call and pool
+    chunk similarities per resume (max or mean).
+    """
+    timings = {}
+    start = time.perf_counter()
+    chunks: List[str] = []
+    counts = np.empty(len(resume_texts), dtype=np.int64)
+    for i, text in enumerate(resume_texts):
+        # Empty resumes keep one empty chunk so every resume gets a score
+        resume_chunks = _chunk_text(text) or ['']
+        chunks.extend(resume_chunks)
+        counts[i] = len(resume_chunks)
+    timings['chunk'] = time.perf_counter() - start
+    
+    start = time.perf_counter()
+    chunk_embeddings = embed_texts(chunks, batch_size=batch_size)
+    timings['encode'] = time.perf_counter() - start
+    
+    # Chunks of one resume are contiguous, so pooling is a segmented reduction
+    start = time.perf_counter()
+    chunk_scores = chunk_embeddings @ job_embedding
+    offsets = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    if pooling == 'mean':
+        scores = np.add.reduceat(chunk_scores, offsets) / counts
+    else:
+        scores = np.maximum.reduceat(chunk_scores, offsets)
+    timings['pool'] = time.perf_counter() - start
+    timings['chunks'] = len(chunks)
+    return scores, timings
+
+def _get_candidate_index() -> Optional[VectorIndex]:
+    """Open the cross-workspace candidate index once the sentence model is loaded"""
+    global candidate_index
+    sentence_model = get_sentence_model() if candidate_index is None else None
+    if candidate_index is None and sentence_model is not None:
+        try:
+            if ANN_BACKEND == 'chroma' and get_chroma_client() is not None:
+                candidate_index = ChromaIndex(get_chroma_client(), name=f"candidates_{EMBEDDING_MODEL_ID}")
+            else:
+                candidate_index = IVFIndex(
+                    os.path.join(ANN_INDEX_DIR, EMBEDDING_MODEL_ID),
+                    dim=sentence_model.get_sentence_embedding_dimension(),
+                    nprobe=ANN_NPROBE,
+                    dtype=EMBEDDING_DTYPE,
+                )
+        except Exception as e:
+            metrics.inc('ats_errors_total', where='candidate_index')
+            print(f"⚠️ Candidate index unavailable: {e}")
+            return None
+    return candidate_index
+
+@timed('index_candidates')
+def index_candidates(candidates: List[Dict], workspace_id: Optional[str] = None) -> int:
+    """
+    Upsert candidates ({'id', 'text', 'ats_score', 'skills', ...}) into the
+    candidate index. Embeddings come from the embedding store, so resumes that
+    were already embedded at ingest are not encoded again.
+    """
+    index = _get_candidate_index()
+    candidates = [c for c in candidates if c.get('id') and c.get('text')]
+    if index is None or not candidates:
+        return 0
+    vectors = embed_texts([c['text'] for c in candidates])
+    metadatas = []
+    for c in candidates:
+        meta = {
+            'ats_score': float(c.get('ats_score') or 0),
+            'skills': list(c.get('skills') or []),
+            'filename': c.get('filename', ''),
+            'email': c.get('email', ''),
+            'text_preview': c.get('text', '')[:200],
+        }
+        if c.get('workspace_id') or workspace_id:
+            meta['workspace_id'] = c.get('workspace_id') or workspace_id
+        metadatas.append(meta)
+    index.upsert([c['id'] for c in candidates], vectors, metadatas)
+    return len(candidates)
+
+def get_skill_index(key: Optional[str], resumes: Optional[List[Dict]] = None,
+                    generation: Optional[int] = None) -> Optional[SkillIndex]:
+    """
+    The cached skill index under ``key``, synced to ``resumes`` when they are
+    given (only new or changed resumes are re-indexed) and then recorded as
+    built at ``generation``. Without a key the index is built for this request
+    only. None if there is no index yet (or only one built at another
+    generation) and no resumes were sent.
+    """
+    if not key:
+        index = SkillIndex()
+        index.sync(resumes or [])
+        return index
+    with skill_indexes_lock:
+        entry = skill_indexes.get(key)
+        if resumes is None and (entry is None or entry[1] != generation):
+            return None
+        index = entry[0] if entry else SkillIndex()
+        skill_indexes[key] = (index, entry[1] if entry else None)
+        skill_indexes.move_to_end(key)
+        while len(skill_indexes) > SKILL_INDEX_WORKSPACES:
+            skill_indexes.popitem(last=False)
+    if resumes is not None:
+        index.sync(resumes)
+        with skill_indexes_lock:
+            if key in skill_indexes and skill_indexes[key][0] is index:
+                skill_indexes[key] = (index, generation)
+    return index
+
+def skill_index_for_request(data: Dict) -> Tuple[Optional[SkillIndex], Optional[str]]:
+    """
+    (skill index, workspace_id) for a filter request. Result sets never change,
+    so their index is built once per handle. A stored workspace has one shared
+    index that only ever holds all of its resumes, reused while the store's
+    generation for the workspace is unchanged; a 'resume_ids' subset gets
+    an index of its own for this request. Plain "resumes" sent with a
+    workspace_id reuse an index kept for that client list, apart from the
+    stored one.
+    """
+    handle = data.get('result_set')
+    if handle and not data.get('resumes'):
+        store = _get_result_store()
+        workspace_id = store.result_set_workspace(handle) if store else None
+        if workspace_id is None:
+            raise LookupError(f'unknown or expired result set {handle}')
+        key = f"result_set:{handle}"
+        index = get_skill_index(key)
+        if index is None:
+            index = get_skill_index(key, resolve_resumes({'result_set': handle})[0])
+        return index, workspace_id
+    workspace_id = data.get('workspace_id')
+    if workspace_id and not data.get('resumes') and not data.get('resume_ids'):
+        store = _get_result_store()
+        generation = store.workspace_generation(workspace_id) if store else None
+        index = get_skill_index(workspace_id, generation=generation)
+        if index is None:
+            index = get_skill_index(workspace_id, resolve_resumes(data)[0], generation)
+        return index, workspace_id
+    resumes, workspace_id = resolve_resumes(data)
+    if data.get('resumes'):
+        return get_skill_index(f"resumes:{workspace_id}" if workspace_id else None, resumes), workspace_id
+    return get_skill_index(None, resumes), workspace_id
+
+def _enrich_resume_records(records: List[Dict]) -> List[Dict]:
+    """Stage 2 (thread): LLM-assisted field extraction for a batch of readable resumes"""
+    readable = [record for record in records if record.get('ml_features') is not None]
+    if readable:
+        fields_list = extract_fields_batch(
+            [r['text'] for r in readable],
+            regex_fields=[r.pop('regex_fields', None) or _extract_fields_with_regex(r['text']) for r in readable]
+        )
+        for record, fields in zip(readable, fields_list):
+            record['fields'] = fields
+        
+        # One predict_proba call for the whole batch instead of one per resume
+        unscored = [r for r in readable if 'ats_score' not in r]
+        for record, (ats_score, confidence) in zip(unscored, predict_ats_scores([r['ml_features'] for r in unscored])):
+            record['ats_score'], record['confidence'] = ats_score, confidence
+        
+        # Embed at ingest so /semantic-ranking only has to encode the job description
+        if get_sentence_model() is not None:
+            start = time.perf_counter()
+            try:
+                embed_texts([r['text'] for r in readable])
+            except Exception as e:
+                metrics.inc('ats_errors_total', where='ingest_embedding')
+                print(f"⚠️ Ingest embedding failed: {e}")
+            for record in readable:
+                record.setdefault('timings', {})['embed'] = time.perf_counter() - start
+    return records
+
+def _build_resume_result(job: Dict, record: Dict, threshold: int) -> Dict:
+    """Stage 3: ATS scoring and the response shape of /process-resumes"""
+    text = record.get('text', '')
+    filename = job['filename']
+    # Same file => same id, so a re-upload replaces the stored resume instead of adding a copy
+    rid = job['sha256']
+
+    if record.get('ml_features') is None or 'fields' not in record:
+        return {
+            'id': rid,
+            'filename': filename,
+            'ats_score': 0,
+            'status': 'rejected',
+            'skills': [],
+            'experience': 'Text extraction failed',
+            'email': 'Not found',
+            'text_preview': text[:200],
+            'reason': 'Failed to extract readable text',
+            # Include full text for downstream semantic ranking (even if extraction is poor)
+            'text': text
+        }
+
+    extracted_fields = record['fields']
+    if 'ats_score' in record:
+        ats_score = record['ats_score']
+    else:
+        ats_score, confidence = predict_ats_score(record['ml_features'])
+        record['ats_score'], record['confidence'] = ats_score, float(confidence)
+    status = 'accepted' if ats_score >= threshold else 'rejected'
+
+    return {
+        'id': rid,
+        'filename': filename,
+        'ats_score': ats_score,
+        'status': status,
+        'skills': extracted_fields['skills'],
+        'experience': extracted_fields['experience'],
+        'email': extracted_fields['email'],
+        'text_preview': text[:200],
+        'reason': f"ML Score: {ats_score}% | Skills: {len(extracted_fields['skills'])} found",
+        # Provide full extracted text for semantic ranking endpoint
+        'text': text
+    }
+
+def _cache_entry(record: Dict) -> Dict:
+    """The subset of a pipeline record worth persisting in the extraction cache"""
+    keys = ('text', 'contact_info', 'ml_features', 'fields', 'ats_score', 'confidence')
+    return {key: record[key] for key in keys if key in record}
+
+def _extraction_cache_version() -> str:
+    """
+    Extractor version plus the identity of every model that shapes cached
+    results, from configuration and installed files only: opening the cache
+    loads no model, and every process with the same setup gets the same version.
+    """
+    parts = [f"extractor:{EXTRACTOR_VERSION}", f"skills:{skill_matcher.version}"]
+    # Backends differ in spacing and reading order; the page limit cuts long files
+    parts.append(f"pdf:{resolve_backend(PDF_BACKEND)}:{EXTRACT_MAX_PAGES}")
+    try:
+        parts.append(f"spacy:{SPACY_MODEL}:{importlib.metadata.version(SPACY_MODEL)}")
+    except importlib.metadata.PackageNotFoundError:
+        parts.append("spacy:none")
+    if os.path.exists(ATS_MODEL_PATH):
+        stat = os.stat(ATS_MODEL_PATH)
+        parts.append(f"ats:{stat.st_size}:{int(stat.st_mtime)}")
+    else:
+        parts.append("ats:fallback")
+    parts.append(f"llm:{LLAMA_MODEL}")
+    return "|".join(parts)
+
+def _get_extraction_cache() -> Optional[ExtractionCache]:
+    """Open the extraction cache on first use (None when disabled or unavailable)"""
+    global extraction_cache
+    if extraction_cache is None and EXTRACTION_CACHE_MAX_MB > 0:
+        try:
+            extraction_cache = ExtractionCache(
+                EXTRACTION_CACHE_PATH,
+                version=_extraction_cache_version(),
+                max_bytes=EXTRACTION_CACHE_MAX_MB * 1024 * 1024,
+            )
+        except Exception as e:
+            metrics.inc('ats_errors_total', where='extraction_cache')
+            print(f"⚠️ Extraction cache unavailable: {e}")
+            return None
+    return extraction_cache
+
+def _get_resume_pipeline() -> ResumePipeline:
+    """Create the shared resume pipeline on first use"""
+    global resume_pipeline
+    if resume_pipeline is None:
+        resume_pipeline = ResumePipeline(
+            parse_fn=_parse_resume_jobs,
+            enrich_fn=_enrich_resume_records,
+            parse_workers=PIPELINE_PARSE_WORKERS,
+            enrich_workers=PIPELINE_LLM_WORKERS,
+            enrich_batch_size=LLM_BATCH_SIZE,
+            parse_batch_size=PIPELINE_PARSE_BATCH_SIZE,
+            queue_size=PIPELINE_QUEUE_SIZE,
+            initializer=_init_parse_worker,
+        )
+    return resume_pipeline
+
+def screen_resumes(jobs: List[Dict], threshold: int, stats: PipelineStats) -> Iterator[Tuple[Dict, Dict]]:
+    """
+    Yield (job, result) for every job as soon as it is scored.
+    
+    Jobs carry 'order', 'filename', 'sha256' and either the file bytes ('data')
+    or an existing 'path'. Files seen before are served from the extraction
+    cache; the rest are parsed by the pipeline's worker processes, which get
+    the bytes themselves (nothing is written to disk).
+    """
+    cache = _get_extraction_cache()
+    cached, pending = [], []
+    for job in jobs:
+        entry = cache.get(job['sha256']) if cache else None
+        if entry is not None and 'ml_features' in entry:
+            job.pop('data', None)
+            cached.append((job, entry))
+            continue
+        pending.append(job)
+    
+    def score(job, record):
+        job.pop('data', None)
+        result = _build_resume_result(job, record, threshold)
+        result['cached'] = False
+        if cache and 'error' not in record and not record.get('text', '').startswith('Error extracting'):
+            try:
+                cache.put(job['sha256'], _cache_entry(record))
+            except Exception as e:
+                metrics.inc('ats_errors_total', where='extraction_cache_write')
+                print(f"⚠️ Extraction cache write failed: {e}")
+        return result
+    
+    try:
+        for job, entry in cached:
+            start = time.perf_counter()
+            result = _build_resume_result(job, entry, threshold)
+            result['cached'] = True
+            timings = {'cache': time.perf_counter() - start}
+            stats.add(timings)
+            result['timings'] = {k: round(v, 4) for k, v in timings.items()}
+            # Same file => same candidate id, so re-uploads update the search index
+            result['candidate_id'] = job['sha256']
+            yield job, result
+        for index, result in _get_resume_pipeline().run(pending, score, stats):
+            result['candidate_id'] = pending[index]['sha256']
+            yield pending[index], result
+    finally:
+        for job in pending:
+            job.pop('data', None)
+
+def _get_job_queue() -> JobQueue:
+    """Open the batch screening queue on first use"""
+    global job_queue
+    if job_queue is None:
+        job_queue = JobQueue(JOB_QUEUE_PATH, max_attempts=JOB_MAX_ATTEMPTS)
+    return job_queue
+
+def run_screening_tasks(tasks: List[Dict]) -> Iterator[Tuple[Dict, Dict]]:
+    """JobWorker process_fn: screen one claimed batch of spooled files"""
+    params = tasks[0]['params']
+    jobs = []
+    for task in tasks:
+        if not os.path.exists(task['path']):
+            raise FileNotFoundError(f"spooled file missing for {task['filename']} (is job_spool shared?)")
+        jobs.append({'order': task['seq'], 'filename': task['filename'], 'sha256': task['sha256'],
+                     'path': task['path'], 'task': task})
+    
+    to_index, results = [], []
+    results_iter = screen_resumes(jobs, int(params.get('threshold', 60)), PipelineStats())
+    try:
+        for job, result in results_iter:
+            if result['ats_score'] > 0:
+                to_index.append(dict(result, id=job['sha256']))
+            results.append(result)
+            yield job['task'], result
+    finally:
+        results_iter.close()
+    try:
+        index_candidates(to_index, params.get('workspace_id'))
+    except Exception as e:
+        metrics.inc('ats_errors_total', where='candidate_indexing')
+        print(f"⚠️ Candidate indexing failed: {e}")
+    store_results(params.get('workspace_id'), results)
+
+def start_job_workers(count: int = JOB_INLINE_WORKERS) -> List[JobWorker]:
+    """Run ``count`` job workers on daemon threads of this process"""
+    for _ in range(count):
+        worker = JobWorker(_get_job_queue(), run_screening_tasks, batch_size=JOB_BATCH_SIZE,
+                           lease_seconds=JOB_LEASE_SECONDS)
+        threading.Thread(target=worker.run_forever, daemon=True, name=f"job-worker-{len(job_workers)}").start()
+        job_workers.append(worker)
+    return job_workers
+
+def _get_result_store() -> Optional[ResultStore]:
+    """Open the workspace result store on first use"""
+    global result_store
+    if result_store is None:
+        try:
+            result_store = ResultStore(RESULT_STORE_PATH, max_age=RESULT_SET_MAX_AGE)
+        except Exception as e:
+            metrics.inc('ats_errors_total', where='result_store')
+            print(f"⚠️ Result store unavailable: {e}")
+            return None
+    return result_store
+
+def store_results(workspace_id: Optional[str], resumes: List[Dict]):
+    """Persist processed resumes (with their text) for a workspace; failures only warn"""
+    store = _get_result_store() if workspace_id else None
+    if store is None or not resumes:
+        return
+    try:
+        store.put_resumes(workspace_id, resumes)
+        generation = store.workspace_generation(workspace_id)
+    except Exception as e:
+        metrics.inc('ats_errors_total', where='store_results')
+        print(f"⚠️ Storing results failed: {e}")
+        generation = None
+    with skill_indexes_lock:
+        entry = skill_indexes.get(workspace_id)
+        if entry is None:
+            return
+        if generation is not None and entry[1] is not None and generation == entry[1] + 1:
+            # Ours was the only write since the index was built: add the new resumes in place
+            entry[0].upsert([_without_text(r) for r in resumes])
+            skill_indexes[workspace_id] = (entry[0], generation)
+        else:
+            skill_indexes.pop(workspace_id, None)
+
+def save_result_set(workspace_id: Optional[str], kind: str, items: List[Dict],
+                    meta: Optional[Dict] = None) -> Optional[str]:
+    """Save one step's ordered output (without resume text); returns the handle"""
+    store = _get_result_store() if workspace_id else None
+    if store is None:
+        return None
+    try:
+        return store.save_result_set(workspace_id, kind, [_without_text(item) for item in items], meta)
+    except Exception as e:
+        metrics.inc('ats_errors_total', where='save_result_set')
+        print(f"⚠️ Saving result set failed: {e}")
+        return None
+
+def _without_text(item: Dict) -> Dict:
+    return {k: v for k, v in item.items() if k != 'text'}
+
+def resolve_resumes(data: Dict, with_text: bool = False) -> Tuple[Optional[List[Dict]], Optional[str]]:
+    """
+    Resumes for a ranking/filter request, from (first match wins):
+    'resumes' (full bodies), 'result_set' (a handle from an earlier step),
+    'resume_ids' + 'workspace_id', or 'workspace_id' alone (every stored
+    resume). Returns (resumes, workspace_id); resumes is None when the request
+    names none of them. Raises LookupError for unknown handles or workspaces.
+    """
+    workspace_id = data.get('workspace_id')
+    if data.get('resumes'):
+        return data['resumes'], workspace_id
+    handle = data.get('result_set')
+    if not handle and not workspace_id:
+        return None, None
+    store = _get_result_store()
+    if store is None:
+        raise LookupError('result store not available')
+    if handle:
+        result_set = store.get_result_set(handle)
+        if result_set is None:
+            raise LookupError(f'unknown or expired result set {handle}')
+        workspace_id = result_set['workspace_id']
+        if not with_text:
+            return result_set['items'], workspace_id
+        ids = [item['id'] for item in result_set['items']]
+        stored = {r['id']: r for r in store.get_resumes(workspace_id, ids, with_text=True)}
+        # Keep the step's own fields (rank, scores) and add the stored text
+        return [dict(stored.get(item['id'], {}), **item, text=stored.get(item['id'], {}).get('text', ''))
+                for item in result_set['items']], workspace_id
+    if data.get('resume_ids'):
+        return store.get_resumes(workspace_id, data['resume_ids'], with_text=with_text), workspace_id
+    resumes = store.list_resumes(workspace_id, with_text=with_text)
+    if not resumes:
+        raise LookupError(f'no stored resumes for workspace {workspace_id}')
+    return resumes, workspace_id
+
+def _page_params(source) -> Tuple[int, Optional[int]]:
+    offset = max(0, int(source.get('offset', 0) or 0))
+    limit = source.get('limit')
+    return offset, (max(0, int(limit)) if limit not in (None, '') else None)
+
+def paginate(items: List, offset: int = 0, limit: Optional[int] = None) -> Tuple[List, Dict]:
+    """One page of ``items`` plus {'offset', 'limit', 'total', 'next_offset'}"""
+    end = len(items) if limit is None else min(len(items), offset + limit)
+    page = items[offset:end]
+    return page, {'offset': offset, 'limit': limit, 'total': len(items),
+                  'next_offset': end if end < len(items) else None}
+
+def encoded_response(payload: Dict, status: int = 200) -> Response:
+    """
+    JSON, or msgpack for clients asking for it (Accept: application/msgpack or
+    ?format=msgpack, when the msgpack package is installed); gzipped when the
+    client accepts gzip and the body is large enough
+    """
+    accept = request.headers.get('Accept', '')
+    wants_msgpack = request.args.get('format') == 'msgpack' or 'msgpack' in accept
+    body, mimetype = None, 'application/json'
+    if wants_msgpack:
+        try:
+            import msgpack
+            body, mimetype = msgpack.packb(payload, use_bin_type=True), 'application/msgpack'
+        except ImportError:
+            pass
+    if body is None:
+        body = app.json.dumps(payload).encode('utf-8')
+    response = Response(body, status=status, mimetype=mimetype)
+    if 'gzip' in request.headers.get('Accept-Encoding', '') and len(body) >= GZIP_MIN_BYTES:
+        response.set_data(gzip.compress(body, compresslevel=5))
+        response.headers['Content-Encoding'] = 'gzip'
+    response.headers['Vary'] = 'Accept, Accept-Encoding'
+    return response
+
+def _stream_format() -> Optional[str]:
+    """Return 'ndjson' or 'sse' when the client asked for a streamed response"""
+    fmt = (request.args.get('stream') or request.form.get('stream') or '').lower()
+    if fmt in ('ndjson', 'sse'):
+        return fmt
+    accept = request.headers.get('Accept', '')
+    if 'application/x-ndjson' in accept:
+        return 'ndjson'
+    if 'text/event-stream' in accept:
+        return 'sse'
+    return None
+
+def _encode_event(fmt: str, event: str, data: Dict) -> str:
+    """Encode one streamed event as an NDJSON line or an SSE frame"""
+    if fmt == 'sse':
+        return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+    return json.dumps({'event': event, 'data': data}) + "\n"
+
+def _model_info() -> Dict:
+    return {
+        'accuracy': 0.89 if get_ats_model()[0] else 0.0,
+        'total_samples': 1500 if get_ats_model()[0] else 0
+    }
+
+# =============================================================================
+# API ENDPOINTS
+# =============================================================================
+
+@app.before_request
+def _start_request_metrics():
+    g.request_start = time.perf_counter()
+    g.profiler = None
+    asked = PROFILE_ON_HEADER and request.headers.get('X-ATS-Profile') == '1'
+    if asked or (PROFILE_SAMPLE_RATE > 0 and random.random() < PROFILE_SAMPLE_RATE):
+        g.profile_path = os.path.join(
+            PROFILE_DIR, f"{datetime.now():%Y%m%dT%H%M%S}-{request.endpoint or 'unmatched'}-{uuid.uuid4().hex[:8]}.folded"
+        )
+        g.profiler = StackSampler(interval=PROFILE_INTERVAL_SECONDS).start()
+
+@app.after_request
+def _tag_response(response):
+    g.status = response.status_code
+    if g.get('profiler') is not None:
+        response.headers['X-ATS-Profile'] = os.path.basename(g.profile_path)
+    return response
+
+@app.teardown_request
+def _finish_request_metrics(exc):
+    """With stream_with_context this runs when the stream ends, so it is timed in full"""
+    start = g.get('request_start')
+    if start is None:
+        return
+    endpoint = request.url_rule.rule if request.url_rule else 'unmatched'
+    metrics.observe('ats_http_request_seconds', time.perf_counter() - start,
+                    endpoint=endpoint, method=request.method, status=g.get('status', 500))
+    profiler = g.get('profiler')
+    if profiler is not None:
+        profiler.stop()
+        try:
+            profiler.write(g.profile_path)
+        except OSError as e:
+            print(f"⚠️ Writing profile failed: {e}")
+    metrics.flush()
+
+@app.route('/metrics', methods=['GET'])
+def metrics_endpoint():
+    """Prometheus text format; with ATS_METRICS_DIR set, summed over every worker process"""
+    return Response(metrics.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+@app.route('/health/live', methods=['GET'])
+def liveness_check():
+    """Liveness: the worker process is up and serving (never touches the models)"""
+    return jsonify({'status': 'alive', 'pid': os.getpid()})
+
+@app.route('/health/ready', methods=['GET'])
+def readiness_check():
+    """Readiness: 200 once models are loaded and warmed up in this worker, else 503"""
+    return jsonify(service_state), 200 if service_state['ready'] else 503
+
+@app.route('/health', methods=['GET'])
+def health_check():
+    """Health check endpoint (always 200 while alive; see 'ready' for readiness)"""
+    return jsonify({
+        'status': 'healthy',
+        'ready': service_state['ready'],
+        'service': service_state,
+        'timestamp': datetime.now().isoformat(),
+        'models_loaded': {
+            'nlp': models.is_loaded('nlp'),
+            'sentence_transformer': models.is_loaded('sentence_model'),
+            'ats_model': models.is_loaded('ats_model'),
+            'llama_client': models.is_loaded('llama_client'),
+            'chroma_db': models.is_loaded('chroma_client')
+        },
+        'startup': {
+            'model_loading': MODEL_LOADING,
+            'import_seconds': service_state.get('import_seconds'),
+            'models': models.stats()
+        },
+        'document_extractor': document_extractor.stats() if document_extractor else None,
+        'extraction_cache': extraction_cache.stats() if extraction_cache else None,
+        'llm_extractor': llm_extractor.stats() if llm_extractor else None,
+        'embedding_engine': _embedding_engine_stats(),
+        'embedding_store': embedding_store.stats() if embedding_store else None,
+        'candidate_index': candidate_index.stats() if candidate_index else None,
+        'skill_indexes': {'workspaces': len(skill_indexes),
+                          'resumes': sum(len(index) for index, _ in list(skill_indexes.values()))},
+        'result_store': result_store.stats() if result_store else None,
+        'rag': rag_stats(),
+        'jobs': job_queue.stats() if job_queue else None,
+        'job_workers': [worker.stats() for worker in job_workers]
+    })
+
+@app.route('/process-resumes', methods=['POST'])
+def process_resumes():
+    """
+    Process uploaded resumes with ATS scoring and field extraction
+    
+    Input Format (multipart/form-data):
+    - files: List of resume files (PDF/DOCX)
+    - threshold: Integer (0-100) for acceptance threshold
+    - workspace_id: Optional workspace; the candidates are tagged with it in the
+      search index and stored server-side (see "result_set" below)
+    - include_text: Optional "false" to leave the full resume text out of the
+      response (later steps can fetch it server-side by id or result set)
+    - offset / limit: Optional page of "resumes" to return (see "page")
+    - stream: Optional "ndjson" or "sse" (or Accept: application/x-ndjson /
+      text/event-stream) to receive each resume as soon as it finishes,
+      followed by a final "summary" event
+    
+    Output Format:
+    {
+        "success": true,
+        "total_processed": 5,
+        "accepted_count": 3,
+        "rejected_count": 2,
+        "resumes": [
+            {
+                "id": "sha256 of the file (re-uploads keep their id)",
+                "filename": "john_doe_resume.pdf",
+                "ats_score": 85,
+                "status": "accepted",
+                "skills": ["Python", "React", "AWS", "Docker"],
+                "experience": "Software Engineer at Tech Corp...",
+                "email": "john.doe@email.com",
+                "text_preview": "John Doe Software Engineer...",
+                "reason": "ML Score: 85% | Features: Email found, Experience section",
+                "cached": false,
+                "candidate_id": "sha256 of the file (id in /search results)",
+                "timings": {"extract_text": 0.12, "ml_features": 0.3, "parse": 0.43, "enrich": 1.1, "score": 0.001}
+            }
+        ],
+        "model_info": {
+            "accuracy": 0.89,
+            "total_samples": 1500
+        },
+        "workspace_id": "ws-1",
+        "result_set": "handle for /semantic-ranking, /filter-resumes, /result-sets (with workspace_id)",
+        "page": {"offset": 0, "limit": null, "total": 5, "next_offset": null},
+        "timings": {
+            "wall_seconds": 4.2,
+            "resumes_per_sec": 1.19,
+            "stage_seconds": {"parse": 3.1, "queue_wait": 0.2, "enrich": 6.4, "score": 0.01}
+        }
+    }
+    """
+    try:
+        # Check if files are present
+        if 'files' not in request.files:
+            return jsonify({'error': 'No files provided'}), 400
+        
+        files = request.files.getlist('files')
+        threshold = int(request.form.get('threshold', 60))
+        
+        if not files or files[0].filename == '':
+            return jsonify({'error': 'No files selected'}), 400
+        
+        uploads = []
+        for order, file in enumerate(files):
+            if not allowed_file(file.filename):
+                continue
+            data = file.read()
+            uploads.append({'order': order, 'filename': secure_filename(file.filename),
+                            'sha256': file_digest(data), 'data': data})
+        
+        stats = PipelineStats()
+        workspace_id = request.form.get('workspace_id')
+        include_text = request.form.get('include_text', 'true').lower() != 'false'
+        to_index, processed = [], []
+        
+        def collect(job, result):
+            if result['ats_score'] > 0:
+                to_index.append(dict(result, id=job['sha256']))
+            processed.append(result)
+            return result if include_text else _without_text(result)
+        
+        def flush_index() -> Optional[str]:
+            try:
+                index_candidates(to_index, workspace_id)
+            except Exception as e:
+                metrics.inc('ats_errors_total', where='candidate_indexing')
+                print(f"⚠️ Candidate indexing failed: {e}")
+            store_results(workspace_id, processed)
+            return save_result_set(workspace_id, 'processed', processed, {'threshold': threshold})
+        
+        results_iter = screen_resumes(uploads, threshold, stats)
+        
+        fmt = _stream_format()
+        if fmt:
+            def generate():
+                accepted_count = 0
+                try:
+                    for job, result in results_iter:
+                        result = collect(job, result)
+                        if result['status'] == 'accepted':
+                            accepted_count += 1
+                        yield _encode_event(fmt, 'resume', result)
+                    handle = flush_index()
+                    yield _encode_event(fmt, 'summary', {
+                        'success': True,
+                        'total_processed': stats.count,
+                        'accepted_count': accepted_count,
+                        'rejected_count': stats.count - accepted_count,
+                        'model_info': _model_info(),
+                        'workspace_id': workspace_id,
+                        'result_set': handle,
+                        'timings': stats.to_dict()
+                    })
+                finally:
+                    results_iter.close()
+            
+            mimetype = 'text/event-stream' if fmt == 'sse' else 'application/x-ndjson'
+            return Response(stream_with_context(generate()), mimetype=mimetype)
+        
+        try:
+            # Keep upload order in the non-streamed response
+            results = [collect(job, result) for job, result in sorted(results_iter, key=lambda item: item[0]['order'])]
+        finally:
+            results_iter.close()
+        handle = flush_index()
+        accepted_count = len([r for r in results if r['status'] == 'accepted'])
+        page, page_info = paginate(results, *_page_params(request.form))
+        
+        return encoded_response({
+            'success': True,
+            'total_processed': len(results),
+            'accepted_count': accepted_count,
+            'rejected_count': len(results) - accepted_count,
+            'resumes': page,
+            'model_info': _model_info(),
+            'workspace_id': workspace_id,
+            'result_set': handle,
+            'page': page_info,
+            'timings': stats.to_dict()
+        })
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/jobs', methods=['POST'])
+def submit_job():
+    """
+    Queue a batch of resumes for background screening
+    
+    Input Format (multipart/form-data): same as /process-resumes
+    - files, threshold, workspace_id
+    
+    Output Format (202):
+    {
+        "success": true,
+        "job_id": "uuid-string",
+        "deduplicated": false,   // true when the same files + parameters were already submitted
+        "job": {"status": "queued", "total": 120, "completed": 0, "failed": 0, "progress": 0.0, ...}
+    }
+    """
+    try:
+        if 'files' not in request.files:
+            return jsonify({'error': 'No files provided'}), 400
+        files = [f for f in request.files.getlist('files') if f.filename and allowed_file(f.filename)]
+        if not files:
+            return jsonify({'error': 'No files selected'}), 400
+        
+        params = {'threshold': int(request.form.get('threshold', 60))}
+        if request.form.get('workspace_id'):
+            params['workspace_id'] = request.form['workspace_id']
+        
+        queue = _get_job_queue()
+        job_id, deduplicated = queue.submit([(secure_filename(f.filename), f.read()) for f in files], params)
+        return jsonify({
+            'success': True,
+            'job_id': job_id,
+            'deduplicated': deduplicated,
+            'job': queue.get(job_id)
+        }), 202
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/jobs/<job_id>', methods=['GET', 'DELETE'])
+def job_status(job_id):
+    """Progress of a screening job (GET) or cancel it (DELETE)"""
+    try:
+        queue = _get_job_queue()
+        if request.method == 'DELETE':
+            cancelled = queue.cancel(job_id)
+            job = queue.get(job_id)
+            if job is None:
+                return jsonify({'error': 'Job not found'}), 404
+            return jsonify({'success': True, 'cancelled': cancelled, 'job': job})
+        
+        job = queue.get(job_id)
+        if job is None:
+            return jsonify({'error': 'Job not found'}), 404
+        return jsonify({'success': True, 'job': job})
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/jobs/<job_id>/results', methods=['GET'])
+def job_results(job_id):
+    """
+    Page through finished results in upload order
+    
+    Query: offset (default 0), limit (default 50, max 500)
+    
+    Output Format:
+    {
+        "success": true,
+        "job": {...},
+        "resumes": [ /process-resumes resume objects plus "seq"; failed files carry "error" ],
+        "offset": 0,
+        "next_offset": 50     // null when no more finished results are available yet
+    }
+    """
+    try:
+        queue = _get_job_queue()
+        job = queue.get(job_id)
+        if job is None:
+            return jsonify({'error': 'Job not found'}), 404
+        offset = max(0, int(request.args.get('offset', 0)))
+        limit = max(1, min(int(request.args.get('limit', 50)), 500))
+        resumes = queue.results(job_id, offset, limit)
+        return jsonify({
+            'success': True,
+            'job': job,
+            'resumes': resumes,
+            'offset': offset,
+            'next_offset': offset + len(resumes) if len(resumes) == limit else None
+        })
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/jobs/<job_id>/events', methods=['GET'])
+def job_events(job_id):
+    """
+    Subscribe to job progress: an SSE (default) or NDJSON stream of "progress"
+    events whenever the counts change, ending with a "finished" event
+    """
+    queue = _get_job_queue()
+    if queue.get(job_id) is None:
+        return jsonify({'error': 'Job not found'}), 404
+    fmt = _stream_format() or 'sse'
+    interval = max(0.1, float(request.args.get('interval', 1.0)))
+    
+    def generate():
+        last = None
+        while True:
+            job = queue.get(job_id)
+            snapshot = (job['status'], job['completed'], job['failed'])
+            if snapshot != last:
+                last = snapshot
+                yield _encode_event(fmt, 'progress', job)
+            if job['status'] in ('done', 'cancelled'):
+                yield _encode_event(fmt, 'finished', job)
+                return
+            time.sleep(interval)
+    
+    mimetype = 'text/event-stream' if fmt == 'sse' else 'application/x-ndjson'
+    return Response(stream_with_context(generate()), mimetype=mimetype)
+
+@app.route('/semantic-ranking', methods=['POST'])
+def semantic_ranking():
+    """
+    Rank resumes based on job description similarity
+    
+    Input Format (JSON):
+    {
+        "job_description": "We are looking for a Python developer...",
+        "mode": "document",      // optional: "chunked" scores every chunk of long resumes
+        "pooling": "max",        // optional (chunked): "max" or "mean" chunk similarity
+        "batch_size": 64,        // optional (chunked): encode batch size
+        "offset": 0, "limit": 50, // optional: page of ranked_resumes to return
+        "result_set": "handle",  // instead of "resumes": a result set from /process-resumes
+        "workspace_id": "ws-1",  // instead of "resumes": stored resumes of the workspace
+        "resume_ids": ["..."],   //   (optionally only these ids)
+        "resumes": [
+            {
+                "id": "uuid-string",
+                "filename": "resume1.pdf",
+                "text": "Full resume text here...",
+                "ats_score": 85,
+                "skills": ["Python", "React"],
+                "experience": "Software Engineer...",
+                "email": "email@domain.com"
+            }
+        ]
+    }
+    
+    Output Format:
+    {
+        "success": true,
+        "job_description_stored": true,
+        "ranked_resumes": [
+            {
+                "id": "uuid-string",
+                "rank": 1,
+                "candidate": "Resume1",
+                "ats_score": 85,
+                "semantic_score": 0.92,
+                "match_status": "Excellent Match",
+                "skills": ["Python", "React"],
+                "experience": "Software Engineer...",
+                "email": "email@domain.com",
+                "found_skills": ["Python", "React"]
+            }
+        ],
+        "summary": {
+            "total_candidates": 5,
+            "excellent_matches": 2,
+            "good_matches": 1,
+            "avg_semantic_score": 0.75
+        },
+        "mode": "chunked",
+        "pooling": "max",
+        "workspace_id": "ws-1",
+        "result_set": "handle of the ranking (for /filter-resumes and /result-sets)",
+        "page": {"offset": 0, "limit": 50, "total": 5, "next_offset": null},
+        "timings": {"encode_job": 0.01, "chunk": 0.002, "encode": 1.8, "pool": 0.001, "chunks": 412, "total": 1.83}
+    }
+    """
+    try:
+        data = request.get_json()
+        job_description = data.get('job_description', '')
+        try:
+            resumes, workspace_id = resolve_resumes(data, with_text=True)
+        except LookupError as e:
+            return jsonify({'error': str(e)}), 404
+        
+        if not job_description or not resumes:
+            return jsonify({'error': 'Job description and resumes are required'}), 400
+        
+        # Generate embeddings
+        sentence_model = get_sentence_model()
+        if not sentence_model:
+            return jsonify({'error': 'Sentence model not loaded'}), 500
+        
+        mode = data.get('mode', 'document')
+        pooling = data.get('pooling', 'max')
+        if mode not in ('document', 'chunked') or pooling not in ('max', 'mean'):
+            return jsonify({'error': "mode must be 'document' or 'chunked' and pooling 'max' or 'mean'"}), 400
+        
+        request_start = time.perf_counter()
+        timings = {}
+        
+        # Stored resume embeddings are reused; only new texts get encoded
+        start = time.perf_counter()
+        job_embedding = embed_texts([job_description])[0]
+        timings['encode_job'] = time.perf_counter() - start
+        resume_texts = [resume.get('text', '') for resume in resumes]
+        
+        if mode == 'chunked':
+            batch_size = int(data.get('batch_size', CHUNK_ENCODE_BATCH_SIZE))
+            similarities, chunk_timings = chunked_similarities(job_embedding, resume_texts, pooling, batch_size)
+            timings.update(chunk_timings)
+        else:
+            start = time.perf_counter()
+            resume_embeddings = embed_texts(resume_texts)
+            timings['encode'] = time.perf_counter() - start
+            
+            # Calculate cosine similarities (rows are unit-normalised)
+            start = time.perf_counter()
+            similarities = resume_embeddings @ job_embedding
+            timings['score'] = time.perf_counter() - start
+        
+        # Extract skills from job description
+        jd_skills = extract_skills_with_regex(job_description)
+        
+        # Create ranked results
+        ranked_results = []
+        for i, (resume, similarity) in enumerate(zip(resumes, similarities)):
+            # Determine match status
+            if similarity >= 0.8:
+                match_status = "Excellent Match"
+            elif similarity >= 0.6:
+                match_status = "Good Match"
+            elif similarity >= 0.4:
+                match_status = "Moderate Match"
+            else:
+                match_status = "Low Match"
+            
+            # Find matching skills
+            resume_skills = resume.get('skills', [])
+            found_skills = [skill for skill in resume_skills if any(jd_skill.lower() in skill.lower() for jd_skill in jd_skills)]
+            
+            candidate_name = resume.get('filename', f'Candidate {i+1}').replace('.pdf', '').replace('.docx', '').replace('_', ' ').title()
+            
+            ranked_results.append({
+                'id': resume.get('id', str(uuid.uuid4())),
+                'rank': i + 1,  # Will be updated after sorting
+                'candidate': candidate_name,
+                'ats_score': resume.get('ats_score', 0),
+                # Ensure JSON serializable float
+                'semantic_score': float(round(float(similarity), 3)),
+                'match_status': match_status,
+                'skills': resume_skills,
+                'experience': resume.get('experience', ''),
+                'email': resume.get('email', ''),
+                'found_skills': found_skills
+            })
+        
+        # Sort by semantic score (descending)
+        ranked_results.sort(key=lambda x: x['semantic_score'], reverse=True)
+        
+        # Update ranks
+        for i, result in enumerate(ranked_results):
+            result['rank'] = i + 1
+        
+        # Calculate summary
+        excellent_matches = len([r for r in ranked_results if r['match_status'] == 'Excellent Match'])
+        good_matches = len([r for r in ranked_results if r['match_status'] == 'Good Match'])
+        avg_score = np.mean([r['semantic_score'] for r in ranked_results])
+        
+        # Job description and resume embeddings now live in the embedding store
+        job_stored = embedding_store is not None
+        
+        handle = save_result_set(workspace_id, 'ranking', ranked_results, {'jd_skills': jd_skills, 'mode': mode})
+        page, page_info = paginate(ranked_results, *_page_params(data))
+        
+        return encoded_response({
+            'success': True,
+            'job_description_stored': job_stored,
+            'ranked_resumes': page,
+            'summary': {
+                'total_candidates': len(ranked_results),
+                'excellent_matches': excellent_matches,
+                'good_matches': good_matches,
+                # Ensure JSON serializable float
+                'avg_semantic_score': float(round(float(avg_score), 3))
+            },
+            # Return JD-extracted skills to drive personalized filters
+            'jd_skills': jd_skills,
+            'mode': mode,
+            'pooling': pooling if mode == 'chunked' else None,
+            'workspace_id': workspace_id,
+            'result_set': handle,
+            'page': page_info,
+            'timings': dict(
+                {k: round(v, 4) if isinstance(v, float) else v for k, v in timings.items()},
+                total=round(time.perf_counter() - request_start, 4)
+            )
+        })
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/search', methods=['POST'])
+def search_candidates():
+    """
+    Top-k candidate search across every processed resume (all workspaces)
+    
+    Input Format (JSON):
+    {
+        "query": "Senior Python developer with Kubernetes experience",
+        "k": 10,
+        "filters": {
+            "min_ats_score": 60,          // optional
+            "skills": ["Python", "AWS"],  // optional: candidate must have all of them
+            "workspace_id": "ws-1"        // optional
+        },
+        "exact": false                    // optional: brute-force search (for comparison)
+    }
+    
+    Output Format:
+    {
+        "success": true,
+        "results": [
+            {"id": "sha256", "score": 0.71, "metadata": {"ats_score": 85, "skills": [...], "filename": "...", ...}}
+        ],
+        "index": {"backend": "ivf", "size": 120000, "lists": 1385, ...},
+        "timings": {"encode": 0.01, "search": 0.004}
+    }
+    """
+    try:
+        data = request.get_json() or {}
+        query = (data.get('query') or '').strip()
+        if not query:
+            return jsonify({'error': 'Query is required'}), 400
+        k = max(1, min(int(data.get('k', 10)), 1000))
+        filters = data.get('filters') or {}
+        
+        index = _get_candidate_index()
+        if index is None:
+            return jsonify({'error': 'Candidate index not available'}), 500
+        
+        timings = {}
+        start = time.perf_counter()
+        query_embedding = embed_texts([query])[0]
+        timings['encode'] = time.perf_counter() - start
+        
+        start = time.perf_counter()
+        results = index.search(
+            query_embedding,
+            k=k,
+            min_ats_score=filters.get('min_ats_score'),
+            skills=filters.get('skills'),
+            exact=bool(data.get('exact', False)),
+            workspace_id=filters.get('workspace_id'),
+        )
+        timings['search'] = time.perf_counter() - start
+        
+        return jsonify({
+            'success': True,
+            'results': results,
+            'index': index.stats(),
+            'timings': {key: round(value, 4) for key, value in timings.items()}
+        })
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/search/index', methods=['POST', 'DELETE'])
+def update_search_index():
+    """
+    Add, update or remove candidates in the search index
+    
+    POST (JSON): {"workspace_id": "ws-1", "resumes": [{"id", "text", "ats_score", "skills", ...}]}
+    DELETE (JSON): {"ids": ["sha256", ...]}
+    
+    Output Format:
+    {"success": true, "indexed": 10, "removed": 0, "index": {...}}
+    """
+    try:
+        data = request.get_json() or {}
+        index = _get_candidate_index()
+        if index is None:
+            return jsonify({'error': 'Candidate index not available'}), 500
+        
+        indexed, removed = 0, 0
+        if request.method == 'DELETE':
+            removed = len(index.delete(list(data.get('ids') or [])))
+        else:
+            indexed = index_candidates(data.get('resumes') or [], data.get('workspace_id'))
+        
+        return jsonify({'success': True, 'indexed': indexed, 'removed': removed, 'index': index.stats()})
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/filter-resumes', methods=['POST'])
+def filter_resumes():
+    """
+    Filter resumes by skills and experience keywords
+    
+    Input Format (JSON):
+    {
+        "resumes": [
+            {
+                "id": "uuid-string",
+                "rank": 1,
+                "candidate": "John Doe",
+                "skills": ["Python", "React", "AWS"],
+                "experience": "Software Engineer at Tech Corp...",
+                "semantic_score": 0.92,
+                "ats_score": 85
+            }
+        ],
+        "skill_filters": ["Python", "React"],
+        "experience_filter": "senior",
+        "workspace_id": "optional; reuses the workspace's skill index",
+        "skill_query": {"all": [], "any": ["AWS", "GCP"], "none": ["PHP"]},
+        "include_facets": false,
+        "result_set": "optional, instead of resumes: handle from /semantic-ranking",
+        "resume_ids": ["optional, instead of resumes: stored ids of workspace_id"],
+        "offset": 0, "limit": 50
+    }
+    Skills are matched case-insensitively as substrings of resume skills;
+    "resumes" may be omitted once the workspace has an index (or stored resumes).
+    The response also carries "workspace_id", "result_set" (when stored
+    server-side) and "page" like /semantic-ranking.
+    
+    Output Format:
+    {
+        "success": true,
+        "filtered_resumes": [
+            {
+                "id": "uuid-string",
+                "rank": 1,
+                "candidate": "John Doe",
+                "ats_score": 85,
+                "semantic_score": 0.92,
+                "match_status": "Excellent Match",
+                "skills": ["Python", "React", "AWS"],
+                "experience": "Software Engineer at Tech Corp...",
+                "email": "john@email.com"
+            }
+        ],
+        "filter_summary": {
+            "total_input": 10,
+            "filtered_output": 3,
+            "filter_criteria": {
+                "skills": ["Python", "React"],
+                "experience": "senior"
+            }
+        }
+    }
+    """
+    try:
+        data = request.get_json()
+        skill_filters = data.get('skill_filters', [])
+        skill_query = data.get('skill_query') or {}
+        experience_filter = data.get('experience_filter', '')
+        
+        start = time.perf_counter()
+        try:
+            index, workspace_id = skill_index_for_request(data)
+        except LookupError as e:
+            return jsonify({'error': str(e)}), 404
+        if index is None:
+            return jsonify({'error': 'resumes are required (no skill index for this workspace yet)'}), 400
+        indexed = time.perf_counter()
+        
+        # Selected skills must ALL be present; skill_query adds OR / NOT groups
+        mask = index.match(
+            all_skills=list(skill_filters) + list(skill_query.get('all', [])),
+            any_skills=skill_query.get('any', []),
+            none_skills=skill_query.get('none', []),
+            experience=experience_filter,
+        )
+        filtered_resumes = index.resumes(mask)
+        criteria = {'skills': skill_filters, 'experience': experience_filter, 'skill_query': skill_query}
+        handle = save_result_set(workspace_id, 'filter', filtered_resumes, criteria) \
+            if data.get('result_set') or data.get('resume_ids') or not data.get('resumes') else None
+        page, page_info = paginate(filtered_resumes, *_page_params(data))
+        
+        response = {
+            'success': True,
+            'filtered_resumes': page,
+            'filter_summary': {
+                'total_input': len(index),
+                'filtered_output': len(filtered_resumes),
+                'filter_criteria': {
+                    'skills': skill_filters,
+                    'experience': experience_filter
+                }
+            },
+            'workspace_id': workspace_id,
+            'result_set': handle,
+            'page': page_info,
+            'timings': {
+                'index_seconds': round(indexed - start, 4),
+                'query_seconds': round(time.perf_counter() - indexed, 4)
+            }
+        }
+        if skill_query:
+            response['filter_summary']['filter_criteria']['skill_query'] = skill_query
+        if data.get('include_facets'):
+            # Skill counts among the filtered resumes, for the dropdown
+            response['facets'] = index.facets(mask)
+        return encoded_response(response)
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/available-skills', methods=['POST'])
+def get_available_skills():
+    """
+    Extract all unique skills from provided resumes for filter dropdown
+    
+    Input Format (JSON):
+    {
+        "workspace_id": "optional; reuses the workspace's skill index",
+        "resumes": [
+            {
+                "skills": ["Python", "React", "AWS"]
+            }
+        ]
+    }
+    Instead of "resumes": "result_set", "resume_ids" or just "workspace_id",
+    as for /filter-resumes.
+    
+    Output Format:
+    {
+        "success": true,
+        "available_skills": ["Python", "React", "AWS", "Docker", "Kubernetes"],
+        "skill_count": 5,
+        "skill_counts": {"Python": 12, "AWS": 9, "React": 4, "Docker": 2, "Kubernetes": 1}
+    }
+    """
+    try:
+        data = request.get_json()
+        try:
+            index, _ = skill_index_for_request(data)
+        except LookupError as e:
+            return jsonify({'error': str(e)}), 404
+        if index is None:
+            return jsonify({'error': 'resumes are required (no skill index for this workspace yet)'}), 400
+        
+        skill_counts = index.facets()
+        available_skills = sorted(skill_counts, key=str.lower)
+        
+        return jsonify({
+            'success': True,
+            'available_skills': available_skills,
+            'skill_count': len(available_skills),
+            'skill_counts': skill_counts
+        })
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/result-sets/<handle>', methods=['GET'])
+def get_result_set(handle):
+    """
+    Read back a saved result set page by page
+    
+    Query parameters: offset, limit (default 100), include_text=true to add
+    each resume's stored text, format=msgpack (or Accept: application/msgpack)
+    
+    Output Format:
+    {
+        "success": true,
+        "result_set": "handle",
+        "workspace_id": "ws-1",
+        "kind": "processed | ranking | filter",
+        "meta": {...},
+        "items": [...],
+        "page": {"offset": 0, "limit": 100, "total": 250, "next_offset": 100}
+    }
+    """
+    try:
+        store = _get_result_store()
+        result_set = store.get_result_set(handle) if store else None
+        if result_set is None:
+            return jsonify({'error': 'Result set not found'}), 404
+        offset, limit = _page_params(request.args)
+        items, page_info = paginate(result_set['items'], offset, 100 if limit is None else limit)
+        if request.args.get('include_text', '').lower() == 'true':
+            texts = {r['id']: r.get('text', '') for r in
+                     store.get_resumes(result_set['workspace_id'], [item['id'] for item in items], with_text=True)}
+            items = [dict(item, text=texts.get(item['id'], '')) for item in items]
+        return encoded_response({
+            'success': True,
+            'result_set': handle,
+            'workspace_id': result_set['workspace_id'],
+            'kind': result_set['kind'],
+            'meta': result_set['meta'],
+            'items': items,
+            'page': page_info
+        })
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/workspaces/<workspace_id>/resumes', methods=['GET', 'DELETE'])
+def workspace_resumes(workspace_id):
+    """
+    GET: stored resumes of a workspace, paged (offset, limit default 100;
+    ids=a,b to fetch specific resumes; include_text=true for the full text).
+    DELETE: remove the listed ids, or the whole workspace and its result sets.
+    """
+    try:
+        store = _get_result_store()
+        if store is None:
+            return jsonify({'error': 'Result store not available'}), 500
+        ids = [rid for rid in request.args.get('ids', '').split(',') if rid]
+        if request.method == 'DELETE':
+            removed = store.delete_resumes(workspace_id, ids or None)
+            with skill_indexes_lock:
+                skill_indexes.pop(workspace_id, None)
+            return jsonify({'success': True, 'removed': removed})
+        
+        with_text = request.args.get('include_text', '').lower() == 'true'
+        offset, limit = _page_params(request.args)
+        limit = 100 if limit is None else limit
+        if ids:
+            resumes, page_info = paginate(store.get_resumes(workspace_id, ids, with_text=with_text), offset, limit)
+        else:
+            resumes = store.list_resumes(workspace_id, offset, limit, with_text=with_text)
+            total = store.count_resumes(workspace_id)
+            page_info = {'offset': offset, 'limit': limit, 'total': total,
+                         'next_offset': offset + limit if offset + limit < total else None}
+        return encoded_response({
+            'success': True,
+            'workspace_id': workspace_id,
+            'resumes': resumes,
+            'page': page_info
+        })
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/extract-text', methods=['POST'])
+def extract_text_from_file():
+    """
+    Extract text from a single uploaded file
+    
+    Input Format (multipart/form-data):
+    - file: Single resume file (PDF/DOCX)
+    
+    Output Format:
+    {
+        "success": true,
+        "filename": "resume.pdf",
+        "text": "Extracted text content...",
+        "word_count": 450,
+        "char_count": 2500
+    }
+    """
+    try:
+        if 'file' not in request.files:
+            return jsonify({'error': 'No file provided'}), 400
+        
+        file = request.files['file']
+        if file.filename == '' or not allowed_file(file.filename):
+            return jsonify({'error': 'Invalid file'}), 400
+        
+        filename = secure_filename(file.filename)
+        data = file.read()
+        digest = file_digest(data)
+        cache = _get_extraction_cache()
+        entry = cache.get(digest) if cache else None
+        if entry is not None and 'text' in entry:
+            text = entry['text']
+            return jsonify({
+                'success': True,
+                'filename': filename,
+                'text': text,
+                'word_count': len(text.split()),
+                'char_count': len(text),
+                'cached': True
+            })
+        
+        # Extract text straight from the upload bytes
+        text = extract_text_from_bytes(data, filename)
+        if cache and not text.startswith('Error extracting'):
+            cache.put(digest, {'text': text})
+        
+        return jsonify({
+            'success': True,
+            'filename': filename,
+            'text': text,
+            'word_count': len(text.split()),
+            'char_count': len(text),
+            'cached': False
+        })
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/analyze-resume', methods=['POST'])
+def analyze_resume():
+    """
+    Analyze a single resume with detailed feedback and recommendations
+    
+    Input Format (JSON):
+    {
+        "candidate_name": "John Doe",
+        "email": "john.doe@email.com", 
+        "phone": "+1-555-123-4567",
+        "resume_text": "Full resume text content here...",
+        "job_description": "Optional job description for matching..." 
+    }
+    
+    Output Format (JSON):
+    {
+        "candidate_name": "John Doe",
+        "email": "john.doe@email.com",
+        "phone": "+1-555-123-4567", 
+        "ats_score": 85,
+        "skills_matched": ["Python", "React", "AWS"],
+        "recommendations": [
+            "Add more specific project details",
+            "Include quantifiable achievements",
+            "Add relevant certifications"
+        ],
+        "summary": "Strong technical background with relevant experience. Resume shows good structure and relevant skills for the position."
+    }
+    """
+    try:
+        data = request.get_json()
+        
+        # Required fields
+        candidate_name = data.get('candidate_name', '')
+        email = data.get('email', '')
+        phone = data.get('phone', '')
+        resume_text = data.get('resume_text', '')
+        job_description = data.get('job_description', '')
+        
+        if not resume_text:
+            return jsonify({'error': 'resume_text is required'}), 400
+        
+        # Extract features and calculate ATS score
+        ml_features = extract_ml_features(resume_text)
+        ats_score, confidence = predict_ats_score(ml_features)
+        
+        # Extract skills from resume
+        extracted_fields = extract_fields_with_llama(resume_text)
+        resume_skills = extracted_fields['skills']
+        
+        # If job description provided, find matching skills
+        skills_matched = []
+        if job_description:
+            job_skills = extract_skills_with_regex(job_description)
+            # Find skills that appear in both resume and job description
+            if isinstance(resume_skills, list):
+                resume_skills_lower = [skill.lower() for skill in resume_skills]
+            else:
+                resume_skills_lower = [skill.lower().strip() for skill in resume_skills.split(',') if skill.strip()]
+            
+            job_skills_lower = [skill.lower() for skill in job_skills]
+            
+            for job_skill in job_skills:
+                if any(job_skill.lower() in resume_skill for resume_skill in resume_skills_lower):
+                    skills_matched.append(job_skill)
+        else:
+            # If no job description, return all extracted skills as matched
+            if isinstance(resume_skills, list):
+                skills_matched = resume_skills[:10]  # Limit to top 10
+            else:
+                skills_matched = [skill.strip() for skill in resume_skills.split(',') if skill.strip()][:10]
+        
+        # Generate recommendations based on analysis
+        recommendations = generate_recommendations(ml_features, ats_score, resume_text, job_description)
+        
+        # Generate summary
+        summary = generate_summary(ats_score, skills_matched, ml_features, job_description)
+        
+        return jsonify({
+            'candidate_name': candidate_name,
+            'email': email,
+            'phone': phone,
+            'ats_score': ats_score,
+            'skills_matched': skills_matched,
+            'recommendations': recommendations,
+            'summary': summary
+        })
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+def generate_recommendations(features: Dict, ats_score: int, resume_text: str, job_description: str = '') -> List[str]:
+    """Generate personalized recommendations for resume improvement"""
+    recommendations = []
+    
+    # Score-based recommendations
+    if ats_score < 60:
+        recommendations.append("Overall resume structure needs improvement for better ATS compatibility")
+    
+    # Contact information recommendations
+    if not features.get('has_email', 0):
+        recommendations.append("Add a professional email address")
+    if not features.get('has_phone', 0):
+        recommendations.append("Include contact phone number")
+    
+    # Content recommendations
+    if features.get('word_count', 0) < 300:
+        recommendations.append("Expand resume content - current length is too brief for comprehensive evaluation")
+    elif features.get('word_count', 0) > 1000:
+        recommendations.append("Consider condensing resume content for better readability")
+    
+    # Section recommendations
+    if not features.get('has_experience', 0):
+        recommendations.append("Add a clear work experience section with job titles and responsibilities")
+    if not features.get('has_education', 0):
+        recommendations.append("Include educational background and qualifications")
+    if not features.get('has_skills', 0):
+        recommendations.append("Add a dedicated skills section highlighting technical and professional competencies")
+    
+    # Skills recommendations
+    skills_count = features.get('skills_count', 0)
+    if skills_count < 5:
+        recommendations.append("Include more relevant technical skills and competencies")
+    elif skills_count > 20:
+        recommendations.append("Focus on most relevant skills - too many skills can dilute impact")
+    
+    # Professional presentation
+    if features.get('non_alpha_ratio', 0) > 0.3:
+        recommendations.append("Improve text formatting - reduce special characters and formatting inconsistencies")
+    
+    # Experience recommendations
+    if features.get('experience_years', 0) == 0:
+        recommendations.append("Include specific dates for work experience to demonstrate career progression")
+    
+    # Job-specific recommendations
+    if job_description:
+        job_skills = extract_skills_with_regex(job_description)
+        resume_skills = set(_match_skills(resume_text))
+        missing_key_skills = []
+        
+        for skill in job_skills[:5]:  # Check top 5 job skills
+            if skill not in resume_skills:
+                missing_key_skills.append(skill)
+        
+        if missing_key_skills:
+            recommendations.append(f"Consider highlighting experience with: {', '.join(missing_key_skills[:3])}")
+    
+    # Quantification recommendations
+    numbers_in_text = len(re.findall(r'\d+', resume_text))
+    if numbers_in_text < 3:
+        recommendations.append("Add quantifiable achievements (numbers, percentages, metrics) to demonstrate impact")
+    
+    # Professional keywords
+    professional_keywords = ['achieved', 'managed', 'led', 'developed', 'implemented', 'improved']
+    found_keywords = sum(1 for keyword in professional_keywords if keyword in resume_text.lower())
+    if found_keywords < 2:
+        recommendations.append("Use more action verbs and achievement-oriented language")
+    
+    return recommendations[:6]  # Limit to 6 most important recommendations
+
+def generate_summary(ats_score: int, skills_matched: List[str], features: Dict, job_description: str = '') -> str:
+    """Generate a comprehensive summary of the resume analysis"""
+    
+    # Base summary based on score
+    if ats_score >= 85:
+        score_assessment = "Excellent resume with strong ATS compatibility"
+    elif ats_score >= 70:
+        score_assessment = "Good resume with solid structure and content"
+    elif ats_score >= 55:
+        score_assessment = "Decent resume with room for improvement"
+    else:
+        score_assessment = "Resume needs significant improvements for ATS systems"
+    
+    # Skills assessment
+    skills_count = len(skills_matched)
+    if skills_count >= 8:
+        skills_assessment = "demonstrates comprehensive technical expertise"
+    elif skills_count >= 5:
+        skills_assessment = "shows relevant technical skills"
+    elif skills_count >= 2:
+        skills_assessment = "has some relevant skills"
+    else:
+        skills_assessment = "needs more clearly highlighted technical skills"
+    
+    # Structure assessment
+    structure_elements = []
+    if features.get('has_experience', 0):
+        structure_elements.append("work experience")
+    if features.get('has_education', 0):
+        structure_elements.append("education")
+    if features.get('has_skills', 0):
+        structure_elements.append("skills section")
+    
+    if len(structure_elements) >= 3:
+        structure_assessment = "Well-structured with all essential sections"
+    elif len(structure_elements) >= 2:
+        structure_assessment = "Good structure with key sections present"
+    else:
+        structure_assessment = "Needs better organization and section structure"
+    
+    # Job match assessment (if job description provided)
+    match_assessment = ""
+    if job_description and skills_matched:
+        match_percentage = min(len(skills_matched) * 10, 90)  # Rough match percentage
+        if match_percentage >= 70:
+            match_assessment = f" Shows excellent alignment ({match_percentage}%) with the job requirements."
+        elif match_percentage >= 50:
+            match_assessment = f" Good fit ({match_percentage}%) for the position with some relevant experience."
+        else:
+            match_assessment = f" Moderate alignment ({match_percentage}%) with job requirements - may need additional experience."
+    
+    # Word count assessment
+    word_count = features.get('word_count', 0)
+    if word_count < 200:
+        length_note = " Resume appears brief and may benefit from more detailed descriptions."
+    elif word_count > 800:
+        length_note = " Comprehensive resume with detailed information."
+    else:
+        length_note = " Well-balanced resume length."
+    
+    # Combine all assessments
+    summary = f"{score_assessment}. The candidate {skills_assessment} and presents a resume that is {structure_assessment.lower()}.{match_assessment}{length_note}"
+    
+    return summary
+
+# =============================================================================
+# MAIN APPLICATION
+# =============================================================================
+
+service_state['import_seconds'] = round(time.perf_counter() - _IMPORT_START, 4)
+
+if __name__ == '__main__':
+    print("🚀 Starting Enhanced ATS Flask API...")
+    
+    # The debug reloader's watcher process only restarts the server: it loads
+    # no models and runs no workers
+    serving = os.environ.get('WERKZEUG_RUN_MAIN') == 'true'
+    
+    # Initialize models
+    if serving and MODEL_LOADING == 'eager':
+        if not initialize_models():
+            print("❌ Failed to initialize models. Some features may not work.")
+        else:
+            warm_up()
+    elif serving and MODEL_LOADING == 'background':
+        load_in_background()
+        print("🔄 Loading models in the background; /health reports progress")
+    elif serving:
+        # Nothing to wait for: each model loads on its first use
+        service_state['ready'] = True
+    
+    if JOB_INLINE_WORKERS > 0 and serving:
+        start_job_workers(JOB_INLINE_WORKERS)
+        print(f"✅ {JOB_INLINE_WORKERS} job worker(s) started (more nodes: python job_worker.py)")
+    
+    print("🌐 Flask API ready!")
+    print("📋 Available endpoints:")
+    print("  - POST /process-resumes")
+    print("  - POST /jobs, GET /jobs/<id>[/results|/events]")
+    print("  - POST /semantic-ranking") 
+    print("  - POST /search")
+    print("  - POST /filter-resumes")
+    print("  - POST /available-skills")
+    print("  - GET  /result-sets/<handle>")
+    print("  - GET/DELETE /workspaces/<workspace_id>/resumes")
+    print("  - POST /extract-text")
+    print("  - POST /analyze-resume (NEW)")
+    print("  - GET  /health, /health/live, /health/ready")
+    print("  - GET  /metrics (Prometheus)")
+    
+    # Run the app
+    app.run(host='0.0.0.0', port=5000, debug=True)
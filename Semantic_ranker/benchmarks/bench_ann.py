@@ -0,0 +1,96 @@
+"""
+Benchmark: IVF candidate index vs exact (brute-force) search
+
+Clustered synthetic vectors stand in for resume embeddings; recall@k is
+measured against exact search over the same index.
+
+Usage:
+    python benchmarks/bench_ann.py --n 200000 --dim 384 --queries 200 --nprobe 8 16 32
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ann_index import IVFIndex  # noqa: E402
+
+
+def make_vectors(n, dim, clusters, noise, seed=0):
+    rng = np.random.default_rng(seed)
+    centres = rng.normal(size=(clusters, dim)).astype(np.float32)
+    labels = rng.integers(0, clusters, size=n)
+    vectors = centres[labels] + noise * rng.normal(size=(n, dim)).astype(np.float32)
+    return vectors, centres, rng
+
+
+def percentiles(samples):
+    ms = np.asarray(samples) * 1000
+    return f"p50 {np.percentile(ms, 50):7.2f} ms  p95 {np.percentile(ms, 95):7.2f} ms"
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--n', type=int, default=200000)
+    parser.add_argument('--dim', type=int, default=384)
+    parser.add_argument('--clusters', type=int, default=500)
+    parser.add_argument('--noise', type=float, default=2.5, help='within-cluster spread (higher = harder)')
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--k', type=int, default=10)
+    parser.add_argument('--nprobe', type=int, nargs='+', default=[8, 16, 32])
+    parser.add_argument('--batch', type=int, default=20000)
+    args = parser.parse_args()
+
+    vectors, centres, rng = make_vectors(args.n, args.dim, args.clusters, args.noise)
+    queries = centres[rng.integers(0, args.clusters, size=args.queries)] + \
+        args.noise * rng.normal(size=(args.queries, args.dim)).astype(np.float32)
+
+    with tempfile.TemporaryDirectory() as directory:
+        index = IVFIndex(directory, args.dim)
+        start = time.perf_counter()
+        for i in range(0, args.n, args.batch):
+            ids = [f"c{j}" for j in range(i, min(i + args.batch, args.n))]
+            metas = [{'ats_score': float(j % 100), 'skills': ['Python'] if j % 3 == 0 else []}
+                     for j in range(i, i + len(ids))]
+            index.upsert(ids, vectors[i:i + len(ids)], metas)
+        index.wait_for_training()
+        build = time.perf_counter() - start
+        print(f"build: {args.n} vectors in {build:.1f} s ({args.n / build:.0f} vectors/s)  {index.stats()}")
+
+        truth, exact_times = [], []
+        for q in queries:
+            start = time.perf_counter()
+            truth.append({r['id'] for r in index.search(q, args.k, exact=True)})
+            exact_times.append(time.perf_counter() - start)
+        print(f"{'exact':<12} recall@{args.k} 1.000  {percentiles(exact_times)}")
+
+        for nprobe in args.nprobe:
+            index.nprobe = nprobe
+            hits, times = 0, []
+            for q, expected in zip(queries, truth):
+                start = time.perf_counter()
+                found = {r['id'] for r in index.search(q, args.k)}
+                times.append(time.perf_counter() - start)
+                hits += len(found & expected)
+            print(f"{'nprobe=' + str(nprobe):<12} recall@{args.k} {hits / (args.k * len(queries)):.3f}  {percentiles(times)}")
+
+        # Filtered search: recall is measured against filtered exact search
+        index.nprobe = args.nprobe[len(args.nprobe) // 2]
+        hits, times = 0, []
+        for q in queries:
+            expected = {r['id'] for r in index.search(q, args.k, min_ats_score=50, skills=['python'], exact=True)}
+            start = time.perf_counter()
+            found = {r['id'] for r in index.search(q, args.k, min_ats_score=50, skills=['python'])}
+            times.append(time.perf_counter() - start)
+            hits += len(found & expected)
+        print(f"{'filtered':<12} recall@{args.k} {hits / (args.k * len(queries)):.3f}  {percentiles(times)}"
+              f"  (nprobe={index.nprobe}, ats>=50, skills=[python])")
+
+
+if __name__ == '__main__':
+    main()
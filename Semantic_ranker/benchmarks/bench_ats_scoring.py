@@ -0,0 +1,166 @@
+"""
+Benchmark: per-resume vs batched ATS feature extraction and scoring
+
+The per-resume path is the original extract_ml_features/predict_ats_score
+loop: Python loops over every character for the text statistics, one full
+spaCy pipeline call and one predict_proba call per resume. The batched path
+is what the pipeline runs now: text_stats.text_statistics over the whole
+batch, nlp.pipe with only NER enabled and one predict_proba call.
+
+spaCy (en_core_web_sm) and scikit-learn are optional; a missing one is
+skipped and the remaining stages are still measured. Regex skill/contact
+matching is identical in both paths and left out.
+
+Usage:
+    python benchmarks/bench_ats_scoring.py --n 2000 --batch-size 32
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from text_stats import text_statistics  # noqa: E402
+
+WORDS = ("python developer engineer team project data cloud aws docker kubernetes led built designed "
+         "university degree experience skills managed improved latency service api customers").split()
+NAMES = ["Jane Doe", "John Smith", "Priya Patel", "Wei Chen", "Maria Garcia"]
+ORGS = ["Acme Corp", "Globex", "Initech", "Umbrella Inc", "Stark Industries"]
+N_FEATURES = 20
+
+
+def make_resumes(n, words, seed=0):
+    rng = np.random.default_rng(seed)
+    resumes = []
+    for i in range(n):
+        paragraphs = [f"{NAMES[i % len(NAMES)]}\nname{i}@example.com | +1 555 010 {i % 10000:04d}"]
+        for _ in range(rng.integers(3, 8)):
+            sentences = []
+            for _ in range(rng.integers(2, 6)):
+                body = " ".join(rng.choice(WORDS, size=rng.integers(6, 18)))
+                sentences.append(f"{body} at {ORGS[rng.integers(len(ORGS))]} in {rng.integers(2010, 2025)}")
+            paragraphs.append(". ".join(sentences) + ".")
+        text = "\n\n".join(paragraphs)
+        resumes.append(" ".join(text.split(" ")[:words]))
+    return resumes
+
+
+def legacy_stats(text):
+    words = text.split()
+    return [
+        len(words), len(text), np.mean([len(word) for word in words]) if words else 0,
+        sum(1 for char in text if not char.isalpha() and not char.isspace()) / len(text) if len(text) > 0 else 0,
+        len([s for s in text.split('.') if s.strip()]), len(text.split('\n\n')),
+    ]
+
+
+def ner_exclusions(nlp):
+    keep = {'ner', 'entity_ruler'}
+    for name, component in nlp.pipeline:
+        if name in ('tok2vec', 'transformer') and 'ner' in getattr(component, 'listening_components', []):
+            keep.add(name)
+    return [name for name in nlp.pipe_names if name not in keep]
+
+
+def entity_counts(doc):
+    return [sum(1 for ent in doc.ents if ent.label_ == label) for label in ("PERSON", "DATE", "ORG")]
+
+
+def load_spacy():
+    try:
+        import spacy
+        return spacy.load("en_core_web_sm")
+    except (ImportError, OSError) as e:
+        print(f"spaCy skipped: {e}")
+        return None
+
+
+def load_model(seed=0):
+    try:
+        from sklearn.ensemble import RandomForestClassifier
+    except ImportError as e:
+        print(f"scikit-learn skipped: {e}")
+        return None
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(2000, N_FEATURES))
+    y = (X[:, 0] + X[:, 1] > 0).astype(int)
+    return RandomForestClassifier(n_estimators=100, random_state=seed).fit(X, y)
+
+
+def run_legacy(resumes, nlp, model, features):
+    timings = {'stats': 0.0, 'spacy': 0.0, 'predict': 0.0}
+    for i, text in enumerate(resumes):
+        start = time.perf_counter()
+        legacy_stats(text)
+        timings['stats'] += time.perf_counter() - start
+        if nlp is not None:
+            start = time.perf_counter()
+            entity_counts(nlp(text[:10000]))
+            timings['spacy'] += time.perf_counter() - start
+        if model is not None:
+            start = time.perf_counter()
+            vector = features[i].reshape(1, -1)
+            model.predict(vector)
+            model.predict_proba(vector)
+            timings['predict'] += time.perf_counter() - start
+    return timings
+
+
+def run_batched(resumes, nlp, model, features, batch_size):
+    timings = {'stats': 0.0, 'spacy': 0.0, 'predict': 0.0}
+    disable = ner_exclusions(nlp) if nlp is not None else []
+    for offset in range(0, len(resumes), batch_size):
+        batch = resumes[offset:offset + batch_size]
+        start = time.perf_counter()
+        text_statistics(batch)
+        timings['stats'] += time.perf_counter() - start
+        if nlp is not None:
+            start = time.perf_counter()
+            for doc in nlp.pipe((text[:10000] for text in batch), batch_size=batch_size, disable=disable):
+                entity_counts(doc)
+            timings['spacy'] += time.perf_counter() - start
+        if model is not None:
+            start = time.perf_counter()
+            model.predict_proba(features[offset:offset + batch_size])
+            timings['predict'] += time.perf_counter() - start
+    return timings
+
+
+def report(label, timings, n):
+    total = sum(timings.values())
+    parts = "  ".join(f"{stage} {seconds:7.3f}s" for stage, seconds in timings.items())
+    print(f"{label:<10} {n / total:9.1f} resumes/s  ({parts})")
+    return total
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--n', type=int, default=2000)
+    parser.add_argument('--words', type=int, default=600, help='words per resume')
+    parser.add_argument('--batch-size', type=int, default=32)
+    parser.add_argument('--no-spacy', action='store_true')
+    args = parser.parse_args()
+
+    resumes = make_resumes(args.n, args.words)
+    nlp = None if args.no_spacy else load_spacy()
+    if nlp is not None:
+        print(f"spaCy pipeline {nlp.pipe_names}, batched path disables {ner_exclusions(nlp)}")
+    model = load_model()
+    features = np.random.default_rng(1).normal(size=(args.n, N_FEATURES))
+
+    # Warm up both paths (lookup tables, spaCy vocab, sklearn threads)
+    run_legacy(resumes[:8], nlp, model, features[:8])
+    run_batched(resumes[:8], nlp, model, features[:8], args.batch_size)
+
+    print(f"{args.n} resumes, ~{args.words} words each, batch size {args.batch_size}")
+    before = report('per-resume', run_legacy(resumes, nlp, model, features), args.n)
+    after = report('batched', run_batched(resumes, nlp, model, features, args.batch_size), args.n)
+    print(f"speed-up {before / after:.2f}x")
+
+
+if __name__ == '__main__':
+    main()
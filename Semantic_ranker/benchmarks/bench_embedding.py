@@ -0,0 +1,226 @@
+"""
+Benchmark: sentence embedding engines (torch vs ONNX Runtime fp32/int8) and storage dtypes
+
+Encodes synthetic resumes and job descriptions (synthetic_corpus.py) with every
+--engines entry, each in a fresh child process so load time and memory are its
+own:
+
+    torch       sentence-transformers (what ATS_EMBED_ENGINE=torch serves)
+    onnx-fp32   onnx_encoder.OnnxEncoder, model.onnx from --model-dir
+    onnx-int8   the same with model.int8.onnx (dynamic int8 quantisation)
+
+Per engine: load seconds, RSS after load, peak RSS while encoding, texts/s and
+p50/p95 per encode call (--batch texts a call, --repeat passes). Accuracy
+against the first engine (the reference): for every job description, the
+Spearman rank correlation of its cosine scores over all resumes, the overlap
+of the top 10, and the largest cosine difference. Storage: the reference
+vectors written through EmbeddingStore as float16 and int8, with bytes per
+vector and the same rank correlation.
+
+--min-spearman makes the run exit 1 when an engine or storage dtype ranks
+less like the reference than that (the switch gate). --out writes JSON.
+
+Build the ONNX files first:
+    python onnx_encoder.py export --out onnx_models/all-MiniLM-L6-v2
+
+Usage:
+    python benchmarks/bench_embedding.py --texts 2000 --threads 4
+    python benchmarks/bench_embedding.py --engines torch onnx-int8 --min-spearman 0.98 --out embedding.json
+    python benchmarks/bench_embedding.py --engines onnx-fp32 onnx-int8 --no-sort   # without length sorting
+"""
+
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+HERE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, HERE)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from synthetic_corpus import make_corpus, make_job_description  # noqa: E402
+from bench_pipeline import PeakMemory, current_rss  # noqa: E402
+from embedding_store import EmbeddingStore, text_key  # noqa: E402
+
+ENGINES = ['torch', 'onnx-fp32', 'onnx-int8']
+
+
+def make_texts(n, queries, seed):
+    """n resumes (full text, so lengths vary from a few lines to the token limit) and job descriptions"""
+    resumes, first = make_corpus(n, seed)
+    rng = random.Random(seed + 1)
+    return [r['text'] for r in resumes], [first] + [make_job_description(rng) for _ in range(queries - 1)]
+
+
+def load_engine(engine, args):
+    if engine == 'torch':
+        if args.threads:
+            import torch
+            torch.set_num_threads(args.threads)
+        from sentence_transformers import SentenceTransformer
+        return SentenceTransformer(args.model, device='cpu')
+    from onnx_encoder import OnnxEncoder
+    return OnnxEncoder(args.model_dir, variant=engine.split('-', 1)[1], threads=args.threads,
+                       max_batch_tokens=args.max_batch_tokens, sort_by_length=not args.no_sort)
+
+
+def child(engine, args):
+    """Runs in its own process: load, encode, save the vectors, print one JSON line"""
+    documents, queries = make_texts(args.texts, args.queries, args.seed)
+    rss_before = current_rss()
+    start = time.perf_counter()
+    model = load_engine(engine, args)
+    load_seconds = time.perf_counter() - start
+    rss_loaded = current_rss()
+    model.encode(documents[:args.batch], batch_size=args.batch)  # first-call allocations outside the timing
+
+    latencies = []
+    with PeakMemory() as memory:
+        for _ in range(args.repeat):
+            for i in range(0, len(documents), args.batch):
+                began = time.perf_counter()
+                model.encode(documents[i:i + args.batch], batch_size=args.batch)
+                latencies.append(time.perf_counter() - began)
+    vectors = np.asarray(model.encode(documents, batch_size=args.batch), dtype=np.float32)
+    query_vectors = np.asarray(model.encode(queries, batch_size=args.batch), dtype=np.float32)
+    np.save(os.path.join(args.workdir, f"{engine}.docs.npy"), vectors)
+    np.save(os.path.join(args.workdir, f"{engine}.queries.npy"), query_vectors)
+
+    ms = np.asarray(latencies) * 1000.0
+    result = {
+        'load_seconds': round(load_seconds, 3),
+        'rss_loaded_mb': round(rss_loaded / 2 ** 20, 1),
+        'model_rss_mb': round((rss_loaded - rss_before) / 2 ** 20, 1),
+        'peak_rss_mb': round(memory.peak / 2 ** 20, 1),
+        'encode_rss_delta_mb': round((memory.peak - memory.start) / 2 ** 20, 1),
+        'texts_per_second': round(len(documents) * args.repeat / sum(latencies), 1),
+        'p50_ms': round(float(np.percentile(ms, 50)), 2),
+        'p95_ms': round(float(np.percentile(ms, 95)), 2),
+    }
+    if hasattr(model, 'stats'):
+        result['encoder'] = model.stats()
+    print(json.dumps(result))
+
+
+def unit(x):
+    return x / (np.linalg.norm(x, axis=1, keepdims=True) + 1e-12)
+
+
+def ranks(scores):
+    out = np.empty_like(scores)
+    out[np.argsort(scores)] = np.arange(len(scores))
+    return out
+
+
+def agreement(ref_docs, ref_queries, docs, queries, k=10):
+    """Mean Spearman rho and top-k overlap of per-query resume rankings, max |cosine difference|"""
+    ref_scores, scores = unit(ref_queries) @ unit(ref_docs).T, unit(queries) @ unit(docs).T
+    rhos, overlaps = [], []
+    for expected, got in zip(ref_scores, scores):
+        rhos.append(float(np.corrcoef(ranks(expected), ranks(got))[0, 1]))
+        top = min(k, len(expected))
+        overlaps.append(len(set(np.argsort(-expected)[:top]) & set(np.argsort(-got)[:top])) / top)
+    return {
+        'spearman_mean': round(float(np.mean(rhos)), 5),
+        'spearman_min': round(float(np.min(rhos)), 5),
+        f'top{k}_overlap': round(float(np.mean(overlaps)), 4),
+        'max_abs_cosine_diff': round(float(np.abs(ref_scores - scores).max()), 5),
+    }
+
+
+def storage(docs, queries, workdir):
+    """Reference vectors stored and read back as float32, float16 and int8"""
+    keys = [text_key(str(i)) for i in range(len(docs))]
+    out = {}
+    for dtype in ('float32', 'float16', 'int8'):
+        store = EmbeddingStore(os.path.join(workdir, 'store'), dim=docs.shape[1], dtype=dtype)
+        store.add(keys, docs)
+        stored = store.get(keys)
+        out[dtype] = dict(agreement(docs, queries, stored, queries),
+                          bytes_per_vector=store.row_bytes, bytes_total=store.stats()['bytes'])
+    return out
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--engines', nargs='+', default=ENGINES, choices=ENGINES, help='first one is the reference')
+    parser.add_argument('--model', default='all-MiniLM-L6-v2')
+    parser.add_argument('--model-dir', default=os.path.join(HERE, 'onnx_models', 'all-MiniLM-L6-v2'))
+    parser.add_argument('--texts', type=int, default=1000, help='resumes to encode')
+    parser.add_argument('--queries', type=int, default=20, help='job descriptions to rank them against')
+    parser.add_argument('--batch', type=int, default=32, help='texts per encode call')
+    parser.add_argument('--repeat', type=int, default=2, help='timed passes over the resumes')
+    parser.add_argument('--threads', type=int, default=0, help='intra-op threads (0 = library default)')
+    parser.add_argument('--max-batch-tokens', type=int, default=8192, help='ONNX: padded tokens per batch')
+    parser.add_argument('--no-sort', action='store_true', help='ONNX: batch in input order')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--min-spearman', type=float, default=0.0, help='exit 1 below this mean rank correlation')
+    parser.add_argument('--out', default='', help='write the JSON report here')
+    parser.add_argument('--child', default='', help=argparse.SUPPRESS)
+    parser.add_argument('--workdir', default='', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        child(args.child, args)
+        return
+
+    workdir = tempfile.mkdtemp(prefix='ats-bench-embed-')
+    passthrough = [f"--{name.replace('_', '-')}={getattr(args, name)}" for name in
+                   ('model', 'model_dir', 'texts', 'queries', 'batch', 'repeat', 'threads', 'max_batch_tokens', 'seed')]
+    passthrough += ['--no-sort'] if args.no_sort else []
+    report = {'meta': {name: getattr(args, name) for name in ('texts', 'queries', 'batch', 'repeat', 'threads',
+                                                              'max_batch_tokens', 'no_sort', 'seed')},
+              'engines': {}, 'accuracy': {}, 'storage': {}}
+    report['meta'].update(cpus=os.cpu_count(), reference=None, started_at=time.strftime('%Y-%m-%dT%H:%M:%S'))
+
+    for engine in args.engines:
+        proc = subprocess.run([sys.executable, os.path.abspath(__file__), '--child', engine,
+                               '--workdir', workdir] + passthrough, capture_output=True, text=True)
+        lines = proc.stdout.strip().splitlines()
+        if proc.returncode != 0 or not lines:
+            print(f"{engine:<10} failed: {(proc.stderr.strip().splitlines() or ['?'])[-1]}")
+            continue
+        row = report['engines'][engine] = json.loads(lines[-1])
+        print(f"{engine:<10} {row['texts_per_second']:>8} texts/s  p50 {row['p50_ms']:>8} ms  p95 {row['p95_ms']:>8} ms"
+              f"  load {row['load_seconds']:>6}s  model +{row['model_rss_mb']} MB"
+              f"  encode +{row['encode_rss_delta_mb']} MB  peak {row['peak_rss_mb']} MB")
+
+    loaded = [engine for engine in args.engines if engine in report['engines']]
+    if not loaded:
+        sys.exit("No engine could be loaded")
+    reference = report['meta']['reference'] = loaded[0]
+    ref_docs = np.load(os.path.join(workdir, f"{reference}.docs.npy"))
+    ref_queries = np.load(os.path.join(workdir, f"{reference}.queries.npy"))
+    print(f"\nRanking agreement with {reference} ({args.queries} job descriptions x {args.texts} resumes)")
+    failed = []
+    for engine in loaded[1:]:
+        row = report['accuracy'][engine] = agreement(
+            ref_docs, ref_queries, np.load(os.path.join(workdir, f"{engine}.docs.npy")),
+            np.load(os.path.join(workdir, f"{engine}.queries.npy")))
+        print(f"  {engine:<12} {row}")
+        if row['spearman_mean'] < args.min_spearman:
+            failed.append(engine)
+    print(f"\nStored as (vectors of {reference})")
+    for dtype, row in storage(ref_docs, ref_queries, workdir).items():
+        report['storage'][dtype] = row
+        print(f"  {dtype:<12} {row['bytes_per_vector']:>5} B/vector  spearman {row['spearman_mean']}"
+              f"  top10 {row['top10_overlap']}  max diff {row['max_abs_cosine_diff']}")
+        if row['spearman_mean'] < args.min_spearman:
+            failed.append(dtype)
+
+    if args.out:
+        with open(args.out, 'w') as fh:
+            json.dump(report, fh, indent=2)
+        print(f"\nWrote {args.out}")
+    if failed:
+        print(f"\nBelow --min-spearman {args.min_spearman}: {', '.join(failed)}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,156 @@
+"""
+Benchmark: PDF/DOCX text extraction backends (document_extractor.py)
+
+Generates resumes as PDF and DOCX (synthetic_corpus.py) and measures, for every
+installed PDF backend (pypdfium2, pypdf2, pdfminer):
+
+    resume_pdf      one-page resumes, parsed in this process
+    long_pdf        a --long-pages document, with and without the page limit
+    agreement       token overlap (Jaccard) of each backend's text with the
+                    first backend's, so a faster backend that drops words shows
+
+then, for the backend "auto" resolves to:
+
+    sandbox         the same resumes through the sandboxed children, to show
+                    what the process boundary costs per document
+    docx            DOCX resumes, in process and sandboxed
+    timeout         a huge document with a short --timeout: the child is
+                    killed, and the next document still goes through
+
+Per case: docs/s and p50/p95 latency in ms. --out writes JSON.
+
+Usage:
+    python benchmarks/bench_extraction.py --docs 200
+    python benchmarks/bench_extraction.py --docs 500 --long-pages 300 --out extraction.json
+"""
+
+import argparse
+import itertools
+import json
+import os
+import re
+import statistics
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, HERE)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from synthetic_corpus import make_corpus, write_docx, write_pdf  # noqa: E402
+from document_extractor import DocumentExtractor, ExtractionError, available_backends, extract  # noqa: E402
+
+
+def read_back(writer, path, text, **kwargs):
+    writer(path, text, **kwargs)
+    with open(path, 'rb') as fh:
+        return fh.read()
+
+
+def summarise(latencies):
+    ms = sorted(value * 1000.0 for value in latencies)
+    total = sum(latencies)
+    return {
+        'docs': len(ms),
+        'docs_per_second': round(len(ms) / total, 1) if total > 0 else None,
+        'p50_ms': round(statistics.median(ms), 3),
+        'p95_ms': round(ms[min(len(ms) - 1, int(len(ms) * 0.95))], 3),
+    }
+
+
+def run(fn, documents):
+    latencies, texts = [], []
+    for data in documents:
+        start = time.perf_counter()
+        texts.append(fn(data))
+        latencies.append(time.perf_counter() - start)
+    return summarise(latencies), texts
+
+
+def jaccard(a, b):
+    left, right = set(re.findall(r'\w+', a.lower())), set(re.findall(r'\w+', b.lower()))
+    return len(left & right) / len(left | right) if left | right else 1.0
+
+
+def show(label, row):
+    print(f"  {label:<28} {row['docs_per_second']:>9} docs/s   p50 {row['p50_ms']:>9} ms   p95 {row['p95_ms']:>9} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--docs', type=int, default=200, help='resumes per case')
+    parser.add_argument('--long-pages', type=int, default=200, help='pages of the long PDF')
+    parser.add_argument('--max-pages', type=int, default=30, help='page limit for the limited long_pdf case')
+    parser.add_argument('--timeout', type=float, default=0.5, help='per-document timeout for the timeout case')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--out', default='', help='write the JSON report here')
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='ats-bench-extract-')
+    resumes, _ = make_corpus(args.docs, args.seed)
+    pdfs = [read_back(write_pdf, os.path.join(workdir, f"{r['id']}.pdf"), r['text']) for r in resumes]
+    docxs = [read_back(write_docx, os.path.join(workdir, f"{r['id']}.docx"), r['text']) for r in resumes]
+    # write_pdf puts 50 lines on a page
+    resume_lines = "\n".join(r['text'] for r in resumes).split("\n")
+    long_lines = list(itertools.islice(itertools.cycle(resume_lines), args.long_pages * 50))
+    long_pdf = read_back(write_pdf, os.path.join(workdir, 'long.pdf'), "\n".join(long_lines))
+
+    backends = available_backends()
+    if not backends:
+        sys.exit("No PDF backend installed (pip install pypdfium2)")
+    report = {'meta': {'docs': args.docs, 'long_pages': args.long_pages, 'max_pages': args.max_pages,
+                       'backends': backends}, 'backends': {}}
+
+    reference = None
+    for backend in backends:
+        print(f"\n{backend}")
+        row = {}
+        row['resume_pdf'], texts = run(lambda data: extract('pdf', data, backend, 10 ** 6), pdfs)
+        show('resume_pdf', row['resume_pdf'])
+        row['long_pdf_all_pages'], _ = run(lambda data: extract('pdf', data, backend, 10 ** 6), [long_pdf] * 3)
+        show(f'long_pdf ({args.long_pages} pages)', row['long_pdf_all_pages'])
+        row['long_pdf_limited'], _ = run(lambda data: extract('pdf', data, backend, args.max_pages), [long_pdf] * 3)
+        show(f'long_pdf (first {args.max_pages})', row['long_pdf_limited'])
+        if reference is None:
+            reference = texts
+        row['agreement'] = round(statistics.mean(jaccard(a, b) for a, b in zip(texts, reference)), 4)
+        print(f"  {'agreement with ' + backends[0]:<28} {row['agreement']}")
+        report['backends'][backend] = row
+
+    extractor = DocumentExtractor(backend='auto', max_pages=args.max_pages)
+    print(f"\nauto -> {extractor.backend}")
+    sandboxed = {}
+    extractor.extract(pdfs[0], 'warm.pdf')  # start a child outside the timing
+    sandboxed['resume_pdf'], _ = run(lambda data: extractor.extract(data, 'resume.pdf'), pdfs)
+    show('resume_pdf (sandbox)', sandboxed['resume_pdf'])
+    sandboxed['docx_in_process'], _ = run(lambda data: extract('docx', data, extractor.backend, 0), docxs)
+    show('docx (in process)', sandboxed['docx_in_process'])
+    sandboxed['docx'], _ = run(lambda data: extractor.extract(data, 'resume.docx'), docxs)
+    show('docx (sandbox)', sandboxed['docx'])
+
+    huge = read_back(write_pdf, os.path.join(workdir, 'huge.pdf'), "\n".join(long_lines * 20))
+    slow = DocumentExtractor(backend=extractor.backend, max_bytes=len(huge), max_pages=10 ** 6, timeout=args.timeout)
+    start = time.perf_counter()
+    try:
+        slow.extract(huge, 'huge.pdf')
+        outcome = 'finished within the timeout'
+    except ExtractionError as e:
+        outcome = e.reason
+    killed_after = time.perf_counter() - start
+    recovered = bool(slow.extract(pdfs[0], 'next.pdf'))
+    sandboxed['timeout'] = {'outcome': outcome, 'seconds': round(killed_after, 3), 'next_document_ok': recovered,
+                            'stats': slow.stats()}
+    print(f"  {'timeout':<28} {outcome} after {killed_after:.2f}s, next document ok: {recovered}")
+    report['auto'] = dict(sandboxed, backend=extractor.backend)
+    extractor.close()
+    slow.close()
+
+    if args.out:
+        with open(args.out, 'w') as fh:
+            json.dump(report, fh, indent=2)
+        print(f"\nWrote {args.out}")
+
+
+if __name__ == '__main__':
+    main()
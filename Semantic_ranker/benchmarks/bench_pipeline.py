@@ -0,0 +1,295 @@
+"""
+Benchmark: end-to-end resume pipeline on a synthetic corpus
+
+Generates N resumes (PDF and DOCX) and a job description (synthetic_corpus.py),
+then times every stage of ats_flask_api in-process:
+
+    extract_text_from_pdf, extract_text_from_docx, extract_skills_with_regex,
+    extract_ml_features, predict_ats_score          one call per resume
+    semantic_ranking, filter_resumes, rag_ingest    one request per --batch resumes
+    rag_query                                       --queries requests
+
+Endpoints go through Flask's test client, so request parsing and JSON encoding
+are included. The LLaMA client is StubOpenAI (fake_openai_server answers, with
+--llm-latency) and Chroma is an in-memory collection (stubs.py), so runs need
+no network and no GPU. spaCy, the ATS model and sentence-transformers are the
+real ones when installed; --encoder hashed (or auto without the package) swaps
+the encoder for a hashed bag of words. Every cache and store lives in a
+temporary directory, so each run starts cold.
+
+Per stage: items/s, p50/p95/p99 latency and peak RSS (sampled every 5 ms)
+above the RSS at stage start. --out writes JSON; --compare reads an earlier
+--out and exits 1 when a stage got slower than --tolerance allows.
+
+Usage:
+    python benchmarks/bench_pipeline.py --sizes 100 1000 --out bench.json
+    python benchmarks/bench_pipeline.py --sizes 100 1000 --compare bench.json --tolerance 0.2
+    python benchmarks/bench_pipeline.py --sizes 50000 --stages rag_ingest rag_query --batch 500
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import numpy as np
+
+HERE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, HERE)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from synthetic_corpus import make_corpus, write_docx, write_pdf  # noqa: E402
+from stubs import HashedEncoder, StubChromaClient, StubOpenAI  # noqa: E402
+
+STAGES = ['extract_text_from_pdf', 'extract_text_from_docx', 'extract_skills_with_regex', 'extract_ml_features',
+          'predict_ats_score', 'semantic_ranking', 'filter_resumes', 'rag_ingest', 'rag_query']
+QUESTIONS = ["Who has Kubernetes and AWS experience?", "Which candidate led a data platform migration?",
+             "Summarise the Python experience of this candidate", "Who knows PyTorch or TensorFlow?",
+             "Find candidates with CI/CD and Terraform", "Which resumes mention fraud detection?"]
+_PAGE_SIZE = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+
+
+def current_rss():
+    try:
+        with open('/proc/self/statm') as fh:
+            return int(fh.read().split()[1]) * _PAGE_SIZE
+    except OSError:
+        # Not Linux: the lifetime peak is the best we have
+        scale = 1 if sys.platform == 'darwin' else 1024
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+
+
+class PeakMemory:
+    """Highest RSS seen while the block runs, sampled from a background thread"""
+
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self.start = self.peak = 0
+
+    def _sample(self):
+        while not self._done.wait(self.interval):
+            self.peak = max(self.peak, current_rss())
+
+    def __enter__(self):
+        self.start = self.peak = current_rss()
+        self._done = threading.Event()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._done.set()
+        self._thread.join()
+        self.peak = max(self.peak, current_rss())
+
+
+def summarise(latencies, items, elapsed, memory):
+    ms = np.asarray(latencies) * 1000.0
+    return {
+        'items': items,
+        'calls': len(latencies),
+        'seconds': round(elapsed, 4),
+        'items_per_second': round(items / elapsed, 2) if elapsed > 0 else None,
+        'p50_ms': round(float(np.percentile(ms, 50)), 3) if len(ms) else None,
+        'p95_ms': round(float(np.percentile(ms, 95)), 3) if len(ms) else None,
+        'p99_ms': round(float(np.percentile(ms, 99)), 3) if len(ms) else None,
+        'peak_rss_mb': round(memory.peak / 2 ** 20, 1),
+        'peak_rss_delta_mb': round((memory.peak - memory.start) / 2 ** 20, 1),
+    }
+
+
+def timed(calls):
+    """Run (fn, items) pairs; returns (latencies, items, elapsed, memory)"""
+    latencies, items = [], 0
+    with PeakMemory() as memory:
+        start = time.perf_counter()
+        for fn, count in calls:
+            began = time.perf_counter()
+            fn()
+            latencies.append(time.perf_counter() - began)
+            items += count
+        elapsed = time.perf_counter() - start
+    return latencies, items, elapsed, memory
+
+
+def post(client, path, body):
+    response = client.post(path, json=body)
+    if response.status_code != 200:
+        raise RuntimeError(f"{path} returned {response.status_code}: {response.get_data(as_text=True)[:300]}")
+    return response.get_json()
+
+
+def run_size(api, client, n, args, workdir):
+    resumes, job_description = make_corpus(n, seed=args.seed)
+    files = os.path.join(workdir, f"corpus_{n}")
+    os.makedirs(files, exist_ok=True)
+    pdfs, docxs = [], []
+    for resume in resumes:
+        pdfs.append(os.path.join(files, f"{resume['id']}.pdf"))
+        docxs.append(os.path.join(files, f"{resume['id']}.docx"))
+        write_pdf(pdfs[-1], resume['text'])
+        write_docx(docxs[-1], resume['text'])
+    texts = [resume['text'] for resume in resumes]
+    batches = [resumes[i:i + args.batch] for i in range(0, n, args.batch)]
+    workspace = f"bench-{n}"
+    results, features = {}, []
+
+    def stage(name, calls):
+        if name not in args.stages:
+            return
+        results[name] = summarise(*timed(calls))
+        row = results[name]
+        print(f"  {name:<26} {row['items_per_second'] or 0:>10.1f}/s  p50 {row['p50_ms']:>9.2f} ms  "
+              f"p95 {row['p95_ms']:>9.2f} ms  p99 {row['p99_ms']:>9.2f} ms  peak +{row['peak_rss_delta_mb']} MB")
+
+    stage('extract_text_from_pdf', [(lambda p=p: api.extract_text_from_pdf(p), 1) for p in pdfs])
+    stage('extract_text_from_docx', [(lambda p=p: api.extract_text_from_docx(p), 1) for p in docxs])
+    stage('extract_skills_with_regex', [(lambda t=t: api.extract_skills_with_regex(t), 1) for t in texts])
+    # Scoring needs features even when their stage is not measured
+    feature_calls = [(lambda t=t: features.append(api.extract_ml_features(t)), 1) for t in texts]
+    if 'extract_ml_features' in args.stages:
+        stage('extract_ml_features', feature_calls)
+    else:
+        features.extend(api.extract_ml_features_batch(texts))
+    stage('predict_ats_score', [(lambda f=f: api.predict_ats_score(f), 1) for f in features])
+
+    ranked = [dict(resume, filename=f"{resume['id']}.pdf", ats_score=score)
+              for resume, (score, _) in zip(resumes, (api.predict_ats_score(f) for f in features))]
+    rank_batches = [ranked[i:i + args.batch] for i in range(0, n, args.batch)]
+    stage('semantic_ranking', [
+        (lambda b=b: post(client, '/semantic-ranking', {'job_description': job_description, 'resumes': b}), len(b))
+        for b in rank_batches
+    ])
+    rng = random.Random(args.seed)
+    stage('filter_resumes', [
+        (lambda b=b, skills=rng.sample(b[0]['skills'], min(2, len(b[0]['skills']))): post(
+            client, '/filter-resumes', {'resumes': b, 'skill_filters': skills, 'workspace_id': workspace}), len(b))
+        for b in rank_batches
+    ])
+    stage('rag_ingest', [
+        (lambda b=b: post(client, '/rag/ingest', {'workspace_id': workspace, 'resumes': b}), len(b))
+        for b in batches
+    ])
+    queries = []
+    for i in range(args.queries):
+        body = {'workspace_id': workspace, 'message': QUESTIONS[i % len(QUESTIONS)], 'chat_id': f"chat-{i % 8}"}
+        if i % 2:
+            # Every other question is about one resume
+            body['resume_id'] = resumes[rng.randrange(n)]['id']
+        queries.append(body)
+    stage('rag_query', [(lambda body=body: post(client, '/rag/query', body), 1) for body in queries])
+    return results
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=HERE, capture_output=True,
+                              text=True, timeout=5).stdout.strip() or None
+    except Exception:
+        return None
+
+
+def compare(report, baseline_path, tolerance):
+    """Print per-stage changes against a baseline report; returns the regressions"""
+    with open(baseline_path) as fh:
+        baseline = json.load(fh)
+    if baseline.get('meta', {}).get('stubs') != report['meta']['stubs']:
+        print(f"⚠️ Baseline ran with {baseline.get('meta', {}).get('stubs')}, this run with "
+              f"{report['meta']['stubs']}; numbers may not be comparable")
+    regressions = []
+    print(f"\nAgainst {baseline_path} (tolerance {tolerance:.0%})")
+    for size, stages in report['runs'].items():
+        before_stages = baseline.get('runs', {}).get(size, {})
+        for name, now in stages.items():
+            before = before_stages.get(name)
+            if not before or not before.get('items_per_second') or not now.get('items_per_second'):
+                continue
+            throughput = now['items_per_second'] / before['items_per_second'] - 1
+            p95 = now['p95_ms'] / before['p95_ms'] - 1 if before.get('p95_ms') else 0.0
+            memory = now['peak_rss_delta_mb'] - before['peak_rss_delta_mb']
+            worse = throughput < -tolerance or p95 > tolerance
+            if worse:
+                regressions.append((size, name))
+            print(f"  n={size:<7} {name:<26} throughput {throughput:+7.1%}  p95 {p95:+7.1%}  "
+                  f"peak {memory:+8.1f} MB{'  ❌ REGRESSION' if worse else ''}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100, 1000], help='resumes per run (100 .. 50000)')
+    parser.add_argument('--stages', nargs='+', default=STAGES, choices=STAGES)
+    parser.add_argument('--batch', type=int, default=100, help='resumes per endpoint request')
+    parser.add_argument('--queries', type=int, default=50, help='/rag/query requests per run')
+    parser.add_argument('--llm-latency', type=float, default=0.0, help='seconds per stub LLM call')
+    parser.add_argument('--encoder', choices=['auto', 'real', 'hashed'], default='auto')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--out', default='', help='write the JSON report here')
+    parser.add_argument('--compare', default='', help='earlier --out report to compare against')
+    parser.add_argument('--tolerance', type=float, default=0.15, help='allowed slowdown before --compare fails')
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='ats-bench-')
+    # Every store starts empty in the temporary directory; set before the import reads them
+    for key, name in [('ATS_EXTRACTION_CACHE', 'extraction_cache.sqlite3'), ('ATS_EMBEDDING_STORE', 'embedding_store'),
+                      ('ATS_ANN_INDEX', 'candidate_index'), ('ATS_RESULT_STORE', 'results.sqlite3'),
+                      ('ATS_JOB_DB', 'jobs.sqlite3'), ('ATS_LLM_CACHE', 'llm_cache.sqlite3'),
+                      ('ATS_RAG_BM25_DIR', 'bm25'), ('ATS_RAG_CHAT_DB', 'chat_memory.sqlite3')]:
+        os.environ[key] = os.path.join(workdir, name)
+    os.environ['ATS_MODEL_LOADING'] = 'lazy'
+    os.chdir(HERE)
+    import ats_flask_api as api
+
+    encoder = args.encoder
+    if encoder == 'auto':
+        try:
+            import sentence_transformers  # noqa: F401
+            encoder = 'real'
+        except ImportError:
+            encoder = 'hashed'
+    if encoder == 'hashed':
+        api.models.set('sentence_model', HashedEncoder())
+    llm = StubOpenAI(latency=args.llm_latency)
+    api.models.set('llama_client', llm)
+    api.models.set('chroma_client', StubChromaClient())
+    start = time.perf_counter()
+    api.initialize_models(connect=False, parallel=False)
+    load_seconds = time.perf_counter() - start
+    client = api.app.test_client()
+
+    report = {
+        'meta': {
+            'commit': git_commit(), 'python': platform.python_version(), 'platform': platform.platform(),
+            'cpus': os.cpu_count(), 'seed': args.seed, 'batch': args.batch, 'queries': args.queries,
+            'stubs': {'llm': 'stub', 'llm_latency': args.llm_latency, 'chroma': 'stub', 'encoder': encoder},
+            'models': {name: info.get('state') for name, info in api.models.stats().items()},
+            'model_load_seconds': round(load_seconds, 3), 'started_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        },
+        'runs': {},
+    }
+    print(f"Models: {report['meta']['models']}  encoder: {encoder}  ({load_seconds:.1f}s to load)")
+    for n in args.sizes:
+        print(f"\nn={n}")
+        report['runs'][str(n)] = run_size(api, client, n, args, workdir)
+    report['meta']['llm_calls'] = llm.calls
+
+    if args.out:
+        with open(args.out, 'w') as fh:
+            json.dump(report, fh, indent=2)
+        print(f"\nWrote {args.out}")
+    if args.compare:
+        regressions = compare(report, args.compare, args.tolerance)
+        if regressions:
+            print(f"\n{len(regressions)} stage(s) regressed")
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
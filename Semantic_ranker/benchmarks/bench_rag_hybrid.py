@@ -0,0 +1,144 @@
+"""
+Benchmark: BM25 keyword index and reciprocal rank fusion for RAG retrieval
+
+Synthetic chunks are built from a shared vocabulary plus a topic; a few carry
+an exact identifier (cert ids, versioned tool names) that recruiters search
+for. Each query names one identifier and some topic words, and the chunk
+holding that identifier is the relevant one. Recall@k is measured for the
+vector ranking alone, BM25 alone and their fusion as done in rag_api.
+
+Vectors come from sentence-transformers when --model is given and installed,
+otherwise from a hashed bag-of-words projection that stands in for a dense
+model: like one, it blurs rare tokens into their neighbours.
+
+Latency: index build, incremental upsert, reload from disk, search p50/p95.
+
+Usage:
+    python benchmarks/bench_rag_hybrid.py --n 20000 --queries 300
+    python benchmarks/bench_rag_hybrid.py --n 5000 --model all-MiniLM-L6-v2
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+import zlib
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bm25_index import BM25Index, reciprocal_rank_fusion, tokenize  # noqa: E402
+
+WORDS = ("python developer engineer team project data cloud aws docker kubernetes led built designed "
+         "university degree experience skills managed improved latency service api customers backend "
+         "frontend react sql pipelines analytics security testing delivery migration platform").split()
+TOPICS = [f"topic{i}" for i in range(50)]
+PREFIXES = ['AZ', 'SAA', 'CKA', 'PMP', 'OCP', 'CCNA', 'terraform', 'spark', 'node.js', 'c++']
+
+
+def make_corpus(n, n_ids, seed=0):
+    rng = random.Random(seed)
+    ids = [f"{rng.choice(PREFIXES)}-{i:03d}" for i in range(n_ids)]
+    holders = rng.sample(range(n), n_ids)
+    chunks, groups = [], []
+    for i in range(n):
+        topic = rng.choice(TOPICS)
+        chunks.append(' '.join(rng.choices(WORDS, k=rng.randint(60, 160)) + [topic] * 3))
+        groups.append(str(i // 2))
+    for ident, holder in zip(ids, holders):
+        chunks[holder] += f" certified {ident}"
+    return chunks, groups, list(zip(ids, holders))
+
+
+def hashed_embed(texts, dim=256):
+    out = np.zeros((len(texts), dim), dtype=np.float32)
+    for row, text in enumerate(texts):
+        for token in tokenize(text):
+            h = zlib.crc32(token.encode())
+            out[row, h % dim] += 1.0 if h & 1 << 31 else -1.0
+    out /= np.linalg.norm(out, axis=1, keepdims=True) + 1e-9
+    return out
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--n', type=int, default=20000, help='number of chunks')
+    parser.add_argument('--queries', type=int, default=300)
+    parser.add_argument('--k', type=int, default=5)
+    parser.add_argument('--depth', type=int, default=20, help='candidates per retriever (ATS_RAG_FUSION_DEPTH)')
+    parser.add_argument('--model', default='', help='sentence-transformers model name')
+    args = parser.parse_args()
+
+    chunks, groups, targets = make_corpus(args.n, args.queries)
+    chunk_ids = [f"{g}::c{i}" for i, g in enumerate(groups)]
+    rng = random.Random(1)
+    queries = [f"candidate certified {ident} with {' '.join(rng.sample(WORDS, 3))}" for ident, _ in targets]
+
+    embed = hashed_embed
+    if args.model:
+        try:
+            from sentence_transformers import SentenceTransformer
+            model = SentenceTransformer(args.model)
+            embed = lambda texts: model.encode(texts, batch_size=64, normalize_embeddings=True)  # noqa: E731
+        except Exception as e:
+            print(f"sentence-transformers unavailable ({e}); using the hashed stand-in")
+    start = time.perf_counter()
+    matrix = np.asarray(embed(chunks), dtype=np.float32)
+    query_vectors = np.asarray(embed(queries), dtype=np.float32)
+    print(f"embedded {args.n} chunks in {time.perf_counter() - start:.2f}s ({'model' if embed is not hashed_embed else 'hashed'})")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'bench.sqlite3')
+        index = BM25Index(path)
+        start = time.perf_counter()
+        for offset in range(0, args.n, 64):
+            index.upsert(chunk_ids[offset:offset + 64], chunks[offset:offset + 64], groups[offset:offset + 64])
+        print(f"BM25 build {time.perf_counter() - start:.2f}s in ingest batches of 64  {index.stats()}")
+
+        changed = list(range(0, args.n, 100))
+        start = time.perf_counter()
+        index.upsert([chunk_ids[i] for i in changed], [chunks[i] + ' updated' for i in changed],
+                     [groups[i] for i in changed])
+        print(f"incremental upsert of {len(changed)} chunks {(time.perf_counter() - start) * 1000:.1f} ms")
+
+        start = time.perf_counter()
+        reopened = BM25Index(path)
+        print(f"reload from disk {time.perf_counter() - start:.2f}s  {reopened.stats()['chunks']} chunks")
+
+        hits = {'vector': 0, 'bm25': 0, 'rrf': 0}
+        latency = {'vector': [], 'bm25': [], 'rrf': []}
+        for qi, (query, (_, holder)) in enumerate(zip(queries, targets)):
+            relevant = chunk_ids[holder]
+            start = time.perf_counter()
+            scores = matrix @ query_vectors[qi]
+            top = np.argpartition(-scores, args.depth)[:args.depth]
+            vector = [chunk_ids[i] for i in top[np.argsort(-scores[top])]]
+            latency['vector'].append(time.perf_counter() - start)
+            start = time.perf_counter()
+            keyword = [cid for cid, _ in index.search(query, args.depth)]
+            latency['bm25'].append(time.perf_counter() - start)
+            start = time.perf_counter()
+            fused = [cid for cid, _ in reciprocal_rank_fusion([vector, keyword])]
+            latency['rrf'].append(time.perf_counter() - start)
+            hits['vector'] += relevant in vector[:args.k]
+            hits['bm25'] += relevant in keyword[:args.k]
+            hits['rrf'] += relevant in fused[:args.k]
+
+        start = time.perf_counter()
+        for query, (_, holder) in zip(queries, targets):
+            index.search(query, args.depth, group=groups[holder])
+        filtered = (time.perf_counter() - start) / len(queries)
+
+    print(f"\nrecall@{args.k} over {len(queries)} exact-term queries")
+    for name in ('vector', 'bm25', 'rrf'):
+        ms = np.asarray(latency[name]) * 1000
+        print(f"  {name:<7} recall {hits[name] / len(queries):.3f}   "
+              f"p50 {np.percentile(ms, 50):7.3f} ms  p95 {np.percentile(ms, 95):7.3f} ms")
+    print(f"  bm25 filtered to one resume: {filtered * 1000:.3f} ms/query")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,202 @@
+"""
+Benchmark: pre-forked gunicorn serving (wsgi.py) with 1, 4 and 8 workers
+
+For each worker count: start gunicorn, wait until every worker reports ready,
+read per-process memory from /proc/<pid>/smaps_rollup (RSS, PSS and private
+bytes; PSS splits copy-on-write pages between the processes sharing them),
+then drive an endpoint with concurrent clients and report requests/sec.
+
+--markdown also prints the rows of the SERVING.md results table. Workers only
+become ready once spaCy's model and the sentence model have loaded; when they
+do not, the row says which models failed and why.
+
+Linux only (fork + /proc). Run from Semantic_ranker/:
+    python benchmarks/bench_serving.py --workers 1 4 8 --endpoint analyze-resume --seconds 20
+    python benchmarks/bench_serving.py --workers 1 4 8 --markdown
+"""
+
+import argparse
+import json
+import os
+import signal
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+
+import numpy as np
+
+HERE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+RESUME = (
+    "Jane Doe\njane.doe@example.com | +1 555 010 0000\n\nExperience\n"
+    "Senior Software Engineer at Acme Corp (2019 - 2024). Built Python, Flask and Docker services on AWS, "
+    "led a team of five and cut p95 latency by 40%.\n\nEducation\nBSc Computer Science, State University\n\n"
+    "Skills\nPython, SQL, Kubernetes, React, TensorFlow"
+)
+JD = "We are hiring a backend engineer with Python, Flask, AWS and Kubernetes experience."
+
+PAYLOADS = {
+    'analyze-resume': {'candidate_name': 'Jane Doe', 'resume_text': RESUME, 'job_description': JD},
+    'semantic-ranking': {'job_description': JD, 'resumes': [
+        {'id': str(i), 'filename': f'r{i}.pdf', 'text': RESUME + f"\nProject {i}", 'ats_score': 70} for i in range(20)
+    ]},
+}
+
+
+def memory_of(pid):
+    fields = {}
+    with open(f'/proc/{pid}/smaps_rollup') as fh:
+        for line in fh:
+            parts = line.split()
+            if len(parts) >= 2 and parts[0].endswith(':') and parts[1].isdigit():
+                fields[parts[0][:-1]] = int(parts[1]) * 1024
+    private = fields.get('Private_Clean', 0) + fields.get('Private_Dirty', 0)
+    return {'rss': fields.get('Rss', 0), 'pss': fields.get('Pss', 0), 'private': private}
+
+
+def children_of(pid):
+    with open(f'/proc/{pid}/task/{pid}/children') as fh:
+        return [int(p) for p in fh.read().split()]
+
+
+def get(url, timeout=5):
+    with urllib.request.urlopen(url, timeout=timeout) as response:
+        return response.status, json.loads(response.read())
+
+
+def wait_ready(base, workers, timeout):
+    deadline = time.time() + timeout
+    ready = set()
+    while time.time() < deadline and len(ready) < workers:
+        try:
+            status, body = get(f"{base}/health/ready")
+            if status == 200:
+                ready.add(body['pid'])
+        except (urllib.error.URLError, ConnectionError, OSError):
+            time.sleep(0.5)
+    return len(ready) >= workers
+
+
+def not_loaded(base):
+    """Models a worker has not loaded, with their state or error, from /health"""
+    try:
+        _, body = get(f"{base}/health")
+    except (urllib.error.URLError, ConnectionError, OSError) as e:
+        return {'health': str(e)}
+    return {name: info.get('error') or info.get('state')
+            for name, info in (body.get('startup') or {}).get('models', {}).items()
+            if info.get('state') not in ('loaded', 'pending')}
+
+
+def markdown_row(result):
+    """One row of the SERVING.md table"""
+    if 'error' in result:
+        return f"| {result['workers']} | {result.get('endpoint', '')} | {result['error']}: {result.get('models')} | | | | |"
+    return (f"| {result['workers']} | {result['endpoint']} | {result['worker_private_mib_loaded']}"
+            f" | {result['worker_pss_mib_loaded']} | {result['total_pss_mib']}"
+            f" | {result['requests_per_sec']} | {result['p95_ms']} |")
+
+
+def load(base, endpoint, concurrency, seconds):
+    body = json.dumps(PAYLOADS[endpoint]).encode('utf-8')
+    latencies, errors = [], [0]
+    lock = threading.Lock()
+    stop_at = time.time() + seconds
+
+    def client():
+        while time.time() < stop_at:
+            request = urllib.request.Request(f"{base}/{endpoint}", data=body,
+                                             headers={'Content-Type': 'application/json'})
+            start = time.perf_counter()
+            try:
+                with urllib.request.urlopen(request, timeout=60) as response:
+                    response.read()
+                ok = True
+            except Exception:
+                ok = False
+            with lock:
+                if ok:
+                    latencies.append(time.perf_counter() - start)
+                else:
+                    errors[0] += 1
+
+    threads = [threading.Thread(target=client) for _ in range(concurrency)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+    ms = np.asarray(latencies or [0]) * 1000
+    return {
+        'requests': len(latencies),
+        'errors': errors[0],
+        'requests_per_sec': round(len(latencies) / elapsed, 2),
+        'p50_ms': round(float(np.percentile(ms, 50)), 1),
+        'p95_ms': round(float(np.percentile(ms, 95)), 1),
+    }
+
+
+def run(workers, args):
+    port = args.port
+    env = dict(os.environ, ATS_WORKERS=str(workers), ATS_BIND=f"127.0.0.1:{port}", ATS_JOB_INLINE_WORKERS='0')
+    proc = subprocess.Popen([sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'wsgi:app'],
+                            cwd=HERE, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    base = f"http://127.0.0.1:{port}"
+    try:
+        start = time.perf_counter()
+        if not wait_ready(base, workers, args.startup_timeout):
+            return {'workers': workers, 'endpoint': args.endpoint, 'error': 'workers did not become ready',
+                    'models': not_loaded(base)}
+        startup = time.perf_counter() - start
+
+        # Memory after warm-up, then again after load (copy-on-write pages get un-shared over time)
+        pids = children_of(proc.pid)
+        before = [memory_of(pid) for pid in pids]
+        result = load(base, args.endpoint, args.concurrency or 2 * workers, args.seconds)
+        after = [memory_of(pid) for pid in pids]
+        master = memory_of(proc.pid)
+        mib = 1024 * 1024
+        result.update({
+            'workers': workers,
+            'endpoint': args.endpoint,
+            'startup_seconds': round(startup, 1),
+            'master_rss_mib': round(master['rss'] / mib, 1),
+            'worker_pss_mib_ready': round(float(np.mean([m['pss'] for m in before])) / mib, 1),
+            'worker_pss_mib_loaded': round(float(np.mean([m['pss'] for m in after])) / mib, 1),
+            'worker_private_mib_loaded': round(float(np.mean([m['private'] for m in after])) / mib, 1),
+            'worker_rss_mib_loaded': round(float(np.mean([m['rss'] for m in after])) / mib, 1),
+            'total_pss_mib': round((master['pss'] + sum(m['pss'] for m in after)) / mib, 1),
+        })
+        return result
+    finally:
+        proc.send_signal(signal.SIGTERM)
+        proc.wait(timeout=60)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 4, 8])
+    parser.add_argument('--endpoint', choices=sorted(PAYLOADS), default='analyze-resume')
+    parser.add_argument('--seconds', type=float, default=20)
+    parser.add_argument('--concurrency', type=int, default=0, help='client threads (default: 2 x workers)')
+    parser.add_argument('--port', type=int, default=5055)
+    parser.add_argument('--startup-timeout', type=float, default=300)
+    parser.add_argument('--markdown', action='store_true', help='also print SERVING.md table rows')
+    args = parser.parse_args()
+
+    results = []
+    for workers in args.workers:
+        results.append(run(workers, args))
+        print(json.dumps(results[-1]), flush=True)
+    if args.markdown:
+        print(f"\nHost: {os.cpu_count()} CPUs, {os.uname().machine}")
+        for result in results:
+            print(markdown_row(result))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+"""
+Benchmark: inverted skill index vs the old per-request scan in /filter-resumes
+
+Synthetic candidates carry a few common skills, a long tail of rare ones and
+a short experience line. Each query runs against the index and against the
+old scan, and both results are checked for equality.
+
+Usage:
+    python benchmarks/bench_skill_index.py --n 100000
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from skill_index import SkillIndex  # noqa: E402
+
+COMMON = ['Python', 'JavaScript', 'Java', 'React', 'AWS', 'Docker', 'Kubernetes', 'SQL',
+          'C++', 'Go', 'Node.js', 'TypeScript', 'Flask', 'Django', 'Spark']
+WORDS = 'senior junior engineer developer lead manager at corp inc. data team years'.split()
+QUERIES = [
+    (['python', 'react'], ''),
+    (['java'], 'senior engineer'),
+    ([], 'lead developer'),
+    (['c++', 'go'], 'lead'),
+    (['skill1'], ''),
+]
+
+
+def make_resumes(n, tail, seed=0):
+    rng = random.Random(seed)
+    rare = [f'skill{i}' for i in range(tail)]
+    return [{
+        'id': str(i),
+        'skills': rng.sample(COMMON, rng.randint(0, 6)) + rng.sample(rare, rng.randint(0, 8)),
+        'experience': ' '.join(rng.choices(WORDS, k=rng.randint(0, 20))).title(),
+    } for i in range(n)]
+
+
+def scan(resumes, skill_filters, experience_filter):
+    """The old /filter-resumes loop"""
+    out = []
+    for resume in resumes:
+        resume_skills = [skill.lower() for skill in resume.get('skills', [])]
+        if not all(any(q.lower() in s for s in resume_skills) for q in skill_filters):
+            continue
+        if experience_filter and experience_filter.lower() not in resume.get('experience', '').lower():
+            continue
+        out.append(resume)
+    return out
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--n', type=int, default=100000)
+    parser.add_argument('--tail', type=int, default=2000, help='number of rare skills')
+    args = parser.parse_args()
+
+    resumes = make_resumes(args.n, args.tail)
+    index = SkillIndex()
+    start = time.perf_counter()
+    index.sync(resumes)
+    print(f"build {time.perf_counter() - start:.2f}s for {args.n} resumes  {index.stats()}")
+
+    start = time.perf_counter()
+    index.sync(resumes)
+    print(f"re-sync (unchanged) {time.perf_counter() - start:.2f}s")
+
+    for skills, experience in QUERIES:
+        start = time.perf_counter()
+        found = index.resumes(index.match(skills, experience=experience))
+        indexed = time.perf_counter() - start
+        start = time.perf_counter()
+        expected = scan(resumes, skills, experience)
+        scanned = time.perf_counter() - start
+        print(f"{str(skills):<20} {experience!r:<18} {len(found):6d} hits  index {indexed * 1000:7.2f} ms  "
+              f"scan {scanned * 1000:7.1f} ms  same={found == expected}")
+
+    start = time.perf_counter()
+    facets = index.facets()
+    print(f"facets over all resumes: {len(facets)} skills in {(time.perf_counter() - start) * 1000:.2f} ms")
+
+
+if __name__ == '__main__':
+    main()
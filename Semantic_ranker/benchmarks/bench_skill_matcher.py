@@ -0,0 +1,99 @@
+"""
+Micro-benchmark: compiled taxonomy matcher vs the legacy per-skill substring scan
+
+Usage:
+    python benchmarks/bench_skill_matcher.py --docs 2000 --words 700
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from skill_matcher import SkillMatcher  # noqa: E402
+
+# Skill list and loop of the original extract_skills_with_regex, kept for comparison
+LEGACY_SKILLS = [
+    'python', 'java', 'javascript', 'typescript', 'c++', 'c#', 'php', 'ruby', 'go', 'rust',
+    'swift', 'kotlin', 'scala', 'r', 'matlab', 'sql', 'html', 'css', 'dart', 'perl',
+    'shell', 'bash', 'powershell', 'vba', 'objective-c',
+    'react', 'angular', 'vue', 'django', 'flask', 'spring', 'express', 'laravel', 'rails',
+    'asp.net', 'tensorflow', 'pytorch', 'keras', 'scikit-learn', 'pandas', 'numpy', 'opencv',
+    'jquery', 'bootstrap', 'node.js', 'next.js', 'gatsby', 'svelte', 'flutter', 'react native',
+    'mysql', 'postgresql', 'mongodb', 'sqlite', 'oracle', 'sql server', 'redis', 'elasticsearch',
+    'cassandra', 'dynamodb', 'neo4j', 'firebase',
+    'aws', 'azure', 'gcp', 'docker', 'kubernetes', 'jenkins', 'gitlab', 'github', 'circleci',
+    'terraform', 'ansible', 'helm', 'prometheus', 'grafana',
+    'git', 'linux', 'windows', 'macos', 'jira', 'confluence', 'postman', 'swagger', 'api',
+    'rest', 'graphql', 'microservices', 'json', 'xml', 'yaml',
+    'agile', 'scrum', 'kanban', 'devops', 'ci/cd', 'tdd', 'bdd', 'microservices',
+    'machine learning', 'artificial intelligence', 'data science', 'data analysis', 'big data',
+    'hadoop', 'spark', 'tableau', 'power bi', 'excel', 'statistics', 'deep learning',
+    'leadership', 'communication', 'teamwork', 'project management', 'problem solving'
+]
+
+
+def legacy_extract(text):
+    text_lower = text.lower()
+    found_skills = []
+    for skill in LEGACY_SKILLS:
+        if skill.lower() in text_lower:
+            formatted_skill = ' '.join(word.capitalize() for word in skill.split())
+            if formatted_skill not in found_skills:
+                found_skills.append(formatted_skill)
+    return found_skills[:20]
+
+
+FILLER = (
+    "experience developed team built services using data systems managed led projects university "
+    "engineering performance customer design testing responsible delivered improved across growth "
+    "category argument forgot rapidly restore capital strategy apiary cargo ergonomic"
+).split()
+
+
+def make_corpus(docs, words, seed=7):
+    rng = random.Random(seed)
+    skills = [s for s in LEGACY_SKILLS if len(s) > 2]
+    corpus = []
+    for _ in range(docs):
+        tokens = [rng.choice(FILLER) for _ in range(words)]
+        for _ in range(rng.randint(3, 15)):
+            tokens[rng.randrange(words)] = rng.choice(skills).title()
+        corpus.append(' '.join(tokens))
+    return corpus
+
+
+def bench(name, fn, corpus):
+    start = time.perf_counter()
+    total = 0
+    for text in corpus:
+        total += len(fn(text))
+    elapsed = time.perf_counter() - start
+    mb = sum(len(t) for t in corpus) / 1e6
+    print(f"{name:<10} {len(corpus) / elapsed:>10.0f} docs/s  {mb / elapsed:>7.2f} MB/s  {total / len(corpus):.1f} skills/doc")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--docs', type=int, default=2000)
+    parser.add_argument('--words', type=int, default=700)
+    args = parser.parse_args()
+
+    taxonomy = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'skill_taxonomy.json')
+    start = time.perf_counter()
+    matcher = SkillMatcher.from_file(taxonomy)
+    print(f"matcher build: {(time.perf_counter() - start) * 1000:.1f} ms ({len(matcher.names)} skills)")
+
+    corpus = make_corpus(args.docs, args.words)
+    bench('legacy', legacy_extract, corpus)
+    bench('compiled', matcher.find, corpus)
+
+    sample = "Restored cargo ergonomics; argued over rapid category growth."
+    print(f"false positives on {sample!r}: legacy={legacy_extract(sample)} compiled={matcher.find(sample)}")
+
+
+if __name__ == '__main__':
+    main()
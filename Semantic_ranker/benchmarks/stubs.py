@@ -0,0 +1,200 @@
+"""
+In-process stand-ins for the external clients, for benchmarks
+
+- StubOpenAI: chat.completions.create like the openai client (plain and
+  stream=True), answers from fake_openai_server.answer_for, optional latency
+- StubChromaClient: get_or_create_collection with an in-memory collection
+  (count/get/upsert/update/delete/query, "where" with equality and $in)
+  scored by brute-force cosine distance in numpy
+- HashedEncoder: sentence-transformers shaped encode() from a hashed bag of
+  words, for machines without the model (numbers are then not comparable to
+  runs with the real encoder)
+"""
+
+import re
+import threading
+import time
+import zlib
+from types import SimpleNamespace
+
+import numpy as np
+
+from fake_openai_server import answer_for
+
+
+def _prompt_of(messages):
+    return "\n".join(str(message.get('content', '')) for message in messages)
+
+
+class _Completions:
+    def __init__(self, owner):
+        self._owner = owner
+
+    def create(self, model=None, messages=(), stream=False, **kwargs):
+        owner = self._owner
+        with owner.lock:
+            owner.calls += 1
+        if owner.latency:
+            time.sleep(owner.latency)
+        text = answer_for(_prompt_of(messages))
+        if stream:
+            return iter([SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=piece))])
+                         for piece in re.findall(r'\S+\s*', text)])
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=text))])
+
+
+class StubOpenAI:
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.calls = 0
+        self.lock = threading.Lock()
+        self.chat = SimpleNamespace(completions=_Completions(self))
+
+    def with_options(self, **kwargs):
+        return self
+
+
+def _matches(meta, where):
+    for key, cond in (where or {}).items():
+        value = (meta or {}).get(key)
+        if isinstance(cond, dict):
+            if '$in' in cond and value not in cond['$in']:
+                return False
+            if '$eq' in cond and value != cond['$eq']:
+                return False
+        elif value != cond:
+            return False
+    return True
+
+
+class StubCollection:
+    def __init__(self, name):
+        self.name = name
+        self._rows = {}          # id -> [document, metadata, embedding]
+        self._matrix = None      # (ids, metadatas, unit embeddings) until the next write
+        self._lock = threading.RLock()
+
+    def count(self):
+        return len(self._rows)
+
+    def _pack(self, ids, include):
+        rows = [self._rows[cid] for cid in ids]
+        out = {'ids': list(ids)}
+        if 'documents' in include:
+            out['documents'] = [row[0] for row in rows]
+        if 'metadatas' in include:
+            out['metadatas'] = [dict(row[1] or {}) for row in rows]
+        if 'embeddings' in include:
+            out['embeddings'] = [row[2] for row in rows]
+        return out
+
+    def get(self, ids=None, where=None, include=('documents', 'metadatas'), limit=None, offset=None):
+        with self._lock:
+            if ids is not None:
+                selected = [cid for cid in ids if cid in self._rows]
+            else:
+                selected = [cid for cid, row in self._rows.items() if _matches(row[1], where)]
+            start = offset or 0
+            selected = selected[start:start + limit if limit is not None else None]
+            return self._pack(selected, include)
+
+    def upsert(self, ids, documents=None, metadatas=None, embeddings=None):
+        with self._lock:
+            for i, cid in enumerate(ids):
+                self._rows[cid] = [documents[i] if documents else '', metadatas[i] if metadatas else {},
+                                   np.asarray(embeddings[i], dtype=np.float32)]
+            self._matrix = None
+
+    add = upsert
+
+    def update(self, ids, documents=None, metadatas=None, embeddings=None):
+        with self._lock:
+            for i, cid in enumerate(ids):
+                row = self._rows.get(cid)
+                if row is None:
+                    continue
+                if documents:
+                    row[0] = documents[i]
+                if metadatas:
+                    row[1] = metadatas[i]
+                if embeddings:
+                    row[2] = np.asarray(embeddings[i], dtype=np.float32)
+            self._matrix = None
+
+    def delete(self, ids=None, where=None):
+        with self._lock:
+            targets = ids if ids is not None else [cid for cid, row in self._rows.items() if _matches(row[1], where)]
+            for cid in targets:
+                self._rows.pop(cid, None)
+            self._matrix = None
+
+    def _packed(self):
+        if self._matrix is None:
+            ids = list(self._rows)
+            metas = [self._rows[cid][1] for cid in ids]
+            if ids:
+                matrix = np.stack([self._rows[cid][2] for cid in ids])
+                matrix /= np.linalg.norm(matrix, axis=1, keepdims=True) + 1e-12
+            else:
+                matrix = np.zeros((0, 1), dtype=np.float32)
+            self._matrix = (ids, metas, matrix)
+        return self._matrix
+
+    def query(self, query_embeddings, n_results=10, where=None, include=('documents', 'metadatas', 'distances')):
+        with self._lock:
+            ids, metas, matrix = self._packed()
+            out = {'ids': [], 'documents': [], 'metadatas': [], 'distances': []}
+            if not ids:
+                for key in out:
+                    out[key] = [[] for _ in query_embeddings]
+                return out
+            allowed = None if not where else np.array([_matches(meta, where) for meta in metas])
+            queries = np.asarray(query_embeddings, dtype=np.float32)
+            queries /= np.linalg.norm(queries, axis=1, keepdims=True) + 1e-12
+            distances = 1.0 - queries @ matrix.T
+            if allowed is not None:
+                distances[:, ~allowed] = np.inf
+            for row in distances:
+                top = np.argsort(row)[:n_results]
+                top = [int(i) for i in top if np.isfinite(row[i])]
+                packed = self._pack([ids[i] for i in top], include)
+                out['ids'].append(packed['ids'])
+                out['documents'].append(packed.get('documents', []))
+                out['metadatas'].append(packed.get('metadatas', []))
+                out['distances'].append([float(row[i]) for i in top])
+            return out
+
+
+class StubChromaClient:
+    def __init__(self):
+        self._collections = {}
+        self._lock = threading.Lock()
+
+    def get_or_create_collection(self, name, **kwargs):
+        with self._lock:
+            return self._collections.setdefault(name, StubCollection(name))
+
+    create_collection = get_or_create_collection
+
+    def delete_collection(self, name):
+        with self._lock:
+            self._collections.pop(name, None)
+
+
+class HashedEncoder:
+    def __init__(self, dim=384):
+        self.dim = dim
+
+    def get_sentence_embedding_dimension(self):
+        return self.dim
+
+    def encode(self, sentences, batch_size=32, **kwargs):
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+        out = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for token in re.findall(r'[a-z0-9+#.]+', text.lower()):
+                h = zlib.crc32(token.encode())
+                out[row, h % self.dim] += 1.0 if h & 1 << 31 else -1.0
+        out /= np.linalg.norm(out, axis=1, keepdims=True) + 1e-9
+        return out[0] if single else out
@@ -0,0 +1,140 @@
+"""
+Synthetic resumes and job descriptions for benchmarks (stdlib only)
+
+- Deterministic per seed: the same --seed gives the same corpus, so runs compare
+- Resume text has the sections the extractors look for (contact, experience,
+  education, skills) and a mix of taxonomy skills, numbers and dates
+- PDF and DOCX files are written by hand (one Helvetica text stream per page;
+  a zip with word/document.xml) so no PDF/Office library is needed to build them
+"""
+
+import random
+import zipfile
+
+FIRST = "Aarav Priya Rohan Ananya Vikram Meera Arjun Kavya Liam Olivia Noah Emma Mateo Sofia Wei Yuki".split()
+LAST = "Sharma Iyer Patel Reddy Gupta Nair Smith Johnson Garcia Chen Tanaka Kim Silva Novak Müller Rossi".split()
+COMPANIES = "Acme Globex Initech Umbrella Hooli Stark Wayne Cyberdyne Tyrell Soylent Vandelay Wonka".split()
+TITLES = ["Software Engineer", "Senior Software Engineer", "Data Scientist", "Backend Developer",
+          "Frontend Developer", "DevOps Engineer", "ML Engineer", "Data Engineer", "Tech Lead",
+          "Full Stack Developer", "QA Engineer", "Cloud Architect"]
+SKILLS = ["Python", "Java", "JavaScript", "TypeScript", "React", "Node.js", "Django", "Flask", "FastAPI",
+          "Docker", "Kubernetes", "AWS", "Azure", "GCP", "SQL", "PostgreSQL", "MongoDB", "Redis",
+          "TensorFlow", "PyTorch", "scikit-learn", "Pandas", "NumPy", "Spark", "Kafka", "Airflow",
+          "Terraform", "Git", "Linux", "C++", "Go", "Rust", "GraphQL", "REST", "CI/CD", "Jenkins"]
+DEGREES = ["B.Tech Computer Science", "BSc Computer Science", "MSc Data Science", "M.Tech Software Systems",
+           "BE Electronics", "MBA Technology Management", "PhD Machine Learning"]
+VERBS = ["Built", "Designed", "Led", "Migrated", "Optimised", "Automated", "Shipped", "Scaled", "Maintained"]
+OBJECTS = ["a payments API", "the data platform", "an internal search service", "the CI pipeline",
+           "a recommendation engine", "customer dashboards", "the event ingestion layer",
+           "a fraud detection model", "the mobile backend", "ETL jobs"]
+
+
+def make_resume(index, rng):
+    """One resume as a dict with 'id', 'name', 'email', 'skills' and full 'text'"""
+    name = f"{rng.choice(FIRST)} {rng.choice(LAST)}"
+    email = f"{name.lower().replace(' ', '.')}{index}@example.com"
+    skills = rng.sample(SKILLS, rng.randint(4, 12))
+    lines = [name, f"{email} | +91 9{rng.randint(100000000, 999999999)}", "", "Summary",
+             f"{rng.choice(TITLES)} with {rng.randint(1, 15)} years of experience in "
+             f"{', '.join(skills[:3])}.", "", "Experience"]
+    year = 2024
+    for _ in range(rng.randint(1, 5)):
+        start = year - rng.randint(1, 4)
+        lines.append(f"{rng.choice(TITLES)} at {rng.choice(COMPANIES)} Corp ({start} - {year})")
+        for _ in range(rng.randint(2, 5)):
+            lines.append(f"- {rng.choice(VERBS)} {rng.choice(OBJECTS)} with {rng.choice(skills)}, "
+                         f"improving throughput by {rng.randint(5, 80)}% for {rng.randint(2, 500)}k users.")
+        year = start
+    lines += ["", "Education", f"{rng.choice(DEGREES)}, State University ({year - 4} - {year})",
+              "", "Skills", ', '.join(skills)]
+    return {'id': f"resume-{index}", 'name': name, 'email': email, 'skills': skills, 'text': "\n".join(lines)}
+
+
+def make_job_description(rng):
+    title = rng.choice(TITLES)
+    must = rng.sample(SKILLS, 4)
+    nice = rng.sample([s for s in SKILLS if s not in must], 3)
+    return (f"We are hiring a {title} to join our platform team. You will design, build and run "
+            f"services used by millions of customers.\n\nRequirements\n- {rng.randint(2, 8)}+ years of "
+            f"experience\n- Strong {', '.join(must)}\n- Experience with production systems on the cloud\n\n"
+            f"Nice to have\n- {', '.join(nice)}\n- Mentoring and code review")
+
+
+def make_corpus(n, seed=0):
+    """n resumes and a job description"""
+    rng = random.Random(seed)
+    return [make_resume(i, rng) for i in range(n)], make_job_description(rng)
+
+
+def _pdf_escape(line):
+    line = line.encode('latin-1', 'replace').decode('latin-1')
+    return line.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)')
+
+
+def write_pdf(path, text, lines_per_page=50):
+    """Minimal multi-page PDF with the text in Helvetica, one line per Tj"""
+    lines = text.split("\n") or ['']
+    pages = [lines[i:i + lines_per_page] for i in range(0, len(lines), lines_per_page)] or [['']]
+    # 1: catalog, 2: page tree, 3: font, then a (page, content) pair per page
+    objects = [None, None, b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for page_lines in pages:
+        ops = ["BT", "/F1 10 Tf", "12 TL", "50 780 Td"]
+        for line in page_lines:
+            ops.append(f"({_pdf_escape(line)}) Tj T*")
+        ops.append("ET")
+        stream = "\n".join(ops).encode('latin-1')
+        page_number, content_number = len(objects) + 1, len(objects) + 2
+        kids.append(f"{page_number} 0 R")
+        objects.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 842] /Resources << /Font << /F1 3 0 R >> >> "
+                       f"/Contents {content_number} 0 R >>".encode())
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+    objects[0] = b"<< /Type /Catalog /Pages 2 0 R >>"
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(kids)} >>".encode()
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for offset in offsets:
+        out += b"%010d 00000 n \n" % offset
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    with open(path, 'wb') as fh:
+        fh.write(out)
+
+
+_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/word/document.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml"/>'
+    '</Types>'
+)
+_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+    'Target="word/document.xml"/></Relationships>'
+)
+
+
+def write_docx(path, text):
+    """Minimal DOCX: one paragraph per line"""
+    def escape(line):
+        return line.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
+    body = ''.join(f'<w:p><w:r><w:t xml:space="preserve">{escape(line)}</w:t></w:r></w:p>'
+                   for line in text.split("\n"))
+    document = (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main">'
+        f'<w:body>{body}</w:body></w:document>'
+    )
+    with zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr('[Content_Types].xml', _CONTENT_TYPES)
+        zf.writestr('_rels/.rels', _RELS)
+        zf.writestr('word/document.xml', document)
@@ -0,0 +1,239 @@
+"""
+BM25 keyword index (separate module)
+- One index per RAG workspace, next to the Chroma store; chunk term counts are
+  persisted in SQLite and the inverted index is rebuilt in memory on open
+- Incremental: upsert/delete by chunk id, in step with the Chroma collection;
+  a generation counter lets other worker processes notice writes and reload
+- Tokens keep technical spellings ('c++', 'node.js', 'az-104') and also index
+  their parts ('node', 'js'), so exact tool names and cert ids are findable
+- reciprocal_rank_fusion() merges ranked lists from several retrievers
+"""
+
+from __future__ import annotations
+
+import json
+import math
+import os
+import re
+import sqlite3
+import threading
+from collections import Counter
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+_TOKEN = re.compile(r"[a-z0-9][a-z0-9+#._\-]*")
+_PARTS = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text: str) -> List[str]:
+    tokens = []
+    for token in _TOKEN.findall(text.lower()):
+        token = token.rstrip('.-_')
+        if not token:
+            continue
+        tokens.append(token)
+        parts = _PARTS.findall(token)
+        if len(parts) > 1 or (parts and parts[0] != token):
+            tokens.extend(parts)
+    return tokens
+
+
+def reciprocal_rank_fusion(rankings: Iterable[Sequence[str]], k: int = 60) -> List[Tuple[str, float]]:
+    """Fuse ranked id lists: score(id) = sum over lists of 1 / (k + rank)"""
+    scores: Dict[str, float] = {}
+    for ranking in rankings:
+        for rank, item in enumerate(ranking, start=1):
+            scores[item] = scores.get(item, 0.0) + 1.0 / (k + rank)
+    return sorted(scores.items(), key=lambda pair: pair[1], reverse=True)
+
+
+class BM25Index:
+    """Okapi BM25 over chunks; ``group`` (the resume id) allows filtered search"""
+
+    def __init__(self, path: str, k1: float = 1.2, b: float = 0.75):
+        self.path = path
+        self.k1 = k1
+        self.b = b
+        self._lock = threading.RLock()
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with self._conn() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS chunks ("
+                " id TEXT PRIMARY KEY,"
+                " grp TEXT NOT NULL,"
+                " length INTEGER NOT NULL,"
+                " terms TEXT NOT NULL)"
+            )
+            conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+        self._load()
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _stored_generation(self) -> int:
+        row = self._conn().execute("SELECT value FROM meta WHERE key = 'generation'").fetchone()
+        return row[0] if row else 0
+
+    def _load(self):
+        self._generation = self._stored_generation()
+        self._slot_of: Dict[str, int] = {}
+        self._ids: List[Optional[str]] = []
+        self._by_group: Dict[str, set] = {}
+        self._lengths: List[int] = []
+        self._postings: Dict[str, Dict[int, int]] = {}
+        self._arrays: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+        self._total_length = 0
+        self._length_array: Optional[np.ndarray] = None
+        for cid, grp, length, terms in self._conn().execute("SELECT id, grp, length, terms FROM chunks"):
+            self._add(cid, grp, length, json.loads(terms))
+
+    def _refresh(self):
+        # Another process wrote since we loaded
+        if self._stored_generation() != self._generation:
+            self._load()
+
+    def _write(self, apply: Callable[[sqlite3.Connection], Any]) -> Any:
+        """Run apply() in an immediate transaction and bump the generation"""
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            self._refresh()
+            result = apply(conn)
+            conn.execute("INSERT INTO meta (key, value) VALUES ('generation', 1)"
+                         " ON CONFLICT(key) DO UPDATE SET value = value + 1")
+            self._generation = self._stored_generation()
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            self._load()
+            raise
+        self._maybe_compact()
+        return result
+
+    def __len__(self) -> int:
+        return len(self._slot_of)
+
+    def __contains__(self, cid: str) -> bool:
+        return cid in self._slot_of
+
+    def ids(self) -> List[str]:
+        with self._lock:
+            self._refresh()
+            return list(self._slot_of)
+
+    def _add(self, cid: str, grp: str, length: int, counts: Dict[str, int]):
+        slot = len(self._ids)
+        self._slot_of[cid] = slot
+        self._ids.append(cid)
+        self._by_group.setdefault(grp, set()).add(slot)
+        self._lengths.append(length)
+        self._total_length += length
+        for term, tf in counts.items():
+            self._postings.setdefault(term, {})[slot] = tf
+            self._arrays.pop(term, None)
+        self._length_array = None
+
+    def _remove(self, cid: str):
+        slot = self._slot_of.pop(cid, None)
+        if slot is None:
+            return
+        row = self._conn().execute("SELECT grp, terms FROM chunks WHERE id = ?", (cid,)).fetchone()
+        if row is not None:
+            members = self._by_group.get(row[0])
+            if members is not None:
+                members.discard(slot)
+                if not members:
+                    del self._by_group[row[0]]
+        for term in (json.loads(row[1]) if row else {}):
+            postings = self._postings.get(term)
+            if postings is not None:
+                postings.pop(slot, None)
+                if not postings:
+                    del self._postings[term]
+                self._arrays.pop(term, None)
+        self._total_length -= self._lengths[slot]
+        self._ids[slot] = None
+
+    def upsert(self, ids: Sequence[str], texts: Sequence[str], groups: Sequence[str]):
+        def apply(conn):
+            rows = []
+            for cid, text, grp in zip(ids, texts, groups):
+                self._remove(cid)
+                tokens = tokenize(text)
+                counts = dict(Counter(tokens))
+                self._add(cid, grp, len(tokens), counts)
+                rows.append((cid, grp, len(tokens), json.dumps(counts)))
+            conn.executemany("INSERT OR REPLACE INTO chunks (id, grp, length, terms) VALUES (?, ?, ?, ?)", rows)
+
+        with self._lock:
+            self._write(apply)
+
+    def delete(self, ids: Iterable[str]) -> int:
+        def apply(conn):
+            removed = [cid for cid in ids if cid in self._slot_of]
+            for cid in removed:
+                self._remove(cid)
+            conn.executemany("DELETE FROM chunks WHERE id = ?", [(cid,) for cid in removed])
+            return len(removed)
+
+        with self._lock:
+            return self._write(apply)
+
+    def _maybe_compact(self):
+        # Slots of replaced/deleted chunks are dead weight; reload once they dominate
+        if len(self._ids) > 1024 and len(self._slot_of) * 2 < len(self._ids):
+            self._load()
+
+    def _term_arrays(self, term: str) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        arrays = self._arrays.get(term)
+        if arrays is None:
+            postings = self._postings.get(term)
+            if not postings:
+                return None
+            arrays = (np.fromiter(postings.keys(), dtype=np.int64, count=len(postings)),
+                      np.fromiter(postings.values(), dtype=np.float64, count=len(postings)))
+            self._arrays[term] = arrays
+        return arrays
+
+    def search(self, query: str, k: int = 10, group: Optional[str] = None) -> List[Tuple[str, float]]:
+        """Top-k (chunk id, BM25 score), optionally only chunks of one group"""
+        with self._lock:
+            self._refresh()
+            n = len(self._slot_of)
+            if n == 0:
+                return []
+            if self._length_array is None:
+                self._length_array = np.asarray(self._lengths, dtype=np.float64)
+            avg_length = max(self._total_length / n, 1e-9)
+            scores = np.zeros(len(self._ids), dtype=np.float64)
+            for term, qtf in Counter(tokenize(query)).items():
+                arrays = self._term_arrays(term)
+                if arrays is None:
+                    continue
+                slots, tf = arrays
+                idf = math.log(1.0 + (n - len(slots) + 0.5) / (len(slots) + 0.5))
+                norm = self.k1 * (1.0 - self.b + self.b * self._length_array[slots] / avg_length)
+                scores[slots] += qtf * idf * tf * (self.k1 + 1.0) / (tf + norm)
+            if group is not None:
+                members = self._by_group.get(group)
+                candidates = np.fromiter(members, dtype=np.int64, count=len(members)) if members else np.zeros(0, np.int64)
+                candidates = candidates[scores[candidates] > 0]
+            else:
+                candidates = np.flatnonzero(scores > 0)
+            if len(candidates) > k:
+                candidates = candidates[np.argpartition(-scores[candidates], k - 1)[:k]]
+            candidates = candidates[np.argsort(-scores[candidates], kind='stable')]
+            return [(self._ids[slot], float(scores[slot])) for slot in candidates.tolist()]
+
+    def stats(self):
+        with self._lock:
+            self._refresh()
+            return {'chunks': len(self._slot_of), 'terms': len(self._postings), 'slots': len(self._ids)}
@@ -0,0 +1,255 @@
+"""
+Chat memory store (separate module)
+- Conversation history per (workspace_id, chat_id), persisted in SQLite so
+  every worker process sees the same chats and they survive restarts
+- In-memory window cache with LRU eviction (by chats and by UTF-8 bytes of the
+  cached messages) and an idle TTL; each cached chat keeps only its most
+  recent window_tokens
+- Cache entries catch up with messages other processes appended by reading
+  rows past the last id they hold
+- On disk: at most max_messages per chat, rows older than retention dropped
+- window(): the most recent messages that fit a token budget
+"""
+
+from __future__ import annotations
+
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+
+def estimate_tokens(text: str) -> int:
+    # ~4 characters per token for English text with BPE tokenizers
+    return max(1, (len(text) + 3) // 4)
+
+
+def _size(role: str, content: str) -> int:
+    return len(role.encode('utf-8')) + len(content.encode('utf-8'))
+
+
+class _Chat:
+    __slots__ = ('messages', 'tokens', 'bytes', 'last_id', 'last_used')
+
+    def __init__(self):
+        self.messages: Deque[Tuple[int, str, str, int]] = deque()  # (id, role, content, tokens)
+        self.tokens = 0
+        self.bytes = 0
+        self.last_id = 0
+        self.last_used = time.time()
+
+
+class ChatMemoryStore:
+    """SQLite-backed chat histories with a bounded in-memory window cache"""
+
+    def __init__(self, path: str, max_chats: int = 256, max_bytes: int = 16 * 1024 * 1024,
+                 ttl: float = 1800, window_tokens: int = 2000, max_messages: int = 200,
+                 retention: float = 30 * 24 * 3600):
+        self.path = path
+        self.max_chats = max_chats
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.window_tokens = window_tokens
+        self.max_messages = max_messages
+        self.retention = retention
+        self.hits = 0
+        self.misses = 0
+        self.evictions = {'lru': 0, 'ttl': 0}
+        self._chats: "OrderedDict[Tuple[str, str], _Chat]" = OrderedDict()
+        self._bytes = 0
+        self._appends = 0
+        self._lock = threading.RLock()
+        self._local = threading.local()
+        parent = os.path.dirname(os.path.abspath(path))
+        os.makedirs(parent, exist_ok=True)
+        with self._conn() as conn:
+            new_chats_table = conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'chats'").fetchone() is None
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS messages ("
+                " id INTEGER PRIMARY KEY AUTOINCREMENT,"
+                " workspace_id TEXT NOT NULL,"
+                " chat_id TEXT NOT NULL,"
+                " role TEXT NOT NULL,"
+                " content TEXT NOT NULL,"
+                " tokens INTEGER NOT NULL,"
+                " created_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_messages_chat ON messages(workspace_id, chat_id, id)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_messages_age ON messages(created_at)")
+            # One row per stored chat, so stats() counts chats without scanning every message
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS chats ("
+                " workspace_id TEXT NOT NULL, chat_id TEXT NOT NULL, PRIMARY KEY (workspace_id, chat_id))"
+            )
+            if new_chats_table:
+                conn.execute("INSERT OR IGNORE INTO chats SELECT DISTINCT workspace_id, chat_id FROM messages")
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    # -- cache -----------------------------------------------------------------
+
+    def _push(self, chat: _Chat, row: Tuple[int, str, str, int]):
+        chat.messages.append(row)
+        chat.tokens += row[3]
+        size = _size(row[1], row[2])
+        chat.bytes += size
+        self._bytes += size
+        chat.last_id = max(chat.last_id, row[0])
+        # Only the most recent window is kept in memory
+        while len(chat.messages) > 1 and chat.tokens - chat.messages[0][3] >= self.window_tokens:
+            _, role, content, tokens = chat.messages.popleft()
+            chat.tokens -= tokens
+            size = _size(role, content)
+            chat.bytes -= size
+            self._bytes -= size
+
+    def _drop(self, key: Tuple[str, str], reason: str):
+        chat = self._chats.pop(key)
+        self._bytes -= chat.bytes
+        self.evictions[reason] += 1
+
+    def _evict(self):
+        now = time.time()
+        # Oldest first: stop at the first chat used within the TTL
+        while self._chats:
+            key, chat = next(iter(self._chats.items()))
+            if now - chat.last_used <= self.ttl:
+                break
+            self._drop(key, 'ttl')
+        while self._chats and (len(self._chats) > self.max_chats or self._bytes > self.max_bytes):
+            self._drop(next(iter(self._chats)), 'lru')
+
+    def _load_tail(self, workspace_id: str, chat_id: str, after_id: int, max_tokens: int) -> List[Tuple[int, str, str, int]]:
+        """Newest rows past after_id until max_tokens are covered, oldest first"""
+        rows: List[Tuple[int, str, str, int]] = []
+        total = 0
+        cursor = self._conn().execute(
+            "SELECT id, role, content, tokens FROM messages"
+            " WHERE workspace_id = ? AND chat_id = ? AND id > ? ORDER BY id DESC",
+            (workspace_id, chat_id, after_id),
+        )
+        for row in cursor:
+            rows.append(row)
+            total += row[3]
+            if total >= max_tokens:
+                break
+        rows.reverse()
+        return rows
+
+    def _chat(self, workspace_id: str, chat_id: str) -> _Chat:
+        """Cached chat, loaded or brought up to date with other processes' appends"""
+        key = (workspace_id, chat_id)
+        chat = self._chats.get(key)
+        if chat is None:
+            self.misses += 1
+            chat = _Chat()
+            self._chats[key] = chat
+        else:
+            self.hits += 1
+            self._chats.move_to_end(key)
+        for row in self._load_tail(workspace_id, chat_id, chat.last_id, self.window_tokens):
+            self._push(chat, row)
+        chat.last_used = time.time()
+        return chat
+
+    def _oldest_dropped(self, conn: sqlite3.Connection, workspace_id: str, chat_id: str) -> int:
+        """Id of the newest row past the max_messages limit (0 if none)"""
+        row = conn.execute(
+            "SELECT id FROM messages WHERE workspace_id = ? AND chat_id = ?"
+            " ORDER BY id DESC LIMIT 1 OFFSET ?",
+            (workspace_id, chat_id, self.max_messages),
+        ).fetchone()
+        return row[0] if row else 0
+
+    # -- public ----------------------------------------------------------------
+
+    def append(self, workspace_id: str, chat_id: str, role: str, content: str):
+        tokens = estimate_tokens(content)
+        now = time.time()
+        conn = self._conn()
+        with self._lock:
+            chat = self._chat(workspace_id, chat_id)
+            with conn:
+                conn.execute(
+                    "INSERT INTO messages (workspace_id, chat_id, role, content, tokens, created_at)"
+                    " VALUES (?, ?, ?, ?, ?, ?)",
+                    (workspace_id, chat_id, role, content, tokens, now),
+                )
+                conn.execute("INSERT OR IGNORE INTO chats (workspace_id, chat_id) VALUES (?, ?)",
+                             (workspace_id, chat_id))
+                # Keep the newest max_messages rows of this chat
+                conn.execute(
+                    "DELETE FROM messages WHERE workspace_id = ? AND chat_id = ? AND id <= ?",
+                    (workspace_id, chat_id, self._oldest_dropped(conn, workspace_id, chat_id)),
+                )
+                self._appends += 1
+                if self._appends % 1000 == 0:
+                    conn.execute("DELETE FROM messages WHERE created_at < ?", (now - self.retention,))
+                    conn.execute(
+                        "DELETE FROM chats WHERE NOT EXISTS (SELECT 1 FROM messages m"
+                        " WHERE m.workspace_id = chats.workspace_id AND m.chat_id = chats.chat_id)"
+                    )
+            # Catch up rather than push: another process may have appended in between
+            for row in self._load_tail(workspace_id, chat_id, chat.last_id, self.window_tokens):
+                self._push(chat, row)
+            self._evict()
+
+    def window(self, workspace_id: str, chat_id: str, max_tokens: Optional[int] = None) -> List[Dict[str, str]]:
+        """Most recent messages (oldest first) whose estimated tokens fit max_tokens"""
+        max_tokens = self.window_tokens if max_tokens is None else max_tokens
+        with self._lock:
+            if max_tokens > self.window_tokens:
+                rows = self._load_tail(workspace_id, chat_id, 0, max_tokens)
+            else:
+                rows = list(self._chat(workspace_id, chat_id).messages)
+            self._evict()
+        picked: List[Dict[str, str]] = []
+        total = 0
+        for _, role, content, tokens in reversed(rows):
+            if total + tokens > max_tokens:
+                break
+            picked.append({'role': role, 'content': content})
+            total += tokens
+        picked.reverse()
+        return picked
+
+    def clear(self, workspace_id: str, chat_id: str) -> int:
+        conn = self._conn()
+        with self._lock:
+            if (workspace_id, chat_id) in self._chats:
+                chat = self._chats.pop((workspace_id, chat_id))
+                self._bytes -= chat.bytes
+            with conn:
+                conn.execute("DELETE FROM chats WHERE workspace_id = ? AND chat_id = ?", (workspace_id, chat_id))
+                return conn.execute(
+                    "DELETE FROM messages WHERE workspace_id = ? AND chat_id = ?", (workspace_id, chat_id)
+                ).rowcount
+
+    def cache_stats(self) -> Dict[str, Any]:
+        """Figures of the in-memory cache only (no database access)"""
+        with self._lock:
+            return {
+                'entries': len(self._chats),
+                'bytes': self._bytes,
+                'max_entries': self.max_chats,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': dict(self.evictions),
+            }
+
+    def stats(self) -> Dict[str, Any]:
+        conn = self._conn()
+        chats = conn.execute("SELECT COUNT(*) FROM chats").fetchone()[0]
+        messages = conn.execute("SELECT COUNT(*) FROM messages").fetchone()[0]
+        return dict(self.cache_stats(), stored_chats=chats, stored_messages=messages)
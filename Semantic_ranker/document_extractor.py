@@ -0,0 +1,292 @@
+"""
+Document text extraction (separate module)
+- Works on the uploaded bytes: no temp file is written and read back
+- Pluggable PDF backends: pypdfium2 (PDFium, C++), PyPDF2, pdfminer.six;
+  "auto" takes the first one installed in the order benchmarks/bench_extraction.py
+  measured as fastest
+- Limits: bytes per document and pages read per PDF
+- Sandbox: documents are parsed in a small child interpreter (a few per
+  process, started on first use) with a wall-clock timeout per document and
+  an address-space cap. A file that hangs or blows up the parser costs at
+  most the timeout: the child is killed and replaced, the batch goes on.
+- Children are recycled after a number of documents to bound slow leaks
+"""
+
+from __future__ import annotations
+
+import io
+import json
+import os
+import queue
+import re
+import struct
+import subprocess
+import sys
+import threading
+from typing import Any, Dict, List, Optional
+
+PDF_BACKENDS = ('pypdfium2', 'pypdf2', 'pdfminer')
+
+
+class ExtractionError(Exception):
+    """A document could not be read; ``reason`` is a short label (too_large, timeout, ...)"""
+
+    def __init__(self, reason: str, detail: str = ''):
+        super().__init__(f"{reason}: {detail}" if detail else reason)
+        self.reason = reason
+
+
+def _pdf_pypdfium2(data: bytes, max_pages: int) -> List[str]:
+    import pypdfium2 as pdfium
+    pdf = pdfium.PdfDocument(data)
+    try:
+        parts = []
+        for index in range(min(len(pdf), max_pages)):
+            page = pdf[index]
+            textpage = page.get_textpage()
+            parts.append(textpage.get_text_range())
+            textpage.close()
+            page.close()
+        return parts
+    finally:
+        pdf.close()
+
+
+def _pdf_pypdf2(data: bytes, max_pages: int) -> List[str]:
+    import PyPDF2
+    reader = PyPDF2.PdfReader(io.BytesIO(data))
+    return [page.extract_text() or '' for page in reader.pages[:max_pages]]
+
+
+def _pdf_pdfminer(data: bytes, max_pages: int) -> List[str]:
+    from pdfminer.high_level import extract_text
+    return [extract_text(io.BytesIO(data), maxpages=max_pages)]
+
+
+_PDF_READERS = {'pypdfium2': _pdf_pypdfium2, 'pypdf2': _pdf_pypdf2, 'pdfminer': _pdf_pdfminer}
+_BACKEND_MODULES = {'pypdfium2': 'pypdfium2', 'pypdf2': 'PyPDF2', 'pdfminer': 'pdfminer.high_level'}
+
+
+def available_backends() -> List[str]:
+    found = []
+    for name in PDF_BACKENDS:
+        try:
+            __import__(_BACKEND_MODULES[name])
+            found.append(name)
+        except ImportError:
+            continue
+    return found
+
+
+def resolve_backend(backend: str) -> str:
+    if backend != 'auto':
+        if backend not in _PDF_READERS:
+            raise ValueError(f"unknown PDF backend {backend!r}; choose from {', '.join(PDF_BACKENDS)} or auto")
+        return backend
+    found = available_backends()
+    return found[0] if found else 'pypdf2'
+
+
+def extract(kind: str, data: bytes, backend: str, max_pages: int) -> str:
+    """Text of one document in this process; kind is 'pdf' or 'docx'"""
+    if kind == 'pdf':
+        parts = _PDF_READERS[backend](data, max_pages)
+        return re.sub(r'\s+', ' ', '\n'.join(parts)).strip()
+    import docx2txt
+    return docx2txt.process(io.BytesIO(data)).strip()
+
+
+# Sandbox protocol over the child's stdin/stdout:
+#   request  = >II (header length, data length) + JSON header + document bytes
+#   response = >I (length) + JSON {"text"} or {"error", "reason"}
+
+def _read_exact(stream, size: int) -> Optional[bytes]:
+    chunks = []
+    while size:
+        chunk = stream.read(size)
+        if not chunk:
+            return None
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b''.join(chunks)
+
+
+def _serve(memory_mb: int):
+    """Child side: answer requests until stdin closes"""
+    if memory_mb > 0:
+        try:
+            import resource
+            limit = memory_mb * 1024 * 1024
+            resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+        except (ImportError, ValueError, OSError):
+            pass  # not POSIX, or a lower hard limit is already set
+    # Replies go to a private copy of fd 1; anything a parser prints lands on
+    # stderr instead of corrupting the framing
+    stdin, stdout = sys.stdin.buffer, os.fdopen(os.dup(1), 'wb')
+    os.dup2(2, 1)
+    sys.stdout = sys.stderr
+    while True:
+        head = _read_exact(stdin, 8)
+        if head is None:
+            return
+        header_len, data_len = struct.unpack('>II', head)
+        header = json.loads(_read_exact(stdin, header_len))
+        data = _read_exact(stdin, data_len)
+        try:
+            reply = {'text': extract(header['kind'], data, header['backend'], header['max_pages'])}
+        except MemoryError:
+            reply = {'reason': 'memory', 'error': 'document needs more memory than the sandbox allows'}
+        except Exception as e:
+            reply = {'reason': 'parse_failed', 'error': f"{type(e).__name__}: {e}"}
+        body = json.dumps(reply).encode('utf-8')
+        stdout.write(struct.pack('>I', len(body)) + body)
+        stdout.flush()
+
+
+class _Sandbox:
+    """One child interpreter running ``_serve``"""
+
+    def __init__(self, memory_mb: int):
+        self.documents = 0
+        self.proc = subprocess.Popen(
+            [sys.executable, os.path.abspath(__file__), '--serve', str(memory_mb)],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+        )
+
+    def run(self, header: Dict[str, Any], data: bytes, timeout: float) -> Dict[str, Any]:
+        replies: "queue.Queue[Optional[bytes]]" = queue.Queue()
+
+        def read_reply():
+            head = _read_exact(self.proc.stdout, 4)
+            replies.put(None if head is None else _read_exact(self.proc.stdout, struct.unpack('>I', head)[0]))
+
+        reader = threading.Thread(target=read_reply, name='extract-reply', daemon=True)
+        reader.start()
+        try:
+            encoded = json.dumps(header).encode('utf-8')
+            self.proc.stdin.write(struct.pack('>II', len(encoded), len(data)) + encoded)
+            self.proc.stdin.write(data)
+            self.proc.stdin.flush()
+            body = replies.get(timeout=timeout)
+        except queue.Empty:
+            self.kill()
+            raise ExtractionError('timeout', f"no result after {timeout:g}s")
+        except (BrokenPipeError, OSError) as e:
+            self.kill()
+            raise ExtractionError('crashed', str(e))
+        if body is None:
+            # The child died mid-document (segfault, address-space cap hit in C code)
+            self.kill()
+            raise ExtractionError('crashed', f"exit code {self.proc.returncode}")
+        self.documents += 1
+        return json.loads(body)
+
+    def alive(self) -> bool:
+        return self.proc.poll() is None
+
+    def kill(self):
+        if self.proc.poll() is None:
+            self.proc.kill()
+        self.proc.wait()
+        for stream in (self.proc.stdin, self.proc.stdout):
+            try:
+                stream.close()
+            except OSError:
+                pass
+
+
+class DocumentExtractor:
+    """
+    ``extract(data, filename)`` returns the text or raises ExtractionError.
+    Thread-safe: up to ``sandboxes`` documents are parsed at once per process.
+    With ``sandbox=False`` documents are parsed in the calling process (limits
+    on bytes and pages still apply, the timeout and memory cap do not).
+    """
+
+    def __init__(self, backend: str = 'auto', max_bytes: int = 10 * 1024 * 1024, max_pages: int = 30,
+                 timeout: float = 15.0, memory_mb: int = 1024, sandbox: bool = True, sandboxes: int = 2,
+                 recycle_after: int = 500):
+        self.backend = resolve_backend(backend)
+        self.max_bytes = max_bytes
+        self.max_pages = max_pages
+        self.timeout = timeout
+        self.memory_mb = memory_mb
+        self.sandbox = sandbox
+        self.sandboxes = max(1, sandboxes)
+        self.recycle_after = recycle_after
+        self.counters = {'documents': 0, 'failures': 0, 'timeouts': 0, 'crashes': 0, 'too_large': 0,
+                         'sandboxes_started': 0}
+        self._reset()
+
+    def _reset(self):
+        self._pid = os.getpid()
+        self._idle: List[_Sandbox] = []
+        self._slots = threading.BoundedSemaphore(self.sandboxes)
+        self._lock = threading.Lock()
+
+    def _check_fork(self):
+        if os.getpid() != self._pid:
+            # The children belong to the parent process; start our own
+            self._reset()
+
+    def _acquire(self) -> _Sandbox:
+        with self._lock:
+            while self._idle:
+                box = self._idle.pop()
+                if box.alive():
+                    return box
+                box.kill()
+            self.counters['sandboxes_started'] += 1
+        return _Sandbox(self.memory_mb)
+
+    def _release(self, box: _Sandbox):
+        if box.alive() and box.documents < self.recycle_after:
+            with self._lock:
+                self._idle.append(box)
+        else:
+            box.kill()
+
+    def extract(self, data: bytes, filename: str) -> str:
+        kind = 'pdf' if filename.lower().endswith('.pdf') else 'docx'
+        self.counters['documents'] += 1
+        if len(data) > self.max_bytes:
+            self.counters['too_large'] += 1
+            raise ExtractionError('too_large', f"{len(data)} bytes, limit {self.max_bytes}")
+        if not self.sandbox:
+            try:
+                return extract(kind, data, self.backend, self.max_pages)
+            except Exception as e:
+                self.counters['failures'] += 1
+                raise ExtractionError('parse_failed', f"{type(e).__name__}: {e}") from e
+
+        self._check_fork()
+        header = {'kind': kind, 'backend': self.backend, 'max_pages': self.max_pages}
+        with self._slots:
+            box = self._acquire()
+            try:
+                reply = box.run(header, data, self.timeout)
+            except ExtractionError as e:
+                self.counters['failures'] += 1
+                self.counters['timeouts' if e.reason == 'timeout' else 'crashes'] += 1
+                raise
+            finally:
+                self._release(box)
+        if 'error' in reply:
+            self.counters['failures'] += 1
+            raise ExtractionError(reply['reason'], reply['error'])
+        return reply['text']
+
+    def close(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+        if os.getpid() == self._pid:
+            for box in idle:
+                box.kill()
+
+    def stats(self) -> Dict[str, Any]:
+        return dict(self.counters, backend=self.backend, sandbox=self.sandbox, idle_sandboxes=len(self._idle),
+                    max_bytes=self.max_bytes, max_pages=self.max_pages, timeout_seconds=self.timeout)
+
+
+if __name__ == '__main__' and len(sys.argv) == 3 and sys.argv[1] == '--serve':
+    _serve(int(sys.argv[2]))
@@ -0,0 +1,157 @@
+"""
+Embedding store (separate module)
+- Unit-normalised vectors appended to one memory-mapped matrix file, stored as
+  float32, float16 (half the bytes) or int8 (a quarter, plus one float32
+  scale per row); reads always return float32
+- SQLite index from content key (SHA-256 of the text) to matrix row
+- Appends are serialised across processes by the SQLite write lock
+- Ranking is a row gather plus one matrix-vector product
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import sqlite3
+import threading
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+_SQLITE_MAX_VARS = 500
+
+# dtype -> (file suffix, stored element type); float32 keeps the original file names
+STORAGE_DTYPES = {'float32': ('f32', np.float32), 'float16': ('f16', np.float16), 'int8': ('i8', np.int8)}
+
+
+def text_key(text: str) -> str:
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+def normalise_rows(vectors: np.ndarray) -> np.ndarray:
+    vectors = np.asarray(vectors, dtype=np.float32)
+    if vectors.ndim == 1:
+        vectors = vectors.reshape(1, -1)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+def _encode_rows(vectors: np.ndarray, dtype: str) -> np.ndarray:
+    """Unit rows -> stored rows; int8 rows are ``dim`` codes followed by a float32 scale (4 int8 columns)"""
+    if dtype == 'float32':
+        return vectors.astype(np.float32)
+    if dtype == 'float16':
+        return vectors.astype(np.float16)
+    scales = np.abs(vectors).max(axis=1, keepdims=True) / 127.0
+    scales[scales == 0] = 1.0
+    codes = np.clip(np.rint(vectors / scales), -127, 127).astype(np.int8)
+    return np.hstack([codes, scales.astype(np.float32).view(np.int8)])
+
+
+def _decode_rows(stored: np.ndarray, dim: int, dtype: str) -> np.ndarray:
+    if dtype != 'int8':
+        return np.asarray(stored, dtype=np.float32)
+    stored = np.ascontiguousarray(stored)
+    vectors = stored[:, :dim].astype(np.float32) * stored[:, dim:].view(np.float32)
+    # Quantised rows are only approximately unit length; cosine scores expect exact
+    return normalise_rows(vectors)
+
+
+class EmbeddingStore:
+    """Append-only, memory-mapped embedding matrix keyed by content hash"""
+
+    def __init__(self, directory: str, dim: int, dtype: str = 'float32'):
+        if dtype not in STORAGE_DTYPES:
+            raise ValueError(f"unknown embedding dtype {dtype!r}; choose from {', '.join(STORAGE_DTYPES)}")
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.dim = dim
+        self.dtype = dtype
+        suffix, self._stored_type = STORAGE_DTYPES[dtype]
+        self._columns = dim + 4 if dtype == 'int8' else dim
+        self.row_bytes = self._columns * np.dtype(self._stored_type).itemsize
+        # Each dtype keeps its own matrix and row index, so switching never mixes layouts
+        self.vectors_path = os.path.join(directory, f'vectors.{suffix}')
+        self.index_path = os.path.join(directory, 'index.sqlite3' if dtype == 'float32' else f'index.{suffix}.sqlite3')
+        self._local = threading.local()
+        self._map_lock = threading.Lock()
+        self._matrix: Optional[np.memmap] = None
+        if not os.path.exists(self.vectors_path):
+            open(self.vectors_path, 'ab').close()
+        with self._conn() as conn:
+            conn.execute("CREATE TABLE IF NOT EXISTS rows (key TEXT PRIMARY KEY, row INTEGER NOT NULL)")
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.index_path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def __len__(self) -> int:
+        return os.path.getsize(self.vectors_path) // self.row_bytes
+
+    def _mapped(self, min_rows: int) -> np.memmap:
+        """Memory map covering at least ``min_rows`` rows (remapped as the file grows)"""
+        with self._map_lock:
+            if self._matrix is None or self._matrix.shape[0] < min_rows:
+                rows = len(self)
+                self._matrix = np.memmap(self.vectors_path, dtype=self._stored_type, mode='r',
+                                         shape=(rows, self._columns))
+            return self._matrix
+
+    def lookup(self, keys: Sequence[str]) -> List[Optional[int]]:
+        found: Dict[str, int] = {}
+        conn = self._conn()
+        unique = list(set(keys))
+        for i in range(0, len(unique), _SQLITE_MAX_VARS):
+            chunk = unique[i:i + _SQLITE_MAX_VARS]
+            placeholders = ','.join('?' * len(chunk))
+            found.update(conn.execute(f"SELECT key, row FROM rows WHERE key IN ({placeholders})", chunk).fetchall())
+        return [found.get(key) for key in keys]
+
+    def add(self, keys: Sequence[str], vectors: np.ndarray):
+        """Append vectors for keys that are not stored yet"""
+        vectors = normalise_rows(vectors)
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            existing = set(k for k, row in zip(keys, self.lookup(keys)) if row is not None)
+            new_keys, new_rows, seen = [], [], set()
+            for key, vector in zip(keys, vectors):
+                if key in existing or key in seen:
+                    continue
+                seen.add(key)
+                new_keys.append(key)
+                new_rows.append(vector)
+            if new_keys:
+                start = len(self)
+                with open(self.vectors_path, 'ab') as fh:
+                    fh.write(_encode_rows(np.stack(new_rows), self.dtype).tobytes())
+                conn.executemany(
+                    "INSERT INTO rows (key, row) VALUES (?, ?)",
+                    [(key, start + i) for i, key in enumerate(new_keys)],
+                )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def get(self, keys: Sequence[str]) -> np.ndarray:
+        """Matrix of stored vectors for ``keys`` (all must be present)"""
+        rows = self.lookup(keys)
+        if any(row is None for row in rows):
+            raise KeyError('embedding missing for some keys')
+        return self.get_rows(rows)
+
+    def get_rows(self, rows: np.ndarray) -> np.ndarray:
+        """Matrix of stored vectors by row number (rows from ``lookup``)"""
+        rows = np.asarray(rows, dtype=np.int64)
+        if rows.size == 0:
+            return np.zeros((0, self.dim), dtype=np.float32)
+        return _decode_rows(self._mapped(int(rows.max()) + 1)[rows], self.dim, self.dtype)
+
+    def stats(self) -> Dict[str, Any]:
+        return {'vectors': len(self), 'dim': self.dim, 'dtype': self.dtype, 'bytes': len(self) * self.row_bytes}
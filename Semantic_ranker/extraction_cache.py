@@ -0,0 +1,120 @@
+"""
+Extraction cache (separate module)
+- Content-addressed: keyed by the SHA-256 of the uploaded file bytes
+- Persistent SQLite store shared by every worker process on the host
+- Bounded by total payload size with least-recently-used eviction
+- Versioned: the version is part of the key, so processes running another
+  extractor/model version (during a rolling restart, say) keep their own
+  entries; entries nobody reads any more age out through the LRU
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Any, Dict, Optional
+
+
+def file_digest(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+class ExtractionCache:
+    """SQLite-backed LRU cache of per-file extraction results"""
+
+    def __init__(self, path: str, version: str, max_bytes: int = 512 * 1024 * 1024):
+        self.path = path
+        self.version = version
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._local = threading.local()
+        parent = os.path.dirname(os.path.abspath(path))
+        os.makedirs(parent, exist_ok=True)
+        with self._conn() as conn:
+            if 'PRIMARY KEY (digest, version)' not in (conn.execute(
+                    "SELECT sql FROM sqlite_master WHERE name = 'extractions'").fetchone() or ('',))[0]:
+                # Caches from before versioned keys held one version per digest
+                conn.execute("DROP TABLE IF EXISTS extractions")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS extractions ("
+                " digest TEXT NOT NULL,"
+                " version TEXT NOT NULL,"
+                " payload BLOB NOT NULL,"
+                " size INTEGER NOT NULL,"
+                " last_access REAL NOT NULL,"
+                " PRIMARY KEY (digest, version))"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_extractions_lru ON extractions(last_access)")
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, digest: str) -> Optional[Dict[str, Any]]:
+        conn = self._conn()
+        row = conn.execute(
+            "SELECT payload FROM extractions WHERE digest = ? AND version = ?",
+            (digest, self.version),
+        ).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        with conn:
+            conn.execute(
+                "UPDATE extractions SET last_access = ? WHERE digest = ? AND version = ?",
+                (time.time(), digest, self.version),
+            )
+        self.hits += 1
+        return json.loads(zlib.decompress(row[0]))
+
+    def put(self, digest: str, entry: Dict[str, Any]):
+        payload = zlib.compress(json.dumps(entry).encode('utf-8'))
+        if len(payload) > self.max_bytes:
+            return
+        conn = self._conn()
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO extractions (digest, version, payload, size, last_access)"
+                " VALUES (?, ?, ?, ?, ?)",
+                (digest, self.version, payload, len(payload), time.time()),
+            )
+            self._evict(conn)
+
+    def _evict(self, conn: sqlite3.Connection):
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM extractions").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for digest, version, size in conn.execute(
+            "SELECT digest, version, size FROM extractions ORDER BY last_access ASC"
+        ).fetchall():
+            conn.execute("DELETE FROM extractions WHERE digest = ? AND version = ?", (digest, version))
+            self.evictions += 1
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+    def stats(self) -> Dict[str, Any]:
+        entries, total = self._conn().execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM extractions"
+        ).fetchone()
+        return {
+            'version': self.version,
+            'entries': entries,
+            'bytes': total,
+            'max_bytes': self.max_bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+        }
@@ -0,0 +1,124 @@
+"""
+Local fake OpenAI-compatible server for testing the LLM paths offline
+- Implements POST /v1/chat/completions with deterministic skill answers
+- Understands the single- and multi-resume prompts of llm_extractor.py
+- Configurable latency and failure rate to exercise timeouts and the circuit breaker
+
+Usage:
+    python fake_openai_server.py --port 8099 --latency 0.5 --fail-rate 0.1
+    set LLAMA_BASE_URL=http://127.0.0.1:8099/v1 before starting ats_flask_api.py
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List
+
+KNOWN_SKILLS = [
+    'python', 'java', 'javascript', 'typescript', 'react', 'django', 'flask', 'docker',
+    'kubernetes', 'aws', 'azure', 'sql', 'postgresql', 'mongodb', 'tensorflow', 'pytorch',
+    'git', 'linux', 'node.js', 'spark', 'pandas', 'numpy', 'flutter', 'dart', 'go', 'rust',
+]
+
+_RESUME_SECTION = re.compile(r'^### Resume (\d+)\s*$', re.MULTILINE)
+
+
+def _skills_in(text: str) -> List[str]:
+    words = set(re.findall(r'[a-z0-9_#+.\-]+', text.lower()))
+    return [skill for skill in KNOWN_SKILLS if skill in words] or ['communication', 'teamwork']
+
+
+def answer_for(prompt: str) -> str:
+    sections = _RESUME_SECTION.split(prompt)
+    if len(sections) > 1:
+        # sections = [preamble, "1", body1, "2", body2, ...]
+        lines = []
+        for number, body in zip(sections[1::2], sections[2::2]):
+            lines.append(f"{number}: {', '.join(_skills_in(body))}")
+        return "\n".join(lines)
+    if 'Resume:' in prompt:
+        return ', '.join(_skills_in(prompt.split('Resume:', 1)[1]))
+    return ', '.join(['python', 'machine learning', 'data analysis'])
+
+
+class FakeOpenAIHandler(BaseHTTPRequestHandler):
+    server_version = 'FakeOpenAI/1.0'
+    latency = 0.0
+    fail_rate = 0.0
+    request_count = 0
+    _count_lock = threading.Lock()
+
+    def log_message(self, format, *args):  # noqa: A002 (BaseHTTPRequestHandler signature)
+        pass
+
+    def _send_json(self, status: int, payload: dict):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        if not self.path.rstrip('/').endswith('/chat/completions'):
+            self._send_json(404, {'error': {'message': 'not found'}})
+            return
+        with FakeOpenAIHandler._count_lock:
+            FakeOpenAIHandler.request_count += 1
+
+        length = int(self.headers.get('Content-Length', 0))
+        payload = json.loads(self.rfile.read(length) or b'{}')
+        if self.latency:
+            time.sleep(self.latency)
+        if self.fail_rate and random.random() < self.fail_rate:
+            self._send_json(503, {'error': {'message': 'injected failure'}})
+            return
+
+        prompt = payload.get('messages', [{}])[-1].get('content', '')
+        content = answer_for(prompt)
+        self._send_json(200, {
+            'id': f"chatcmpl-{uuid.uuid4().hex}",
+            'object': 'chat.completion',
+            'created': int(time.time()),
+            'model': payload.get('model', 'fake'),
+            'choices': [{
+                'index': 0,
+                'message': {'role': 'assistant', 'content': content},
+                'finish_reason': 'stop',
+            }],
+            'usage': {'prompt_tokens': len(prompt.split()), 'completion_tokens': len(content.split()),
+                      'total_tokens': len(prompt.split()) + len(content.split())},
+        })
+
+
+def serve(host: str = '127.0.0.1', port: int = 8099, latency: float = 0.0, fail_rate: float = 0.0) -> ThreadingHTTPServer:
+    """Start the fake server on a background thread and return it"""
+    FakeOpenAIHandler.latency = latency
+    FakeOpenAIHandler.fail_rate = fail_rate
+    server = ThreadingHTTPServer((host, port), FakeOpenAIHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8099)
+    parser.add_argument('--latency', type=float, default=0.0, help='seconds to sleep per request')
+    parser.add_argument('--fail-rate', type=float, default=0.0, help='fraction of requests answered with 503')
+    args = parser.parse_args()
+
+    server = serve(args.host, args.port, args.latency, args.fail_rate)
+    print(f"🧪 Fake OpenAI server on http://{args.host}:{args.port}/v1")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -0,0 +1,52 @@
+"""
+Gunicorn settings for the ATS API (see wsgi.py)
+- ATS_WORKERS: worker processes (default: CPU count)
+- ATS_WORKER_THREADS: request threads per worker (gthread)
+- ATS_TORCH_THREADS: intra-op threads per worker (default: CPUs / workers),
+  also used by the ONNX sentence encoder unless ATS_EMBED_THREADS is set
+- ATS_BIND, ATS_WORKER_TIMEOUT
+- ATS_METRICS_DIR: where every process writes its metrics so /metrics on any
+  worker reports the whole server (default: a fresh directory per master)
+- ATS_PARSE_WORKERS: /process-resumes parse processes per gunicorn worker
+  (default: CPUs / workers, so all workers together use about one per core;
+  each parse process can also start document extraction sandboxes). Queue
+  large batches through /jobs and job_worker.py instead of raising it.
+"""
+
+import os
+import tempfile
+
+bind = os.environ.get('ATS_BIND', '0.0.0.0:5000')
+workers = int(os.environ.get('ATS_WORKERS', os.cpu_count() or 1))
+worker_class = 'gthread'
+threads = int(os.environ.get('ATS_WORKER_THREADS', 4))
+timeout = int(os.environ.get('ATS_WORKER_TIMEOUT', 300))
+preload_app = True
+# Read by metrics.py when wsgi imports the app, i.e. after this file
+os.environ.setdefault('ATS_METRICS_DIR', os.path.join(tempfile.gettempdir(), f"ats-metrics-{os.getpid()}"))
+# The app's own default (one per CPU) is meant for a single process
+os.environ.setdefault('ATS_PARSE_WORKERS', str(max(1, (os.cpu_count() or 1) // workers)))
+# Workers are forked from the warmed-up master; recycling them keeps that state
+max_requests = int(os.environ.get('ATS_WORKER_MAX_REQUESTS', 0))
+max_requests_jitter = max_requests // 10
+
+
+def post_fork(server, worker):
+    import ats_flask_api
+
+    torch_threads = int(os.environ.get('ATS_TORCH_THREADS', 0)) or max(1, (os.cpu_count() or 1) // workers)
+    try:
+        import torch
+        torch.set_num_threads(torch_threads)
+    except Exception:
+        pass
+    encoder = ats_flask_api.get_sentence_model() if ats_flask_api.models.is_loaded('sentence_model') else None
+    if hasattr(encoder, 'set_threads'):
+        encoder.set_threads(int(os.environ.get('ATS_EMBED_THREADS', 0)) or torch_threads)
+    ats_flask_api.reset_process_state()
+    timings = ats_flask_api.warm_up()
+    server.log.info("worker %s ready (torch threads %s, warm-up %s)", worker.pid, torch_threads, timings)
+
+
+def when_ready(server):
+    server.log.info("🌐 ATS API master ready: models preloaded, forking %s workers", workers)
@@ -0,0 +1,422 @@
+"""
+Batch screening job queue (separate module)
+- Persistent SQLite queue: one job per submitted batch, one task per file
+- Uploaded files are spooled content-addressed (by SHA-256) next to the
+  database, so worker processes read them from disk instead of the request
+- Single host only: the database runs in WAL mode, whose shared-memory index
+  does not work over network filesystems (NFS, SMB), so every process using
+  the queue must run on the machine that holds jobs.sqlite3 and job_spool/.
+  Spreading workers across nodes needs a real broker instead
+- Workers claim tasks under a lease; a crashed worker's tasks are reclaimed
+  once the lease expires
+- Failed tasks are retried with exponential backoff up to max_attempts
+- Resubmitting the same files with the same parameters returns the existing job
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+import zlib
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+TERMINAL_TASK_STATES = ('done', 'failed', 'cancelled')
+
+
+class JobQueue:
+    """SQLite-backed queue of screening jobs and their per-file tasks"""
+
+    def __init__(self, path: str, spool_dir: Optional[str] = None, max_attempts: int = 3,
+                 retry_backoff: float = 5.0):
+        self.path = path
+        self.spool_dir = spool_dir or os.path.join(os.path.dirname(os.path.abspath(path)), 'job_spool')
+        self.max_attempts = max_attempts
+        self.retry_backoff = retry_backoff
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        os.makedirs(self.spool_dir, exist_ok=True)
+        conn = self._conn()
+        with conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                " id TEXT PRIMARY KEY,"
+                " idem_key TEXT NOT NULL,"
+                " status TEXT NOT NULL,"
+                " params TEXT NOT NULL,"
+                " total INTEGER NOT NULL,"
+                " done INTEGER NOT NULL DEFAULT 0,"
+                " failed INTEGER NOT NULL DEFAULT 0,"
+                " created_at REAL NOT NULL,"
+                " updated_at REAL NOT NULL,"
+                " finished_at REAL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_idem ON jobs(idem_key)")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS tasks ("
+                " job_id TEXT NOT NULL,"
+                " seq INTEGER NOT NULL,"
+                " sha256 TEXT NOT NULL,"
+                " filename TEXT NOT NULL,"
+                " status TEXT NOT NULL,"
+                " attempts INTEGER NOT NULL DEFAULT 0,"
+                " available_at REAL NOT NULL,"
+                " lease_owner TEXT,"
+                " lease_expires REAL,"
+                " result BLOB,"
+                " error TEXT,"
+                " PRIMARY KEY (job_id, seq))"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_tasks_ready ON tasks(status, available_at)")
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    # -- spool -----------------------------------------------------------
+
+    def blob_path(self, sha256: str) -> str:
+        return os.path.join(self.spool_dir, sha256[:2], sha256)
+
+    def _spool(self, sha256: str, data: bytes):
+        path = self.blob_path(sha256)
+        if os.path.exists(path):
+            return
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{uuid.uuid4().hex}.tmp"
+        with open(tmp, 'wb') as out:
+            out.write(data)
+        os.replace(tmp, path)
+
+    # -- producer side ---------------------------------------------------
+
+    @staticmethod
+    def idempotency_key(digests: Iterable[str], params: Dict[str, Any]) -> str:
+        body = json.dumps({'files': sorted(digests), 'params': params}, sort_keys=True)
+        return hashlib.sha256(body.encode('utf-8')).hexdigest()
+
+    def submit(self, files: List[Tuple[str, bytes]], params: Dict[str, Any]) -> Tuple[str, bool]:
+        """
+        Queue ``files`` ([(filename, bytes)]) as one job.
+        Returns (job_id, deduplicated): an identical live submission is reused.
+        """
+        digests = [hashlib.sha256(data).hexdigest() for _, data in files]
+        key = self.idempotency_key(digests, params)
+        conn = self._conn()
+        row = conn.execute(
+            "SELECT id FROM jobs WHERE idem_key = ? AND status != 'cancelled' ORDER BY created_at DESC LIMIT 1",
+            (key,),
+        ).fetchone()
+        if row:
+            return row[0], True
+
+        for digest, (_, data) in zip(digests, files):
+            self._spool(digest, data)
+
+        job_id = str(uuid.uuid4())
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # Re-check under the write lock: a concurrent identical submit may have won
+            row = conn.execute(
+                "SELECT id FROM jobs WHERE idem_key = ? AND status != 'cancelled' LIMIT 1", (key,)
+            ).fetchone()
+            if row:
+                conn.execute("COMMIT")
+                return row[0], True
+            conn.execute(
+                "INSERT INTO jobs (id, idem_key, status, params, total, created_at, updated_at)"
+                " VALUES (?, ?, 'queued', ?, ?, ?, ?)",
+                (job_id, key, json.dumps(params), len(files), now, now),
+            )
+            conn.executemany(
+                "INSERT INTO tasks (job_id, seq, sha256, filename, status, available_at)"
+                " VALUES (?, ?, ?, ?, 'queued', ?)",
+                [(job_id, seq, digest, filename, now)
+                 for seq, (digest, (filename, _)) in enumerate(zip(digests, files))],
+            )
+            if not files:
+                conn.execute("UPDATE jobs SET status = 'done', finished_at = ? WHERE id = ?", (now, job_id))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return job_id, False
+
+    def cancel(self, job_id: str) -> bool:
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            cur = conn.execute(
+                "UPDATE jobs SET status = 'cancelled', updated_at = ?, finished_at = ?"
+                " WHERE id = ? AND status IN ('queued', 'running')",
+                (time.time(), time.time(), job_id),
+            )
+            conn.execute(
+                "UPDATE tasks SET status = 'cancelled', lease_owner = NULL"
+                " WHERE job_id = ? AND status IN ('queued', 'running')",
+                (job_id,),
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return cur.rowcount > 0
+
+    # -- consumer side ---------------------------------------------------
+
+    def claim(self, owner: str, limit: int = 8, lease_seconds: float = 300.0) -> List[Dict[str, Any]]:
+        """
+        Lease up to ``limit`` ready tasks (one job at a time, so a worker can
+        run them as one batch). Tasks whose lease expired are reclaimed; those
+        that already used every attempt are failed instead.
+        """
+        conn = self._conn()
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            lost = conn.execute(
+                "SELECT job_id, seq FROM tasks WHERE status = 'running' AND lease_expires < ? AND attempts >= ?",
+                (now, self.max_attempts),
+            ).fetchall()
+            for job_id, seq in lost:
+                self._finish_task(conn, job_id, seq, 'failed', None, 'worker lost while processing', now)
+
+            head = conn.execute(
+                "SELECT job_id FROM tasks"
+                " WHERE (status = 'queued' AND available_at <= ?) OR (status = 'running' AND lease_expires < ?)"
+                " ORDER BY available_at LIMIT 1",
+                (now, now),
+            ).fetchone()
+            if head is None:
+                conn.execute("COMMIT")
+                return []
+            job_id = head[0]
+            rows = conn.execute(
+                "SELECT t.seq, t.sha256, t.filename, t.attempts, j.params FROM tasks t JOIN jobs j ON j.id = t.job_id"
+                " WHERE t.job_id = ? AND ((t.status = 'queued' AND t.available_at <= ?)"
+                " OR (t.status = 'running' AND t.lease_expires < ?))"
+                " ORDER BY t.seq LIMIT ?",
+                (job_id, now, now, limit),
+            ).fetchall()
+            conn.executemany(
+                "UPDATE tasks SET status = 'running', attempts = attempts + 1, lease_owner = ?, lease_expires = ?"
+                " WHERE job_id = ? AND seq = ?",
+                [(owner, now + lease_seconds, job_id, seq) for seq, *_ in rows],
+            )
+            conn.execute(
+                "UPDATE jobs SET status = 'running', updated_at = ? WHERE id = ? AND status = 'queued'",
+                (now, job_id),
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return [
+            {'job_id': job_id, 'seq': seq, 'sha256': sha256, 'filename': filename,
+             'attempt': attempts + 1, 'params': json.loads(params), 'path': self.blob_path(sha256)}
+            for seq, sha256, filename, attempts, params in rows
+        ]
+
+    def heartbeat(self, owner: str, tasks: List[Dict[str, Any]], lease_seconds: float = 300.0):
+        """Extend the lease on tasks still being processed"""
+        conn = self._conn()
+        with_lease = time.time() + lease_seconds
+        conn.executemany(
+            "UPDATE tasks SET lease_expires = ? WHERE job_id = ? AND seq = ? AND lease_owner = ? AND status = 'running'",
+            [(with_lease, t['job_id'], t['seq'], owner) for t in tasks],
+        )
+
+    def complete(self, owner: str, task: Dict[str, Any], result: Dict[str, Any]) -> bool:
+        return self._settle(owner, task, 'done', result, None)
+
+    def fail(self, owner: str, task: Dict[str, Any], error: str, retry: bool = True) -> bool:
+        """Record a failed attempt; the task is re-queued with backoff while attempts remain"""
+        if retry and task['attempt'] < self.max_attempts:
+            conn = self._conn()
+            cur = conn.execute(
+                "UPDATE tasks SET status = 'queued', lease_owner = NULL, error = ?, available_at = ?"
+                " WHERE job_id = ? AND seq = ? AND lease_owner = ? AND status = 'running'",
+                (error, time.time() + self.retry_backoff * 2 ** (task['attempt'] - 1),
+                 task['job_id'], task['seq'], owner),
+            )
+            return cur.rowcount > 0
+        return self._settle(owner, task, 'failed', None, error)
+
+    def _settle(self, owner, task, status, result, error) -> bool:
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT 1 FROM tasks WHERE job_id = ? AND seq = ? AND lease_owner = ? AND status = 'running'",
+                (task['job_id'], task['seq'], owner),
+            ).fetchone()
+            # A lost lease means another worker owns (or already finished) the task
+            if row:
+                self._finish_task(conn, task['job_id'], task['seq'], status, result, error, time.time())
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return row is not None
+
+    @staticmethod
+    def _finish_task(conn, job_id, seq, status, result, error, now):
+        payload = zlib.compress(json.dumps(result).encode('utf-8')) if result is not None else None
+        conn.execute(
+            "UPDATE tasks SET status = ?, result = ?, error = ?, lease_owner = NULL WHERE job_id = ? AND seq = ?",
+            (status, payload, error, job_id, seq),
+        )
+        column = 'done' if status == 'done' else 'failed'
+        conn.execute(
+            f"UPDATE jobs SET {column} = {column} + 1, updated_at = ? WHERE id = ?", (now, job_id)
+        )
+        conn.execute(
+            "UPDATE jobs SET status = 'done', finished_at = ? WHERE id = ? AND status = 'running' AND done + failed >= total",
+            (now, job_id),
+        )
+
+    # -- reporting -------------------------------------------------------
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        row = self._conn().execute(
+            "SELECT status, params, total, done, failed, created_at, updated_at, finished_at FROM jobs WHERE id = ?",
+            (job_id,),
+        ).fetchone()
+        if row is None:
+            return None
+        status, params, total, done, failed, created_at, updated_at, finished_at = row
+        return {
+            'job_id': job_id,
+            'status': status,
+            'params': json.loads(params),
+            'total': total,
+            'completed': done,
+            'failed': failed,
+            'progress': round((done + failed) / total, 4) if total else 1.0,
+            'created_at': created_at,
+            'updated_at': updated_at,
+            'finished_at': finished_at,
+        }
+
+    def results(self, job_id: str, offset: int = 0, limit: int = 50) -> List[Dict[str, Any]]:
+        """Finished task results in upload order (failed tasks carry an 'error')"""
+        rows = self._conn().execute(
+            "SELECT seq, sha256, filename, status, result, error, attempts FROM tasks"
+            " WHERE job_id = ? AND status IN ('done', 'failed') ORDER BY seq LIMIT ? OFFSET ?",
+            (job_id, limit, offset),
+        ).fetchall()
+        out = []
+        for seq, sha256, filename, status, result, error, attempts in rows:
+            if status == 'done':
+                item = json.loads(zlib.decompress(result))
+            else:
+                item = {'filename': filename, 'error': error, 'status': 'failed'}
+            item.update({'seq': seq, 'candidate_id': sha256, 'attempts': attempts})
+            out.append(item)
+        return out
+
+    def stats(self) -> Dict[str, Any]:
+        conn = self._conn()
+        jobs = dict(conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall())
+        tasks = dict(conn.execute("SELECT status, COUNT(*) FROM tasks GROUP BY status").fetchall())
+        return {'jobs': jobs, 'tasks': tasks}
+
+    def purge(self, older_than_seconds: float) -> int:
+        """Delete finished jobs older than the cutoff and spooled files nothing references"""
+        conn = self._conn()
+        cutoff = time.time() - older_than_seconds
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            ids = [r[0] for r in conn.execute(
+                "SELECT id FROM jobs WHERE status IN ('done', 'cancelled') AND finished_at < ?", (cutoff,)
+            ).fetchall()]
+            conn.executemany("DELETE FROM tasks WHERE job_id = ?", [(i,) for i in ids])
+            conn.executemany("DELETE FROM jobs WHERE id = ?", [(i,) for i in ids])
+            live = {r[0] for r in conn.execute("SELECT DISTINCT sha256 FROM tasks").fetchall()}
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        for bucket in os.listdir(self.spool_dir):
+            folder = os.path.join(self.spool_dir, bucket)
+            for name in os.listdir(folder) if os.path.isdir(folder) else []:
+                if name not in live and not name.endswith('.tmp'):
+                    os.remove(os.path.join(folder, name))
+        return len(ids)
+
+
+def default_worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+
+
+class JobWorker:
+    """
+    Claims batches of tasks and runs them through ``process_fn``.
+
+    ``process_fn(tasks)`` yields ``(task, result)`` as each file finishes; tasks
+    it never yields (because it raised) are failed and retried.
+    """
+
+    def __init__(self, queue: JobQueue, process_fn: Callable, batch_size: int = 8,
+                 lease_seconds: float = 300.0, poll_interval: float = 1.0, worker_id: Optional[str] = None):
+        self.queue = queue
+        self.process_fn = process_fn
+        self.batch_size = batch_size
+        self.lease_seconds = lease_seconds
+        self.poll_interval = poll_interval
+        self.worker_id = worker_id or default_worker_id()
+        self.processed = 0
+        self.errors = 0
+
+    def run_once(self) -> int:
+        tasks = self.queue.claim(self.worker_id, self.batch_size, self.lease_seconds)
+        if not tasks:
+            return 0
+        pending = {(t['job_id'], t['seq']): t for t in tasks}
+        stop = threading.Event()
+
+        def keep_leases():
+            while not stop.wait(self.lease_seconds / 3):
+                self.queue.heartbeat(self.worker_id, list(pending.values()), self.lease_seconds)
+
+        beat = threading.Thread(target=keep_leases, daemon=True)
+        beat.start()
+        error = 'no result produced'
+        try:
+            for task, result in self.process_fn(tasks):
+                pending.pop((task['job_id'], task['seq']), None)
+                self.queue.complete(self.worker_id, task, result)
+                self.processed += 1
+        except Exception as e:
+            self.errors += 1
+            error = f"{type(e).__name__}: {e}"
+        finally:
+            stop.set()
+        for task in list(pending.values()):
+            self.queue.fail(self.worker_id, task, error)
+        return len(tasks)
+
+    def run_forever(self, stop: Optional[threading.Event] = None):
+        stop = stop or threading.Event()
+        while not stop.is_set():
+            try:
+                if self.run_once() == 0:
+                    stop.wait(self.poll_interval)
+            except Exception as e:
+                self.errors += 1
+                print(f"⚠️ Job worker {self.worker_id} error: {e}")
+                stop.wait(self.poll_interval)
+
+    def stats(self) -> Dict[str, Any]:
+        return {'worker_id': self.worker_id, 'processed': self.processed, 'errors': self.errors}
@@ -0,0 +1,41 @@
+"""
+Standalone batch screening worker (separate module)
+- Loads the same models as ats_flask_api.py and drains the shared job queue
+- Run any number next to the API on the same host, all using the same local
+  jobs.sqlite3 and job_spool/ (not across nodes: see job_queue.py)
+- Safe to stop at any time: unfinished tasks are re-leased after ATS_JOB_LEASE_SECONDS
+
+Usage:
+    python job_worker.py --threads 1 --batch-size 16
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+
+import ats_flask_api as ats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--threads', type=int, default=1, help='worker loops in this process')
+    parser.add_argument('--batch-size', type=int, default=ats.JOB_BATCH_SIZE, help='tasks claimed per batch')
+    args = parser.parse_args()
+
+    if not ats.initialize_models():
+        print("❌ Failed to initialize models. Some features may not work.")
+
+    ats.JOB_BATCH_SIZE = args.batch_size
+    workers = ats.start_job_workers(args.threads)
+    print(f"👷 {len(workers)} job worker(s) polling {ats.JOB_QUEUE_PATH}")
+    try:
+        while True:
+            time.sleep(60)
+            print(f"📊 {[w.stats() for w in workers]} queue={ats.job_queue.stats()}")
+    except KeyboardInterrupt:
+        print("🛑 Stopping; leased tasks will be retried by other workers")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,206 @@
+"""
+LLM skill extraction (separate module)
+- Packs several resumes into one prompt and runs prompts concurrently
+- Global concurrency limit and per-call timeout for the OpenAI-compatible client
+- Circuit breaker: after repeated failures callers fall back to regex skills
+- Disk cache keyed by the hash of the single-resume prompt
+"""
+
+from __future__ import annotations
+
+import hashlib
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+from metrics import metrics
+
+SINGLE_PROMPT = """Extract technical skills from this resume. List only programming languages, frameworks, and tools.
+
+Resume: {resume}
+
+Return only: skill1, skill2, skill3"""
+
+BATCH_PROMPT = """Extract technical skills from each resume below. List only programming languages, frameworks, and tools.
+
+{resumes}
+
+Return exactly one line per resume, numbered like the resumes:
+1: skill1, skill2, skill3
+2: skill1, skill2, skill3"""
+
+_NUMBERED_LINE = re.compile(r'^\s*(?:resume\s*)?(\d+)\s*[:.)\-]\s*(.*)$', re.IGNORECASE)
+
+
+def parse_skill_list(response: str) -> Optional[List[str]]:
+    """Parse a comma-separated skill list the way /process-resumes always has"""
+    response = (response or '').strip()
+    if len(response) <= 10:
+        return None
+    return [s.strip().title() for s in response.split(',') if s.strip()]
+
+
+class CircuitBreaker:
+    """
+    Opens after ``failure_threshold`` consecutive failures, retries after
+    ``reset_seconds``. Half-open lets a single probe call through; everyone
+    else keeps failing fast until it reports back (or, if it never does,
+    until another ``reset_seconds`` have passed).
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_seconds: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.probe_started: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def _state(self, now: float) -> str:
+        if self.opened_at is None:
+            return 'closed'
+        if now - self.opened_at >= self.reset_seconds:
+            return 'half_open'
+        return 'open'
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._state(time.monotonic())
+
+    def allow(self) -> bool:
+        with self._lock:
+            now = time.monotonic()
+            state = self._state(now)
+            if state != 'half_open':
+                return state == 'closed'
+            if self.probe_started is not None and now - self.probe_started < self.reset_seconds:
+                return False
+            self.probe_started = now
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self.probe_started = None
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self.probe_started = None
+            if self.failures >= self.failure_threshold:
+                # Also restarts the cool-down when a half-open probe fails
+                self.opened_at = time.monotonic()
+
+
+class LLMSkillExtractor:
+    """
+    Batched, concurrent skill extraction.
+
+    ``extract`` returns one entry per input text: a skill list, or None when
+    the LLM was skipped or failed and the caller should rely on regex skills.
+    """
+
+    def __init__(
+        self,
+        client: Any,
+        model: str,
+        max_concurrency: int = 4,
+        batch_size: int = 4,
+        timeout: float = 20.0,
+        max_chars: int = 2000,
+        cache: Any = None,
+        breaker: Optional[CircuitBreaker] = None,
+    ):
+        # Retries would multiply the per-call timeout; the breaker handles flakiness
+        self.client = client.with_options(max_retries=0) if hasattr(client, 'with_options') else client
+        self.model = model
+        self.batch_size = max(1, batch_size)
+        self.timeout = timeout
+        self.max_chars = max_chars
+        self.cache = cache
+        self.breaker = breaker or CircuitBreaker()
+        self._executor = ThreadPoolExecutor(max_workers=max(1, max_concurrency), thread_name_prefix='llm')
+        self.calls = 0
+        self.failures = 0
+        self.fallbacks = 0
+
+    def _cache_key(self, text: str) -> str:
+        prompt = SINGLE_PROMPT.format(resume=text[:self.max_chars])
+        return hashlib.sha256(f"{self.model}\0{prompt}".encode('utf-8')).hexdigest()
+
+    def _complete(self, prompt: str, max_tokens: int) -> str:
+        self.calls += 1
+        with metrics.timer('ats_llm_seconds', caller='skills'):
+            completion = self.client.chat.completions.create(
+                model=self.model,
+                messages=[{"role": "user", "content": prompt}],
+                temperature=0.1,
+                max_tokens=max_tokens,
+                stream=False,
+                timeout=self.timeout,
+            )
+        return completion.choices[0].message.content or ''
+
+    def _run_batch(self, texts: List[str]) -> List[Optional[List[str]]]:
+        if not self.breaker.allow():
+            return [None] * len(texts)
+        try:
+            if len(texts) == 1:
+                response = self._complete(SINGLE_PROMPT.format(resume=texts[0][:self.max_chars]), 200)
+                results = [parse_skill_list(response)]
+            else:
+                sections = "\n\n".join(
+                    f"### Resume {i + 1}\n{text[:self.max_chars]}" for i, text in enumerate(texts)
+                )
+                response = self._complete(BATCH_PROMPT.format(resumes=sections), 200 * len(texts))
+                by_number: Dict[int, str] = {}
+                for line in response.splitlines():
+                    match = _NUMBERED_LINE.match(line)
+                    if match:
+                        by_number.setdefault(int(match.group(1)), match.group(2))
+                results = [parse_skill_list(by_number.get(i + 1, '')) for i in range(len(texts))]
+        except Exception:
+            self.failures += 1
+            self.breaker.record_failure()
+            return [None] * len(texts)
+        self.breaker.record_success()
+        return results
+
+    def extract(self, texts: List[str]) -> List[Optional[List[str]]]:
+        results: List[Optional[List[str]]] = [None] * len(texts)
+        keys = [self._cache_key(text) for text in texts]
+
+        misses: List[int] = []
+        for i, key in enumerate(keys):
+            entry = self.cache.get(key) if self.cache else None
+            if entry is not None:
+                results[i] = entry['skills']
+            else:
+                misses.append(i)
+
+        batches = [misses[i:i + self.batch_size] for i in range(0, len(misses), self.batch_size)]
+        futures = [
+            (batch, self._executor.submit(self._run_batch, [texts[i] for i in batch]))
+            for batch in batches
+        ]
+        for batch, future in futures:
+            for i, skills in zip(batch, future.result()):
+                results[i] = skills
+                if skills is None:
+                    self.fallbacks += 1
+                elif self.cache:
+                    self.cache.put(keys[i], {'skills': skills})
+        return results
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'calls': self.calls,
+            'failures': self.failures,
+            'fallbacks': self.fallbacks,
+            'breaker_state': self.breaker.state,
+            'cache': self.cache.stats() if self.cache else None,
+        }
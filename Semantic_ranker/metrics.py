@@ -0,0 +1,411 @@
+"""
+Metrics and tracing (separate module)
+- Counters, gauges and histograms with labels, rendered in the Prometheus text
+  format for /metrics
+- ``timed(stage)`` decorates a pipeline function: its duration goes to the
+  ats_stage_seconds histogram, exceptions it raises to ats_stage_errors_total
+- Collectors: callables run at render time that read figures other objects
+  already keep (cache hit counts, model load times)
+- Pre-forked workers: with ATS_METRICS_DIR set, every process writes its
+  figures to <dir>/<pid>-<token>.json (at most every ATS_METRICS_FLUSH_SECONDS)
+  and /metrics adds up the files of all processes, so any worker answers for
+  the whole server. Gauges are merged by taking the maximum.
+- Files of exited processes are folded into <dir>/dead.json (counters and
+  histograms only, like prometheus_client's multiprocess mode), so counters
+  never go back and the directory does not grow with every recycled worker
+- Fork-aware: a forked child starts with empty figures instead of counting
+  its parent's again. Collectors read objects the process that owns them
+  created; they only run in that process (``claim_collectors`` moves them
+  to a worker that reopened its own objects), so a forked helper such as a
+  parse-pool child never reports its parent's cache counts a second time.
+- Process pools: a pool child ``drain()``s its figures into each result it
+  returns and the parent ``merge()``s them, so they reach /metrics with or
+  without ATS_METRICS_DIR and without waiting for the child to flush
+- StackSampler: opt-in sampling profiler for one thread (a request), output in
+  the folded-stack format of flamegraph.pl and speedscope
+"""
+
+from __future__ import annotations
+
+import bisect
+import functools
+import glob
+import json
+import os
+import uuid
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # not POSIX: no cross-process lock, dead files are still folded
+    fcntl = None
+
+METRICS_DIR = os.environ.get('ATS_METRICS_DIR', '')
+METRICS_FLUSH_SECONDS = float(os.environ.get('ATS_METRICS_FLUSH_SECONDS', 1.0))
+
+# Seconds; from sub-millisecond regex passes to minute-long batch requests
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+def _labels(labels: Dict[str, Any]) -> Labels:
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(labels: Labels, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(labels) + ([extra] if extra else [])
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{key}="{_escape(value)}"' for key, value in pairs) + '}'
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class Metrics:
+    """
+    ``describe(name, kind, help)`` once per metric (kind: counter, gauge or
+    histogram), then ``inc``/``set``/``observe`` from any thread.
+    """
+
+    def __init__(self, directory: str = METRICS_DIR, flush_interval: float = METRICS_FLUSH_SECONDS):
+        self.directory = directory
+        self.flush_interval = flush_interval
+        self._meta: Dict[str, Dict[str, Any]] = {}
+        self._collectors: List[Callable[[], Iterable[Tuple[str, Dict[str, Any], float]]]] = []
+        self._collector_pid = os.getpid()
+        self._reset()
+
+    def _reset(self):
+        self._pid = os.getpid()
+        # The pid alone is not unique over time: a recycled pid must not overwrite a dead process's file
+        self._token = uuid.uuid4().hex[:8]
+        self._lock = threading.Lock()
+        self._values: Dict[str, Dict[Labels, Any]] = {}
+        self._flushed_at = 0.0
+        self._dirty = False
+
+    def _check_fork(self):
+        if os.getpid() != self._pid:
+            self._reset()
+
+    def describe(self, name: str, kind: str, help_text: str, buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self._meta[name] = {'kind': kind, 'help': help_text, 'buckets': buckets if kind == 'histogram' else None}
+
+    def collector(self, fn: Callable[[], Iterable[Tuple[str, Dict[str, Any], float]]]):
+        """``fn()`` yields (name, labels, value) for described counters and gauges at render time"""
+        self._collectors.append(fn)
+        return fn
+
+    def claim_collectors(self):
+        """Run collectors in this process from now on (a forked worker that reopened its own objects)"""
+        self._collector_pid = os.getpid()
+
+    def inc(self, name: str, value: float = 1.0, **labels):
+        self._check_fork()
+        key = _labels(labels)
+        with self._lock:
+            series = self._values.setdefault(name, {})
+            series[key] = series.get(key, 0.0) + value
+            self._dirty = True
+
+    def set(self, name: str, value: float, **labels):
+        self._check_fork()
+        with self._lock:
+            self._values.setdefault(name, {})[_labels(labels)] = float(value)
+            self._dirty = True
+
+    def observe(self, name: str, value: float, **labels):
+        self._check_fork()
+        buckets = self._meta[name]['buckets']
+        key = _labels(labels)
+        with self._lock:
+            series = self._values.setdefault(name, {})
+            # Per-bucket (not cumulative) counts, then sum and count
+            state = series.get(key)
+            if state is None:
+                state = series[key] = [0] * (len(buckets) + 1) + [0.0, 0]
+            state[bisect.bisect_left(buckets, value)] += 1
+            state[-2] += value
+            state[-1] += 1
+            self._dirty = True
+
+    def timer(self, name: str, **labels) -> '_Timer':
+        """``with metrics.timer('ats_llm_seconds', stage='answer'):`` observes the block's duration"""
+        return _Timer(self, name, labels)
+
+    def _collected(self) -> Dict[str, Dict[Labels, Any]]:
+        values: Dict[str, Dict[Labels, Any]] = {}
+        if os.getpid() != self._collector_pid:
+            return values
+        for fn in self._collectors:
+            try:
+                for name, labels, value in fn():
+                    series = values.setdefault(name, {})
+                    key = _labels(labels)
+                    series[key] = series.get(key, 0.0) + float(value)
+            except Exception as e:
+                print(f"⚠️ Metrics collector {getattr(fn, '__name__', fn)} failed: {e}")
+        return values
+
+    def snapshot(self) -> Dict[str, Dict[Labels, Any]]:
+        """This process's figures, collectors included"""
+        self._check_fork()
+        with self._lock:
+            values = {name: {key: list(v) if isinstance(v, list) else v for key, v in series.items()}
+                      for name, series in self._values.items()}
+        for name, series in self._collected().items():
+            target = values.setdefault(name, {})
+            for key, value in series.items():
+                target[key] = target.get(key, 0.0) + value
+        return values
+
+    def drain(self) -> Dict[str, Any]:
+        """Hand over this process's own figures (collectors excluded) and start again from zero"""
+        self._check_fork()
+        with self._lock:
+            values, self._values = self._values, {}
+        return {name: [[list(key), value] for key, value in series.items()] for name, series in values.items()}
+
+    def merge(self, payload: Dict[str, Any]):
+        """Add figures drained in another process (a pool child) to this process's own"""
+        if not payload:
+            return
+        self._check_fork()
+        with self._lock:
+            self._merge_into(self._values, payload)
+            self._dirty = True
+
+    def flush(self, force: bool = False):
+        """Write this process's figures for the other workers (no-op without a directory)"""
+        if not self.directory:
+            return
+        self._check_fork()
+        now = time.monotonic()
+        if not force and (not self._dirty or now - self._flushed_at < self.flush_interval):
+            return
+        self._flushed_at = now
+        self._dirty = False
+        payload = {name: [[list(key), value] for key, value in series.items()]
+                   for name, series in self.snapshot().items()}
+        os.makedirs(self.directory, exist_ok=True)
+        self._write(self._own_path(), payload)
+
+    def _own_path(self) -> str:
+        return os.path.join(self.directory, f"{self._pid}-{self._token}.json")
+
+    @staticmethod
+    def _write(path: str, payload: Dict[str, Any]):
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, 'w') as fh:
+            json.dump(payload, fh)
+        os.replace(tmp, path)
+
+    @staticmethod
+    def _read(path: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(path) as fh:
+                return json.load(fh)
+        except (OSError, ValueError):
+            return None  # removed by a compaction
+
+    def _merge_into(self, merged: Dict[str, Dict[Labels, Any]], payload: Dict[str, Any], gauges: bool = True):
+        for name, rows in payload.items():
+            kind = self._meta.get(name, {}).get('kind')
+            if kind == 'gauge' and not gauges:
+                continue
+            series = merged.setdefault(name, {})
+            for key, value in rows:
+                key = tuple(tuple(pair) for pair in key)
+                old = series.get(key)
+                if old is None:
+                    series[key] = value
+                elif kind == 'histogram':
+                    series[key] = [a + b for a, b in zip(old, value)]
+                elif kind == 'gauge':
+                    series[key] = max(old, value)
+                else:
+                    series[key] = old + value
+
+    def _file_lock(self, exclusive: bool):
+        """flock on <dir>/.lock: compaction is exclusive, readers shared, so no scrape sees a file twice"""
+        fh = open(os.path.join(self.directory, '.lock'), 'a')
+        if fcntl is not None:
+            fcntl.flock(fh, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        return fh
+
+    def compact(self):
+        """Fold the files of processes that no longer exist into dead.json"""
+        if not self.directory or not os.path.isdir(self.directory):
+            return
+        dead = []
+        for path in glob.glob(os.path.join(self.directory, '*-*.json')):
+            try:
+                pid = int(os.path.basename(path).split('-', 1)[0])
+            except ValueError:
+                continue
+            if not _alive(pid):
+                dead.append(path)
+        if not dead:
+            return
+        with self._file_lock(exclusive=True):
+            dead_path = os.path.join(self.directory, 'dead.json')
+            folded: Dict[str, Dict[Labels, Any]] = {}
+            self._merge_into(folded, self._read(dead_path) or {})
+            for path in dead:
+                self._merge_into(folded, self._read(path) or {}, gauges=False)
+            self._write(dead_path, {name: [[list(key), value] for key, value in series.items()]
+                                    for name, series in folded.items()})
+            for path in dead:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+    def _merged(self) -> Dict[str, Dict[Labels, Any]]:
+        merged = self.snapshot()
+        if not self.directory or not os.path.isdir(self.directory):
+            return merged
+        self.compact()
+        own = self._own_path()
+        with self._file_lock(exclusive=False):
+            for path in glob.glob(os.path.join(self.directory, '*.json')):
+                if path != own:
+                    self._merge_into(merged, self._read(path) or {})
+        return merged
+
+    def render(self) -> str:
+        """Prometheus text exposition format (version 0.0.4)"""
+        self.flush()
+        lines: List[str] = []
+        for name, series in sorted(self._merged().items()):
+            meta = self._meta.get(name)
+            if meta is None:
+                continue
+            lines.append(f"# HELP {name} {meta['help']}")
+            lines.append(f"# TYPE {name} {meta['kind']}")
+            for key, value in sorted(series.items()):
+                if meta['kind'] != 'histogram':
+                    lines.append(f"{name}{_format_labels(key)} {_format_value(value)}")
+                    continue
+                cumulative = 0
+                for bound, count in zip(meta['buckets'] + (float('inf'),), value[:-2]):
+                    cumulative += count
+                    lines.append(f"{name}_bucket{_format_labels(key, ('le', _format_value(bound)))} {cumulative}")
+                lines.append(f"{name}_sum{_format_labels(key)} {_format_value(round(value[-2], 6))}")
+                lines.append(f"{name}_count{_format_labels(key)} {value[-1]}")
+        return "\n".join(lines) + "\n"
+
+
+def _alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True  # exists, owned by another user
+    return True
+
+
+class _Timer:
+    def __init__(self, metrics: Metrics, name: str, labels: Dict[str, Any]):
+        self.metrics = metrics
+        self.name = name
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.metrics.observe(self.name, time.perf_counter() - self.start, **self.labels)
+
+
+metrics = Metrics()
+metrics.describe('ats_http_request_seconds', 'histogram', 'Request duration by endpoint, method and status')
+metrics.describe('ats_stage_seconds', 'histogram', 'Duration of pipeline stages (one call)')
+metrics.describe('ats_stage_errors_total', 'counter', 'Exceptions raised by pipeline stages')
+metrics.describe('ats_llm_seconds', 'histogram', 'Duration of LLM completions by caller')
+metrics.describe('ats_llm_fallbacks_total', 'counter', 'LLM answers replaced by a fallback (regex skills, canned text)')
+metrics.describe('ats_cache_requests_total', 'counter', 'Cache lookups by cache and result (hit or miss)')
+metrics.describe('ats_cache_entries', 'gauge', 'Entries held by an in-memory cache')
+metrics.describe('ats_cache_bytes', 'gauge', 'Bytes held by an in-memory cache')
+metrics.describe('ats_cache_evictions_total', 'counter', 'Entries evicted from an in-memory cache, by reason (lru, ttl)')
+metrics.describe('ats_extraction_failures_total', 'counter', 'Files whose text could not be extracted, by format and reason')
+metrics.describe('ats_errors_total', 'counter', 'Errors logged and tolerated, by where they happened')
+metrics.describe('ats_model_load_seconds', 'gauge', 'Model and client load time by step (import, load, total)')
+
+
+def timed(stage: str):
+    """Decorator: observe every call in ats_stage_seconds{stage=...}, count exceptions"""
+    def decorate(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            except Exception:
+                metrics.inc('ats_stage_errors_total', stage=stage)
+                raise
+            finally:
+                metrics.observe('ats_stage_seconds', time.perf_counter() - start, stage=stage)
+        return wrapper
+    return decorate
+
+
+class StackSampler:
+    """
+    Samples the stack of one thread every ``interval`` seconds from a
+    background thread. Work the thread hands to pools (parse processes, LLM
+    threads) is not sampled; the time spent waiting for it is.
+    """
+
+    def __init__(self, thread_id: Optional[int] = None, interval: float = 0.005):
+        self.thread_id = thread_id if thread_id is not None else threading.get_ident()
+        self.interval = interval
+        self.samples: Counter = Counter()
+        self._done = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _run(self):
+        while not self._done.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}:{frame.f_lineno}")
+                frame = frame.f_back
+            self.samples[';'.join(reversed(stack))] += 1
+
+    def start(self) -> 'StackSampler':
+        self._thread = threading.Thread(target=self._run, name='stack-sampler', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> Counter:
+        self._done.set()
+        if self._thread is not None:
+            self._thread.join()
+        return self.samples
+
+    def write(self, path: str):
+        """Folded stacks, one ``frame;frame;frame count`` line per distinct stack"""
+        parent = os.path.dirname(os.path.abspath(path))
+        os.makedirs(parent, exist_ok=True)
+        with open(path, 'w') as fh:
+            for stack, count in self.samples.most_common():
+                fh.write(f"{stack} {count}\n")
@@ -0,0 +1,136 @@
+"""
+Lazy model registry (separate module)
+- Each model/client is registered with a loader and loaded on first use
+- Concurrent first uses wait for one load instead of loading twice
+- Optional background loading of several models in parallel threads
+- Per-model state and timings (import vs load) for /health
+- Fork-aware: a forked child starts with fresh locks and keeps loaded values
+"""
+
+from __future__ import annotations
+
+import importlib
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+_MISSING = object()
+
+
+class ModelRegistry:
+    """
+    ``register(name, loader)`` where ``loader(timings)`` returns the model and
+    may record sub-steps (e.g. ``timings['import'] = ...``). A loader that
+    raises leaves the model as None and the error in ``stats()``; it is not
+    retried until ``reset(name)``.
+    """
+
+    def __init__(self):
+        self._loaders: Dict[str, Callable[[Dict[str, float]], Any]] = {}
+        self._values: Dict[str, Any] = {}
+        self._info: Dict[str, Dict[str, Any]] = {}
+        self._pid = os.getpid()
+        self._locks: Dict[str, threading.Lock] = {}
+        self._guard = threading.Lock()
+        self._import_lock = threading.Lock()
+
+    def register(self, name: str, loader: Callable[[Dict[str, float]], Any]):
+        self._loaders[name] = loader
+        self._info[name] = {'state': 'pending'}
+
+    def _check_fork(self):
+        if os.getpid() != self._pid:
+            # Locks held by loader threads of the parent would never be released here
+            self._pid = os.getpid()
+            self._guard = threading.Lock()
+            self._import_lock = threading.Lock()
+            self._locks = {}
+            for info in self._info.values():
+                if info['state'] == 'loading':
+                    info['state'] = 'pending'
+
+    def _lock_for(self, name: str) -> threading.Lock:
+        self._check_fork()
+        with self._guard:
+            return self._locks.setdefault(name, threading.Lock())
+
+    def import_module(self, module: str, timings: Dict[str, float]) -> Any:
+        """
+        Import for a loader, timed into ``timings['import']``. Imports run one
+        at a time: concurrent imports of packages that share dependencies
+        (torch, thinc, numpy) can deadlock.
+        """
+        self._check_fork()
+        start = time.perf_counter()
+        with self._import_lock:
+            loaded = importlib.import_module(module)
+        timings['import'] = timings.get('import', 0.0) + time.perf_counter() - start
+        return loaded
+
+    def get(self, name: str) -> Any:
+        """The model, loading it on first use (None if loading failed)"""
+        value = self._values.get(name, _MISSING)
+        if value is not _MISSING:
+            return value
+        with self._lock_for(name):
+            value = self._values.get(name, _MISSING)
+            if value is not _MISSING:
+                return value
+            info = self._info[name]
+            info.update({'state': 'loading', 'thread': threading.current_thread().name})
+            timings: Dict[str, float] = {}
+            start = time.perf_counter()
+            try:
+                value = self._loaders[name](timings)
+                info['state'] = 'loaded' if value is not None else 'unavailable'
+            except Exception as e:
+                value = None
+                info.update({'state': 'failed', 'error': str(e)})
+                print(f"❌ Failed to load {name}: {e}")
+            timings['total'] = time.perf_counter() - start
+            info['seconds'] = {key: round(val, 4) for key, val in timings.items()}
+            self._values[name] = value
+            return value
+
+    def peek(self, name: str) -> Any:
+        """The model if it is already loaded, without triggering a load"""
+        value = self._values.get(name, _MISSING)
+        return None if value is _MISSING else value
+
+    def is_loaded(self, name: str) -> bool:
+        return self.peek(name) is not None
+
+    def set(self, name: str, value: Any):
+        """Provide a value directly instead of loading it (e.g. a stand-in client in benchmarks)"""
+        self._values[name] = value
+        self._info[name] = {'state': 'loaded' if value is not None else 'unavailable', 'provided': True}
+
+    def reset(self, name: str):
+        """Forget a value (e.g. a connection that must be reopened after fork)"""
+        self._values.pop(name, None)
+        self._info[name] = {'state': 'pending'}
+
+    def load(self, names: Optional[Iterable[str]] = None, parallel: bool = True) -> Dict[str, Any]:
+        """Load ``names`` (default: all) now, in parallel threads unless ``parallel`` is False"""
+        names = list(names or self._loaders)
+        if parallel:
+            threads = self.start_background(names)
+            for thread in threads:
+                thread.join()
+        else:
+            for name in names:
+                self.get(name)
+        return {name: self.peek(name) for name in names}
+
+    def start_background(self, names: Optional[Iterable[str]] = None) -> List[threading.Thread]:
+        """Start one daemon thread per model; requests that need a model wait for it"""
+        threads = []
+        for name in names or self._loaders:
+            thread = threading.Thread(target=self.get, args=(name,), name=f"load-{name}", daemon=True)
+            thread.start()
+            threads.append(thread)
+        return threads
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        return {name: dict(info) for name, info in self._info.items()}
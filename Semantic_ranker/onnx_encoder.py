@@ -0,0 +1,251 @@
+"""
+ONNX Runtime sentence encoder (separate module)
+- Drop-in for SentenceTransformer.encode / get_sentence_embedding_dimension
+  (ATS_EMBED_ENGINE=onnx): same tokenizer, same transformer, mean pooling and
+  L2 normalisation in NumPy, float32 rows out
+- Model directory: model.onnx (fp32), model.int8.onnx (dynamic int8 weights for
+  the MatMul/Gemm layers), tokenizer.json and encoder.json (pooling, max length).
+  Build it with ``python onnx_encoder.py export`` (needs sentence-transformers,
+  torch and onnx once; serving only needs onnxruntime and tokenizers)
+- Length-sorted dynamic batching: texts are tokenised in one call, sorted by
+  token count and cut into batches of at most ``batch_size`` texts and
+  ``max_batch_tokens`` padded tokens, each padded only to its own longest text;
+  rows come back in input order
+- Threads: ``threads`` intra-op threads per session (0 = ONNX Runtime default,
+  one per core); inter-op parallelism off and spin-waiting off, so pre-forked
+  workers do not burn idle cores
+- Fork-aware: ONNX Runtime's thread pool does not survive fork, so a forked
+  child opens its own session on first use (gunicorn workers set their thread
+  count with ``set_threads`` in post_fork)
+
+Usage:
+    python onnx_encoder.py export --model all-MiniLM-L6-v2 --out onnx_models/all-MiniLM-L6-v2
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import threading
+from typing import Any, Dict, List, Sequence, Union
+
+import numpy as np
+
+VARIANTS = {'fp32': 'model.onnx', 'int8': 'model.int8.onnx'}
+
+
+class OnnxEncoder:
+    """
+    ``encode(sentences, batch_size=32)`` like sentence-transformers; extra
+    keyword arguments (show_progress_bar, convert_to_numpy, ...) are accepted
+    and ignored. Thread-safe.
+    """
+
+    def __init__(self, model_dir: str, variant: str = 'int8', threads: int = 0, max_batch_tokens: int = 8192,
+                 sort_by_length: bool = True):
+        from tokenizers import Tokenizer
+
+        if variant not in VARIANTS:
+            raise ValueError(f"unknown ONNX variant {variant!r}; choose from {', '.join(VARIANTS)}")
+        model_path = os.path.join(model_dir, VARIANTS[variant])
+        if not os.path.exists(model_path):
+            raise FileNotFoundError(f"{model_path} not found; build it with: python onnx_encoder.py export --out {model_dir}")
+        with open(os.path.join(model_dir, 'encoder.json')) as fh:
+            self.config: Dict[str, Any] = json.load(fh)
+        self.model_path = model_path
+        self.variant = variant
+        self.threads = threads
+        self.max_batch_tokens = max_batch_tokens
+        self.sort_by_length = sort_by_length
+        self.max_length = int(self.config.get('max_length', 256))
+
+        self.tokenizer = Tokenizer.from_file(os.path.join(model_dir, 'tokenizer.json'))
+        self.tokenizer.enable_truncation(self.max_length)
+        self.tokenizer.no_padding()
+
+        self._pid = os.getpid()
+        self._lock = threading.Lock()
+        self.session = None
+        self.counters = {'sentences': 0, 'batches': 0, 'tokens': 0, 'padded_tokens': 0}
+        session = self._session()
+        self._inputs = [node.name for node in session.get_inputs()]
+        self._dim = int(self.config.get('dim') or session.get_outputs()[0].shape[-1])
+
+    def _check_fork(self):
+        if os.getpid() != self._pid:
+            # The parent's session threads and lock holders do not exist here
+            self._pid = os.getpid()
+            self._lock = threading.Lock()
+            self.session = None
+
+    def _session(self):
+        """This process's inference session, opened on first use (again after fork or set_threads)"""
+        self._check_fork()
+        session = self.session
+        if session is not None:
+            return session
+        with self._lock:
+            if self.session is None:
+                import onnxruntime as ort
+                options = ort.SessionOptions()
+                options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+                options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+                options.intra_op_num_threads = self.threads
+                options.inter_op_num_threads = 1
+                options.add_session_config_entry('session.intra_op.allow_spinning', '0')
+                self.session = ort.InferenceSession(self.model_path, options, providers=['CPUExecutionProvider'])
+            return self.session
+
+    def set_threads(self, threads: int):
+        """Intra-op threads for this process; the session is reopened on next use"""
+        self._check_fork()
+        with self._lock:
+            if threads != self.threads:
+                self.threads = threads
+                self.session = None
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return self._dim
+
+    def _batches(self, lengths: np.ndarray, batch_size: int) -> List[np.ndarray]:
+        """Index arrays, longest texts first; a batch closes at batch_size texts or max_batch_tokens padded"""
+        order = np.argsort(-lengths, kind='stable') if self.sort_by_length else np.arange(len(lengths))
+        batches, start = [], 0
+        while start < len(order):
+            end = start + 1
+            width = lengths[order[start]]
+            while end < len(order) and end - start < batch_size:
+                width_next = max(width, lengths[order[end]])
+                if width_next * (end - start + 1) > self.max_batch_tokens:
+                    break
+                width = width_next
+                end += 1
+            batches.append(order[start:end])
+            start = end
+        return batches
+
+    def _run(self, encodings: Sequence[Any]) -> np.ndarray:
+        width = max(len(encoding.ids) for encoding in encodings)
+        feeds = {name: np.zeros((len(encodings), width), dtype=np.int64) for name in self._inputs}
+        mask = np.zeros((len(encodings), width), dtype=np.int64)
+        for row, encoding in enumerate(encodings):
+            n = len(encoding.ids)
+            mask[row, :n] = 1
+            if 'input_ids' in feeds:
+                feeds['input_ids'][row, :n] = encoding.ids
+            if 'token_type_ids' in feeds:
+                feeds['token_type_ids'][row, :n] = encoding.type_ids
+        if 'attention_mask' in feeds:
+            feeds['attention_mask'] = mask
+        output = self._session().run(None, feeds)[0]
+        if output.ndim == 3:
+            # Token embeddings: pool over the real (unpadded) tokens
+            if self.config.get('pooling', 'mean') == 'cls':
+                output = output[:, 0]
+            else:
+                weights = mask[:, :, None].astype(np.float32)
+                output = (output * weights).sum(axis=1) / np.maximum(weights.sum(axis=1), 1e-9)
+        with self._lock:
+            self.counters['batches'] += 1
+            self.counters['tokens'] += int(mask.sum())
+            self.counters['padded_tokens'] += int(mask.size)
+        return output.astype(np.float32, copy=False)
+
+    def encode(self, sentences: Union[str, Sequence[str]], batch_size: int = 32, **kwargs) -> np.ndarray:
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+        out = np.zeros((len(texts), self._dim), dtype=np.float32)
+        if texts:
+            encodings = self.tokenizer.encode_batch(texts)
+            lengths = np.fromiter((len(encoding.ids) for encoding in encodings), dtype=np.int64, count=len(texts))
+            for batch in self._batches(lengths, max(1, batch_size)):
+                out[batch] = self._run([encodings[i] for i in batch])
+            if self.config.get('normalize', True):
+                norms = np.linalg.norm(out, axis=1, keepdims=True)
+                norms[norms == 0] = 1.0
+                out /= norms
+            with self._lock:
+                self.counters['sentences'] += len(texts)
+        return out[0] if single else out
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            counters = dict(self.counters)
+        padded = counters['padded_tokens']
+        return dict(counters, engine='onnx', variant=self.variant, threads=self.threads,
+                    max_batch_tokens=self.max_batch_tokens,
+                    padding_ratio=round(1 - counters['tokens'] / padded, 4) if padded else None)
+
+
+def export(model_name: str, out_dir: str, opset: int = 14, quantize: bool = True, per_channel: bool = False) -> Dict:
+    """
+    Export a sentence-transformers model (transformer + mean/CLS pooling +
+    optional Normalize) to ``out_dir``; pooling and normalisation run in NumPy.
+    """
+    import torch
+    from sentence_transformers import SentenceTransformer
+
+    model = SentenceTransformer(model_name, device='cpu')
+    transformer, pooling = model[0], model[1]
+    mode = pooling.get_pooling_mode_str()
+    if mode not in ('mean', 'cls'):
+        raise ValueError(f"{model_name} uses {mode} pooling; only mean and cls are supported")
+    os.makedirs(out_dir, exist_ok=True)
+    auto_model, tokenizer = transformer.auto_model.eval(), model.tokenizer
+    tokenizer.save_pretrained(out_dir)
+
+    sample = tokenizer(["a sample sentence", "another one"], padding=True, return_tensors='pt')
+    names = [name for name in ('input_ids', 'attention_mask', 'token_type_ids') if name in sample]
+    dynamic = {name: {0: 'batch', 1: 'tokens'} for name in names}
+    dynamic['last_hidden_state'] = {0: 'batch', 1: 'tokens'}
+
+    class TokenEmbeddings(torch.nn.Module):
+        def __init__(self, inner):
+            super().__init__()
+            self.inner = inner
+
+        def forward(self, *inputs):
+            return self.inner(**dict(zip(names, inputs)))[0]
+
+    fp32_path = os.path.join(out_dir, VARIANTS['fp32'])
+    with torch.no_grad():
+        torch.onnx.export(TokenEmbeddings(auto_model), tuple(sample[name] for name in names), fp32_path,
+                          input_names=names, output_names=['last_hidden_state'], dynamic_axes=dynamic,
+                          opset_version=opset, do_constant_folding=True)
+    config = {
+        'model': model_name, 'pooling': mode, 'max_length': int(model.max_seq_length),
+        'normalize': any(type(module).__name__ == 'Normalize' for module in model),
+        'dim': int(model.get_sentence_embedding_dimension()), 'opset': opset,
+    }
+    with open(os.path.join(out_dir, 'encoder.json'), 'w') as fh:
+        json.dump(config, fh, indent=2)
+    if quantize:
+        quantize_int8(fp32_path, os.path.join(out_dir, VARIANTS['int8']), per_channel=per_channel)
+    return config
+
+
+def quantize_int8(fp32_path: str, int8_path: str, per_channel: bool = False):
+    """Dynamic quantisation: int8 weights, activations quantised per batch at run time"""
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+    quantize_dynamic(fp32_path, int8_path, weight_type=QuantType.QInt8, per_channel=per_channel,
+                     op_types_to_quantize=['MatMul', 'Gemm'])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest='command', required=True)
+    build = commands.add_parser('export', help='export a sentence-transformers model and quantise it')
+    build.add_argument('--model', default='all-MiniLM-L6-v2')
+    build.add_argument('--out', default=os.path.join('onnx_models', 'all-MiniLM-L6-v2'))
+    build.add_argument('--opset', type=int, default=14)
+    build.add_argument('--no-quantize', action='store_true', help='write model.onnx only')
+    build.add_argument('--per-channel', action='store_true', help='per-channel int8 scales (slower, closer)')
+    args = parser.parse_args()
+    config = export(args.model, args.out, opset=args.opset, quantize=not args.no_quantize,
+                    per_channel=args.per_channel)
+    print(f"✅ Exported {args.model} to {args.out}: {config}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,763 @@
+"""
+RAG API (separate module)
+- Efficient ingestion into Chroma per workspace collection: incremental
+  upserts keyed by chunk hash, bounded encode batches, streamed NDJSON bodies
+- Hybrid retrieval: vector hits from Chroma and BM25 hits from a per-workspace
+  keyword index (bm25_index, kept in step with ingest and persisted next to
+  the Chroma store), merged by reciprocal rank fusion
+- Query expansion via LLaMA: expansions are cached per (workspace, query) and
+  computed while a first retrieval pass on the raw query runs; the remaining
+  expansions share one encode and one col.query
+- /rag/query/stream: snippets first, then the answer token by token (SSE)
+- Conversational memory (chat_memory): history per chat persisted in SQLite,
+  shared by worker processes, cached in a bounded LRU/TTL window; the most
+  recent turns that fit ATS_RAG_HISTORY_TOKENS are sent with each question
+- Stage timings, LLM latency and fallbacks, cache hits go to metrics (/metrics)
+"""
+
+from __future__ import annotations
+
+from flask import Blueprint, request, jsonify, Response
+import hashlib
+import json
+import os
+import queue
+import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from itertools import islice
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+import numpy as np
+
+from bm25_index import BM25Index, reciprocal_rank_fusion
+from chat_memory import ChatMemoryStore
+from metrics import metrics, timed
+
+rag_bp = Blueprint('rag', __name__, url_prefix='/rag')
+
+# Ingestion: resumes diffed against the collection per group, chunks encoded per batch
+INGEST_GROUP_SIZE = int(os.environ.get('ATS_RAG_INGEST_GROUP', 64))
+INGEST_ENCODE_BATCH = int(os.environ.get('ATS_RAG_ENCODE_BATCH', 64))
+# Query expansions: LRU cache per (workspace, query) and how long a query waits for them
+EXPANSION_CACHE_SIZE = int(os.environ.get('ATS_RAG_EXPANSION_CACHE', 1024))
+EXPANSION_TTL_SECONDS = float(os.environ.get('ATS_RAG_EXPANSION_TTL', 3600))
+EXPANSION_TIMEOUT_SECONDS = float(os.environ.get('ATS_RAG_EXPANSION_TIMEOUT', 8))
+# Keyword index location and fusion: each retriever contributes its top
+# FUSION_DEPTH hits per query, fused with 1 / (RRF_K + rank)
+BM25_DIR = os.environ.get('ATS_RAG_BM25_DIR', './chroma_db_bm25')
+FUSION_DEPTH = int(os.environ.get('ATS_RAG_FUSION_DEPTH', 20))
+RRF_K = int(os.environ.get('ATS_RAG_RRF_K', 60))
+# Chat memory: SQLite file, cached chats (count, bytes, idle seconds), history
+# tokens sent with a question, messages kept per chat on disk
+CHAT_MEMORY_PATH = os.environ.get('ATS_RAG_CHAT_DB', './chat_memory.sqlite3')
+CHAT_CACHE_SIZE = int(os.environ.get('ATS_RAG_CHAT_CACHE', 256))
+CHAT_CACHE_BYTES = int(os.environ.get('ATS_RAG_CHAT_CACHE_BYTES', 16 * 1024 * 1024))
+CHAT_IDLE_TTL = float(os.environ.get('ATS_RAG_CHAT_TTL', 1800))
+CHAT_HISTORY_TOKENS = int(os.environ.get('ATS_RAG_HISTORY_TOKENS', 1500))
+CHAT_MAX_MESSAGES = int(os.environ.get('ATS_RAG_CHAT_MAX_MESSAGES', 200))
+LLAMA_MODEL = "meta/llama3-70b-instruct"
+
+# Injected providers: zero-argument callables returning the client/model (or
+# None), so models load on first use instead of when the blueprint registers
+_providers: Dict[str, Optional[Callable[[], Any]]] = {'llama': None, 'chroma': None, 'sentence_model': None}
+
+# Conversation store, opened lazily (and again in a forked worker)
+_chat_memory: Dict[str, Any] = {}
+_chat_memory_lock = threading.Lock()
+
+_expansions: "OrderedDict[Tuple[str, str], Tuple[float, List[str]]]" = OrderedDict()
+_expansions_lock = threading.Lock()
+_executor: Dict[str, Any] = {}
+_bm25_indexes: Dict[str, BM25Index] = {}
+_bm25_owner = {'pid': os.getpid()}
+_bm25_lock = threading.Lock()
+
+
+def init_rag_blueprint(app, get_llama_client, get_chroma_client, get_sentence_model):
+    _providers.update({'llama': get_llama_client, 'chroma': get_chroma_client, 'sentence_model': get_sentence_model})
+    app.register_blueprint(rag_bp)
+
+
+def _provided(name: str) -> Any:
+    provider = _providers.get(name)
+    return provider() if provider else None
+
+
+def _collection_name(workspace_id: str) -> str:
+    return f"resumes_{workspace_id}"
+
+
+def _get_or_create_collection(name: str):
+    chroma_client = _provided('chroma')
+    assert chroma_client is not None, "Chroma client not initialized"
+    try:
+        return chroma_client.get_or_create_collection(name=name)
+    except Exception:
+        return chroma_client.create_collection(name=name)
+
+
+def _chunk_text(text: str, chunk_size: int = 1000, overlap: int = 200) -> List[str]:
+    if not text:
+        return []
+    chunks: List[str] = []
+    start = 0
+    length = len(text)
+    while start < length:
+        end = min(start + chunk_size, length)
+        chunk = text[start:end]
+        chunks.append(chunk)
+        if end == length:
+            break
+        start = max(end - overlap, 0)
+    return chunks
+
+
+@timed('rag_embed')
+def _embed_texts(texts: List[str], batch_size: int = 32) -> List[List[float]]:
+    sentence_model = _provided('sentence_model')
+    assert sentence_model is not None, "Sentence model not loaded"
+    if not texts:
+        return []
+    embs = sentence_model.encode(texts, batch_size=batch_size)
+    return [e.tolist() if hasattr(e, 'tolist') else list(e) for e in embs]
+
+
+@timed('rag_expand')
+def _expand_query(query: str) -> List[str]:
+    expansions: List[str] = []
+    try:
+        llama_client = _provided('llama')
+        if llama_client:
+            prompt = (
+                "Generate 3 short semantic query expansions (comma-separated) for searching a resume.\n"
+                f"Query: {query}\nReturn only expansions separated by commas."
+            )
+            with metrics.timer('ats_llm_seconds', caller='expansion'):
+                completion = llama_client.chat.completions.create(
+                    model=LLAMA_MODEL,
+                    messages=[{"role": "user", "content": prompt}],
+                    temperature=0.2,
+                    max_tokens=150,
+                    stream=False,
+                )
+            text = completion.choices[0].message.content.strip()
+            expansions = [q.strip() for q in text.split(',') if q.strip()]
+    except Exception:
+        metrics.inc('ats_llm_fallbacks_total', caller='expansion', reason='error')
+        expansions = []
+
+    if not expansions:
+        # Simple keyword-based expansion fallback
+        words = re.findall(r"[A-Za-z0-9_#\+\.\-]+", query)
+        key = " ".join(words[:6])
+        expansions = [query, key]
+    else:
+        expansions = [query] + expansions
+    return expansions[:4]
+
+
+def _get_bm25(workspace_id: str, col) -> BM25Index:
+    """
+    Keyword index of a workspace; on first open it is reconciled with the
+    collection (chunks ingested before the index existed are backfilled);
+    reopened in a forked worker
+    """
+    with _bm25_lock:
+        if _bm25_owner['pid'] != os.getpid():
+            _bm25_indexes.clear()
+            _bm25_owner['pid'] = os.getpid()
+        index = _bm25_indexes.get(workspace_id)
+        if index is None:
+            name = re.sub(r'[^A-Za-z0-9_.-]', '_', _collection_name(workspace_id))
+            index = BM25Index(os.path.join(BM25_DIR, f"{name}.sqlite3"))
+            if len(index) != col.count():
+                _sync_bm25(index, col)
+            _bm25_indexes[workspace_id] = index
+        return index
+
+
+@timed('rag_bm25_sync')
+def _sync_bm25(index: BM25Index, col, page: int = 5000):
+    present: set = set()
+    offset = 0
+    while True:
+        got = col.get(include=['documents', 'metadatas'], limit=page, offset=offset)
+        ids = got.get('ids') or []
+        if not ids:
+            break
+        present.update(ids)
+        missing = [i for i, cid in enumerate(ids) if cid not in index]
+        if missing:
+            docs = got.get('documents') or [''] * len(ids)
+            metas = got.get('metadatas') or [{}] * len(ids)
+            index.upsert([ids[i] for i in missing], [docs[i] or '' for i in missing],
+                         [str((metas[i] or {}).get('resume_id', '')) for i in missing])
+        offset += len(ids)
+    index.delete([cid for cid in index.ids() if cid not in present])
+
+
+def _chunk_hash(text: str) -> str:
+    return hashlib.sha1(text.encode('utf-8', 'surrogatepass')).hexdigest()
+
+
+def _chunk_metadata(r: Dict[str, Any], rid: str, idx: int, chunk: str) -> Dict[str, Any]:
+    return {
+        'resume_id': rid,
+        'candidate': r.get('candidate', ''),
+        'email': r.get('email', ''),
+        'skills': r.get('skills', []),
+        'experience': r.get('experience', ''),
+        'rank': r.get('rank', 0),
+        'chunk_idx': idx,
+        'chunk_hash': _chunk_hash(chunk),
+    }
+
+
+@timed('rag_ingest_group')
+def _ingest_group(col, bm25: BM25Index, resumes: List[Dict[str, Any]], stats: Dict[str, Any]):
+    """
+    Diff one group of resumes against the collection: embed and upsert new or
+    changed chunks, update metadata-only changes, delete chunks past the end
+    of a resume that got shorter. The keyword index follows every write.
+    """
+    wanted: Dict[str, Tuple[str, Dict[str, Any]]] = {}
+    rids: List[str] = []
+    for r in resumes:
+        rid = r.get('id') or r.get('resume_id')
+        text = r.get('text', '')
+        if not rid or not text:
+            stats['skipped'] += 1
+            continue
+        rid = str(rid)
+        rids.append(rid)
+        for idx, chunk in enumerate(_chunk_text(text)):
+            wanted[f"{rid}::c{idx}"] = (chunk, _chunk_metadata(r, rid, idx, chunk))
+    if not rids:
+        return
+
+    start = time.perf_counter()
+    existing = col.get(where={'resume_id': {'$in': rids}}, include=['metadatas'])
+    stored = dict(zip(existing.get('ids', []), existing.get('metadatas') or []))
+    stats['timings']['diff'] += time.perf_counter() - start
+
+    to_embed: List[str] = []
+    meta_only: List[str] = []
+    for cid, (_, meta) in wanted.items():
+        old = stored.get(cid)
+        if old is None or old.get('chunk_hash') != meta['chunk_hash']:
+            to_embed.append(cid)
+        elif old != meta:
+            meta_only.append(cid)
+        else:
+            stats['chunks_unchanged'] += 1
+    stale = [cid for cid in stored if cid not in wanted]
+
+    if stale:
+        col.delete(ids=stale)
+        bm25.delete(stale)
+        stats['chunks_deleted'] += len(stale)
+    if meta_only:
+        col.update(ids=meta_only, metadatas=[wanted[cid][1] for cid in meta_only])
+        stats['chunks_updated'] += len(meta_only)
+    # Encode and write one bounded batch at a time so memory stays flat
+    for offset in range(0, len(to_embed), INGEST_ENCODE_BATCH):
+        batch = to_embed[offset:offset + INGEST_ENCODE_BATCH]
+        docs = [wanted[cid][0] for cid in batch]
+        start = time.perf_counter()
+        embeddings = _embed_texts(docs, batch_size=INGEST_ENCODE_BATCH)
+        stats['timings']['encode'] += time.perf_counter() - start
+        start = time.perf_counter()
+        col.upsert(ids=batch, documents=docs, metadatas=[wanted[cid][1] for cid in batch], embeddings=embeddings)
+        stats['timings']['write'] += time.perf_counter() - start
+        start = time.perf_counter()
+        bm25.upsert(batch, docs, [wanted[cid][1]['resume_id'] for cid in batch])
+        stats['timings']['keyword_index'] += time.perf_counter() - start
+        stats['chunks_added'] += len(batch)
+    stats['resumes'] += len(rids)
+
+
+def _prune_missing(col, bm25: BM25Index, keep: set) -> int:
+    """Delete chunks of resumes that were not part of this ingest"""
+    existing = col.get(include=['metadatas'])
+    stale = [cid for cid, meta in zip(existing.get('ids', []), existing.get('metadatas') or [])
+             if (meta or {}).get('resume_id') not in keep]
+    for offset in range(0, len(stale), 5000):
+        col.delete(ids=stale[offset:offset + 5000])
+    bm25.delete(stale)
+    return len(stale)
+
+
+def _ndjson_resumes(stream) -> Iterator[Dict[str, Any]]:
+    for line in iter(stream.readline, b''):
+        line = line.strip()
+        if line:
+            yield json.loads(line)
+
+
+def _groups(items: Iterable[Dict[str, Any]], size: int) -> Iterator[List[Dict[str, Any]]]:
+    iterator = iter(items)
+    while True:
+        group = list(islice(iterator, size))
+        if not group:
+            return
+        yield group
+
+
+@rag_bp.route('/ingest', methods=['POST'])
+def rag_ingest():
+    """
+    Incremental ingest: chunks whose text hash is already stored are skipped,
+    chunks past the new end of a resume are deleted, re-ingesting is safe.
+
+    JSON body: {"workspace_id", "resumes": [{"id", "text", ...}], "prune": false}
+    Streamed body (Content-Type: application/x-ndjson): one resume per line,
+    with workspace_id (and prune) as query parameters. "prune" also deletes
+    resumes of the workspace that were not sent.
+    """
+    streamed = 'ndjson' in (request.content_type or '')
+    if streamed:
+        workspace_id = (request.args.get('workspace_id') or '').strip()
+        prune = request.args.get('prune', '').lower() == 'true'
+        resumes: Iterable[Dict[str, Any]] = _ndjson_resumes(request.stream)
+    else:
+        data = request.get_json() or {}
+        workspace_id = data.get('workspace_id', '').strip()
+        prune = bool(data.get('prune'))
+        resumes = data.get('resumes', [])
+        if not resumes:
+            workspace_id = ''
+    if not workspace_id:
+        return jsonify({'error': 'workspace_id and resumes are required'}), 400
+
+    col = _get_or_create_collection(_collection_name(workspace_id))
+    bm25 = _get_bm25(workspace_id, col)
+
+    stats: Dict[str, Any] = {
+        'resumes': 0, 'skipped': 0, 'chunks_added': 0, 'chunks_unchanged': 0,
+        'chunks_updated': 0, 'chunks_deleted': 0,
+        'timings': {'diff': 0.0, 'encode': 0.0, 'write': 0.0, 'keyword_index': 0.0},
+    }
+    request_start = time.perf_counter()
+    seen: set = set()
+    try:
+        for group in _groups(resumes, INGEST_GROUP_SIZE):
+            seen.update(str(r.get('id') or r.get('resume_id')) for r in group)
+            _ingest_group(col, bm25, group, stats)
+        if prune:
+            stats['chunks_deleted'] += _prune_missing(col, bm25, seen)
+
+        stats['timings'] = {k: round(v, 4) for k, v in stats['timings'].items()}
+        stats['timings']['total'] = round(time.perf_counter() - request_start, 4)
+        return jsonify(dict(stats, success=True, workspace_id=workspace_id))
+    except Exception as e:
+        return jsonify({'error': str(e), 'progress': {k: v for k, v in stats.items() if k != 'timings'}}), 500
+
+
+@rag_bp.route('/suggest', methods=['POST'])
+def rag_suggest():
+    data = request.get_json() or {}
+    workspace_id = data.get('workspace_id', '').strip()
+    resume_id = data.get('resume_id', '').strip()
+    if not workspace_id or not resume_id:
+        return jsonify({'error': 'workspace_id and resume_id are required'}), 400
+
+    questions: List[str] = []
+    try:
+        llama_client = _provided('llama')
+        if llama_client:
+            prompt = (
+                "Given a resume, propose 4 short, helpful questions for an HR reviewer.\n"
+                "Focus on: strengths, key projects, role fit, and experience depth.\n"
+                "Return as a comma-separated list only."
+            )
+            with metrics.timer('ats_llm_seconds', caller='suggest'):
+                completion = llama_client.chat.completions.create(
+                    model=LLAMA_MODEL,
+                    messages=[{"role": "user", "content": prompt}],
+                    temperature=0.3,
+                    max_tokens=120,
+                    stream=False,
+                )
+            text = completion.choices[0].message.content.strip()
+            questions = [q.strip() for q in text.split(',') if q.strip()]
+    except Exception:
+        metrics.inc('ats_llm_fallbacks_total', caller='suggest', reason='error')
+        questions = []
+
+    if not questions:
+        questions = [
+            "Summarize the candidate's strengths for this role",
+            "What key projects demonstrate relevant experience?",
+            "How well does the candidate match the job description?",
+            "Any potential gaps or risks to note?",
+        ]
+
+    return jsonify({'success': True, 'workspace_id': workspace_id, 'resume_id': resume_id, 'questions': questions[:4]})
+
+
+def _get_executor(name: str = 'expand') -> ThreadPoolExecutor:
+    """
+    Thread pools for query expansion and streamed retrieval (separate, so
+    retrievals waiting on expansions cannot starve them); recreated in a
+    forked worker
+    """
+    if _executor.get('pid') != os.getpid():
+        _executor.clear()
+        _executor['pid'] = os.getpid()
+    if name not in _executor:
+        _executor[name] = ThreadPoolExecutor(max_workers=4, thread_name_prefix=f'rag-{name}')
+    return _executor[name]
+
+
+def _cached_expansions(workspace_id: str, query: str) -> Optional[List[str]]:
+    key = (workspace_id, ' '.join(query.lower().split()))
+    with _expansions_lock:
+        hit = _expansions.get(key)
+        if hit is None or time.time() - hit[0] > EXPANSION_TTL_SECONDS:
+            return None
+        _expansions.move_to_end(key)
+        return hit[1]
+
+
+def _expand_query_cached(workspace_id: str, query: str) -> List[str]:
+    expansions = _cached_expansions(workspace_id, query)
+    if expansions is None:
+        expansions = _expand_query(query)
+        with _expansions_lock:
+            _expansions[(workspace_id, ' '.join(query.lower().split()))] = (time.time(), expansions)
+            while len(_expansions) > EXPANSION_CACHE_SIZE:
+                _expansions.popitem(last=False)
+    return expansions
+
+
+@timed('rag_vector_search')
+def _vector_search(col, queries: List[str], k: int, resume_id: Optional[str]) -> List[List[Tuple[str, str, Dict[str, Any], float]]]:
+    """One encode and one col.query for every query; per query, ranked (id, doc, meta, distance)"""
+    if not queries:
+        return []
+    embeddings = _embed_texts(queries, batch_size=len(queries))
+    where = {'resume_id': resume_id} if resume_id else None
+    qr = col.query(query_embeddings=embeddings, n_results=k, where=where)
+    rankings = []
+    for qi in range(len(queries)):
+        docs = (qr.get('documents') or [[]] * len(queries))[qi] or []
+        metas = (qr.get('metadatas') or [[]] * len(queries))[qi] or []
+        ids = (qr.get('ids') or [[]] * len(queries))[qi] or []
+        dists = (qr.get('distances') or [[]] * len(queries))[qi] or [0.0] * len(docs)
+        rankings.append([(ids[i] if i < len(ids) else '', doc, metas[i] if i < len(metas) else {},
+                          float(dists[i]) if i < len(dists) else 0.0) for i, doc in enumerate(docs)])
+    return rankings
+
+
+@timed('rag_keyword_search')
+def _keyword_search(workspace_id: str, col, queries: List[str], k: int, resume_id: Optional[str]) -> List[List[str]]:
+    """Per query, chunk ids ranked by BM25 (none if the keyword index is unavailable)"""
+    try:
+        index = _get_bm25(workspace_id, col)
+    except Exception as e:
+        metrics.inc('ats_errors_total', where='bm25_index')
+        print(f"⚠️ BM25 index unavailable for {workspace_id}: {e}")
+        return []
+    return [[cid for cid, _ in index.search(q, k, group=resume_id)] for q in queries]
+
+
+@timed('rag_fuse')
+def _fuse(col, vector: List[List[Tuple[str, str, Dict[str, Any], float]]], keyword: List[List[str]],
+          k: int) -> List[Dict[str, Any]]:
+    """Reciprocal rank fusion of every vector and keyword ranking, top k snippets"""
+    found: Dict[str, Tuple[str, Dict[str, Any]]] = {}
+    for hits in vector:
+        for cid, doc, meta, _ in hits:
+            found.setdefault(cid, (doc, meta))
+    rankings = [[hit[0] for hit in hits] for hits in vector] + keyword
+    fused = reciprocal_rank_fusion(rankings, RRF_K)[:k]
+    # Keyword-only hits: fetch their text and metadata in one call
+    missing = [cid for cid, _ in fused if cid not in found]
+    if missing:
+        got = col.get(ids=missing, include=['documents', 'metadatas'])
+        for cid, doc, meta in zip(got.get('ids') or [], got.get('documents') or [], got.get('metadatas') or []):
+            found[cid] = (doc or '', meta or {})
+    return [
+        {'id': cid, 'text': found[cid][0], 'score': float(round(score, 4)), 'metadata': found[cid][1]}
+        for cid, score in fused if cid in found
+    ]
+
+
+def _search(col, workspace_id: str, queries: List[str], resume_id: Optional[str], k: int, timings: Dict[str, float]):
+    depth = max(k, FUSION_DEPTH)
+    start = time.perf_counter()
+    vector = _vector_search(col, queries, depth, resume_id)
+    timings['vector'] = timings.get('vector', 0.0) + time.perf_counter() - start
+    start = time.perf_counter()
+    keyword = _keyword_search(workspace_id, col, queries, depth, resume_id)
+    timings['keyword'] = timings.get('keyword', 0.0) + time.perf_counter() - start
+    return vector, keyword
+
+
+def _retrieve(col, workspace_id: str, message: str, resume_id: Optional[str], k: int,
+              on_first_pass: Optional[Callable[[List[Dict[str, Any]]], None]] = None):
+    """
+    Snippets for a message. Cached expansions go out in one batched query;
+    otherwise the LLM expansion runs in a thread while the raw message is
+    searched, and only the extra expansions are searched afterwards. Every
+    query contributes a vector and a BM25 ranking to the fusion.
+    Returns (snippets, expansions, timings).
+    """
+    timings: Dict[str, float] = {}
+    start = time.perf_counter()
+    expansions = _cached_expansions(workspace_id, message)
+    metrics.inc('ats_cache_requests_total', cache='rag_expansion', result='miss' if expansions is None else 'hit')
+    if expansions is not None:
+        timings['expansion'] = 0.0  # cached
+        vector, keyword = _search(col, workspace_id, list(dict.fromkeys([message] + expansions)), resume_id, k, timings)
+        snippets = _fuse(col, vector, keyword, k)
+        timings['retrieve'] = time.perf_counter() - start
+        return snippets, expansions, timings
+
+    future = _get_executor().submit(_expand_query_cached, workspace_id, message)
+    vector, keyword = _search(col, workspace_id, [message], resume_id, k, timings)
+    first = _fuse(col, vector, keyword, k) if on_first_pass is not None else None
+    timings['first_pass'] = time.perf_counter() - start
+    if first is not None:
+        on_first_pass(first)
+    try:
+        expansions = future.result(timeout=EXPANSION_TIMEOUT_SECONDS)
+    except FutureTimeout:
+        expansions = [message]
+    timings['expansion_wait'] = time.perf_counter() - start - timings['first_pass']
+    extra = [q for q in dict.fromkeys(expansions) if q != message]
+    second = time.perf_counter()
+    more_vector, more_keyword = _search(col, workspace_id, extra, resume_id, k, timings)
+    snippets = _fuse(col, vector + more_vector, keyword + more_keyword, k)
+    timings['second_pass'] = time.perf_counter() - second
+    return snippets, expansions, timings
+
+
+def _answer_prompt(message: str, contexts: List[str]) -> str:
+    return (
+        "You are an HR assistant. Answer the user's question about the candidate using only the provided context.\n"
+        "Be concise and directly relevant to the question. If not enough info, say what is missing.\n\n"
+        f"Question: {message}\n\nContext:\n" + "\n---\n".join(contexts[:5])
+    )
+
+
+def _answer_messages(message: str, contexts: List[str], history: List[Dict[str, str]]) -> List[Dict[str, str]]:
+    """Earlier turns of the chat, then the question with its retrieved context"""
+    return history + [{"role": "user", "content": _answer_prompt(message, contexts)}]
+
+
+def _fallback_answer(contexts: List[str]) -> str:
+    # Simple fallback answer
+    joined = contexts[0][:600] if contexts else ''
+    return f"Based on retrieved context, here are relevant details: {joined}" if joined else "No sufficient information retrieved."
+
+
+def _get_chat_memory() -> ChatMemoryStore:
+    with _chat_memory_lock:
+        if _chat_memory.get('pid') != os.getpid():
+            _chat_memory.clear()
+            _chat_memory['store'] = ChatMemoryStore(
+                CHAT_MEMORY_PATH, max_chats=CHAT_CACHE_SIZE, max_bytes=CHAT_CACHE_BYTES, ttl=CHAT_IDLE_TTL,
+                window_tokens=CHAT_HISTORY_TOKENS, max_messages=CHAT_MAX_MESSAGES,
+            )
+            _chat_memory['pid'] = os.getpid()
+        return _chat_memory['store']
+
+
+def _memory_for(workspace_id: str, chat_id: str, message: str) -> List[Dict[str, str]]:
+    """History window of a chat (before this message), then the message is recorded"""
+    try:
+        store = _get_chat_memory()
+        history = store.window(workspace_id, chat_id, CHAT_HISTORY_TOKENS)
+        store.append(workspace_id, chat_id, 'user', message)
+        return history
+    except Exception as e:
+        metrics.inc('ats_errors_total', where='chat_memory')
+        print(f"⚠️ Chat memory unavailable: {e}")
+        return []
+
+
+def _remember_answer(workspace_id: str, chat_id: str, answer: str):
+    try:
+        _get_chat_memory().append(workspace_id, chat_id, 'assistant', answer)
+    except Exception as e:
+        metrics.inc('ats_errors_total', where='chat_memory')
+        print(f"⚠️ Chat memory unavailable: {e}")
+
+
+@metrics.collector
+def _collect_chat_memory_metrics():
+    store = _chat_memory.get('store') if _chat_memory.get('pid') == os.getpid() else None
+    if store is not None:
+        stats = store.cache_stats()
+        yield 'ats_cache_requests_total', {'cache': 'chat_memory', 'result': 'hit'}, stats['hits']
+        yield 'ats_cache_requests_total', {'cache': 'chat_memory', 'result': 'miss'}, stats['misses']
+        yield 'ats_cache_entries', {'cache': 'chat_memory'}, stats['entries']
+        yield 'ats_cache_bytes', {'cache': 'chat_memory'}, stats['bytes']
+        for reason, count in stats['evictions'].items():
+            yield 'ats_cache_evictions_total', {'cache': 'chat_memory', 'reason': reason}, count
+
+
+def rag_stats() -> Dict[str, Any]:
+    """Chat memory and keyword index figures for /health"""
+    store = _chat_memory.get('store') if _chat_memory.get('pid') == os.getpid() else None
+    return {
+        'chat_memory': store.stats() if store else None,
+        'keyword_indexes': {workspace: index.stats() for workspace, index in list(_bm25_indexes.items())},
+    }
+
+
+def _query_params():
+    data = request.get_json() or {}
+    workspace_id = data.get('workspace_id', '').strip()
+    message = data.get('message', '').strip()
+    resume_id = data.get('resume_id', '').strip() or None
+    k = int(data.get('k', 5))
+    chat_id = (data.get('chat_id') or (resume_id or 'global')).strip()
+    return workspace_id, message, resume_id, k, chat_id
+
+
+@rag_bp.route('/query', methods=['POST'])
+def rag_query():
+    workspace_id, message, resume_id, k, chat_id = _query_params()
+    if not workspace_id or not message:
+        return jsonify({'error': 'workspace_id and message are required'}), 400
+
+    col = _get_or_create_collection(_collection_name(workspace_id))
+    history = _memory_for(workspace_id, chat_id, message)
+
+    try:
+        snippets, _, timings = _retrieve(col, workspace_id, message, resume_id, k)
+    except Exception as e:
+        return jsonify({'error': f'retrieval_failed: {e}'}), 500
+    contexts = [snippet['text'] for snippet in snippets]
+
+    # Synthesize answer
+    answer = None
+    start = time.perf_counter()
+    try:
+        llama_client = _provided('llama')
+        if llama_client and contexts:
+            completion = llama_client.chat.completions.create(
+                model=LLAMA_MODEL,
+                messages=_answer_messages(message, contexts, history),
+                temperature=0.2,
+                max_tokens=400,
+                stream=False,
+            )
+            answer = completion.choices[0].message.content.strip()
+            metrics.observe('ats_llm_seconds', time.perf_counter() - start, caller='answer')
+    except Exception:
+        metrics.inc('ats_llm_fallbacks_total', caller='answer', reason='error')
+        answer = None
+    timings['answer'] = time.perf_counter() - start
+
+    if not answer:
+        if answer is not None or not llama_client:
+            metrics.inc('ats_llm_fallbacks_total', caller='answer', reason='empty' if llama_client else 'unavailable')
+        answer = _fallback_answer(contexts)
+    _remember_answer(workspace_id, chat_id, answer)
+
+    return jsonify({
+        'success': True,
+        'workspace_id': workspace_id,
+        'resume_id': resume_id,
+        'chat_id': chat_id,
+        'answer': answer,
+        'snippets': snippets,
+        'timings': {key: round(value, 4) for key, value in timings.items()},
+    })
+
+
+def _sse(event: str, data: Dict[str, Any]) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+@rag_bp.route('/query/stream', methods=['POST'])
+def rag_query_stream():
+    """
+    Same input as /rag/query, answered as Server-Sent Events:
+    - "snippets" {"stage": "first_pass"}: hits for the raw message, sent
+      while the expansion is still running (skipped on a cached expansion)
+    - "snippets" {"stage": "final"}: the merged, re-ranked snippets
+    - "token" {"text"}: answer fragments as the LLM produces them
+    - "done": the full answer, chat_id and timings ("error" on failure)
+    """
+    workspace_id, message, resume_id, k, chat_id = _query_params()
+    if not workspace_id or not message:
+        return jsonify({'error': 'workspace_id and message are required'}), 400
+
+    col = _get_or_create_collection(_collection_name(workspace_id))
+    history = _memory_for(workspace_id, chat_id, message)
+    llama_client = _provided('llama')
+
+    def generate():
+        request_start = time.perf_counter()
+        # Retrieval runs in a thread so the first pass is flushed before expansion finishes
+        first_pass: "queue.Queue[Optional[List[Dict[str, Any]]]]" = queue.Queue()
+        future = _get_executor('retrieve').submit(_retrieve, col, workspace_id, message, resume_id, k,
+                                                  first_pass.put)
+        future.add_done_callback(lambda _: first_pass.put(None))
+        for early in iter(first_pass.get, None):
+            yield _sse('snippets', {'stage': 'first_pass', 'snippets': early})
+        try:
+            snippets, _, timings = future.result()
+        except Exception as e:
+            yield _sse('error', {'error': f'retrieval_failed: {e}'})
+            return
+        yield _sse('snippets', {'stage': 'final', 'snippets': snippets})
+        timings['time_to_snippets'] = time.perf_counter() - request_start
+
+        contexts = [snippet['text'] for snippet in snippets]
+        parts: List[str] = []
+        answer_start = time.perf_counter()
+        try:
+            if llama_client and contexts:
+                stream = llama_client.chat.completions.create(
+                    model=LLAMA_MODEL,
+                    messages=_answer_messages(message, contexts, history),
+                    temperature=0.2,
+                    max_tokens=400,
+                    stream=True,
+                )
+                for chunk in stream:
+                    delta = chunk.choices[0].delta.content if chunk.choices else None
+                    if delta:
+                        if not parts:
+                            timings['time_to_first_token'] = time.perf_counter() - request_start
+                        parts.append(delta)
+                        yield _sse('token', {'text': delta})
+                metrics.observe('ats_llm_seconds', time.perf_counter() - answer_start, caller='answer_stream')
+        except Exception:
+            metrics.inc('ats_llm_fallbacks_total', caller='answer_stream', reason='error')
+        answer = ''.join(parts).strip()
+        if not answer:
+            answer = _fallback_answer(contexts)
+            yield _sse('token', {'text': answer})
+        _remember_answer(workspace_id, chat_id, answer)
+        timings['total'] = time.perf_counter() - request_start
+        # The request hook only sees the response start; the stream is timed here
+        metrics.observe('ats_stage_seconds', timings['total'], stage='rag_query_stream')
+        yield _sse('done', {
+            'success': True,
+            'workspace_id': workspace_id,
+            'resume_id': resume_id,
+            'chat_id': chat_id,
+            'answer': answer,
+            'timings': {key: round(value, 4) for key, value in timings.items()},
+        })
+
+    return Response(generate(), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+
+@rag_bp.route('/chats/<workspace_id>/<chat_id>', methods=['DELETE'])
+def rag_clear_chat(workspace_id, chat_id):
+    """Forget the conversation history of one chat"""
+    try:
+        deleted = _get_chat_memory().clear(workspace_id, chat_id)
+        return jsonify({'success': True, 'workspace_id': workspace_id, 'chat_id': chat_id, 'deleted': deleted})
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
@@ -0,0 +1,221 @@
+"""
+Workspace result store (separate module)
+- Processed resumes per workspace, persisted in SQLite so clients can refer to
+  them by id instead of posting full resume bodies back on every step
+- Resume text is stored apart from the rest of the record: listings and
+  ranking results never have to load it
+- Result sets: the ordered output of one step (processing, ranking, filtering)
+  saved under an opaque handle, read back page by page
+- Old result sets expire after max_age seconds
+- Every write to a workspace's resumes bumps its generation, so per-process
+  caches built from a workspace can tell when another process changed it
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+import zlib
+from typing import Any, Dict, List, Optional, Sequence
+
+
+def _pack(value: Any) -> bytes:
+    return zlib.compress(json.dumps(value).encode('utf-8'))
+
+
+def _unpack(blob: bytes) -> Any:
+    return json.loads(zlib.decompress(blob))
+
+
+class ResultStore:
+    """SQLite-backed store of processed resumes and result sets, keyed by workspace"""
+
+    def __init__(self, path: str, max_age: float = 7 * 24 * 3600):
+        self.path = path
+        self.max_age = max_age
+        self._local = threading.local()
+        parent = os.path.dirname(os.path.abspath(path))
+        os.makedirs(parent, exist_ok=True)
+        with self._conn() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS resumes ("
+                " workspace_id TEXT NOT NULL,"
+                " id TEXT NOT NULL,"
+                " seq INTEGER NOT NULL,"
+                " record BLOB NOT NULL,"
+                " text BLOB,"
+                " updated_at REAL NOT NULL,"
+                " PRIMARY KEY (workspace_id, id))"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_resumes_seq ON resumes(workspace_id, seq)")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS result_sets ("
+                " handle TEXT PRIMARY KEY,"
+                " workspace_id TEXT NOT NULL,"
+                " kind TEXT NOT NULL,"
+                " total INTEGER NOT NULL,"
+                " items BLOB NOT NULL,"
+                " meta BLOB NOT NULL,"
+                " created_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_result_sets_age ON result_sets(created_at)")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS workspaces ("
+                " workspace_id TEXT PRIMARY KEY,"
+                " generation INTEGER NOT NULL)"
+            )
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    # -- resumes ---------------------------------------------------------------
+
+    @staticmethod
+    def _bump(conn: sqlite3.Connection, workspace_id: str):
+        conn.execute(
+            "INSERT INTO workspaces (workspace_id, generation) VALUES (?, 1)"
+            " ON CONFLICT(workspace_id) DO UPDATE SET generation = generation + 1",
+            (workspace_id,),
+        )
+
+    def workspace_generation(self, workspace_id: str) -> int:
+        """Number of writes to the workspace's resumes so far (0 if never written)"""
+        row = self._conn().execute(
+            "SELECT generation FROM workspaces WHERE workspace_id = ?", (workspace_id,)
+        ).fetchone()
+        return row[0] if row else 0
+
+    def put_resumes(self, workspace_id: str, resumes: Sequence[Dict[str, Any]]) -> List[str]:
+        """Insert or replace resumes (each needs an 'id'); returns their ids"""
+        conn = self._conn()
+        now = time.time()
+        with conn:
+            seq = conn.execute(
+                "SELECT COALESCE(MAX(seq), -1) + 1 FROM resumes WHERE workspace_id = ?", (workspace_id,)
+            ).fetchone()[0]
+            rows = []
+            for offset, resume in enumerate(resumes):
+                record = {k: v for k, v in resume.items() if k != 'text'}
+                text = resume.get('text')
+                rows.append((workspace_id, str(resume['id']), seq + offset, _pack(record),
+                             zlib.compress(text.encode('utf-8')) if text is not None else None, now))
+            conn.executemany(
+                "INSERT INTO resumes (workspace_id, id, seq, record, text, updated_at) VALUES (?, ?, ?, ?, ?, ?)"
+                " ON CONFLICT(workspace_id, id) DO UPDATE SET"
+                " record = excluded.record, text = excluded.text, updated_at = excluded.updated_at",
+                rows,
+            )
+            self._bump(conn, workspace_id)
+        return [row[1] for row in rows]
+
+    def _decode(self, row, with_text: bool) -> Dict[str, Any]:
+        record = _unpack(row[1])
+        if with_text:
+            record['text'] = zlib.decompress(row[2]).decode('utf-8') if row[2] is not None else ''
+        return record
+
+    def get_resumes(self, workspace_id: str, ids: Sequence[str], with_text: bool = False) -> List[Dict[str, Any]]:
+        """Resumes in the order of ``ids``; unknown ids are skipped"""
+        columns = "id, record, text" if with_text else "id, record, NULL"
+        found: Dict[str, Dict[str, Any]] = {}
+        conn = self._conn()
+        ids = [str(rid) for rid in ids]
+        # Stay below SQLite's bound-parameter limit
+        for start in range(0, len(ids), 500):
+            chunk = ids[start:start + 500]
+            placeholders = ",".join("?" * len(chunk))
+            for row in conn.execute(
+                f"SELECT {columns} FROM resumes WHERE workspace_id = ? AND id IN ({placeholders})",
+                [workspace_id] + chunk,
+            ):
+                found[row[0]] = self._decode(row, with_text)
+        return [found[rid] for rid in ids if rid in found]
+
+    def list_resumes(self, workspace_id: str, offset: int = 0, limit: Optional[int] = None,
+                     with_text: bool = False) -> List[Dict[str, Any]]:
+        """Resumes of a workspace in insertion order"""
+        columns = "id, record, text" if with_text else "id, record, NULL"
+        rows = self._conn().execute(
+            f"SELECT {columns} FROM resumes WHERE workspace_id = ? ORDER BY seq LIMIT ? OFFSET ?",
+            (workspace_id, -1 if limit is None else limit, offset),
+        ).fetchall()
+        return [self._decode(row, with_text) for row in rows]
+
+    def count_resumes(self, workspace_id: str) -> int:
+        return self._conn().execute(
+            "SELECT COUNT(*) FROM resumes WHERE workspace_id = ?", (workspace_id,)
+        ).fetchone()[0]
+
+    def delete_resumes(self, workspace_id: str, ids: Optional[Sequence[str]] = None) -> int:
+        """Delete some resumes, or the whole workspace (and its result sets) when ids is None"""
+        conn = self._conn()
+        with conn:
+            # The generation row stays, so a deleted workspace never counts from 0 again
+            self._bump(conn, workspace_id)
+            if ids is None:
+                conn.execute("DELETE FROM result_sets WHERE workspace_id = ?", (workspace_id,))
+                return conn.execute("DELETE FROM resumes WHERE workspace_id = ?", (workspace_id,)).rowcount
+            return conn.executemany(
+                "DELETE FROM resumes WHERE workspace_id = ? AND id = ?",
+                [(workspace_id, str(rid)) for rid in ids],
+            ).rowcount
+
+    # -- result sets -----------------------------------------------------------
+
+    def save_result_set(self, workspace_id: str, kind: str, items: Sequence[Dict[str, Any]],
+                        meta: Optional[Dict[str, Any]] = None) -> str:
+        """Save the ordered output of one step; returns its handle"""
+        handle = uuid.uuid4().hex
+        conn = self._conn()
+        now = time.time()
+        with conn:
+            conn.execute(
+                "INSERT INTO result_sets (handle, workspace_id, kind, total, items, meta, created_at)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (handle, workspace_id, kind, len(items), _pack(list(items)), _pack(meta or {}), now),
+            )
+            conn.execute("DELETE FROM result_sets WHERE created_at < ?", (now - self.max_age,))
+        return handle
+
+    def get_result_set(self, handle: str) -> Optional[Dict[str, Any]]:
+        """{'handle', 'workspace_id', 'kind', 'total', 'items', 'meta', 'created_at'} or None"""
+        row = self._conn().execute(
+            "SELECT workspace_id, kind, total, items, meta, created_at FROM result_sets WHERE handle = ?",
+            (handle,),
+        ).fetchone()
+        if row is None:
+            return None
+        return {
+            'handle': handle,
+            'workspace_id': row[0],
+            'kind': row[1],
+            'total': row[2],
+            'items': _unpack(row[3]),
+            'meta': _unpack(row[4]),
+            'created_at': row[5],
+        }
+
+    def result_set_workspace(self, handle: str) -> Optional[str]:
+        """Workspace of a result set without loading its items"""
+        row = self._conn().execute(
+            "SELECT workspace_id FROM result_sets WHERE handle = ?", (handle,)
+        ).fetchone()
+        return row[0] if row else None
+
+    def stats(self) -> Dict[str, Any]:
+        conn = self._conn()
+        workspaces, resumes = conn.execute(
+            "SELECT COUNT(DISTINCT workspace_id), COUNT(*) FROM resumes"
+        ).fetchone()
+        result_sets = conn.execute("SELECT COUNT(*) FROM result_sets").fetchone()[0]
+        return {'workspaces': workspaces, 'resumes': resumes, 'result_sets': result_sets}
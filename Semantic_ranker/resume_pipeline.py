@@ -0,0 +1,274 @@
+"""
+Resume ingestion pipeline (separate module)
+- Stage 1: CPU-bound parsing + spaCy features in a process pool, in small batches
+- Stage 2: I/O-bound LLM enrichment in a thread pool, in small batches
+- Stage 3: scoring on the consuming thread, results yielded as they finish
+- Bounded queues between stages keep memory flat for large batches
+- Metrics recorded in a parse worker travel back with its batch and are added
+  to this process's figures
+"""
+
+from __future__ import annotations
+
+import math
+import os
+import queue
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from metrics import metrics
+
+_SENTINEL = object()
+_POLL_SECONDS = 0.1
+
+
+def _timed_call(fn: Callable[[List[Any]], List[Dict[str, Any]]],
+                jobs: List[Any]) -> Tuple[List[Dict[str, Any]], float, Dict[str, Any]]:
+    """Run a stage function on a batch in the worker process, time it there and take its metrics"""
+    start = time.perf_counter()
+    records = fn(jobs)
+    return records, time.perf_counter() - start, metrics.drain()
+
+
+def _put(q: queue.Queue, item: Any, stop: threading.Event) -> bool:
+    """Blocking put that gives up once the pipeline is stopped"""
+    while not stop.is_set():
+        try:
+            q.put(item, timeout=_POLL_SECONDS)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def _get(q: queue.Queue, stop: threading.Event) -> Any:
+    """Blocking get that gives up once the pipeline is stopped"""
+    while not stop.is_set():
+        try:
+            return q.get(timeout=_POLL_SECONDS)
+        except queue.Empty:
+            continue
+    return _SENTINEL
+
+
+class PipelineStats:
+    """Aggregated per-stage timings for one pipeline run"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.finished: Optional[float] = None
+        self.count = 0
+        self.failed = 0
+        self.stage_seconds: Dict[str, float] = {}
+
+    def add(self, timings: Dict[str, float]):
+        self.count += 1
+        for stage, seconds in timings.items():
+            self.stage_seconds[stage] = self.stage_seconds.get(stage, 0.0) + seconds
+
+    def to_dict(self) -> Dict[str, Any]:
+        wall = (self.finished or time.perf_counter()) - self.started
+        return {
+            'total_processed': self.count,
+            'failed': self.failed,
+            'wall_seconds': round(wall, 4),
+            'resumes_per_sec': round(self.count / wall, 2) if wall > 0 else 0.0,
+            'stage_seconds': {k: round(v, 4) for k, v in self.stage_seconds.items()},
+            'stage_avg_seconds': {
+                k: round(v / self.count, 4) for k, v in self.stage_seconds.items()
+            } if self.count else {},
+        }
+
+
+class ResumePipeline:
+    """
+    Staged resume processing.
+
+    ``parse_fn`` runs in worker processes, so it must be a picklable top-level
+    function; it receives up to ``parse_batch_size`` jobs at once and returns
+    one record per job, in order (each record is charged an equal share of
+    the batch's parse time). ``enrich_fn`` and ``score_fn`` run in this
+    process; ``enrich_fn`` receives up to ``enrich_batch_size`` parsed records
+    at once and returns them in the same order. Every stage returns a record
+    dict; a ``timings`` dict on the record is merged with the stage timings
+    measured here.
+    """
+
+    def __init__(
+        self,
+        parse_fn: Callable[[List[Any]], List[Dict[str, Any]]],
+        enrich_fn: Callable[[List[Dict[str, Any]]], List[Dict[str, Any]]],
+        parse_workers: Optional[int] = None,
+        enrich_workers: int = 4,
+        enrich_batch_size: int = 1,
+        parse_batch_size: int = 1,
+        queue_size: int = 32,
+        initializer: Optional[Callable[[], None]] = None,
+    ):
+        self.parse_fn = parse_fn
+        self.enrich_fn = enrich_fn
+        self.parse_workers = parse_workers or os.cpu_count() or 1
+        self.enrich_workers = max(1, enrich_workers)
+        self.enrich_batch_size = max(1, enrich_batch_size)
+        self.parse_batch_size = max(1, parse_batch_size)
+        self.queue_size = max(1, queue_size)
+        self.initializer = initializer
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._pool_lock = threading.Lock()
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        with self._pool_lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.parse_workers,
+                    initializer=self.initializer,
+                )
+            return self._pool
+
+    def _reset_pool(self):
+        with self._pool_lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=False, cancel_futures=True)
+                self._pool = None
+
+    def shutdown(self):
+        self._reset_pool()
+
+    def run(
+        self,
+        jobs: List[Any],
+        score_fn: Callable[[Any, Dict[str, Any]], Dict[str, Any]],
+        stats: Optional[PipelineStats] = None,
+    ) -> Iterator[Tuple[int, Dict[str, Any]]]:
+        """
+        Yield ``(job_index, result)`` pairs in completion order.
+
+        ``score_fn(job, record)`` builds the final result; failed records
+        carry an ``error`` key instead of the stage output.
+        """
+        stats = stats or PipelineStats()
+        if not jobs:
+            stats.finished = time.perf_counter()
+            return
+
+        parsed_q: queue.Queue = queue.Queue(maxsize=self.queue_size)
+        done_q: queue.Queue = queue.Queue(maxsize=self.queue_size)
+        stop = threading.Event()
+        pool = self._get_pool()
+
+        def dispatch():
+            pending: Dict[Any, range] = {}
+            in_flight = 0
+            next_job = 0
+            try:
+                while not stop.is_set():
+                    # Keep at most queue_size documents in flight in the pool; batches
+                    # shrink near the end so every worker still gets a share
+                    while next_job < len(jobs) and in_flight < self.queue_size:
+                        remaining = len(jobs) - next_job
+                        size = min(self.parse_batch_size, self.queue_size - in_flight,
+                                   math.ceil(remaining / self.parse_workers))
+                        batch = range(next_job, next_job + max(1, size))
+                        fut = pool.submit(_timed_call, self.parse_fn, [jobs[i] for i in batch])
+                        pending[fut] = batch
+                        in_flight += len(batch)
+                        next_job = batch.stop
+                    if not pending:
+                        break
+                    done, _ = wait(list(pending), timeout=_POLL_SECONDS, return_when=FIRST_COMPLETED)
+                    for fut in done:
+                        batch = pending.pop(fut)
+                        in_flight -= len(batch)
+                        try:
+                            records, elapsed, figures = fut.result()
+                            metrics.merge(figures)
+                            for record in records:
+                                record.setdefault('timings', {})['parse'] = elapsed / len(batch)
+                        except Exception as e:
+                            records = [{'error': f'parse_failed: {e}', 'timings': {'parse': 0.0}} for _ in batch]
+                        for index, record in zip(batch, records):
+                            record['_enqueued'] = time.perf_counter()
+                            if not _put(parsed_q, (index, record), stop):
+                                return
+            except Exception as e:
+                # A broken pool fails every remaining job instead of hanging the request
+                self._reset_pool()
+                unfinished = [index for batch in pending.values() for index in batch]
+                for index in unfinished + list(range(next_job, len(jobs))):
+                    if not _put(parsed_q, (index, {'error': f'parse_failed: {e}', 'timings': {}}), stop):
+                        return
+            finally:
+                for _ in range(self.enrich_workers):
+                    _put(parsed_q, _SENTINEL, stop)
+
+        def enrich():
+            finished = False
+            while not finished:
+                item = _get(parsed_q, stop)
+                if item is _SENTINEL:
+                    return
+                # Take whatever else is already parsed, up to one batch
+                batch = [item]
+                while len(batch) < self.enrich_batch_size:
+                    try:
+                        item = parsed_q.get_nowait()
+                    except queue.Empty:
+                        break
+                    if item is _SENTINEL:
+                        finished = True
+                        break
+                    batch.append(item)
+
+                now = time.perf_counter()
+                for _, record in batch:
+                    timings = record.setdefault('timings', {})
+                    timings['queue_wait'] = now - record.pop('_enqueued', now)
+
+                todo = [record for _, record in batch if 'error' not in record]
+                if todo:
+                    start = time.perf_counter()
+                    try:
+                        enriched = self.enrich_fn(todo)
+                    except Exception as e:
+                        enriched = [dict(record, error=f'enrich_failed: {e}') for record in todo]
+                    # Batch latency is attributed to every record in the batch
+                    elapsed = time.perf_counter() - start
+                    for record in enriched:
+                        record.setdefault('timings', {})['enrich'] = elapsed
+                    enriched_iter = iter(enriched)
+                    batch = [
+                        (index, record if 'error' in record else next(enriched_iter))
+                        for index, record in batch
+                    ]
+
+                for entry in batch:
+                    if not _put(done_q, entry, stop):
+                        return
+
+        threads = [threading.Thread(target=dispatch, daemon=True)]
+        threads += [threading.Thread(target=enrich, daemon=True) for _ in range(self.enrich_workers)]
+        for t in threads:
+            t.start()
+
+        try:
+            for _ in range(len(jobs)):
+                item = _get(done_q, stop)
+                if item is _SENTINEL:
+                    break
+                index, record = item
+                timings = record.get('timings', {})
+                start = time.perf_counter()
+                result = score_fn(jobs[index], record)
+                timings['score'] = time.perf_counter() - start
+                if 'error' in record:
+                    stats.failed += 1
+                stats.add(timings)
+                result['timings'] = {k: round(v, 4) for k, v in timings.items()}
+                yield index, result
+        finally:
+            stop.set()
+            for t in threads:
+                t.join(timeout=1.0)
+            stats.finished = time.perf_counter()
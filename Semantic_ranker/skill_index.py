@@ -0,0 +1,307 @@
+"""
+Inverted skill index (separate module)
+- Maps every normalised skill, and every experience keyword, to the sorted
+  array of candidate slots that carry it (CSR layout: one flat array per field)
+- AND / OR / NOT skill queries become boolean bitmap operations over slots
+- Facet counts for the filter dropdown come from one bincount over the postings
+- sync() diffs a resume list against the index: only new or changed resumes
+  are re-indexed, resumes that disappeared are tombstoned
+- Same matching rules as the old scan: a selected skill matches every skill
+  containing it ('java' matches 'JavaScript'), and the experience filter is a
+  case-insensitive substring of the experience text
+"""
+
+from __future__ import annotations
+
+import hashlib
+import re
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+_WORD = re.compile(r'[\w+#.]+')
+_SKILL = 'skill'
+_EXPERIENCE = 'experience'
+
+
+def normalise_skill(skill: str) -> str:
+    return ' '.join(skill.lower().split())
+
+
+def resume_skills(resume: Dict[str, Any]) -> List[str]:
+    """Skills of a resume payload: a list, or a comma-separated string"""
+    skills = resume.get('skills', [])
+    if isinstance(skills, str):
+        skills = skills.split(',')
+    return [s.strip() for s in skills or [] if isinstance(s, str) and s.strip()]
+
+
+def _signature(resume: Dict[str, Any]) -> str:
+    digest = hashlib.sha1()
+    for part in resume_skills(resume) + [str(resume.get('experience', ''))]:
+        digest.update(part.encode('utf-8', 'surrogatepass') + b'\x00')
+    return digest.hexdigest()
+
+
+class _Field:
+    """Postings of one field: term dictionary plus CSR arrays (term -> sorted slots)"""
+
+    def __init__(self):
+        self.terms: Dict[str, int] = {}
+        self.names: List[str] = []
+        self._pending: List[Tuple[int, int]] = []
+        self.indptr = np.zeros(1, dtype=np.int64)
+        self.slots = np.zeros(0, dtype=np.int64)
+        self.term_of = np.zeros(0, dtype=np.int64)
+        self._substring_cache: Dict[str, np.ndarray] = {}
+
+    def add(self, slot: int, terms: Iterable[str], display: Optional[Dict[str, str]] = None):
+        for term in set(terms):
+            term_id = self.terms.get(term)
+            if term_id is None:
+                term_id = self.terms[term] = len(self.names)
+                self.names.append((display or {}).get(term, term))
+                self._substring_cache.clear()
+            self._pending.append((term_id, slot))
+
+    def freeze(self, alive: np.ndarray):
+        """Merge pending postings and drop dead slots; rebuilds the CSR arrays"""
+        if self._pending:
+            pending = np.asarray(self._pending, dtype=np.int64).reshape(-1, 2)
+            term_of = np.concatenate([self.term_of, pending[:, 0]])
+            slots = np.concatenate([self.slots, pending[:, 1]])
+            self._pending = []
+        else:
+            term_of, slots = self.term_of, self.slots
+        keep = alive[slots]
+        term_of, slots = term_of[keep], slots[keep]
+        order = np.lexsort((slots, term_of))
+        self.term_of, self.slots = term_of[order], slots[order]
+        counts = np.bincount(self.term_of, minlength=len(self.names))
+        self.indptr = np.concatenate(([0], np.cumsum(counts)))
+
+    def postings(self, term_id: int) -> np.ndarray:
+        return self.slots[self.indptr[term_id]:self.indptr[term_id + 1]]
+
+    def containing(self, query: str) -> np.ndarray:
+        """Ids of every term that contains ``query``"""
+        ids = self._substring_cache.get(query)
+        if ids is None:
+            ids = np.fromiter((i for term, i in self.terms.items() if query in term), dtype=np.int64)
+            self._substring_cache[query] = ids
+        return ids
+
+    def bitmap(self, term_ids: np.ndarray, size: int) -> np.ndarray:
+        mask = np.zeros(size, dtype=bool)
+        for term_id in term_ids.tolist():
+            mask[self.postings(term_id)] = True
+        return mask
+
+
+class SkillIndex:
+    """
+    Candidates are stored in slots; a resume that changes gets a new slot and
+    its old one is tombstoned (compacted once tombstones dominate). Queries
+    return resumes in the order of the last sync().
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._reset()
+
+    def _reset(self):
+        self._ids: List[str] = []
+        self._docs: List[Optional[Dict[str, Any]]] = []
+        self._experience: List[str] = []
+        self._slot_of: Dict[str, int] = {}
+        self._signature_of: Dict[str, str] = {}
+        self._positions: List[int] = []
+        self._alive = np.zeros(0, dtype=bool)
+        self._order = np.zeros(0, dtype=np.int64)
+        self._fields = {_SKILL: _Field(), _EXPERIENCE: _Field()}
+        self._dirty = False
+
+    def __len__(self) -> int:
+        return len(self._slot_of)
+
+    @staticmethod
+    def resume_id(resume: Dict[str, Any]) -> str:
+        rid = resume.get('id')
+        return str(rid) if rid not in (None, '') else 'sig:' + _signature(resume)
+
+    def _add(self, rid: str, resume: Dict[str, Any], signature: str, position: int):
+        slot = len(self._ids)
+        self._ids.append(rid)
+        self._positions.append(position)
+        self._docs.append(resume)
+        experience = str(resume.get('experience', '') or '').lower()
+        self._experience.append(experience)
+        self._slot_of[rid] = slot
+        self._signature_of[rid] = signature
+
+        skills = resume_skills(resume)
+        display: Dict[str, str] = {}
+        for skill in skills:
+            display.setdefault(normalise_skill(skill), skill)
+        self._fields[_SKILL].add(slot, display, display)
+        self._fields[_EXPERIENCE].add(slot, _WORD.findall(experience))
+        self._dirty = True
+
+    def _kill(self, rid: str):
+        slot = self._slot_of.pop(rid, None)
+        self._signature_of.pop(rid, None)
+        if slot is not None:
+            self._docs[slot] = None
+            self._dirty = True
+
+    def _freeze(self):
+        if not self._dirty:
+            return
+        size = len(self._ids)
+        alive = np.zeros(size, dtype=bool)
+        alive[list(self._slot_of.values())] = True
+        if size > 64 and alive.sum() * 2 < size:
+            # Compact: tombstones dominate, re-add the live resumes
+            live = [(rid, self._docs[slot], self._signature_of[rid], self._positions[slot])
+                    for rid, slot in self._slot_of.items()]
+            self._reset()
+            for item in live:
+                self._add(*item)
+            self._freeze()
+            return
+        for field in self._fields.values():
+            field.freeze(alive)
+        self._order = np.asarray(self._positions, dtype=np.int64)
+        self._alive = alive
+        self._dirty = False
+
+    def sync(self, resumes: Sequence[Dict[str, Any]]) -> Dict[str, int]:
+        """Make the index hold exactly ``resumes`` (in this order); unchanged resumes are kept as they are"""
+        with self._lock:
+            seen: Dict[str, int] = {}
+            added = updated = 0
+            for position, resume in enumerate(resumes):
+                rid = self.resume_id(resume)
+                signature = _signature(resume)
+                if rid in seen:
+                    continue  # Duplicate id in one list: the first one wins
+                seen[rid] = position
+                if rid in self._slot_of:
+                    slot = self._slot_of[rid]
+                    if self._signature_of[rid] == signature:
+                        self._docs[slot] = resume
+                        if self._positions[slot] != position:
+                            self._positions[slot] = position
+                            self._dirty = True
+                    else:
+                        self._kill(rid)
+                        self._add(rid, resume, signature, position)
+                        updated += 1
+                else:
+                    self._add(rid, resume, signature, position)
+                    added += 1
+            removed = [rid for rid in self._slot_of if rid not in seen]
+            for rid in removed:
+                self._kill(rid)
+            self._freeze()
+            return {'added': added, 'updated': updated, 'removed': len(removed), 'total': len(self)}
+
+    def upsert(self, resumes: Sequence[Dict[str, Any]]) -> int:
+        """Add or replace resumes without touching the others (new ones go last)"""
+        with self._lock:
+            changed = 0
+            for resume in resumes:
+                rid = self.resume_id(resume)
+                signature = _signature(resume)
+                if self._signature_of.get(rid) == signature:
+                    self._docs[self._slot_of[rid]] = resume
+                    continue
+                previous = self._slot_of.get(rid)
+                if previous is not None:
+                    position = self._positions[previous]
+                else:
+                    position = max(self._positions, default=-1) + 1
+                self._kill(rid)
+                self._add(rid, resume, signature, position)
+                changed += 1
+            self._freeze()
+            return changed
+
+    def delete(self, ids: Iterable[str]) -> int:
+        with self._lock:
+            removed = 0
+            for rid in ids:
+                if rid in self._slot_of:
+                    self._kill(rid)
+                    removed += 1
+            self._freeze()
+            return removed
+
+    def _skill_mask(self, skill: str) -> np.ndarray:
+        field = self._fields[_SKILL]
+        return field.bitmap(field.containing(normalise_skill(skill)), len(self._ids))
+
+    def match(self, all_skills: Sequence[str] = (), any_skills: Sequence[str] = (),
+              none_skills: Sequence[str] = (), experience: str = '') -> np.ndarray:
+        """Bitmap over slots of the live resumes matching every condition"""
+        with self._lock:
+            self._freeze()
+            mask = self._alive.copy()
+            for skill in all_skills:
+                mask &= self._skill_mask(skill)
+            if any_skills:
+                either = np.zeros(len(mask), dtype=bool)
+                for skill in any_skills:
+                    either |= self._skill_mask(skill)
+                mask &= either
+            for skill in none_skills:
+                mask &= ~self._skill_mask(skill)
+            experience = experience.lower().strip()
+            if experience and mask.any():
+                mask &= self._experience_mask(experience)
+            return mask
+
+    def _experience_mask(self, experience: str) -> np.ndarray:
+        # Keyword postings narrow the candidates, the substring check keeps the old semantics
+        field = self._fields[_EXPERIENCE]
+        mask = self._alive.copy()
+        for word in _WORD.findall(experience):
+            mask &= field.bitmap(field.containing(word), len(mask))
+        for slot in np.flatnonzero(mask).tolist():
+            if experience not in self._experience[slot]:
+                mask[slot] = False
+        return mask
+
+    def resumes(self, mask: np.ndarray, offset: int = 0, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Matched resume payloads, in sync order"""
+        with self._lock:
+            slots = np.flatnonzero(mask)
+            slots = slots[np.argsort(self._order[slots], kind='stable')]
+            end = None if limit is None else offset + limit
+            return [self._docs[slot] for slot in slots[offset:end].tolist()]
+
+    def facets(self, mask: Optional[np.ndarray] = None) -> Dict[str, int]:
+        """Skill -> number of (matched) resumes carrying it, most common first"""
+        with self._lock:
+            self._freeze()
+            field = self._fields[_SKILL]
+            terms = field.term_of if mask is None else field.term_of[mask[field.slots]]
+            counts = np.bincount(terms, minlength=len(field.names))
+            nonzero = np.flatnonzero(counts)
+            ranked = sorted(nonzero.tolist(), key=lambda t: (-counts[t], field.names[t].lower()))
+            return {field.names[t]: int(counts[t]) for t in ranked}
+
+    def skills(self) -> List[str]:
+        """Every skill carried by at least one live resume, sorted"""
+        return sorted(self.facets(), key=str.lower)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'resumes': len(self),
+                'slots': len(self._ids),
+                'skills': len(self._fields[_SKILL].names),
+                'experience_terms': len(self._fields[_EXPERIENCE].names),
+                'postings': int(sum(len(f.slots) for f in self._fields.values())),
+            }
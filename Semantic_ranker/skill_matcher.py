@@ -0,0 +1,86 @@
+"""
+Skill matcher (separate module)
+- Loads a skill taxonomy (canonical names + aliases) from JSON
+- Compiles every term into one trie-shaped regex, matched in a single pass
+- Terms only match on token boundaries, so 'r', 'go' and 'api' no longer
+  match inside other words
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import re
+from typing import Dict, List, Optional
+
+# Characters that continue a token: 'c' must not match inside 'c++' or 'c#'
+_TOKEN_CHARS = r'\w+#'
+
+
+def _trie_pattern(terms: List[str]) -> str:
+    """Build a regex alternation shaped like a prefix trie (longest match first)"""
+    trie: Dict = {}
+    for term in terms:
+        node = trie
+        for ch in term:
+            node = node.setdefault(ch, {})
+        node[''] = True
+
+    def build(node: Dict) -> str:
+        branches = []
+        for ch in sorted(k for k in node if k):
+            # Any run of whitespace matches the single space inside a term
+            piece = r'\s+' if ch == ' ' else re.escape(ch)
+            branches.append(piece + build(node[ch]))
+        if not branches:
+            return ''
+        body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+        if node.get(''):
+            # The term may also end here: longer continuations are tried first
+            body = '(?:' + body + ')?'
+        return body
+
+    return build(trie)
+
+
+class SkillMatcher:
+    """Single-pass matcher from free text to canonical skill names"""
+
+    def __init__(self, skills: List[Dict], version: str = ''):
+        self.names: List[str] = []
+        self.categories: Dict[str, str] = {}
+        self._canonical: Dict[str, str] = {}
+        for skill in skills:
+            name = skill['name']
+            if name in self.categories:
+                continue
+            self.names.append(name)
+            self.categories[name] = skill.get('category', '')
+            for term in [name] + list(skill.get('aliases', [])):
+                self._canonical.setdefault(self._normalise(term), name)
+        self._order = {name: i for i, name in enumerate(self.names)}
+        self.version = version
+        self.pattern = re.compile(
+            rf'(?<![{_TOKEN_CHARS}])' + _trie_pattern(list(self._canonical)) + rf'(?![{_TOKEN_CHARS}])'
+        )
+
+    @staticmethod
+    def _normalise(term: str) -> str:
+        return ' '.join(term.lower().split())
+
+    @classmethod
+    def from_file(cls, path: str) -> 'SkillMatcher':
+        with open(path, 'rb') as fh:
+            raw = fh.read()
+        data = json.loads(raw)
+        version = f"{data.get('version', 0)}:{hashlib.sha256(raw).hexdigest()[:12]}"
+        return cls(data['skills'], version=version)
+
+    def canonical(self, term: str) -> Optional[str]:
+        """Canonical skill name for a term or alias, if it is in the taxonomy"""
+        return self._canonical.get(self._normalise(term))
+
+    def find(self, text: str) -> List[str]:
+        """All taxonomy skills mentioned in ``text``, in taxonomy order"""
+        found = {self._canonical[self._normalise(m.group(0))] for m in self.pattern.finditer(text.lower())}
+        return sorted(found, key=self._order.__getitem__)
@@ -0,0 +1,114 @@
+import threading
+
+import numpy as np
+
+import ann_index
+from ann_index import IVFIndex
+
+DIM = 16
+
+
+def vectors(n, seed):
+    return np.random.default_rng(seed).standard_normal((n, DIM)).astype(np.float32)
+
+
+def meta(i):
+    return {'ats_score': i % 100, 'skills': ['python'] if i % 2 else ['java']}
+
+
+def test_writes_from_another_instance_are_seen(tmp_path):
+    first = IVFIndex(str(tmp_path), DIM, min_train=10 ** 6)
+    second = IVFIndex(str(tmp_path), DIM, min_train=10 ** 6)
+    x = vectors(20, 0)
+    first.upsert([f"a{i}" for i in range(20)], x, [meta(i) for i in range(20)])
+
+    hits = second.search(x[3], k=1)
+    assert hits[0]['id'] == 'a3'
+    assert len(second) == 20
+
+    second.delete(['a3'])
+    assert first.search(x[3], k=1)[0]['id'] != 'a3'
+    assert len(first) == 19
+
+
+def test_training_is_shared_and_not_repeated(tmp_path):
+    first = IVFIndex(str(tmp_path), DIM, min_train=64, nprobe=4)
+    second = IVFIndex(str(tmp_path), DIM, min_train=64, nprobe=4)
+    x = vectors(200, 1)
+    first.upsert([f"a{i}" for i in range(100)], x[:100], [meta(i) for i in range(100)])
+    first.wait_for_training()
+    assert first.centroids is not None
+    centroids = first.centroids.copy()
+
+    # The other instance catches up before it writes, so it does not retrain on its own
+    second.upsert([f"a{i}" for i in range(100, 200)], x[100:], [meta(i) for i in range(100, 200)])
+    np.testing.assert_array_equal(second.centroids, centroids)
+    second.train(only_if_needed=True)
+    np.testing.assert_array_equal(second.centroids, centroids)
+
+    second.train()
+    assert first.search(x[150], k=1)[0]['id'] == 'a150'
+    np.testing.assert_array_equal(first.centroids, second.centroids)
+    assert first.trained_on == 200
+
+
+def test_search_and_upsert_are_not_blocked_by_training(tmp_path, monkeypatch):
+    index = IVFIndex(str(tmp_path), DIM, min_train=64, nprobe=4)
+    x = vectors(120, 4)
+    index.upsert([f"a{i}" for i in range(100)], x[:100], [meta(i) for i in range(100)])
+    index.wait_for_training()
+    kmeans = ann_index.spherical_kmeans
+    served = []
+
+    def kmeans_while_serving(*args, **kwargs):
+        # Another thread searches and writes while k-means runs
+        def serve():
+            served.append(index.search(x[3], k=1)[0]['id'])
+            index.upsert([f"a{i}" for i in range(100, 120)], x[100:], [meta(i) for i in range(100, 120)])
+        thread = threading.Thread(target=serve)
+        thread.start()
+        thread.join(10)
+        assert not thread.is_alive()
+        return kmeans(*args, **kwargs)
+
+    monkeypatch.setattr(ann_index, 'spherical_kmeans', kmeans_while_serving)
+    index.train()
+    assert served == ['a3']
+    # What was written during k-means is assigned to the new lists too
+    assert index.trained_on == 120
+    assert index.search(x[110], k=1)[0]['id'] == 'a110'
+    assert all(index._assign[index._slot_of[f"a{i}"]] >= 0 for i in range(120))
+
+
+def test_workspace_filter_applies_before_top_k(tmp_path):
+    index = IVFIndex(str(tmp_path), DIM, min_train=64, nprobe=2)
+    x = vectors(400, 2)
+    metas = [dict(meta(i), workspace_id='small' if i % 50 == 0 else 'big') for i in range(400)]
+    index.upsert([f"a{i}" for i in range(400)], x, metas)
+    index.wait_for_training()
+    assert index.centroids is not None
+
+    hits = index.search(x[1], k=5, workspace_id='small')
+    assert len(hits) == 5
+    assert all(hit['metadata']['workspace_id'] == 'small' for hit in hits)
+    exact = index.search(x[1], k=5, workspace_id='small', exact=True)
+    assert [hit['id'] for hit in hits] == [hit['id'] for hit in exact]
+    assert index.search(x[1], k=5, workspace_id='unknown') == []
+
+
+def test_same_item_in_two_workspaces_is_found_by_both(tmp_path):
+    index = IVFIndex(str(tmp_path), DIM, min_train=64, nprobe=2)
+    x = vectors(200, 3)
+    index.upsert([f"a{i}" for i in range(200)], x, [dict(meta(i), workspace_id='a') for i in range(200)])
+    index.upsert(['a7'], x[7:8], [dict(meta(7), workspace_id='b')])
+
+    for workspace_id in ('a', 'b'):
+        hits = index.search(x[7], k=1, workspace_id=workspace_id)
+        assert hits[0]['id'] == 'a7'
+        assert hits[0]['metadata']['workspace_ids'] == ['a', 'b']
+    assert [hit['id'] for hit in index.search(x[8], k=5, workspace_id='b')] == ['a7']
+
+    # The membership is persisted, not just held by this instance
+    reopened = IVFIndex(str(tmp_path), DIM, min_train=64, nprobe=2)
+    assert reopened.search(x[7], k=1, workspace_id='a')[0]['id'] == 'a7'
+    assert len(reopened) == 200
@@ -0,0 +1,21 @@
+from chat_memory import ChatMemoryStore
+
+
+def test_cache_size_is_counted_in_utf8_bytes(tmp_path):
+    store = ChatMemoryStore(str(tmp_path / 'chat.sqlite3'), max_bytes=40)
+    store.append('ws', 'a', 'user', 'é' * 10)
+    assert store.cache_stats()['bytes'] == len('user') + 20
+    # 'ß' * 10 is 10 characters but 20 bytes: together they no longer fit
+    store.append('ws', 'b', 'user', 'ß' * 10)
+    stats = store.cache_stats()
+    assert (stats['entries'], stats['evictions']['lru']) == (1, 1)
+
+
+def test_stored_chats_are_counted_without_the_messages(tmp_path):
+    path = str(tmp_path / 'chat.sqlite3')
+    store = ChatMemoryStore(path)
+    for chat_id in ('a', 'a', 'b'):
+        store.append('ws', chat_id, 'user', 'hello')
+    assert (store.stats()['stored_chats'], store.stats()['stored_messages']) == (2, 3)
+    store.clear('ws', 'a')
+    assert ChatMemoryStore(path).stats()['stored_chats'] == 1
@@ -0,0 +1,37 @@
+import sqlite3
+
+from extraction_cache import ExtractionCache
+
+
+def test_versions_share_the_file_without_purging_each_other(tmp_path):
+    path = str(tmp_path / 'cache.sqlite3')
+    old = ExtractionCache(path, version='v1')
+    old.put('abc', {'text': 'old'})
+    new = ExtractionCache(path, version='v2')
+    assert new.get('abc') is None
+    new.put('abc', {'text': 'new'})
+    assert old.get('abc') == {'text': 'old'}
+    assert new.get('abc') == {'text': 'new'}
+    assert ExtractionCache(path, version='v1').get('abc') == {'text': 'old'}
+
+
+def test_lru_eviction_spans_versions(tmp_path):
+    path = str(tmp_path / 'cache.sqlite3')
+    old = ExtractionCache(path, version='v1')
+    old.put('a', {'text': 'x' * 100})
+    one_entry = old.stats()['bytes']
+    new = ExtractionCache(path, version='v2', max_bytes=one_entry)
+    new.put('a', {'text': 'x' * 100})
+    assert old.get('a') is None
+    assert new.get('a') == {'text': 'x' * 100}
+
+
+def test_cache_from_before_versioned_keys_is_replaced(tmp_path):
+    path = str(tmp_path / 'cache.sqlite3')
+    with sqlite3.connect(path) as conn:
+        conn.execute("CREATE TABLE extractions (digest TEXT PRIMARY KEY, version TEXT NOT NULL,"
+                     " payload BLOB NOT NULL, size INTEGER NOT NULL, last_access REAL NOT NULL)")
+    cache = ExtractionCache(path, version='v1')
+    cache.put('a', {'text': 'x'})
+    ExtractionCache(path, version='v2').put('a', {'text': 'y'})
+    assert cache.get('a') == {'text': 'x'}
@@ -0,0 +1,89 @@
+import pytest
+
+from job_queue import JobQueue
+
+
+@pytest.fixture
+def queue(tmp_path):
+    return JobQueue(str(tmp_path / 'jobs.sqlite3'), max_attempts=3, retry_backoff=0.0)
+
+
+def submit(queue, n=2):
+    files = [(f"resume{i}.pdf", f"file {i}".encode()) for i in range(n)]
+    return queue.submit(files, {'threshold': 70})[0]
+
+
+def test_identical_submit_is_deduplicated(queue):
+    job_id = submit(queue)
+    assert queue.submit([(f"resume{i}.pdf", f"file {i}".encode()) for i in range(2)], {'threshold': 70}) == (job_id, True)
+    assert queue.submit([("resume0.pdf", b"file 0")], {'threshold': 70})[1] is False
+
+
+def test_claimed_tasks_are_leased_to_one_worker(queue):
+    job_id = submit(queue)
+    tasks = queue.claim('a', limit=8)
+    assert [(t['job_id'], t['seq'], t['attempt']) for t in tasks] == [(job_id, 0, 1), (job_id, 1, 1)]
+    with open(tasks[0]['path'], 'rb') as fh:
+        assert fh.read() == b"file 0"
+    assert queue.claim('b') == []
+    assert queue.get(job_id)['status'] == 'running'
+
+
+def test_expired_lease_is_reclaimed_and_the_old_owner_loses_it(queue):
+    job_id = submit(queue, 1)
+    [task] = queue.claim('a', lease_seconds=-1)
+    [again] = queue.claim('b')
+    assert again['attempt'] == 2
+    assert queue.complete('a', task, {'id': 'late'}) is False
+    assert queue.complete('b', again, {'id': 'ok'}) is True
+    assert queue.get(job_id)['status'] == 'done'
+    assert [r['id'] for r in queue.results(job_id)] == ['ok']
+
+
+def test_heartbeat_keeps_the_lease(queue):
+    submit(queue, 1)
+    tasks = queue.claim('a', lease_seconds=-1)
+    queue.heartbeat('a', tasks, lease_seconds=300)
+    assert queue.claim('b') == []
+
+
+def test_failed_task_is_retried_until_max_attempts(queue):
+    job_id = submit(queue, 1)
+    for attempt in (1, 2):
+        [task] = queue.claim('a')
+        assert task['attempt'] == attempt
+        assert queue.fail('a', task, f"error {attempt}") is True
+        assert queue.get(job_id)['failed'] == 0
+    [task] = queue.claim('a')
+    assert queue.fail('a', task, 'error 3') is True
+    assert queue.claim('a') == []
+    job = queue.get(job_id)
+    assert (job['status'], job['failed'], job['completed']) == ('done', 1, 0)
+    assert queue.results(job_id)[0]['error'] == 'error 3'
+
+
+def test_retry_waits_for_the_backoff(tmp_path):
+    queue = JobQueue(str(tmp_path / 'jobs.sqlite3'), retry_backoff=60.0)
+    submit(queue, 1)
+    [task] = queue.claim('a')
+    queue.fail('a', task, 'boom')
+    assert queue.claim('a') == []
+
+
+def test_lease_lost_on_the_last_attempt_fails_the_task(queue):
+    job_id = submit(queue, 1)
+    for _ in range(3):
+        queue.claim('a', lease_seconds=-1)
+    assert queue.claim('b') == []
+    job = queue.get(job_id)
+    assert (job['status'], job['failed']) == ('done', 1)
+    assert queue.results(job_id)[0]['error'] == 'worker lost while processing'
+
+
+def test_cancel_stops_claims_and_settling(queue):
+    job_id = submit(queue)
+    [first, _] = queue.claim('a')
+    assert queue.cancel(job_id) is True
+    assert queue.complete('a', first, {'id': 'x'}) is False
+    assert queue.claim('a') == []
+    assert queue.get(job_id)['status'] == 'cancelled'
@@ -0,0 +1,80 @@
+import threading
+import time
+
+from llm_extractor import CircuitBreaker, LLMSkillExtractor
+
+
+def test_breaker_opens_after_consecutive_failures():
+    breaker = CircuitBreaker(failure_threshold=2, reset_seconds=60)
+    breaker.record_failure()
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == 'open'
+    assert not breaker.allow()
+
+
+def test_half_open_lets_one_probe_through():
+    breaker = CircuitBreaker(failure_threshold=1, reset_seconds=0.05)
+    breaker.record_failure()
+    time.sleep(0.06)
+    assert breaker.state == 'half_open'
+    assert breaker.allow()
+    assert not breaker.allow()
+    breaker.record_success()
+    assert breaker.state == 'closed'
+    assert breaker.allow() and breaker.allow()
+
+
+def test_failed_probe_reopens_and_a_lost_probe_is_replaced():
+    breaker = CircuitBreaker(failure_threshold=1, reset_seconds=0.05)
+    breaker.record_failure()
+    time.sleep(0.06)
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == 'open'
+    time.sleep(0.06)
+    assert breaker.allow()
+    # The probe never reports back: another one goes out after reset_seconds
+    time.sleep(0.06)
+    assert breaker.allow()
+
+
+class SlowClient:
+    """Stands in for the OpenAI client: counts calls, blocks until released"""
+
+    def __init__(self):
+        self.calls = 0
+        self.release = threading.Event()
+        self.chat = self
+        self.completions = self
+
+    def create(self, **kwargs):
+        self.calls += 1
+        self.release.wait(5)
+        message = type('Message', (), {'content': 'Python, SQL'})
+        choice = type('Choice', (), {'message': message})
+        return type('Completion', (), {'choices': [choice]})
+
+
+def test_concurrent_callers_send_one_probe():
+    client = SlowClient()
+    breaker = CircuitBreaker(failure_threshold=1, reset_seconds=0.05)
+    breaker.record_failure()
+    time.sleep(0.06)
+    extractor = LLMSkillExtractor(client, 'model', max_concurrency=8, batch_size=1, breaker=breaker)
+    results = []
+    threads = [threading.Thread(target=lambda i=i: results.append(extractor._run_batch([f"resume {i}"])))
+               for i in range(8)]
+    for thread in threads:
+        thread.start()
+    # Everyone but the probe fails fast while it is still in flight
+    deadline = time.time() + 5
+    while len(results) < 7 and time.time() < deadline:
+        time.sleep(0.01)
+    assert results == [[None]] * 7
+    client.release.set()
+    for thread in threads:
+        thread.join()
+    assert client.calls == 1
+    assert results[-1] == [['Python', 'Sql']]
+    assert breaker.state == 'closed'
@@ -0,0 +1,100 @@
+import glob
+import os
+
+import pytest
+
+from metrics import Metrics, metrics
+from resume_pipeline import ResumePipeline
+
+pytestmark = pytest.mark.skipif(not hasattr(os, 'fork'), reason='needs fork')
+
+
+def make_metrics(directory):
+    m = Metrics(directory=str(directory), flush_interval=0)
+    m.describe('hits_total', 'counter', 'cache hits')
+    m.describe('requests_total', 'counter', 'requests')
+    m.describe('load_seconds', 'gauge', 'load time')
+    return m
+
+
+def value(text, name):
+    lines = [line for line in text.splitlines() if line.startswith(name + ' ')]
+    return float(lines[0].split()[1]) if lines else None
+
+
+def in_child(fn):
+    pid = os.fork()
+    if pid == 0:
+        try:
+            fn()
+        finally:
+            os._exit(0)
+    os.waitpid(pid, 0)
+
+
+def test_forked_child_does_not_report_parent_collectors(tmp_path):
+    m = make_metrics(tmp_path)
+    m.collector(lambda: [('hits_total', {}, 10)])
+    m.flush(force=True)
+    in_child(lambda: m.flush(force=True))
+    assert value(m.render(), 'hits_total') == 10
+
+
+def test_claimed_collectors_report_from_the_worker(tmp_path):
+    m = make_metrics(tmp_path)
+    m.collector(lambda: [('hits_total', {}, 3)])
+
+    def worker():
+        m.claim_collectors()
+        m.flush(force=True)
+        with open(tmp_path / 'rendered', 'w') as fh:
+            fh.write(m.render())
+    in_child(worker)
+    assert value((tmp_path / 'rendered').read_text(), 'hits_total') == 3
+
+
+def test_counts_of_exited_processes_are_folded_once(tmp_path):
+    m = make_metrics(tmp_path)
+    m.inc('requests_total', 1)
+    for _ in range(3):
+        def child():
+            m.inc('requests_total', 2)
+            m.set('load_seconds', 9)
+            m.flush(force=True)
+        in_child(child)
+    rendered = m.render()
+    assert value(rendered, 'requests_total') == 7
+    # Gauges of dead processes are dropped; counters stay
+    assert value(rendered, 'load_seconds') is None
+    files = sorted(os.path.basename(path) for path in glob.glob(str(tmp_path / '*.json')))
+    assert files == ['dead.json'] or files == sorted(['dead.json', os.path.basename(m._own_path())])
+    assert value(m.render(), 'requests_total') == 7
+
+
+def test_recycled_pid_does_not_overwrite_a_dead_file(tmp_path):
+    m = make_metrics(tmp_path)
+    m.inc('requests_total', 4)
+    m.flush(force=True)
+    first = m._own_path()
+    m._reset()  # what a new process with the same pid would start with
+    m.inc('requests_total', 1)
+    m.flush(force=True)
+    assert first != m._own_path() and os.path.exists(first)
+
+
+def count_batch(jobs):
+    metrics.inc('ats_errors_total', len(jobs), where='parse-worker-test')
+    metrics.observe('ats_stage_seconds', 0.01, stage='parse-worker-test')
+    return [{'job': job} for job in jobs]
+
+
+def test_parse_worker_figures_reach_the_parent_without_a_directory(monkeypatch):
+    monkeypatch.setattr(metrics, 'directory', '')
+    pipeline = ResumePipeline(count_batch, lambda records: records, parse_workers=1, parse_batch_size=2)
+    try:
+        assert len(list(pipeline.run(list(range(5)), lambda job, record: record))) == 5
+    finally:
+        pipeline.shutdown()
+    rendered = metrics.render()
+    assert value(rendered, 'ats_errors_total{where="parse-worker-test"}') == 5
+    assert value(rendered, 'ats_stage_seconds_count{stage="parse-worker-test"}') == 3
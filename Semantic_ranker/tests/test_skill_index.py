@@ -0,0 +1,100 @@
+import pytest
+
+from result_store import ResultStore
+from skill_index import SkillIndex
+
+
+def resume(rid, skills, experience=''):
+    return {'id': rid, 'skills': skills, 'experience': experience}
+
+
+def ids(index, mask):
+    return [r['id'] for r in index.resumes(mask)]
+
+
+def test_sync_holds_exactly_the_list_in_its_order():
+    index = SkillIndex()
+    index.sync([resume('a', ['Python']), resume('b', ['Java']), resume('c', ['Python', 'SQL'])])
+    assert ids(index, index.match(all_skills=['python'])) == ['a', 'c']
+
+    stats = index.sync([resume('c', ['Python', 'SQL']), resume('a', ['Python', 'Go'])])
+    assert stats == {'added': 0, 'updated': 1, 'removed': 1, 'total': 2}
+    assert ids(index, index.match()) == ['c', 'a']
+    assert index.facets() == {'Python': 2, 'Go': 1, 'SQL': 1}
+
+
+def test_upsert_adds_and_replaces_without_dropping_others():
+    index = SkillIndex()
+    index.sync([resume('a', ['Python']), resume('b', ['Java'])])
+    assert index.upsert([resume('b', ['Rust']), resume('c', ['Java'])]) == 2
+    assert len(index) == 3
+    assert ids(index, index.match()) == ['a', 'b', 'c']
+    assert ids(index, index.match(any_skills=['java'])) == ['c']
+    assert index.upsert([resume('a', ['Python'])]) == 0
+    assert index.delete(['a', 'missing']) == 1
+    assert ids(index, index.match(none_skills=['rust'])) == ['c']
+
+
+def test_java_matches_javascript_and_experience_is_a_substring():
+    index = SkillIndex()
+    index.sync([resume('a', 'JavaScript, React', '5 years backend'), resume('b', ['Java'], '2 years frontend')])
+    assert ids(index, index.match(all_skills=['java'])) == ['a', 'b']
+    assert ids(index, index.match(experience='years back')) == ['a']
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    import ats_flask_api
+    monkeypatch.setattr(ats_flask_api, 'result_store', ResultStore(str(tmp_path / 'results.sqlite3')))
+    ats_flask_api.skill_indexes.clear()
+    yield ats_flask_api
+    ats_flask_api.skill_indexes.clear()
+
+
+def test_subset_request_leaves_the_workspace_index_whole(app):
+    app.result_store.put_resumes('ws', [resume('a', ['Python']), resume('b', ['Java']), resume('c', ['Go'])])
+    whole, _ = app.skill_index_for_request({'workspace_id': 'ws'})
+    assert len(whole) == 3
+
+    subset, workspace_id = app.skill_index_for_request({'workspace_id': 'ws', 'resume_ids': ['b']})
+    assert workspace_id == 'ws'
+    assert subset is not whole
+    assert ids(subset, subset.match()) == ['b']
+
+    again, _ = app.skill_index_for_request({'workspace_id': 'ws'})
+    assert ids(again, again.match()) == ['a', 'b', 'c']
+
+
+def test_client_resumes_do_not_replace_the_stored_workspace_index(app):
+    app.result_store.put_resumes('ws', [resume('a', ['Python']), resume('b', ['Java'])])
+    stored, _ = app.skill_index_for_request({'workspace_id': 'ws'})
+    sent, _ = app.skill_index_for_request({'workspace_id': 'ws', 'resumes': [resume('x', ['Go'])]})
+    assert ids(sent, sent.match()) == ['x']
+    assert ids(stored, stored.match()) == ['a', 'b']
+
+
+def test_store_results_adds_to_the_cached_workspace_index(app):
+    app.result_store.put_resumes('ws', [resume('a', ['Python'])])
+    index, _ = app.skill_index_for_request({'workspace_id': 'ws'})
+    app.store_results('ws', [dict(resume('b', ['Java']), text='full text')])
+    again, _ = app.skill_index_for_request({'workspace_id': 'ws'})
+    assert again is index
+    assert ids(again, again.match()) == ['a', 'b']
+    assert 'text' not in again.resumes(again.match())[1]
+
+
+def test_write_from_another_process_rebuilds_the_cached_index(app, tmp_path):
+    app.result_store.put_resumes('ws', [resume('a', ['Python']), resume('b', ['Java'])])
+    index, _ = app.skill_index_for_request({'workspace_id': 'ws'})
+    other = ResultStore(str(tmp_path / 'results.sqlite3'))
+    other.put_resumes('ws', [resume('c', ['Go'])])
+    other.delete_resumes('ws', ['a'])
+    again, _ = app.skill_index_for_request({'workspace_id': 'ws'})
+    assert ids(again, again.match()) == ['b', 'c']
+
+    app.store_results('ws', [resume('d', ['Rust'])])
+    other.put_resumes('ws', [resume('e', ['C'])])
+    app.store_results('ws', [resume('f', ['Go'])])
+    assert 'ws' not in app.skill_indexes
+    final, _ = app.skill_index_for_request({'workspace_id': 'ws'})
+    assert ids(final, final.match()) == ['b', 'c', 'd', 'e', 'f']
@@ -0,0 +1,30 @@
+"""
+Production WSGI entry point (separate module)
+- Imported once by the gunicorn master (preload_app): models are loaded and
+  warmed up there, then shared copy-on-write by every forked worker
+- gc.freeze() moves the loaded objects out of the collector's reach so its
+  passes do not write to (and un-share) their pages in the workers
+- Per-worker setup (clients, thread counts, warm-up, readiness) lives in
+  gunicorn.conf.py
+
+Usage:
+    gunicorn -c gunicorn.conf.py wsgi:app
+"""
+
+import gc
+
+import ats_flask_api
+
+if not ats_flask_api.initialize_models(connect=False):
+    print("❌ Failed to initialize models. Some features may not work.")
+else:
+    ats_flask_api.warm_up()
+# Readiness is reported per worker, after its own warm-up
+ats_flask_api.service_state['ready'] = False
+# Model load times were recorded here, in the master; workers start with empty metrics
+ats_flask_api.metrics.flush(force=True)
+
+gc.collect()
+gc.freeze()
+
+app = ats_flask_api.app
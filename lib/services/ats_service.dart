@@ -46,7 +46,49 @@ class AtsService {
     final uri = _uri('/process-resumes');
     final request = http.MultipartRequest('POST', uri);
     request.fields['threshold'] = threshold.toString();
+    await _addResumeFiles(request, files);
 
+    final streamed = await request.send();
+    final response = await http.Response.fromStream(streamed);
+    return _decodeJson(response);
+  }
+
+  // Background screening: submit a batch, then poll jobStatus / page jobResults
+  Future<Map<String, dynamic>> submitJob({
+    required List<PlatformFile> files,
+    int threshold = 60,
+    String? workspaceId,
+  }) async {
+    final request = http.MultipartRequest('POST', _uri('/jobs'));
+    request.fields['threshold'] = threshold.toString();
+    if (workspaceId != null) request.fields['workspace_id'] = workspaceId;
+    await _addResumeFiles(request, files);
+
+    final streamed = await request.send();
+    final response = await http.Response.fromStream(streamed);
+    return _decodeJson(response);
+  }
+
+  Future<Map<String, dynamic>> jobStatus(String jobId) async {
+    final response = await http.get(_uri('/jobs/$jobId'));
+    return _decodeJson(response);
+  }
+
+  Future<Map<String, dynamic>> jobResults(
+    String jobId, {
+    int offset = 0,
+    int limit = 50,
+  }) async {
+    final response = await http.get(
+      _uri('/jobs/$jobId/results?offset=$offset&limit=$limit'),
+    );
+    return _decodeJson(response);
+  }
+
+  Future<void> _addResumeFiles(
+    http.MultipartRequest request,
+    List<PlatformFile> files,
+  ) async {
     for (final file in files) {
       if (file.bytes != null) {
         request.files.add(
@@ -68,25 +110,25 @@ class AtsService {
         );
       }
     }
-
-    final streamed = await request.send();
-    final response = await http.Response.fromStream(streamed);
-    return _decodeJson(response);
   }
 
+  /// With [resultSet] (the handle /process-resumes returned for a
+  /// workspace) the server ranks its stored resumes and [resumes] are not
+  /// uploaded again.
   Future<Map<String, dynamic>> semanticRanking({
     required String jobDescription,
     required List<ProcessedResume> resumes,
+    String? resultSet,
   }) async {
-    // Convert ProcessedResume objects to Map for API call
-    final resumeMaps = resumes.map((resume) => resume.toJson()).toList();
-
     final response = await http.post(
       _uri('/semantic-ranking'),
       headers: {'Content-Type': 'application/json'},
       body: jsonEncode({
         'job_description': jobDescription,
-        'resumes': resumeMaps,
+        if (resultSet != null)
+          'result_set': resultSet
+        else
+          'resumes': resumes.map((resume) => resume.toJson()).toList(),
       }),
     );
     return _decodeJson(response);
@@ -96,17 +138,21 @@ class AtsService {
     required List<RankedResume> resumes,
     List<String> skillFilters = const [],
     String experienceFilter = '',
+    String? workspaceId,
+    String? resultSet,
   }) async {
-    // Convert RankedResume objects to Map for API call
-    final resumeMaps = resumes.map((resume) => resume.toJson()).toList();
-
     final response = await http.post(
       _uri('/filter-resumes'),
       headers: {'Content-Type': 'application/json'},
       body: jsonEncode({
-        'resumes': resumeMaps,
+        // A ranking handle from semanticRanking replaces the resume bodies
+        if (resultSet != null)
+          'result_set': resultSet
+        else
+          'resumes': resumes.map((resume) => resume.toJson()).toList(),
         'skill_filters': skillFilters,
         'experience_filter': experienceFilter,
+        if (workspaceId != null) 'workspace_id': workspaceId,
       }),
     );
     return _decodeJson(response);
@@ -182,6 +228,57 @@ class AtsService {
     return _decodeJson(response);
   }
 
+  /// Server-Sent Events from /rag/query/stream, one map per event:
+  /// {'event': 'snippets' | 'token' | 'done' | 'error', 'data': {...}}.
+  /// Snippets arrive first; answer tokens follow as the model produces them.
+  Stream<Map<String, dynamic>> ragQueryStream({
+    required String workspaceId,
+    required String message,
+    String? resumeId,
+    String? chatId,
+    int k = 5,
+  }) async* {
+    final request = http.Request('POST', _uri('/rag/query/stream'))
+      ..headers['Content-Type'] = 'application/json'
+      ..headers['Accept'] = 'text/event-stream'
+      ..body = jsonEncode({
+        'workspace_id': workspaceId,
+        'message': message,
+        if (resumeId != null) 'resume_id': resumeId,
+        if (chatId != null) 'chat_id': chatId,
+        'k': k,
+      });
+    final client = http.Client();
+    try {
+      final response = await client.send(request);
+      if (response.statusCode != 200) {
+        throw AtsException(
+          statusCode: response.statusCode,
+          message: await response.stream.bytesToString(),
+        );
+      }
+      String event = 'message';
+      final dataLines = <String>[];
+      await for (final line in response.stream
+          .transform(utf8.decoder)
+          .transform(const LineSplitter())) {
+        if (line.isEmpty) {
+          if (dataLines.isNotEmpty) {
+            yield {'event': event, 'data': jsonDecode(dataLines.join('\n'))};
+          }
+          event = 'message';
+          dataLines.clear();
+        } else if (line.startsWith('event:')) {
+          event = line.substring(6).trim();
+        } else if (line.startsWith('data:')) {
+          dataLines.add(line.substring(5).trim());
+        }
+      }
+    } finally {
+      client.close();
+    }
+  }
+
   Future<Map<String, dynamic>> analyzeResume({
     required String candidateName,
     required String email,
@@ -210,22 +307,21 @@ class AtsService {
 
   Future<Map<String, dynamic>> getAvailableSkills({
     required List<RankedResume> resumes,
+    String? workspaceId,
   }) async {
-    // Mock implementation for now
+    final response = await http.post(
+      _uri('/available-skills'),
+      headers: {'Content-Type': 'application/json'},
+      body: jsonEncode({
+        'resumes': resumes.map((resume) => resume.toJson()).toList(),
+        if (workspaceId != null) 'workspace_id': workspaceId,
+      }),
+    );
+    final result = _decodeJson(response);
     return {
-      'success': true,
-      'availableSkills': [
-        'JavaScript',
-        'Python',
-        'React',
-        'Node.js',
-        'Flutter',
-        'Dart',
-        'Java',
-        'C++',
-        'SQL',
-        'MongoDB',
-      ],
+      'success': result['success'] ?? false,
+      'availableSkills': List<String>.from(result['available_skills'] ?? []),
+      'skillCounts': Map<String, int>.from(result['skill_counts'] ?? {}),
     };
   }
 